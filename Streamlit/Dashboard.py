@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 
+from linaw.resources import (load_chain_status, load_event_store, load_kpis, load_outbox, load_query_cache,
+                             load_workspace)
+from linaw.sidebar import tenant_sidebar
+
 st.markdown(
     """
     <style>
@@ -39,6 +43,22 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+tenant_sidebar()
+query_cache = load_query_cache()
+kpis = load_kpis().snapshot
+chain_status = load_chain_status().snapshot
+outbox = load_outbox().stats()
+
+
+workspace = load_workspace()
+
+
+@query_cache.memoize("chain")
+def recent_chain_activity(limit: int):
+    # Status checks each event's anchored hash against the tenant's own records.
+    return load_event_store().recent(limit=limit, expected=workspace.expected_hash)
+
+
 # Header
 st.markdown('<p class="main-header">🔗 LINAW Blockchain AIS</p>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">Ledger for Integrity, Neutrality, and Accountability on the Web</p>', unsafe_allow_html=True)
@@ -68,27 +88,43 @@ with col2:
     st.info(f"""
     **Current Date**: {datetime.now().strftime('%B %d, %Y')}
     
-    **System Status**: 🟢 Active
+    **System Status**: {chain_status.label}
     
-    **Blockchain Network**: LINAW Chain
+    **Blockchain Network**: LINAW Chain (block {chain_status.height_label})
     
-    **Last Sync**: {datetime.now().strftime('%H:%M:%S')}
+    **Chain Writes Queued**: {outbox.depth:,} ({outbox.in_flight:,} awaiting receipts, {outbox.dead:,} dead-lettered)
+    
+    **Confirmation Lag**: {outbox.lag_label}
+    
+    **Last Sync**: {kpis.updated_at.strftime('%H:%M:%S')}
     """)
 
 st.markdown("---")
 
 # Quick Stats
 st.subheader("💰 Financial Summary (Current Month)")
+if kpis.month is not None:
+    st.caption(f"{pd.Timestamp(kpis.month).strftime('%B %Y')}, compared with the previous month")
 col1, col2, col3, col4 = st.columns(4)
 
+
+def peso(centavos: int) -> str:
+    return f"₱{centavos / 100:,.0f}"
+
+
+def percent(change: float | None) -> str | None:
+    return None if change is None else f"{change:+.1%}"
+
+
 with col1:
-    st.metric(label="Total Assets", value="₱2,450,000", delta="5.2%")
+    st.metric(label="Total Assets", value=peso(kpis.total_assets), delta=percent(kpis.assets_change))
 with col2:
-    st.metric(label="Total Income", value="₱850,000", delta="12.3%")
+    st.metric(label="Total Income", value=peso(kpis.income), delta=percent(kpis.income_change))
 with col3:
-    st.metric(label="Total Expenses", value="₱620,000", delta="-3.1%")
+    st.metric(label="Total Expenses", value=peso(kpis.expenses), delta=percent(kpis.expenses_change),
+              delta_color="inverse")
 with col4:
-    st.metric(label="Net Position", value="₱230,000", delta="18.5%")
+    st.metric(label="Net Position", value=peso(kpis.net_position), delta=percent(kpis.net_change))
 
 st.markdown("---")
 
@@ -136,25 +172,11 @@ st.markdown("---")
 
 # Recent Activity
 st.header("🕒 Recent Blockchain Activity")
-recent_activity = pd.DataFrame({
-    'Timestamp': [
-        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        '2025-11-02 10:30:15',
-        '2025-11-02 09:15:42',
-        '2025-11-02 08:45:20'
-    ],
-    'Transaction Type': ['Financial Report', 'Expense Entry', 'Income Entry', 'Ordinance'],
-    'Document ID': ['FR-2025-034', 'EXP-2025-892', 'INC-2025-445', 'ORD-2025-012'],
-    'Status': ['✅ Verified', '✅ Verified', '✅ Verified', '✅ Verified'],
-    'Block Hash': [
-        '0x7a3f8b2e...',
-        '0x9c4d1f7a...',
-        '0x2e8b5c3a...',
-        '0x6f1a9d4b...'
-    ]
-})
-
-st.dataframe(recent_activity, use_container_width=True, hide_index=True)
+recent_activity = recent_chain_activity(5)
+if recent_activity.empty:
+    st.info("No blockchain activity has been ingested yet. Set `FABCONNECT_URL` to stream chain events into the local store.")
+else:
+    st.dataframe(recent_activity, use_container_width=True, hide_index=True)
 
 st.markdown("---")
 st.caption("© 2025 Blockchain Initiative LINAW - Barangay/LGU Transparency Project")
\ No newline at end of file
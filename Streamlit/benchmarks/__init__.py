@@ -0,0 +1 @@
+"""Headless latency and memory benchmarks for the LINAW Streamlit pages."""
@@ -0,0 +1,523 @@
+"""Rerun-latency benchmarks for the dashboard and every page.
+
+Each dataset scale runs in a fresh worker process with
+``LINAW_SYNTHETIC_LINES`` and ``LINAW_SYNTHETIC_DOCUMENTS`` set, so the
+pages load a synthetic ledger and registry of that size and the memory high-water mark belongs to that scale alone.
+The worker drives every page through Streamlit's ``AppTest`` harness
+(the same script runner the server uses, without a browser): a cold
+first run that builds the shared resources, then several browser
+sessions that each open the page and rerun it.
+
+Each page is then opened in its own fresh process, as a server restart
+would, for the first-paint profile: the fastest first complete render
+over a few such processes, and the modules that render imported, from
+``python -X importtime``, totalled by top-level package.
+
+The same pages are then opened the way a browser opens them: a simulated
+client starts a real ``streamlit run`` server, connects to its websocket,
+asks for the page and times the session until the server reports the
+script finished, then opens a second session on the warm server.
+
+Last, a fresh process imports a synthetic CSV export through the tenant's
+workspace, with every resource that follows the ledger (Parquet store,
+Merkle trees, indexes, rollups, budget book, anomaly checks) attached as
+the pages attach them, and reports the import rate in lines per second.
+
+Every scale records the machine it ran on; ``--check`` only compares
+timings against a baseline recorded on the same machine. A scale that
+fails the check is measured again, and only a regression both runs show
+fails it.
+
+Run from the ``Streamlit`` directory::
+
+    python -m benchmarks.run --scales 1000 100000 1000000
+    python -m benchmarks.run --save-baseline    # record benchmarks/baseline.json
+    python -m benchmarks.run --check            # exit 1 on a regression
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+PAGES = (
+    "Dashboard.py",
+    "pages/1_Accounting.py",
+    "pages/2_Income_&_Expenses.py",
+    "pages/3_Blockchain_Public_View.py",
+)
+DEFAULT_SCALES = (1_000, 100_000)
+# Synthetic public documents per scale: one for every this many journal lines.
+DOCUMENT_RATIO = 100
+
+# Reruns per session. With three sessions, thirty each puts p95 at the
+# fifth-slowest rerun rather than between the two slowest, which a single
+# collector pause or scheduler hiccup was enough to double.
+RERUNS = 30
+# A page regresses when its p95 exceeds the baseline by this fraction plus
+# a fixed allowance for timer noise on very fast reruns.
+LATENCY_TOLERANCE = 0.5
+LATENCY_ALLOWANCE_MS = 5.0
+MEMORY_TOLERANCE = 0.25
+# Fresh processes per page for the first paint, and how far the fastest
+# may exceed the baseline's: on a shared machine the fastest of five cold
+# starts still moves by up to 40% between idle runs.
+FIRST_PAINT_RUNS = 5
+FIRST_PAINT_TOLERANCE = 0.5
+# Seconds to wait for a benchmark server to answer its health check.
+SERVER_START_TIMEOUT = 60.0
+# Packages listed per page in the first-paint import profile.
+IMPORT_PROFILE_TOP = 5
+# Written to stderr between the harness's imports and the page's.
+FIRST_PAINT_MARKER = "linaw-benchmark: first paint"
+# Lines in the CSV export imported at every scale, and the workspace
+# resources that follow the ledger while it is imported.
+IMPORT_LINES = 200_000
+IMPORT_RESOURCES = ("balance_index", "entry_index", "kpis", "rollups", "budget_book",
+                    "journal_merkle", "anomalies", "query_cache")
+IMPORT_TOLERANCE = 0.25
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2)}
+
+
+def run_worker(sessions: int, reruns: int, timeout: float) -> dict:
+    """Benchmark every page in this process; returns the per-page results."""
+    from streamlit.testing.v1 import AppTest
+
+    results: dict = {"pages": {}}
+    for page in PAGES:
+        path = str(APP_DIR / page)
+        runs = 0
+        cold = None
+        opens, reruns_ms = [], []
+        errors = []
+        for session in range(sessions):
+            app = AppTest.from_file(path, default_timeout=timeout)
+            for i in range(reruns + 1):
+                start = time.perf_counter()
+                app.run()
+                elapsed = (time.perf_counter() - start) * 1000
+                runs += 1
+                if app.exception:
+                    errors.append(app.exception[0].message)
+                if cold is None:
+                    cold = elapsed
+                elif i == 0:
+                    opens.append(elapsed)
+                else:
+                    reruns_ms.append(elapsed)
+        results["pages"][page] = {
+            "cold_ms": round(cold, 2),
+            "open_ms": round(float(np.mean(opens)), 2) if opens else None,
+            **_percentiles(reruns_ms or [cold]),
+            "runs": runs,
+            "errors": sorted(set(errors)),
+        }
+    # ru_maxrss is in kilobytes on Linux.
+    results["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return results
+
+
+def run_first_paint(page: str, timeout: float) -> dict:
+    """Render ``page`` once in this (fresh) process; the first-paint worker."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP_DIR / page), default_timeout=timeout)
+    print(FIRST_PAINT_MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    app.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    return {"first_paint_ms": round(elapsed, 2),
+            "errors": sorted({exception.message for exception in app.exception})}
+
+
+def machine() -> dict:
+    """The hardware and interpreter the timings were taken on."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            cpu = next(line.split(":", 1)[1].strip() for line in cpuinfo if line.startswith("model name"))
+    except (OSError, StopIteration):
+        pass
+    return {"cpu": cpu, "cpus": os.cpu_count(), "python": platform.python_version(),
+            "platform": platform.platform(terse=True)}
+
+
+def page_name(page: str) -> str:
+    """The URL path Streamlit serves ``page`` under; the main script is ``""``."""
+    if "/" not in page:
+        return ""
+    return Path(page).stem.split("_", 1)[-1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _open_session(http, url: str, page: str, timeout: float) -> tuple[float, list[str]]:
+    """Open one browser session on ``page``; returns (ms until the script finished, errors)."""
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    errors = []
+    start = time.perf_counter()
+    async with http.ws_connect(url, protocols=("streamlit",)) as ws:
+        message = BackMsg()
+        message.rerun_script.page_name = page_name(page)
+        await ws.send_bytes(message.SerializeToString())
+        while True:
+            received = await ws.receive(timeout)
+            if received.type != 2:  # aiohttp.WSMsgType.BINARY
+                errors.append(f"websocket closed before the script finished ({received.type})")
+                break
+            forward = ForwardMsg()
+            forward.ParseFromString(received.data)
+            kind = forward.WhichOneof("type")
+            if kind == "page_not_found":
+                errors.append(f"page not found: {page_name(page)}")
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                if element.WhichOneof("type") == "exception":
+                    errors.append(element.exception.message)
+            elif kind == "script_finished":
+                if forward.script_finished not in (ForwardMsg.FINISHED_SUCCESSFULLY,
+                                                   ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY):
+                    errors.append(f"script finished with status {forward.script_finished}")
+                break
+    return (time.perf_counter() - start) * 1000, errors
+
+
+async def _wire_run(page: str, env: dict, timeout: float) -> dict:
+    """Start a fresh server, then open ``page`` in a first and a second browser session."""
+    import aiohttp
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", PAGES[0], "--server.headless=true",
+         f"--server.port={port}", "--server.address=127.0.0.1", "--browser.gatherUsageStats=false"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        async with aiohttp.ClientSession() as http:
+            deadline = time.monotonic() + SERVER_START_TIMEOUT
+            while True:
+                try:
+                    async with http.get(f"http://127.0.0.1:{port}/_stcore/health") as resp:
+                        if resp.status == 200:
+                            break
+                except aiohttp.ClientError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"the benchmark server for {page} did not start")
+                await asyncio.sleep(0.05)
+            url = f"ws://127.0.0.1:{port}/_stcore/stream"
+            first, errors = await _open_session(http, url, page, timeout)
+            second, more = await _open_session(http, url, page, timeout)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"first_paint_ms": round(first, 2), "open_ms": round(second, 2), "errors": sorted(set(errors + more))}
+
+
+def run_wire(page: str, env: dict, timeout: float) -> dict:
+    """Fastest websocket first paint of ``page`` over ``FIRST_PAINT_RUNS`` fresh servers."""
+    runs = sorted((asyncio.run(_wire_run(page, env, timeout)) for _ in range(FIRST_PAINT_RUNS)),
+                  key=lambda run: run["first_paint_ms"])
+    return {**runs[0], "errors": sorted({error for run in runs for error in run["errors"]})}
+
+
+def run_import(lines: int) -> dict:
+    """Import a ``lines``-line CSV export into the default tenant's workspace; the import worker."""
+    import pandas as pd
+
+    from linaw.synthetic import synthetic_ledger
+    from linaw.tenants import Workspace, default_tenant
+
+    source = synthetic_ledger(lines, seed=1)
+    codes = np.array([account.code for account in source.accounts], dtype=object)
+    refs = np.array(source.je_refs, dtype=object)
+    descriptions = np.array(source.je_descriptions, dtype=object)
+    workspace = Workspace(default_tenant())
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "export.csv"
+        pd.DataFrame({
+            "Reference": "IMP-" + refs[source.je],
+            "Date": source.date.astype(str),
+            "Description": descriptions[source.je],
+            "Account": codes[source.account],
+            "Debit": source.debit / 100,
+            "Credit": source.credit / 100,
+            "Fund": np.array(source.funds, dtype=object)[source.fund],
+        }).to_csv(path, index=False)
+        for name in IMPORT_RESOURCES:
+            getattr(workspace, name)
+        result = workspace.importer.run(path)
+    workspace.close()
+    return {"lines": result.lines, "accepted": result.accepted, "rejected": result.rejected,
+            "seconds": round(result.elapsed, 3), "lines_per_second": round(result.lines_per_second)}
+
+
+def import_profile(stderr: str) -> dict:
+    """Import time (ms) per top-level package, for modules imported after the marker."""
+    packages: dict[str, float] = {}
+    lines = stderr.splitlines()
+    if FIRST_PAINT_MARKER in lines:
+        lines = lines[lines.index(FIRST_PAINT_MARKER) + 1:]
+    for line in lines:
+        # "import time: <self us> | <cumulative us> | <indented module>"
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not self_us.isdigit():  # the column header
+            continue
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:IMPORT_PROFILE_TOP]
+    return {"import_ms": round(sum(packages.values()), 2),
+            "imports": {package: round(ms, 2) for package, ms in top}}
+
+
+def run_scale(lines: int, sessions: int, reruns: int, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "LINAW_SYNTHETIC_LINES": str(lines),
+            "LINAW_SYNTHETIC_DOCUMENTS": str(max(1, lines // DOCUMENT_RATIO)),
+            "LINAW_DATA_DIR": data_dir,
+            "STREAMLIT_LOGGER_LEVEL": "error",
+        }
+        env.pop("FABCONNECT_URL", None)
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--worker",
+             "--sessions", str(sessions), "--reruns", str(reruns), "--timeout", str(timeout)],
+            cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        # The worker has written the Parquet stores, so these open the
+        # pages the way a restarted server would.
+        result["first_paint"] = {}
+        for page in PAGES:
+            paints = []
+            for _ in range(FIRST_PAINT_RUNS):
+                completed = subprocess.run(
+                    [sys.executable, "-X", "importtime", "-m", "benchmarks.run", "--first-paint", page,
+                     "--timeout", str(timeout)],
+                    cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+                paints.append({**json.loads(completed.stdout.strip().splitlines()[-1]),
+                               **import_profile(completed.stderr)})
+            paints.sort(key=lambda paint: paint["first_paint_ms"])
+            result["first_paint"][page] = {
+                **paints[0],
+                "errors": sorted({error for paint in paints for error in paint["errors"]}),
+            }
+        result["wire"] = {page: run_wire(page, env, timeout) for page in PAGES}
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--import-worker", str(IMPORT_LINES)],
+            cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+        result["import"] = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["machine"] = machine()
+    return result
+
+
+def print_report(report: dict) -> None:
+    header = f"{'lines':>10}  {'page':<36}{'cold':>9}{'open':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'runs':>6}"
+    print(header)
+    print("-" * len(header))
+    for scale, result in report.items():
+        for page, stats in result["pages"].items():
+            open_ms = "-" if stats["open_ms"] is None else f"{stats['open_ms']:.1f}"
+            print(f"{int(scale):>10,}  {page:<36}{stats['cold_ms']:>9.1f}{open_ms:>9}"
+                  f"{stats['p50']:>9.1f}{stats['p95']:>9.1f}{stats['p99']:>9.1f}{stats['runs']:>6}")
+            for error in stats["errors"]:
+                print(f"{'':>12}error: {error}")
+        print(f"{int(scale):>10,}  {'max RSS':<36}{result['max_rss_mb']:>9.1f} MB")
+    print("latencies in ms; cold = first run in a fresh process, open = new session, "
+          "p50/p95/p99 = reruns")
+    print()
+    header = f"{'lines':>10}  {'page':<36}{'paint':>9}{'imports':>9}  slowest imports (ms)"
+    print(header)
+    print("-" * len(header))
+    for scale, result in report.items():
+        for page, stats in result.get("first_paint", {}).items():
+            imports = ", ".join(f"{package} {ms:.0f}" for package, ms in stats["imports"].items())
+            print(f"{int(scale):>10,}  {page:<36}{stats['first_paint_ms']:>9.1f}{stats['import_ms']:>9.1f}  {imports}")
+            for error in stats["errors"]:
+                print(f"{'':>12}error: {error}")
+    print(f"paint = fastest first render of the page over {FIRST_PAINT_RUNS} fresh processes, "
+          "imports = module imports during it")
+    print()
+    header = f"{'lines':>10}  {'websocket session':<36}{'first':>9}{'open':>9}"
+    print(header)
+    print("-" * len(header))
+    for scale, result in report.items():
+        for page, stats in result.get("wire", {}).items():
+            print(f"{int(scale):>10,}  {page:<36}{stats['first_paint_ms']:>9.1f}{stats['open_ms']:>9.1f}")
+            for error in stats["errors"]:
+                print(f"{'':>12}error: {error}")
+    print(f"first = fastest over {FIRST_PAINT_RUNS} fresh servers of a browser session's first page render, "
+          "open = a second session on the same server")
+    print()
+    header = f"{'lines':>10}  {'import':<36}{'seconds':>9}{'lines/s':>11}"
+    print(header)
+    print("-" * len(header))
+    for scale, result in report.items():
+        stats = result.get("import")
+        if stats:
+            label = f"{stats['lines']:,}-line CSV"
+            print(f"{int(scale):>10,}  {label:<36}{stats['seconds']:>9.2f}{stats['lines_per_second']:>11,}")
+    print("import = a CSV export posted through the tenant's workspace with its ledger followers attached")
+
+
+def same_machine(result: dict, base: dict) -> bool:
+    """Whether timings in ``result`` and ``base`` were taken on the same hardware."""
+    return result.get("machine") == base.get("machine")
+
+
+def regressions(report: dict, baseline: dict) -> list[str]:
+    found = []
+    for scale, result in report.items():
+        base = baseline.get(scale)
+        if base is None:
+            continue
+        # Timings only compare on the machine that recorded them; errors and
+        # memory are checked everywhere.
+        timed = same_machine(result, base)
+        for page, stats in result["pages"].items():
+            if stats["errors"]:
+                found.append(f"{scale} lines, {page}: {stats['errors'][0]}")
+            reference = base["pages"].get(page)
+            if reference is None or not timed:
+                continue
+            limit = reference["p95"] * (1 + LATENCY_TOLERANCE) + LATENCY_ALLOWANCE_MS
+            if stats["p95"] > limit:
+                found.append(f"{scale} lines, {page}: p95 {stats['p95']:.1f} ms > {limit:.1f} ms")
+        for page, stats in result.get("first_paint", {}).items():
+            if stats["errors"]:
+                found.append(f"{scale} lines, {page}: first paint: {stats['errors'][0]}")
+            reference = base.get("first_paint", {}).get(page)
+            if reference is None or not timed:
+                continue
+            limit = reference["first_paint_ms"] * (1 + FIRST_PAINT_TOLERANCE)
+            if stats["first_paint_ms"] > limit:
+                found.append(f"{scale} lines, {page}: first paint {stats['first_paint_ms']:.1f} ms "
+                             f"> {limit:.1f} ms")
+        for page, stats in result.get("wire", {}).items():
+            if stats["errors"]:
+                found.append(f"{scale} lines, {page}: websocket: {stats['errors'][0]}")
+            reference = base.get("wire", {}).get(page)
+            if reference is None or not timed:
+                continue
+            limit = reference["first_paint_ms"] * (1 + FIRST_PAINT_TOLERANCE)
+            if stats["first_paint_ms"] > limit:
+                found.append(f"{scale} lines, {page}: websocket first paint {stats['first_paint_ms']:.1f} ms "
+                             f"> {limit:.1f} ms")
+        reference = base.get("import")
+        if reference and "import" in result and timed:
+            floor = reference["lines_per_second"] * (1 - IMPORT_TOLERANCE)
+            if result["import"]["lines_per_second"] < floor:
+                found.append(f"{scale} lines: import {result['import']['lines_per_second']:,} lines/s "
+                             f"< {floor:,.0f} lines/s")
+        limit = base["max_rss_mb"] * (1 + MEMORY_TOLERANCE)
+        if result["max_rss_mb"] > limit:
+            found.append(f"{scale} lines: max RSS {result['max_rss_mb']:.1f} MB > {limit:.1f} MB")
+    return found
+
+
+def best_of(result: dict, retry: dict) -> dict:
+    """The faster of two runs at one scale, page by page, with both runs' errors.
+
+    ``--check`` measures a flagged scale again and gates on this, so only a
+    regression that shows in both runs fails it.
+    """
+    merged = {**result, "max_rss_mb": min(result["max_rss_mb"], retry["max_rss_mb"])}
+    for section, metric in (("pages", "p95"), ("first_paint", "first_paint_ms"), ("wire", "first_paint_ms")):
+        if section not in result or section not in retry:
+            continue
+        merged[section] = {}
+        for page, stats in result[section].items():
+            other = retry[section].get(page, stats)
+            merged[section][page] = {**min(stats, other, key=lambda run: run[metric]),
+                                     "errors": sorted({*stats["errors"], *other["errors"]})}
+    if "import" in result and "import" in retry:
+        merged["import"] = max(result["import"], retry["import"], key=lambda run: run["lines_per_second"])
+    return merged
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help="journal line counts to benchmark")
+    parser.add_argument("--sessions", type=int, default=3, help="browser sessions per page")
+    parser.add_argument("--reruns", type=int, default=RERUNS, help="reruns per session")
+    parser.add_argument("--timeout", type=float, default=600, help="per-run timeout in seconds")
+    parser.add_argument("--json", type=Path, help="also write the report to this file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write {BASELINE.name}")
+    parser.add_argument("--check", action="store_true", help="fail on regressions vs the baseline")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--first-paint", metavar="PAGE", help=argparse.SUPPRESS)
+    parser.add_argument("--import-worker", type=int, metavar="LINES", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.import_worker:
+        print(json.dumps(run_import(args.import_worker)))
+        return 0
+    if args.first_paint:
+        print(json.dumps(run_first_paint(args.first_paint, args.timeout)))
+        return 0
+    if args.worker:
+        print(json.dumps(run_worker(args.sessions, args.reruns, args.timeout)))
+        return 0
+
+    report = {}
+    for lines in args.scales:
+        print(f"benchmarking {lines:,} journal lines...", file=sys.stderr)
+        report[str(lines)] = run_scale(lines, args.sessions, args.reruns, args.timeout)
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    if args.check:
+        for scale, result in report.items():
+            if regressions({scale: result}, baseline):
+                print(f"benchmarking {int(scale):,} journal lines again to confirm...", file=sys.stderr)
+                retry = run_scale(int(scale), args.sessions, args.reruns, args.timeout)
+                report[scale] = best_of(result, retry)
+    print_report(report)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        BASELINE.write_text(json.dumps({**baseline, **report}, indent=2) + "\n")
+        print(f"baseline written to {BASELINE}")
+    if args.check:
+        if not BASELINE.exists():
+            print("no baseline recorded; run with --save-baseline first", file=sys.stderr)
+            return 1
+        for scale, result in report.items():
+            if scale in baseline and not same_machine(result, baseline[scale]):
+                print(f"note: the {int(scale):,}-line baseline was recorded on another machine "
+                      f"({baseline[scale].get('machine', {}).get('cpu', 'unknown')}); "
+                      "only errors and memory are checked", file=sys.stderr)
+        found = regressions(report, baseline)
+        for line in found:
+            print(f"REGRESSION {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
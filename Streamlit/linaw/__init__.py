@@ -0,0 +1,5 @@
+"""Data layer behind the LINAW Streamlit pages."""
+
+from .ledger import CHART_OF_ACCOUNTS, FUNDS, Account, Ledger, format_peso, to_centavos
+
+__all__ = ["CHART_OF_ACCOUNTS", "FUNDS", "Account", "Ledger", "format_peso", "to_centavos"]
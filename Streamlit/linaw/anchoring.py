@@ -0,0 +1,381 @@
+"""Batched on-chain anchoring of journal entries.
+
+Submitting every journal entry as its own Fabric transaction would cap
+posting at the network's TPS.  Instead an :class:`Anchorer` periodically
+cuts the entries posted since the last batch, in posting order, into
+batches of up to ``batch_size``, builds a Merkle tree over their leaves
+(the same entry hashes as :mod:`linaw.merkle`) and appends one
+``AnchorJournalBatch`` write per batch, carrying the root, to the tenant's
+:class:`~linaw.outbox.Outbox` under the batch's asset id.  Posting never
+waits on the chain; chain TPS only bounds batches per second.
+
+The outbox's dispatcher sends the writes, retries them and records their
+receipts; the anchorer reconciles its batches against the outbox.  A
+batch, and with it every entry in it, moves from ``pending`` to
+``submitted`` (handed to the outbox) to ``anchored`` (with its Fabric
+transaction id and block) or ``failed`` (dead-lettered; requeuing the
+write resumes it).  A batch the chaincode reports as already anchored
+(say the outbox was lost) is matched against the chain event carrying its
+root instead.
+
+Batches are contiguous ranges of ledger entry ids kept in a per-tenant
+SQLite file, so an entry's status is one indexed range lookup and the
+queue survives restarts.  When the books are rebuilt or replaced under a
+surviving log, the batches whose roots no longer match the ledger are
+retired (kept, with their receipts, in ``retired_batches``) and their
+entries queue again under new batch numbers, so asset ids never repeat.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .ledger import Ledger
+from .merkle import MerkleTree
+from .outbox import CONFIRMED, DEAD, Outbox
+from .settings import data_dir
+
+if TYPE_CHECKING:
+    from .events import EventStore
+    from .merkle import JournalMerkle
+
+log = logging.getLogger(__name__)
+
+ANCHOR_FUNC = "AnchorJournalBatch"
+ASSET_PREFIX = "JEB"
+
+QUEUED = "queued"
+PENDING = "pending"
+SUBMITTED = "submitted"
+ANCHORED = "anchored"
+FAILED = "failed"
+
+_SCHEMA = """
+-- One row per batch; batches claim contiguous, increasing ranges of ledger entry ids.
+CREATE TABLE IF NOT EXISTS batches (
+    batch        INTEGER PRIMARY KEY,
+    first_entry  INTEGER NOT NULL UNIQUE,
+    last_entry   INTEGER NOT NULL,
+    root         BLOB NOT NULL,
+    status       TEXT NOT NULL,
+    tx_id        TEXT,
+    block_number INTEGER,
+    error        TEXT,
+    cut_at       TEXT NOT NULL,
+    submitted_at TEXT,
+    anchored_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS batches_status ON batches (status);
+-- Batches cut from books that were since replaced; their numbers are never reused.
+CREATE TABLE IF NOT EXISTS retired_batches AS SELECT * FROM batches WHERE 0;
+"""
+
+_COLUMNS = "batch, first_entry, last_entry, root, status, tx_id, block_number, error, submitted_at"
+
+
+@dataclass(frozen=True)
+class AnchorBatch:
+    batch: int
+    first_entry: int
+    last_entry: int
+    root: bytes
+    status: str
+    tx_id: str | None = None
+    block_number: int | None = None
+    error: str | None = None
+    submitted_at: str | None = None
+
+    def __len__(self) -> int:
+        return self.last_entry - self.first_entry + 1
+
+
+@dataclass(frozen=True)
+class EntryAnchor:
+    """Where one journal entry stands; ``batch`` is ``None`` while it is queued."""
+
+    reference: str
+    batch: AnchorBatch | None = None
+
+    @property
+    def status(self) -> str:
+        return QUEUED if self.batch is None else self.batch.status
+
+    @property
+    def label(self) -> str:
+        batch = self.batch
+        if batch is None:
+            return "🕓 Queued for anchoring"
+        if batch.status == ANCHORED:
+            tx = f" · tx `{batch.tx_id[:16]}…`" if batch.tx_id else ""
+            block = f" · block {batch.block_number:,}" if batch.block_number is not None else ""
+            return f"✅ Batch #{batch.batch}{tx}{block}"
+        if batch.status == FAILED:
+            return f"⚠️ Batch #{batch.batch} failed: {batch.error}"
+        if batch.status == SUBMITTED:
+            return f"⏳ Batch #{batch.batch} submitted, awaiting confirmation"
+        return f"⏳ Batch #{batch.batch} awaiting submission"
+
+
+class AnchorLog:
+    """SQLite record of anchoring batches and their chain receipts."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else data_dir() / "anchors.db"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def next_entry(self) -> int:
+        """The first entry id not yet claimed by a batch."""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(MAX(last_entry) + 1, 0) FROM batches").fetchone()[0]
+
+    def cut(self, first_entry: int, last_entry: int, root: bytes) -> AnchorBatch:
+        with self._lock:
+            batch = self._db.execute(
+                "INSERT INTO batches (batch, first_entry, last_entry, root, status, cut_at) "
+                "SELECT MAX(COALESCE((SELECT MAX(batch) FROM batches), 0), "
+                "COALESCE((SELECT MAX(batch) FROM retired_batches), 0)) + 1, ?, ?, ?, ?, datetime('now')",
+                (first_entry, last_entry, root, PENDING)).lastrowid
+        return AnchorBatch(batch, first_entry, last_entry, root, PENDING)
+
+    def batches(self) -> list[AnchorBatch]:
+        """Every live batch in entry order."""
+        return self._select("1 ORDER BY first_entry")
+
+    def retire(self, batch: int) -> None:
+        """Move ``batch`` and every later batch to ``retired_batches``."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("INSERT INTO retired_batches SELECT * FROM batches WHERE batch >= ?", (batch,))
+            self._db.execute("DELETE FROM batches WHERE batch >= ?", (batch,))
+            self._db.execute("COMMIT")
+
+    def _select(self, where: str, params: tuple = ()) -> list[AnchorBatch]:
+        with self._lock:
+            rows = self._db.execute(f"SELECT {_COLUMNS} FROM batches WHERE {where}", params).fetchall()
+        return [AnchorBatch(*row) for row in rows]
+
+    def get(self, batch: int) -> AnchorBatch | None:
+        found = self._select("batch = ?", (batch,))
+        return found[0] if found else None
+
+    def unsent(self) -> list[AnchorBatch]:
+        """Batches cut but not yet handed to the outbox, oldest first."""
+        return self._select("status = ? ORDER BY batch", (PENDING,))
+
+    def unsettled(self) -> list[AnchorBatch]:
+        """Batches in the outbox that are not anchored yet, failed ones included."""
+        return self._select("status IN (?, ?) ORDER BY batch", (SUBMITTED, FAILED))
+
+    def submitted(self, batch: int) -> None:
+        with self._lock:
+            self._db.execute("UPDATE batches SET status = ?, error = NULL, "
+                             "submitted_at = COALESCE(submitted_at, datetime('now')) WHERE batch = ?",
+                             (SUBMITTED, batch))
+
+    def anchored(self, batch: int, tx_id: str | None, block_number: int | None) -> None:
+        with self._lock:
+            self._db.execute("UPDATE batches SET status = ?, tx_id = ?, block_number = ?, error = NULL, "
+                             "anchored_at = datetime('now') WHERE batch = ?",
+                             (ANCHORED, tx_id, block_number, batch))
+
+    def failed(self, batch: int, error: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE batches SET status = ?, error = ? WHERE batch = ?", (FAILED, error, batch))
+
+    def batch_of(self, entry_id: int) -> AnchorBatch | None:
+        """The batch whose range holds ``entry_id``."""
+        found = self._select("first_entry <= ? ORDER BY first_entry DESC LIMIT 1", (entry_id,))
+        return found[0] if found and found[0].last_entry >= entry_id else None
+
+    def entry_counts(self) -> dict[str, int]:
+        """Entries per batch status."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, SUM(last_entry - first_entry + 1) FROM batches "
+                                    "GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class Anchorer:
+    """Cuts posted entries into batches, hands their roots to the outbox and reconciles them."""
+
+    def __init__(self, ledger: Ledger, merkle: JournalMerkle, anchor_log: AnchorLog, outbox: Outbox, *,
+                 events: EventStore | None = None, asset_prefix: str = ASSET_PREFIX,
+                 batch_size: int = 256, interval: float = 5.0, max_delay: float = 300.0):
+        self.ledger = ledger
+        self.merkle = merkle
+        self.log = anchor_log
+        self.outbox = outbox
+        self.events = events
+        self.asset_prefix = asset_prefix
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_delay = max_delay
+        self._cut_lock = threading.Lock()
+        # Batch numbers are never reused and the ledger only grows, so a
+        # batch that matched the ledger once always will.
+        self._checked = 0
+        self._retire_stale()
+
+    def asset_id(self, batch: int) -> str:
+        return f"{self.asset_prefix}-{batch:08d}"
+
+    # -- batching --------------------------------------------------------
+
+    def queued(self) -> int:
+        """Posted entries not yet claimed by a batch."""
+        return max(0, len(self.ledger.je_refs) - self.log.next_entry())
+
+    def cut(self, limit: int | None = None) -> list[AnchorBatch]:
+        """Claim the entries posted since the last batch as up to ``limit`` new batches."""
+        batches = []
+        with self._cut_lock:
+            first = self.log.next_entry()
+            while limit is None or len(batches) < limit:
+                leaves = self.merkle.leaves(first, first + self.batch_size)
+                if not len(leaves):
+                    break
+                root = MerkleTree(leaves).root
+                batches.append(self.log.cut(first, first + len(leaves) - 1, root))
+                first += len(leaves)
+            if batches:
+                self._checked = max(self._checked, batches[-1].batch)
+        return batches
+
+    def _retire_stale(self) -> None:
+        """Retire the batches cut from books that have since been rebuilt or replaced.
+
+        Every batch root not yet checked is recomputed from the ledger; from
+        the first that differs on, the batches are retired and their entries
+        queue again.  Runs on every step as well, since another process
+        holding older books may cut batches into the same log.
+        """
+        batches = [batch for batch in self.log.batches() if batch.batch > self._checked]
+        if not batches:
+            return
+        leaves = self.merkle.leaves(batches[0].first_entry, batches[-1].last_entry + 1)
+        offset = batches[0].first_entry
+        for index, batch in enumerate(batches):
+            if batch.last_entry - offset >= len(leaves) or MerkleTree(
+                    leaves[batch.first_entry - offset:batch.last_entry - offset + 1]).root != batch.root:
+                log.warning("Anchoring batches from #%d no longer match the ledger; retiring %d of them",
+                            batch.batch, len(batches) - index)
+                self.log.retire(batch.batch)
+                return
+            self._checked = batch.batch
+
+    def _tree(self, batch: AnchorBatch) -> MerkleTree:
+        tree = MerkleTree(self.merkle.leaves(batch.first_entry, batch.last_entry + 1))
+        if len(tree) != len(batch) or tree.root != batch.root:
+            raise ValueError(f"batch {batch.batch} no longer matches the ledger")
+        return tree
+
+    # -- chain -----------------------------------------------------------
+
+    def _args(self, batch: AnchorBatch) -> list[str]:
+        refs = self.ledger.je_refs
+        return [self.asset_id(batch.batch), "0x" + batch.root.hex(), refs[batch.first_entry],
+                refs[batch.last_entry], str(len(batch))]
+
+    def submit(self, batch: AnchorBatch) -> None:
+        # Keyed by asset id, so handing a batch over twice (a crash between
+        # these two lines) leaves one write in the outbox.
+        self.outbox.enqueue(self.asset_id(batch.batch), ANCHOR_FUNC, self._args(batch))
+        self.log.submitted(batch.batch)
+
+    def _already_anchored(self, batch: AnchorBatch) -> bool:
+        """Settle a batch from its chain event when its write failed because it is already on chain."""
+        if self.events is None:
+            return False
+        digest, block = self.events.document_hashes([self.asset_id(batch.batch)]).get(
+            self.asset_id(batch.batch), (None, None))
+        if digest != "0x" + batch.root.hex():
+            return False
+        self.log.anchored(batch.batch, None, block)
+        return True
+
+    def reconcile(self) -> int:
+        """Settle batches whose outbox writes were confirmed or dead-lettered; returns the number anchored."""
+        batches = self.log.unsettled()
+        writes = self.outbox.get_many(self.asset_id(batch.batch) for batch in batches)
+        anchored = 0
+        for batch in batches:
+            write = writes.get(self.asset_id(batch.batch))
+            if write is None:
+                continue
+            if write.status == CONFIRMED:
+                self.log.anchored(batch.batch, write.tx_id, write.block_number)
+                anchored += 1
+            elif write.status == DEAD:
+                if self._already_anchored(batch):
+                    anchored += 1
+                elif batch.status != FAILED:
+                    self.log.failed(batch.batch, write.error or "transaction failed")
+                    log.warning("Anchoring batch %d failed: %s", batch.batch, write.error)
+            elif batch.status == FAILED:
+                # The dead letter was requeued.
+                self.log.submitted(batch.batch)
+        return anchored
+
+    def step(self) -> None:
+        """Reconcile with the outbox, then hand it every batch not yet in it."""
+        with self._cut_lock:
+            self._retire_stale()
+        self.reconcile()
+        for batch in self.log.unsent() + self.cut():
+            self.submit(batch)
+
+    async def run(self) -> None:
+        """Cut and reconcile every ``interval`` seconds until cancelled; failures back off with jitter."""
+        failures = 0
+        while True:
+            try:
+                await asyncio.to_thread(self.step)
+                failures = 0
+                delay = self.interval
+            except Exception:
+                # A store failure or a batch that no longer matches the ledger
+                # must not stop anchoring for the life of the process; the
+                # entries stay queued and the next step picks them up.
+                failures += 1
+                delay = min(self.interval * 2 ** failures, self.max_delay)
+                log.exception("Anchoring step failed (%d in a row). Retrying in ~%.1fs", failures, delay)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+    # -- queries ---------------------------------------------------------
+
+    def status(self, ref: str) -> EntryAnchor:
+        return EntryAnchor(ref, self.log.batch_of(self.ledger.entry_id(ref)))
+
+    def proof(self, ref: str) -> dict | None:
+        """An inclusion proof of ``ref`` in its batch root, once the entry is batched."""
+        anchor = self.status(ref)
+        batch = anchor.batch
+        if batch is None:
+            return None
+        tree = self._tree(batch)
+        index = self.ledger.entry_id(ref) - batch.first_entry
+        return {
+            "batch": batch.batch,
+            "asset_id": self.asset_id(batch.batch),
+            "status": batch.status,
+            "tx_id": batch.tx_id,
+            "block_number": batch.block_number,
+            "leaf_index": index,
+            "leaf_count": len(tree),
+            "root": "0x" + tree.root.hex(),
+            "path": [{"hash": "0x" + sibling.hex(), "side": side} for sibling, side in tree.proof(index)],
+        }
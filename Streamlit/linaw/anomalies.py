@@ -0,0 +1,370 @@
+"""Streaming review of posted transactions for likely irregularities.
+
+An :class:`AnomalyDetector` follows the ledger listener and checks each
+appended batch once, against a trailing window of recent payments, for:
+
+* ``duplicate`` payments: the same payee, object code, fund and amount
+  paid again within ``duplicate_days``;
+* ``split`` purchases: payments for procured object codes (supplies,
+  repairs, equipment) each just under the procurement ``threshold``
+  (within ``margin`` of it) that together reach it, to the same payee
+  within ``split_days``;
+* ``outlier`` amounts: lines whose log amount sits more than ``z_limit``
+  standard deviations above their category's running mean.  Only high
+  amounts are flagged; unusually small ones carry no risk.
+
+A payment is an expense line of an entry that credits cash.  Journal
+entries have no payee field, so the entry description, case-folded and
+stripped of digits and punctuation, stands in for the payee.  Payments
+are matched by hashing those keys and sorting the window together with
+the batch, so a batch costs a sort of the window plus the batch, and
+rolling window sums come from cumulative sums and ``searchsorted``.
+
+Findings, the number of ledger rows checked and the running category
+statistics are kept in a per-tenant SQLite file and committed together,
+so a restart only checks rows posted since.  The trailing window is
+rebuilt from the already-checked rows dated inside it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .ledger import EXPENSE, REVENUE, Ledger, format_peso
+from .settings import data_dir
+
+DUPLICATE = "duplicate"
+SPLIT = "split"
+OUTLIER = "outlier"
+KINDS = {
+    DUPLICATE: "Possible duplicate payment",
+    SPLIT: "Possible split purchase",
+    OUTLIER: "Unusual amount",
+}
+CASH_ACCOUNTS = ("1010", "1020")
+# Object codes bought through procurement, where splitting avoids bidding.
+PROCURED_ACCOUNTS = ("5020", "5040", "5050")
+# Most related entries recorded per finding.
+MAX_RELATED = 10
+
+_NOT_NAME = re.compile(r"[^a-z]+")
+
+_SCHEMA = """
+-- One row per flagged ledger line and kind; ``related`` lists the entries it matched.
+CREATE TABLE IF NOT EXISTS findings (
+    id       INTEGER PRIMARY KEY,
+    kind     TEXT NOT NULL,
+    line     INTEGER NOT NULL,
+    entry    TEXT NOT NULL,
+    date     TEXT NOT NULL,
+    account  TEXT NOT NULL,
+    fund     TEXT NOT NULL,
+    amount   INTEGER NOT NULL,
+    score    REAL NOT NULL,
+    related  TEXT NOT NULL,
+    detail   TEXT NOT NULL,
+    UNIQUE (kind, line)
+);
+CREATE INDEX IF NOT EXISTS findings_kind ON findings (kind, id);
+-- Detector progress: rows checked and running category statistics.
+CREATE TABLE IF NOT EXISTS state (
+    name   TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+_INSERT = ("INSERT OR IGNORE INTO findings (kind, line, entry, date, account, fund, amount, score, "
+           "related, detail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class FindingStore:
+    """SQLite record of anomaly findings and the detector's progress."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else data_dir() / "findings.db"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _state(self, name: str):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def position(self) -> int:
+        """Ledger rows already checked."""
+        return self._state("position") or 0
+
+    def statistics(self) -> dict | None:
+        return self._state("statistics")
+
+    def commit(self, findings: list[tuple], position: int, statistics: dict) -> None:
+        """Record a checked batch: its findings and the progress after it, atomically."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(_INSERT, findings)
+                self._db.executemany("INSERT OR REPLACE INTO state (name, value) VALUES (?, ?)",
+                                     [("position", json.dumps(position)),
+                                      ("statistics", json.dumps(statistics))])
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM findings")
+            self._db.execute("DELETE FROM state")
+            self._db.execute("COMMIT")
+
+    def counts(self) -> dict[str, int]:
+        """Findings per kind."""
+        with self._lock:
+            rows = self._db.execute("SELECT kind, COUNT(*) FROM findings GROUP BY kind").fetchall()
+        return {kind: 0 for kind in KINDS} | dict(rows)
+
+    def recent(self, kind: str | None = None, limit: int = 50) -> pd.DataFrame:
+        """The latest findings by posting date; Amount is centavos."""
+        where, params = ("WHERE kind = ?", (kind,)) if kind else ("", ())
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT date, kind, entry, account, fund, amount, related, detail FROM findings {where} "
+                "ORDER BY date DESC, line DESC LIMIT ?", (*params, limit)).fetchall()
+        frame = pd.DataFrame(rows, columns=["Date", "Finding", "Entry", "Account", "Fund", "Amount",
+                                            "Related Entries", "Detail"])
+        frame["Finding"] = frame["Finding"].map(KINDS)
+        return frame
+
+
+def _payee_hash(description: str) -> int:
+    name = " ".join(_NOT_NAME.sub(" ", description.casefold()).split())
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+
+def _key(frame: pd.DataFrame, columns: list[str]) -> np.ndarray:
+    return pd.util.hash_pandas_object(frame[columns], index=False).to_numpy()
+
+
+def _peso(centavos: int) -> str:
+    return f"₱{format_peso(int(centavos))}"
+
+
+class AnomalyDetector:
+    """Checks every batch appended to a :class:`Ledger` and records findings in a :class:`FindingStore`."""
+
+    def __init__(self, ledger: Ledger, store: FindingStore, *, threshold: int = 50_000_00,
+                 margin: float = 0.2, duplicate_days: int = 7, split_days: int = 30,
+                 z_limit: float = 3.5, min_samples: int = 30):
+        self.ledger = ledger
+        self.store = store
+        self.threshold = threshold
+        self.floor = int(threshold * (1 - margin))
+        self.duplicate_days = duplicate_days
+        self.split_days = split_days
+        self.z_limit = z_limit
+        self.min_samples = min_samples
+
+        accounts = ledger.accounts
+        codes = [a.code for a in accounts]
+        kinds = np.array([a.kind for a in accounts])
+        self._expense = kinds == EXPENSE
+        self._cash = np.isin(codes, CASH_ACCOUNTS)
+        self._procured = np.isin(codes, PROCURED_ACCOUNTS)
+        # Amounts read positive on the account's normal side; 0 skips the account.
+        self._signs = np.where(self._expense, 1, np.where(kinds == REVENUE, -1, 0))
+        self.categories = list(dict.fromkeys(a.section for a in accounts))
+        self._category = np.array([self.categories.index(a.section) for a in accounts])
+        self._payees: dict[str, int] = {}
+
+        position = store.position()
+        statistics = store.statistics()
+        if position > len(ledger) or (position and statistics is None):
+            # The books were replaced; check them from the start.
+            store.reset()
+            position, statistics = 0, None
+        size = len(self.categories)
+        statistics = statistics or {"count": [0] * size, "mean": [0.0] * size, "m2": [0.0] * size}
+        self._count = np.array(statistics["count"], dtype=np.int64)
+        self._mean = np.array(statistics["mean"], dtype=np.float64)
+        self._m2 = np.array(statistics["m2"], dtype=np.float64)
+
+        self._recent = self._payments(np.arange(0))
+        if position:
+            dates = ledger.date[:position]
+            horizon = dates.max() - max(duplicate_days, split_days)
+            self._recent = self._payments(np.flatnonzero(dates >= horizon))
+        self._check(position, len(ledger))
+        ledger.add_listener(self._check)
+
+    def close(self) -> None:
+        """Stop checking postings and close the findings store."""
+        self.ledger.remove_listener(self._check)
+        self.store.close()
+
+    # -- payments --------------------------------------------------------
+
+    def _payee_ids(self, entries: np.ndarray) -> np.ndarray:
+        unique, inverse = np.unique(entries, return_inverse=True)
+        descriptions = self.ledger.je_descriptions
+        hashes = np.empty(len(unique), dtype=np.uint64)
+        for i, entry in enumerate(unique.tolist()):
+            description = descriptions[entry]
+            payee = self._payees.get(description)
+            if payee is None:
+                payee = self._payees[description] = _payee_hash(description)
+            hashes[i] = payee
+        return hashes[inverse]
+
+    def _payments(self, rows: np.ndarray) -> pd.DataFrame:
+        """Expense lines of entries that credit cash, among ledger ``rows`` (whole entries)."""
+        ledger = self.ledger
+        accounts = ledger.account[rows]
+        net = ledger.debit[rows] - ledger.credit[rows]
+        entries = ledger.je[rows].astype(np.intp)
+        lowest = entries.min() if len(entries) else 0
+        paid_out = np.bincount(entries - lowest, weights=np.where(self._cash[accounts], -net, 0))
+        keep = self._expense[accounts] & (net > 0)
+        keep[keep] = paid_out[entries[keep] - lowest] > 0
+        rows, entries = rows[keep], entries[keep]
+        frame = pd.DataFrame({
+            "row": rows,
+            "entry": entries,
+            "date": ledger.date[rows].astype(np.int64),
+            "payee": self._payee_ids(entries),
+            "account": ledger.account[rows],
+            "fund": ledger.fund[rows],
+            "amount": net[keep],
+        })
+        frame["duplicate"] = _key(frame, ["payee", "account", "fund", "amount"])
+        frame["split"] = _key(frame, ["payee", "account", "fund"])
+        return frame
+
+    # -- checks ----------------------------------------------------------
+
+    def _check(self, start: int, end: int) -> None:
+        if end <= start:
+            return
+        batch = self._payments(np.arange(start, end))
+        window = pd.concat([self._recent, batch], ignore_index=True)
+        findings = self._duplicates(window, start) + self._splits(window, start)
+        findings += self._outliers(start, end)
+        self.store.commit(findings, end, {"count": self._count.tolist(), "mean": self._mean.tolist(),
+                                          "m2": self._m2.tolist()})
+        if len(window):
+            horizon = window["date"].max() - max(self.duplicate_days, self.split_days)
+            self._recent = window[window["date"].to_numpy() >= horizon].reset_index(drop=True)
+
+    def _finding(self, kind: str, row: int, score: float, related: list[int], detail: str) -> tuple:
+        ledger = self.ledger
+        entry = int(ledger.je[row])
+        account = ledger.accounts[int(ledger.account[row])]
+        refs = list(dict.fromkeys(ledger.je_refs[e] for e in related if e != entry))
+        return (kind, row, ledger.je_refs[entry], str(ledger.date[row]), f"{account.code} {account.name}",
+                ledger.funds[int(ledger.fund[row])], abs(int(ledger.debit[row] - ledger.credit[row])),
+                float(score), ", ".join(refs[-MAX_RELATED:]), detail)
+
+    def _duplicates(self, window: pd.DataFrame, start: int) -> list[tuple]:
+        """Payments with the same key as the one before them, within ``duplicate_days``."""
+        order = np.lexsort((window["row"].to_numpy(), window["date"].to_numpy(), window["duplicate"].to_numpy()))
+        key = window["duplicate"].to_numpy()[order]
+        date = window["date"].to_numpy()[order]
+        row = window["row"].to_numpy()[order]
+        entry = window["entry"].to_numpy()[order]
+        gap = date[1:] - date[:-1]
+        hits = np.flatnonzero((key[1:] == key[:-1]) & (gap <= self.duplicate_days)
+                              & (entry[1:] != entry[:-1]) & ((row[1:] >= start) | (row[:-1] >= start)))
+        findings = []
+        for i in hits.tolist():
+            days = int(gap[i])
+            when = "the same day" if not days else f"{days} day{'s' if days > 1 else ''} earlier"
+            findings.append(self._finding(
+                DUPLICATE, int(row[i + 1]), days, [int(entry[i])],
+                f"Same payee, object code, fund and amount as {self.ledger.je_refs[int(entry[i])]}, "
+                f"paid {when}"))
+        return findings
+
+    def _splits(self, window: pd.DataFrame, start: int) -> list[tuple]:
+        """Near-threshold procurement payments whose rolling ``split_days`` sum per payee reaches it."""
+        amount = window["amount"].to_numpy()
+        band = (self._procured[window["account"].to_numpy()] & (amount >= self.floor)
+                & (amount < self.threshold))
+        if band.sum() < 2:
+            return []
+        near = window[band]
+        order = np.lexsort((near["row"].to_numpy(), near["date"].to_numpy(), near["split"].to_numpy()))
+        key = near["split"].to_numpy()[order]
+        date = near["date"].to_numpy()[order]
+        row = near["row"].to_numpy()[order]
+        entry = near["entry"].to_numpy()[order]
+        amount = near["amount"].to_numpy()[order]
+        # Rank each payee, then offset dates so a window never reaches into the previous payee.
+        group = np.concatenate([[0], np.cumsum(key[1:] != key[:-1])])
+        position = group * (1 << 32) + (date - date.min() + self.split_days + 1)
+        first = np.searchsorted(position, position - self.split_days, side="left")
+        index = np.arange(len(order))
+        totals = np.concatenate([[0], np.cumsum(amount)])
+        count = index - first + 1
+        total = totals[index + 1] - totals[first]
+        hits = np.flatnonzero((count >= 2) & (total >= self.threshold) & (row >= start))
+        findings = []
+        for i in hits.tolist():
+            findings.append(self._finding(
+                SPLIT, int(row[i]), int(count[i]), entry[first[i]:i].tolist(),
+                f"{count[i]} payments to the same payee within {self.split_days} days, each just under "
+                f"the {_peso(self.threshold)} procurement threshold, total {_peso(total[i])}"))
+        return findings
+
+    def _outliers(self, start: int, end: int) -> list[tuple]:
+        """Lines far above their category's log-amount mean, scored before the batch joins it."""
+        ledger = self.ledger
+        accounts = ledger.account[start:end]
+        amount = (ledger.debit[start:end] - ledger.credit[start:end]) * self._signs[accounts]
+        rows = np.flatnonzero(amount > 0)
+        if not len(rows):
+            return []
+        values = np.log(amount[rows])
+        category = self._category[accounts[rows]]
+        size = len(self.categories)
+        count = np.bincount(category, minlength=size)
+        mean = np.bincount(category, weights=values, minlength=size) / np.maximum(count, 1)
+        m2 = np.bincount(category, weights=(values - mean[category]) ** 2, minlength=size)
+
+        # Chan et al.'s pairwise merge of the running and batch statistics.
+        total = self._count + count
+        delta = mean - self._mean
+        merged_mean = self._mean + delta * count / np.maximum(total, 1)
+        merged_m2 = self._m2 + m2 + delta ** 2 * self._count * count / np.maximum(total, 1)
+        # Score against history once it is large enough, else against history and batch.
+        settled = self._count >= self.min_samples
+        ref_count = np.where(settled, self._count, total)
+        ref_mean = np.where(settled, self._mean, merged_mean)
+        ref_std = np.sqrt(np.where(settled, self._m2, merged_m2) / np.maximum(ref_count - 1, 1))
+        self._count, self._mean, self._m2 = total, merged_mean, merged_m2
+
+        ready = (ref_count >= self.min_samples) & (ref_std > 0)
+        z = np.divide(values - ref_mean[category], ref_std[category],
+                      out=np.zeros(len(values)), where=ready[category])
+        findings = []
+        for i in np.flatnonzero(z > self.z_limit).tolist():
+            row = start + int(rows[i])
+            typical = _peso(round(float(np.exp(ref_mean[category[i]]))))
+            findings.append(self._finding(
+                OUTLIER, row, z[i], [],
+                f"{_peso(amount[rows[i]])} is {z[i]:.1f} standard deviations above the usual "
+                f"{self.categories[category[i]]} amount (typically about {typical})"))
+        return findings
@@ -0,0 +1,169 @@
+"""Per-account running-balance index.
+
+For every account the index keeps its postings in date order together with
+prefix sums of debits and credits.  Any balance "as of" a date is then one
+binary search, and a new posting only rewrites the tail of the account it
+touches instead of the whole history.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .ledger import Ledger
+
+
+class _Postings:
+    """Growable, date-ordered arrays for a single account."""
+
+    __slots__ = ("size", "rows", "dates", "cum_debit", "cum_credit")
+
+    def __init__(self, rows: np.ndarray, dates: np.ndarray,
+                 cum_debit: np.ndarray, cum_credit: np.ndarray):
+        self.size = len(rows)
+        capacity = max(16, self.size)
+        self.rows = np.empty(capacity, dtype=np.int32)
+        self.dates = np.empty(capacity, dtype="datetime64[D]")
+        self.cum_debit = np.empty(capacity, dtype=np.int64)
+        self.cum_credit = np.empty(capacity, dtype=np.int64)
+        self.rows[: self.size] = rows
+        self.dates[: self.size] = dates
+        self.cum_debit[: self.size] = cum_debit
+        self.cum_credit[: self.size] = cum_credit
+
+    def reserve(self, needed: int) -> None:
+        capacity = len(self.rows)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("rows", "dates", "cum_debit", "cum_credit"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+
+    def totals_before(self, position: int) -> tuple[int, int]:
+        if position == 0:
+            return 0, 0
+        return int(self.cum_debit[position - 1]), int(self.cum_credit[position - 1])
+
+
+class BalanceIndex:
+    """Prefix-sum balance index over every account of a :class:`Ledger`.
+
+    The index subscribes to the ledger, so postings made after it is built
+    are folded in as they arrive.
+    """
+
+    def __init__(self, ledger: Ledger):
+        self.ledger = ledger
+        self._accounts: list[_Postings] = []
+        self._build()
+        ledger.add_listener(self._on_append)
+
+    def _build(self) -> None:
+        ledger = self.ledger
+        # Group rows by account, then by date, keeping posting order for ties.
+        order = np.lexsort((np.arange(len(ledger)), ledger.date, ledger.account))
+        accounts = ledger.account[order]
+        bounds = np.searchsorted(accounts, np.arange(len(ledger.accounts) + 1))
+        debit = np.cumsum(ledger.debit[order])
+        credit = np.cumsum(ledger.credit[order])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            base_debit = debit[lo - 1] if lo else 0
+            base_credit = credit[lo - 1] if lo else 0
+            self._accounts.append(_Postings(
+                order[lo:hi],
+                ledger.date[order[lo:hi]],
+                debit[lo:hi] - base_debit,
+                credit[lo:hi] - base_credit,
+            ))
+
+    def _on_append(self, start: int, end: int) -> None:
+        ledger = self.ledger
+        rows = np.arange(start, end)
+        accounts = ledger.account[start:end]
+        for account_id in np.unique(accounts):
+            self._insert(self._accounts[account_id], rows[accounts == account_id])
+
+    def _insert(self, postings: _Postings, rows: np.ndarray) -> None:
+        ledger = self.ledger
+        rows = rows[np.argsort(ledger.date[rows], kind="stable")]
+        # Back-dated postings land before existing ones; everything from the
+        # insertion point onwards is re-sorted and re-summed, nothing before it.
+        position = int(np.searchsorted(postings.dates[: postings.size],
+                                       ledger.date[rows[0]], side="right"))
+        tail = np.concatenate([postings.rows[position: postings.size], rows])
+        tail = tail[np.argsort(ledger.date[tail], kind="stable")]
+        base_debit, base_credit = postings.totals_before(position)
+
+        end = position + len(tail)
+        postings.reserve(end)
+        postings.rows[position:end] = tail
+        postings.dates[position:end] = ledger.date[tail]
+        postings.cum_debit[position:end] = base_debit + np.cumsum(ledger.debit[tail])
+        postings.cum_credit[position:end] = base_credit + np.cumsum(ledger.credit[tail])
+        postings.size = end
+
+    # -- queries ---------------------------------------------------------
+
+    def _postings(self, code: str) -> tuple[_Postings, int]:
+        account_id = self.ledger.account_id(code)
+        return self._accounts[account_id], self.ledger.accounts[account_id].normal_sign
+
+    def _position(self, postings: _Postings, as_of: date | None) -> int:
+        if as_of is None:
+            return postings.size
+        return int(np.searchsorted(postings.dates[: postings.size],
+                                   np.datetime64(as_of, "D"), side="right"))
+
+    def count(self, code: str) -> int:
+        return self._postings(code)[0].size
+
+    def totals(self, code: str, start: date | None = None,
+               end: date | None = None) -> tuple[int, int]:
+        """Total (debits, credits) posted to ``code`` within an inclusive date range."""
+        postings, _ = self._postings(code)
+        lo = 0 if start is None else int(np.searchsorted(
+            postings.dates[: postings.size], np.datetime64(start, "D"), side="left"))
+        hi = self._position(postings, end)
+        debit_hi, credit_hi = postings.totals_before(hi)
+        debit_lo, credit_lo = postings.totals_before(lo)
+        return debit_hi - debit_lo, credit_hi - credit_lo
+
+    def balance(self, code: str, as_of: date | None = None) -> int:
+        """Balance of ``code`` on its normal side as of the end of ``as_of``."""
+        postings, sign = self._postings(code)
+        debit, credit = postings.totals_before(self._position(postings, as_of))
+        return (debit - credit) * sign
+
+    def postings(self, code: str, start: date | None = None, end: date | None = None,
+                 limit: int | None = None) -> pd.DataFrame:
+        """General-ledger rows for ``code`` with their running balance.
+
+        Only the requested window is materialized; ``limit`` keeps the latest
+        rows of that window.
+        """
+        postings, sign = self._postings(code)
+        dates = postings.dates[: postings.size]
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = self._position(postings, end)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+
+        ledger = self.ledger
+        rows = postings.rows[lo:hi]
+        je = ledger.je[rows]
+        balance = (postings.cum_debit[lo:hi] - postings.cum_credit[lo:hi]) * sign
+        return pd.DataFrame({
+            "Date": postings.dates[lo:hi],
+            "Reference": [ledger.je_refs[i] for i in je],
+            "Description": [ledger.je_descriptions[i] for i in je],
+            "Debit": ledger.debit[rows],
+            "Credit": ledger.credit[rows],
+            "Balance": balance,
+        })
@@ -0,0 +1,409 @@
+"""Appropriations, allotments and their utilization by fund, office and object code.
+
+An :class:`Ordinance` is the approved annual budget: appropriations by
+(fund, office, object code) and estimated revenues by (fund, revenue
+account).  :class:`BudgetBook` lays the appropriations out as a tree
+(all funds, fund, office, object code) and keeps dense (month × node ×
+measure) centavo sums per fiscal year, maintained from the ledger
+listener.  A posting is matched to its object-code leaf and added to the
+leaf and every node above it, so allotments, obligations, disbursements
+and the balances between them are already rolled up at every level and
+a utilization report for any node and any run of months is a sum over
+at most twelve rows, never a pass over the journal.
+
+Journal lines carry a fund and an account but no office, so an
+ordinance may appropriate each (fund, object code) to one office only.
+Expenses on an object code a fund did not appropriate are charged to
+that fund's *Unappropriated* office, where they show up as spending
+without an appropriation instead of disappearing.
+
+An expense is obligated when it is recorded and disbursed by the cash
+credited in the same entry; what is left is owed through payables and is
+disbursed, oldest obligation first within the fund, when a later entry
+settles payables from cash.  Allotments are released from each year's
+appropriations on the ordinance's schedule.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .ledger import EXPENSE, REVENUE, Ledger
+
+ALL_FUNDS = "All Funds"
+UNAPPROPRIATED = "Unappropriated"
+CASH_ACCOUNTS = ("1010", "1020")
+PAYABLE_ACCOUNTS = ("2010", "2020")
+# Months in which each release schedule allots a share of the appropriations.
+RELEASES = {
+    "annual": (1,),
+    "quarterly": (1, 4, 7, 10),
+    "monthly": tuple(range(1, 13)),
+}
+
+# Measures kept per month and appropriation node.
+ALLOTMENT, OBLIGATION, DISBURSEMENT = range(3)
+
+
+@dataclass(frozen=True)
+class Appropriation:
+    fund: str
+    office: str
+    # Object code: the expense account the appropriation may be spent on.
+    account: str
+    # Annual amount, in centavos.
+    amount: int
+
+
+@dataclass(frozen=True)
+class RevenueEstimate:
+    fund: str
+    account: str
+    amount: int
+
+
+@dataclass(frozen=True)
+class Ordinance:
+    """One fiscal year's appropriations and revenue estimates, applied to every year of the books."""
+
+    appropriations: tuple[Appropriation, ...]
+    revenues: tuple[RevenueEstimate, ...] = ()
+    releases: str = "quarterly"
+
+    def __post_init__(self):
+        if self.releases not in RELEASES:
+            raise ValueError(f"unknown release schedule: {self.releases}")
+
+
+class BudgetTree:
+    """A node for the root and every prefix of the leaf keys, in key order.
+
+    ``paths[i]`` holds the node ids from the root down to leaf ``i``, so a
+    (month × leaf) matrix rolls up to every node with one scatter-add per
+    level.
+    """
+
+    def __init__(self, root: str, keys: Sequence[tuple[str, ...]], labels: Mapping[str, str] | None = None):
+        labels = labels or {}
+        self.names = [root]
+        self.parents = [-1]
+        self.depths = [0]
+        self._ids: dict[tuple[str, ...], int] = {(): 0}
+        paths = []
+        for key in keys:
+            path = [0]
+            for depth in range(1, len(key) + 1):
+                prefix = key[:depth]
+                if prefix not in self._ids:
+                    self._ids[prefix] = len(self.names)
+                    self.names.append(labels.get(key[depth - 1], key[depth - 1]))
+                    self.parents.append(path[-1])
+                    self.depths.append(depth)
+                path.append(self._ids[prefix])
+            paths.append(path)
+        self.keys = list(self._ids)
+        self.paths = np.array(paths, dtype=np.intp).reshape(len(keys), -1)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def node(self, *key: str) -> int:
+        try:
+            return self._ids[key]
+        except KeyError:
+            raise KeyError(f"no budget node {' / '.join(key)}") from None
+
+    def label(self, node: int) -> str:
+        """The node's name with its ancestors', e.g. ``General Fund / Barangay Treasury``."""
+        names = []
+        while node > 0:
+            names.append(self.names[node])
+            node = self.parents[node]
+        return " / ".join(reversed(names)) or self.names[0]
+
+    def descendants(self, node: int, depth: int) -> list[int]:
+        """``node`` and the nodes up to ``depth`` levels below it, in tree order."""
+        key, floor = self.keys[node], self.depths[node]
+        return [i for i, other in enumerate(self.keys)
+                if other[:floor] == key and self.depths[i] - floor <= depth]
+
+    def roll_up(self, leaves: np.ndarray) -> np.ndarray:
+        """Sum a (... × leaf) array into (... × node)."""
+        nodes = np.zeros((*leaves.shape[:-1], len(self)), dtype=np.int64)
+        for level in self.paths.T:
+            np.add.at(nodes, (..., level), leaves)
+        return nodes
+
+
+def _fiscal_months(start, end) -> tuple[int, int, int]:
+    """The fiscal year and month numbers (1-12) of a window inside one year."""
+    first, last = np.datetime64(start, "M").astype(np.int64), np.datetime64(end, "M").astype(np.int64)
+    year = int(first) // 12 + 1970
+    if int(last) // 12 + 1970 != year or last < first:
+        raise ValueError(f"budget windows stay within one fiscal year: {start} to {end}")
+    return year, int(first) % 12 + 1, int(last) % 12 + 1
+
+
+class BudgetBook:
+    """An ordinance's appropriations tracked against a :class:`Ledger`, rolled up at every node."""
+
+    def __init__(self, ledger: Ledger, ordinance: Ordinance):
+        self.ledger = ledger
+        self.ordinance = ordinance
+        accounts, funds = ledger.accounts, ledger.funds
+        labels = {a.code: f"{a.code} {a.name}" for a in accounts}
+
+        # Appropriation leaves in fund order, then every object code a fund
+        # left out, under its Unappropriated office.
+        self._expense_leaf = np.full((len(funds), len(accounts)), -1, dtype=np.intp)
+        keys, amounts = [], []
+        for fund_id, fund in enumerate(funds):
+            for line in ordinance.appropriations:
+                if line.fund != fund:
+                    continue
+                account = ledger.account_id(line.account)
+                if accounts[account].kind != EXPENSE:
+                    raise ValueError(f"{line.account} is not an expense account")
+                if self._expense_leaf[fund_id, account] >= 0:
+                    raise ValueError(f"{fund} appropriates {line.account} more than once; "
+                                     f"journal lines carry no office to tell them apart")
+                self._expense_leaf[fund_id, account] = len(keys)
+                keys.append((fund, line.office, line.account))
+                amounts.append(line.amount)
+            for account, info in enumerate(accounts):
+                if info.kind == EXPENSE and self._expense_leaf[fund_id, account] < 0:
+                    self._expense_leaf[fund_id, account] = len(keys)
+                    keys.append((fund, UNAPPROPRIATED, info.code))
+                    amounts.append(0)
+        unknown = {line.fund for line in ordinance.appropriations} - set(funds)
+        if unknown:
+            raise KeyError(f"unknown fund: {sorted(unknown)[0]}")
+        self.appropriations = BudgetTree(ALL_FUNDS, keys, labels)
+        self._appropriated = np.array(amounts, dtype=np.int64)
+
+        # Revenue leaves: every (fund, revenue account).
+        self._revenue_leaf = np.full((len(funds), len(accounts)), -1, dtype=np.intp)
+        keys = []
+        for fund_id, fund in enumerate(funds):
+            for account, info in enumerate(accounts):
+                if info.kind == REVENUE:
+                    self._revenue_leaf[fund_id, account] = len(keys)
+                    keys.append((fund, info.code))
+        self.revenues = BudgetTree(ALL_FUNDS, keys, labels)
+        estimated = np.zeros(len(keys), dtype=np.int64)
+        for line in ordinance.revenues:
+            leaf = self._revenue_leaf[ledger.fund_id(line.fund), ledger.account_id(line.account)]
+            if leaf < 0:
+                raise ValueError(f"{line.account} is not a revenue account")
+            estimated[leaf] += line.amount
+
+        self.appropriated = self.appropriations.roll_up(self._appropriated)
+        self.estimated = self.revenues.roll_up(estimated)
+        self._allotments = self._release_schedule()
+        self._cash = np.isin([a.code for a in accounts], CASH_ACCOUNTS)
+        self._payable = np.isin([a.code for a in accounts], PAYABLE_ACCOUNTS)
+        # (month × node × measure) and (month × node) per fiscal year.
+        self._spending: dict[int, np.ndarray] = {}
+        self._collections: dict[int, np.ndarray] = {}
+        # Per fund, [leaf, centavos] still owed through payables, oldest first.
+        self._unpaid: dict[int, deque[list[int]]] = {}
+        self._add(0, len(ledger))
+        ledger.add_listener(self._add)
+
+    def _release_schedule(self) -> np.ndarray:
+        """(month × node) allotments; remainders are released with the last share."""
+        months = np.array(RELEASES[self.ordinance.releases]) - 1
+        share = self._appropriated // len(months)
+        leaves = np.zeros((12, len(self._appropriated)), dtype=np.int64)
+        leaves[months] = share
+        leaves[months[-1]] += self._appropriated - share * len(months)
+        return self.appropriations.roll_up(leaves)
+
+    def _year(self, year: int) -> tuple[np.ndarray, np.ndarray]:
+        if year not in self._spending:
+            spending = np.zeros((12, len(self.appropriations), 3), dtype=np.int64)
+            spending[:, :, ALLOTMENT] = self._allotments
+            self._spending[year] = spending
+            self._collections[year] = np.zeros((12, len(self.revenues)), dtype=np.int64)
+        return self._spending[year], self._collections[year]
+
+    def _scatter(self, years: np.ndarray, months: np.ndarray, leaves: np.ndarray,
+                 amounts: np.ndarray, measure: int | None) -> None:
+        """Add amounts by (year, month, leaf) to every node above the leaf."""
+        tree = self.appropriations if measure is not None else self.revenues
+        width = len(tree.paths)
+        for year in np.unique(years).tolist():
+            rows = years == year
+            cells = np.bincount(months[rows] * width + leaves[rows], weights=amounts[rows],
+                                minlength=12 * width)
+            nodes = tree.roll_up(np.rint(cells).astype(np.int64).reshape(12, width))
+            spending, collections = self._year(year)
+            if measure is None:
+                collections += nodes
+            else:
+                spending[:, :, measure] += nodes
+
+    def _add(self, start: int, end: int) -> None:
+        ledger = self.ledger
+        if end <= start:
+            return
+        days = ledger.date[start:end]
+        accounts = ledger.account[start:end].astype(np.intp)
+        funds = ledger.fund[start:end].astype(np.intp)
+        net = ledger.debit[start:end] - ledger.credit[start:end]
+        months = days.astype("datetime64[M]").astype(np.int64)
+        years, months = months // 12 + 1970, months % 12
+
+        revenue = self._revenue_leaf[funds, accounts]
+        rows = revenue >= 0
+        self._scatter(years[rows], months[rows], revenue[rows], -net[rows], None)
+
+        leaves = self._expense_leaf[funds, accounts]
+        spent = leaves >= 0
+        self._scatter(years[spent], months[spent], leaves[spent], net[spent], OBLIGATION)
+
+        # Entries in a batch have consecutive ids, so they index dense sums.
+        entries = ledger.je[start:end].astype(np.intp)
+        entries = entries - entries.min()
+        size = int(entries.max()) + 1
+        charged = np.where(spent & (net > 0), net, 0)
+        cash_out = -np.bincount(entries, weights=np.where(self._cash[accounts], net, 0), minlength=size)
+        expense = np.bincount(entries, weights=charged, minlength=size)
+        paid = np.clip(np.minimum(cash_out, expense), 0, None)
+        ratio = np.divide(paid, expense, out=np.zeros(size), where=expense > 0)[entries]
+        disbursed = np.where(ratio >= 1, charged, np.floor(charged * ratio)).astype(np.int64)
+        rows = disbursed > 0
+        self._scatter(years[rows], months[rows], leaves[rows], disbursed[rows], DISBURSEMENT)
+
+        for row in np.flatnonzero(charged > disbursed).tolist():
+            self._unpaid.setdefault(int(funds[row]), deque()).append(
+                [int(leaves[row]), int(charged[row] - disbursed[row])])
+
+        settled = np.bincount(entries, weights=np.where(self._payable[accounts], np.maximum(net, 0), 0),
+                              minlength=size)
+        settled = np.minimum(settled, np.clip(cash_out - paid, 0, None))
+        if settled.any():
+            self._settle(np.flatnonzero(self._payable[accounts] & (net > 0)), entries, settled,
+                         funds, years, months)
+
+    def _settle(self, rows: np.ndarray, entries: np.ndarray, settled: np.ndarray,
+                funds: np.ndarray, years: np.ndarray, months: np.ndarray) -> None:
+        """Disburse payable settlements against each fund's oldest unpaid obligations."""
+        hits: list[tuple[int, int, int, int]] = []
+        for row in rows.tolist():
+            entry = entries[row]
+            amount, settled[entry] = int(settled[entry]), 0
+            queue = self._unpaid.get(int(funds[row]))
+            while amount > 0 and queue:
+                owed = queue[0]
+                part = min(amount, owed[1])
+                hits.append((int(years[row]), int(months[row]), owed[0], part))
+                owed[1] -= part
+                amount -= part
+                if not owed[1]:
+                    queue.popleft()
+        if hits:
+            year, month, leaf, amount = (np.array(column, dtype=np.int64) for column in zip(*hits))
+            self._scatter(year, month, leaf, amount, DISBURSEMENT)
+
+    # -- queries ---------------------------------------------------------
+
+    def nodes(self, depth: int = 2) -> list[int]:
+        """Appropriation nodes down to ``depth`` (funds are 1, offices 2), in tree order."""
+        return self.appropriations.descendants(0, depth)
+
+    def unpaid(self) -> int:
+        """Obligations still owed through payables, in centavos."""
+        return sum(owed for queue in self._unpaid.values() for _, owed in queue)
+
+    def utilization(self, start: date | str, end: date | str, node: int = 0,
+                    depth: int = 1) -> pd.DataFrame:
+        """Appropriation status of ``node`` and the nodes ``depth`` levels below it.
+
+        Columns are centavos: the annual Appropriation, Allotments released
+        to date, Obligations and Disbursements for months ``start`` through
+        ``end``, the Unobligated allotment to date (negative when a node is
+        over-obligated) and Utilization %, obligations to date over the
+        appropriation.  The node's own row comes first, in capitals.
+        """
+        year, first, last = _fiscal_months(start, end)
+        spending = self._year(year)[0]
+        rows = self.appropriations.descendants(node, depth)
+        to_date = spending[:last, rows].sum(axis=0)
+        window = spending[first - 1:last, rows].sum(axis=0)
+        appropriated = self.appropriated[rows]
+        top = self.appropriations.depths[node]
+        names = [self.appropriations.names[i] for i in rows]
+        items = [name.upper() if i == node else "    " * (self.appropriations.depths[i] - top - 1) + name
+                 for i, name in zip(rows, names)]
+        frame = pd.DataFrame({
+            "Item": items,
+            "Appropriation": appropriated,
+            "Allotments": to_date[:, ALLOTMENT],
+            "Obligations": window[:, OBLIGATION],
+            "Disbursements": window[:, DISBURSEMENT],
+            "Unobligated": to_date[:, ALLOTMENT] - to_date[:, OBLIGATION],
+        })
+        frame["Utilization %"] = (pd.Series(to_date[:, OBLIGATION]) * 100
+                                  / pd.Series(appropriated).where(appropriated != 0)).round(1)
+        return frame
+
+    def summary(self, start: date | str, end: date | str, fund: str | None = None) -> pd.DataFrame:
+        """Budget against actual Income, Expenses and Net Income (centavos) for months ``start`` through ``end``.
+
+        The budget is the months' share of the estimated revenues and the
+        appropriations; actual expenses are the obligations incurred.
+        """
+        year, first, last = _fiscal_months(start, end)
+        spending, collections = self._year(year)
+        expense_node = 0 if fund is None else self.appropriations.node(fund)
+        revenue_node = 0 if fund is None else self.revenues.node(fund)
+        months = last - first + 1
+        budget = {
+            "Income": int(self.estimated[revenue_node]) * months // 12,
+            "Expenses": int(self.appropriated[expense_node]) * months // 12,
+        }
+        actual = {
+            "Income": int(collections[first - 1:last, revenue_node].sum()),
+            "Expenses": int(spending[first - 1:last, expense_node, OBLIGATION].sum()),
+        }
+        budget["Net Income"] = budget["Income"] - budget["Expenses"]
+        actual["Net Income"] = actual["Income"] - actual["Expenses"]
+        frame = pd.DataFrame({
+            "Category": list(budget),
+            "Budget": list(budget.values()),
+            "Actual": list(actual.values()),
+        })
+        frame["Variance"] = frame["Actual"] - frame["Budget"]
+        frame["Utilization %"] = (frame["Actual"] / frame["Budget"].where(frame["Budget"] != 0) * 100).round(1)
+        return frame
+
+
+def source_ordinance(source: str) -> Ordinance:
+    """The ordinance named by ``source``: ``"sample"``, a JSON file, or ``""`` for none yet.
+
+    The file holds ``appropriations`` and ``revenues`` as lists of objects
+    with the fields of :class:`Appropriation` and :class:`RevenueEstimate`
+    (amounts in centavos) and optionally ``releases``.  Without an
+    ordinance the books are still tracked, every expense unappropriated.
+    """
+    if source == "sample":
+        from .sample import sample_ordinance
+
+        return sample_ordinance()
+    if not source:
+        return Ordinance(appropriations=())
+    spec = json.loads(Path(source).read_text())
+    return Ordinance(
+        appropriations=tuple(Appropriation(**line) for line in spec.get("appropriations", ())),
+        revenues=tuple(RevenueEstimate(**line) for line in spec.get("revenues", ())),
+        releases=spec.get("releases", "quarterly"),
+    )
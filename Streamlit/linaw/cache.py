@@ -0,0 +1,258 @@
+"""Cross-session query cache with version-keyed invalidation.
+
+Every Streamlit session reruns the page scripts from the top, so without
+a shared cache each visitor recomputes the same frames and figures.
+``QueryCache`` memoizes those results once per process.  Each entry
+records the versions of the data sources it was computed from (the
+ledger's posting version, the chain height); an entry is served only
+while those versions are current, so invalidation is exact rather than
+time-based.  Concurrent misses for the same key are collapsed into a
+single computation, and the cache is bounded by LRU eviction.
+
+Caches belonging to different tenants can share one :class:`CacheBudget`
+of (approximate) bytes.  The budget is enforced by fair share: when it is
+exceeded, entries are evicted from whichever cache is furthest over its
+weighted share, so one tenant filling its cache evicts its own entries
+rather than everyone else's working set.
+
+Cached values are shared between sessions and must be treated as
+read-only by callers.
+"""
+
+from __future__ import annotations
+
+import functools
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+# Sentinel for "no cached value" distinct from a cached ``None``.
+_MISSING = object()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate bytes held by a cached value (frames, arrays, bytes and containers of them)."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    if _depth < 4:
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+                                              for k, v in value.items())
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return sys.getsizeof(value) + sum(estimate_size(v, _depth + 1) for v in value)
+        # Plotly figures and similar objects keep their data in a dict.
+        to_dict = getattr(value, "to_plotly_json", None)
+        if to_dict is not None:
+            return estimate_size(to_dict(), _depth + 1)
+        if hasattr(value, "__dict__"):
+            return sys.getsizeof(value) + estimate_size(vars(value), _depth + 1)
+    return sys.getsizeof(value)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CacheBudget:
+    """Byte budget shared by several caches and enforced by fair share.
+
+    A cache's share is ``max_bytes * weight / total weight``.  A cache may
+    grow past its share while others leave theirs unused; once the total
+    is over budget, least recently used entries are evicted from the cache
+    with the highest usage relative to its share until the total fits.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._weights: dict[QueryCache, float] = {}
+        self._used: dict[QueryCache, int] = {}
+        self._lock = threading.Lock()
+
+    def register(self, cache: "QueryCache", weight: float = 1.0) -> None:
+        with self._lock:
+            self._weights[cache] = weight
+            self._used.setdefault(cache, 0)
+
+    def unregister(self, cache: "QueryCache") -> None:
+        with self._lock:
+            self._weights.pop(cache, None)
+            self._used.pop(cache, None)
+
+    def share(self, cache: "QueryCache") -> int:
+        with self._lock:
+            total = sum(self._weights.values())
+            return int(self.max_bytes * self._weights.get(cache, 0) / total) if total else 0
+
+    @property
+    def used(self) -> int:
+        with self._lock:
+            return sum(self._used.values())
+
+    def charge(self, cache: "QueryCache", size: int) -> None:
+        """Account ``size`` bytes (negative when freed) to ``cache`` and evict until within budget."""
+        with self._lock:
+            if cache in self._used:
+                self._used[cache] += size
+        if size > 0:
+            self._enforce()
+
+    def _victim(self) -> "QueryCache | None":
+        with self._lock:
+            if sum(self._used.values()) <= self.max_bytes:
+                return None
+            total = sum(self._weights.values())
+            return max(self._used, key=lambda c: self._used[c] * total / self._weights[c], default=None)
+
+    def _enforce(self) -> None:
+        while (victim := self._victim()) is not None:
+            freed = victim.evict_lru()
+            if freed is None:
+                # The heaviest cache is empty (its entries are still being computed).
+                return
+            with self._lock:
+                if victim in self._used:
+                    self._used[victim] -= freed
+
+
+class QueryCache:
+    """Size-bounded LRU of computed values keyed by data-source versions.
+
+    Sources are registered by name with a callable that returns their
+    current version in O(1); ``get`` and ``memoize`` name the sources a
+    value depends on.  With a ``budget``, the cache also counts its bytes
+    against that shared :class:`CacheBudget` with the given ``weight``.
+    """
+
+    def __init__(self, max_entries: int = 1024, budget: CacheBudget | None = None, weight: float = 1.0):
+        self.max_entries = max_entries
+        self.budget = budget
+        self._sources: dict[str, Callable[[], Hashable]] = {}
+        self._entries: OrderedDict[Hashable, tuple[tuple[str, ...], tuple, Any, int]] = OrderedDict()
+        self._inflight: dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._bytes = 0
+        if budget is not None:
+            budget.register(self, weight)
+
+    def close(self) -> None:
+        """Drop every entry and leave the shared budget."""
+        self.invalidate()
+        if self.budget is not None:
+            self.budget.unregister(self)
+
+    def add_source(self, name: str, version: Callable[[], Hashable]) -> None:
+        self._sources[name] = version
+
+    def versions(self, depends: tuple[str, ...]) -> tuple:
+        return tuple(self._sources[name]() for name in depends)
+
+    def get(self, key: Hashable, depends: tuple[str, ...], compute: Callable[[], Any]) -> Any:
+        """Return the value cached under ``key`` for the current versions, computing it once."""
+        while True:
+            versions = self.versions(depends)
+            with self._lock:
+                found = self._entries.get(key, _MISSING)
+                if found is not _MISSING:
+                    _, stored_versions, value, size = found
+                    if stored_versions == versions:
+                        self._entries.move_to_end(key)
+                        self._stats.hits += 1
+                        return value
+                    del self._entries[key]
+                    self._bytes -= size
+                    self._stats.invalidations += 1
+                    self._charge(-size)
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    self._inflight[key] = threading.Event()
+                    self._stats.misses += 1
+                    break
+            # Another session is computing this key; use its result.
+            waiting.wait()
+
+        try:
+            value = compute()
+            size = estimate_size(value) if self.budget is not None else 0
+            freed = 0
+            with self._lock:
+                self._entries[key] = (depends, versions, value, size)
+                self._entries.move_to_end(key)
+                self._bytes += size
+                while len(self._entries) > self.max_entries:
+                    freed += self._entries.popitem(last=False)[1][3]
+                    self._stats.evictions += 1
+                self._bytes -= freed
+            self._charge(size - freed)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def _charge(self, size: int) -> None:
+        if self.budget is not None and size:
+            self.budget.charge(self, size)
+
+    def evict_lru(self) -> int | None:
+        """Evict the least recently used entry; its size, or ``None`` if the cache is empty."""
+        with self._lock:
+            if not self._entries:
+                return None
+            size = self._entries.popitem(last=False)[1][3]
+            self._bytes -= size
+            self._stats.evictions += 1
+            return size
+
+    def memoize(self, *depends: str) -> Callable:
+        """Decorator form of :meth:`get`, keyed by function name and arguments."""
+
+        def decorator(fn: Callable) -> Callable:
+            # Page scripts all run as ``__main__``, so key by source file.
+            name = f"{fn.__code__.co_filename}:{fn.__qualname__}"
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = (name, args, tuple(sorted(kwargs.items())))
+                return self.get(key, depends, lambda: fn(*args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, depends: str | None = None) -> None:
+        """Drop every entry (or every entry that depends on one source)."""
+        with self._lock:
+            if depends is None:
+                stale = list(self._entries)
+            else:
+                stale = [key for key, entry in self._entries.items() if depends in entry[0]]
+            freed = sum(self._entries.pop(key)[3] for key in stale)
+            self._bytes -= freed
+            self._stats.invalidations += len(stale)
+        self._charge(-freed)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._stats.hits, self._stats.misses, self._stats.invalidations,
+                              self._stats.evictions, len(self._entries), self._bytes)
@@ -0,0 +1,200 @@
+"""Background chain-status poller shared by every session.
+
+One poller per server process asks the network for its state on a fixed
+interval and publishes an immutable :class:`ChainStatus`.  Publishing is a
+single reference assignment, so the pages read ``poller.snapshot`` without
+locks and never touch the network on a rerun.
+
+Each poll uses the same endpoints as the Go ``kaleido`` package:
+
+* FabConnect ``/chainInfo`` for the block height (and gateway reachability),
+* the Kaleido admin API ``/consortia/{id}/environments/{id}/nodes``
+  (``ListNodes``) for peer and orderer state, when ``APIKEY``,
+  ``KALEIDO_CONSORTIUM`` and ``KALEIDO_ENVIRONMENT`` are set.
+
+The receipt backlog (writes submitted through the app and still waiting
+for a receipt) is read from the tenant's :class:`~linaw.outbox.Outbox`,
+whose dispatcher fetches the receipts.
+
+Failed polls back off exponentially with jitter up to a ceiling.  The
+HTTP stack is imported when the first poll runs, so a process without
+FabConnect only ever reads the idle snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiohttp
+
+    from .fabconnect import FabconnectClient, FabconnectConfig
+    from .outbox import Outbox
+
+log = logging.getLogger(__name__)
+
+KALEIDO_API_URL = "https://console.kaleido.io/api/v1"
+NODE_STARTED = "started"
+
+
+@dataclass(frozen=True)
+class KaleidoConfig:
+    url: str = KALEIDO_API_URL
+    api_key: str = ""
+    consortium: str = ""
+    environment: str = ""
+
+    @classmethod
+    def from_env(cls) -> "KaleidoConfig | None":
+        """Config from ``KALEIDO_URL``/``APIKEY``/``KALEIDO_CONSORTIUM``/``KALEIDO_ENVIRONMENT``, if set."""
+        config = cls(
+            url=os.getenv("KALEIDO_URL") or cls.url,
+            api_key=os.getenv("APIKEY", ""),
+            consortium=os.getenv("KALEIDO_CONSORTIUM", ""),
+            environment=os.getenv("KALEIDO_ENVIRONMENT", ""),
+        )
+        return config if config.api_key and config.consortium and config.environment else None
+
+    @property
+    def nodes_url(self) -> str:
+        return f"{self.url.rstrip('/')}/consortia/{self.consortium}/environments/{self.environment}/nodes"
+
+
+@dataclass(frozen=True)
+class ChainStatus:
+    """One published poll result; ``reachable`` is ``None`` until the first poll."""
+
+    height: int | None = None
+    reachable: bool | None = None
+    peers_up: int | None = None
+    peers: int | None = None
+    orderers_up: int | None = None
+    orderers: int | None = None
+    receipt_backlog: int = 0
+    checked_at: datetime | None = None
+    failures: int = 0
+    error: str | None = None
+
+    @property
+    def degraded(self) -> bool:
+        return ((self.peers is not None and self.peers_up < self.peers)
+                or (self.orderers is not None and self.orderers_up < self.orderers))
+
+    @property
+    def label(self) -> str:
+        if self.reachable is None:
+            return "⚪ Not connected"
+        if not self.reachable:
+            return "🔴 Unreachable"
+        return "🟡 Degraded" if self.degraded else "🟢 Active"
+
+    @property
+    def height_label(self) -> str:
+        return "—" if self.height is None else f"{self.height:,}"
+
+
+class ChainStatusPoller:
+    """Polls FabConnect (and optionally Kaleido) and publishes a :class:`ChainStatus`."""
+
+    def __init__(self, config: FabconnectConfig | None = None, kaleido: KaleidoConfig | None = None, *,
+                 client: FabconnectClient | None = None, outbox: Outbox | None = None,
+                 interval: float = 10.0, max_delay: float = 300.0, request_timeout: float = 5.0):
+        self.config = config
+        self._client = client
+        # A client passed in is shared with the tenant's other tasks; it is not ours to close.
+        self._owns_client = client is None
+        self.kaleido = kaleido
+        self.outbox = outbox
+        self.interval = interval
+        self.max_delay = max_delay
+        self.request_timeout = request_timeout
+        self.snapshot = ChainStatus()
+        self._kaleido_session: aiohttp.ClientSession | None = None
+
+    @property
+    def client(self) -> FabconnectClient:
+        if self._client is None:
+            from .fabconnect import FabconnectClient
+
+            self._client = FabconnectClient(self.config, request_timeout=self.request_timeout)
+        return self._client
+
+    async def _nodes(self) -> tuple[int, int, int, int]:
+        """(peers started, peers, orderers started, orderers) from the Kaleido admin API."""
+        import aiohttp
+
+        from .fabconnect import FabconnectError
+
+        if self._kaleido_session is None or self._kaleido_session.closed:
+            # Separate from the FabConnect session, which carries that gateway's credentials.
+            self._kaleido_session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.kaleido.api_key}"},
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+        async with self._kaleido_session.get(self.kaleido.nodes_url) as resp:
+            if resp.status != 200:
+                raise FabconnectError(f"failed to list nodes: {resp.status} {await resp.text()}")
+            nodes = await resp.json(content_type=None)
+        counts = []
+        for role in ("peer", "orderer"):
+            group = [n for n in nodes if n.get("role") == role]
+            counts += [sum(n.get("state") == NODE_STARTED for n in group), len(group)]
+        return tuple(counts)
+
+    async def poll_once(self) -> ChainStatus:
+        """Query the network once and publish the result."""
+        height = await self.client.chain_height()
+        backlog = (await asyncio.to_thread(self.outbox.stats)).in_flight if self.outbox else 0
+        nodes = await self._nodes() if self.kaleido else (None, None, None, None)
+        self.snapshot = ChainStatus(height, True, *nodes, receipt_backlog=backlog,
+                                    checked_at=datetime.now())
+        return self.snapshot
+
+    async def close(self) -> None:
+        if self._owns_client and self._client is not None:
+            await self._client.close()
+        if self._kaleido_session is not None:
+            await self._kaleido_session.close()
+
+    async def run(self) -> None:
+        """Poll until cancelled; failures back off exponentially with jitter."""
+        import aiohttp
+
+        from .fabconnect import FabconnectError
+
+        failures = 0
+        try:
+            while True:
+                try:
+                    await self.poll_once()
+                    failures = 0
+                    delay = self.interval
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError, FabconnectError) as err:
+                    failures += 1
+                    delay = min(self.interval * 2 ** failures, self.max_delay)
+                    # Keep the last known height; mark the network unreachable.
+                    self.snapshot = replace(self.snapshot, reachable=False, failures=failures,
+                                            error=str(err) or type(err).__name__,
+                                            checked_at=datetime.now())
+                    log.warning("Chain status poll failed (%d in a row): %s. Retrying in ~%.1fs",
+                                failures, err, delay)
+                except Exception as err:
+                    # A malformed response or a store failure must not freeze the
+                    # published status for the life of the process.
+                    failures += 1
+                    delay = min(self.interval * 2 ** failures, self.max_delay)
+                    self.snapshot = replace(self.snapshot, reachable=False, failures=failures,
+                                            error=str(err) or type(err).__name__,
+                                            checked_at=datetime.now())
+                    log.exception("Chain status poll failed (%d in a row). Retrying in ~%.1fs",
+                                  failures, delay)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        finally:
+            await self.close()
+
@@ -0,0 +1,195 @@
+"""Date-ordered index of journal entry headers.
+
+Entries are kept sorted by their posting date (ties in posting order), so
+a date range is two binary searches and any page of headers inside it is
+a slice.  Journal lines are grouped by entry once, so opening an entry
+reads only its own lines instead of scanning the journal.  The index
+subscribes to the ledger: new entries are appended (or merged in when
+back-dated) as they are posted.
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import date
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .ledger import Ledger
+
+HEADER_COLUMNS = ["Reference", "Date", "Description", "Amount"]
+LINE_COLUMNS = ["Reference", "Date", "Account", "Category", "Description", "Amount"]
+
+
+def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+    capacity = len(array)
+    if needed <= capacity:
+        return array
+    capacity = max(capacity, 16)
+    while capacity < needed:
+        capacity *= 2
+    grown = np.empty(capacity, dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class EntryIndex:
+    """Sorted (date, entry) index plus per-entry line offsets over a :class:`Ledger`."""
+
+    def __init__(self, ledger: Ledger):
+        self.ledger = ledger
+        self._lock = threading.Lock()
+        self._build()
+        ledger.add_listener(self._on_append)
+
+    def _build(self) -> None:
+        ledger = self.ledger
+        n = len(ledger)
+        entries = len(ledger.je_refs)
+        je = ledger.je
+        # Lines grouped by entry, in posting order within each entry.
+        self._line_rows = np.argsort(je, kind="stable").astype(np.int64)
+        self._line_start = np.searchsorted(je[self._line_rows], np.arange(entries + 1)).astype(np.int64)
+        self._lines = n
+
+        ids, first = np.unique(je, return_index=True)
+        self._date = np.full(entries, np.datetime64("NaT"), dtype="datetime64[D]")
+        self._date[ids] = ledger.date[first]
+        self._amount = np.bincount(je, weights=ledger.debit, minlength=entries).astype(np.int64)
+        self._entries = entries
+
+        self._order = ids[np.lexsort((ids, self._date[ids]))].astype(np.int64)
+        self._sorted_dates = self._date[self._order]
+        self._size = len(self._order)
+
+    def _on_append(self, start: int, end: int) -> None:
+        ledger = self.ledger
+        je = ledger.je[start:end]
+        with self._lock:
+            # Entries are posted whole, so a batch normally holds only new
+            # entries in id order; anything else is rare enough to rebuild.
+            if start != self._lines or je[0] < self._entries or (np.diff(je) < 0).any():
+                self._build()
+                return
+            ids, first = np.unique(je, return_index=True)
+            entries = len(ledger.je_refs)
+
+            self._line_rows = _grow(self._line_rows, end)
+            self._line_rows[start:end] = np.arange(start, end)
+            self._line_start = _grow(self._line_start, entries + 1)
+            boundaries = np.searchsorted(je, np.arange(self._entries, entries + 1)) + start
+            self._line_start[self._entries: entries + 1] = boundaries
+            self._lines = end
+
+            self._date = _grow(self._date, entries)
+            self._date[self._entries: entries] = np.datetime64("NaT")
+            self._date[ids] = ledger.date[start:end][first]
+            self._amount = _grow(self._amount, entries)
+            self._amount[self._entries: entries] = 0
+            np.add.at(self._amount, je, ledger.debit[start:end])
+            self._entries = entries
+
+            new = ids[np.lexsort((ids, self._date[ids]))]
+            size = self._size + len(new)
+            self._order = _grow(self._order, size)
+            self._sorted_dates = _grow(self._sorted_dates, size)
+            self._order[self._size: size] = new
+            self._sorted_dates[self._size: size] = self._date[new]
+            if self._size and self._date[new[0]] < self._sorted_dates[self._size - 1]:
+                # Back-dated entries: merge them into place.
+                order = self._order[:size]
+                merged = order[np.lexsort((order, self._date[order]))]
+                self._order[:size] = merged
+                self._sorted_dates[:size] = self._date[merged]
+            self._size = size
+
+    # -- queries ---------------------------------------------------------
+
+    def _range(self, start: date | None, end: date | None) -> tuple[int, int]:
+        dates = self._sorted_dates[: self._size]
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = self._size if end is None else int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return lo, max(lo, hi)
+
+    def count(self, start: date | None = None, end: date | None = None) -> int:
+        """Entries first posted within an inclusive date range."""
+        lo, hi = self._range(start, end)
+        return hi - lo
+
+    def headers(self, start: date | None = None, end: date | None = None,
+                offset: int = 0, limit: int | None = None) -> pd.DataFrame:
+        """Header rows for entries in the range, oldest first, from ``offset``."""
+        with self._lock:
+            lo, hi = self._range(start, end)
+            lo = min(hi, lo + offset)
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            ids = self._order[lo:hi]
+            dates = self._sorted_dates[lo:hi]
+            amounts = self._amount[ids]
+        ledger = self.ledger
+        return pd.DataFrame({
+            "Reference": [ledger.je_refs[i] for i in ids],
+            "Date": dates,
+            "Description": [ledger.je_descriptions[i] for i in ids],
+            "Amount": amounts,
+        }, columns=HEADER_COLUMNS)
+
+    def pages(self, start: date | None = None, end: date | None = None,
+              size: int = 50) -> Iterator[pd.DataFrame]:
+        """Header pages for the range, each resolved only when it is reached."""
+        for offset in range(0, self.count(start, end), size):
+            yield self.headers(start, end, offset, size)
+
+    def lines(self, ref: str) -> pd.DataFrame:
+        """Line items of one entry: Account, Debit, Credit."""
+        ledger = self.ledger
+        entry = ledger.entry_id(ref)
+        with self._lock:
+            rows = self._line_rows[self._line_start[entry]: self._line_start[entry + 1]]
+        names = np.asarray([a.name for a in ledger.accounts], dtype=object)
+        return pd.DataFrame({
+            "Account": names[ledger.account[rows]],
+            "Debit": ledger.debit[rows],
+            "Credit": ledger.credit[rows],
+        })
+
+    def recent_lines(self, kind: str, start: date | None = None, end: date | None = None,
+                     limit: int = 10) -> pd.DataFrame:
+        """The latest ``limit`` lines on ``kind`` accounts in the range, newest entry first.
+
+        Amounts are signed by the account's normal side, so revenue and
+        expense lines both read as positive centavos.
+        """
+        ledger = self.ledger
+        accounts = ledger.accounts
+        kinds = np.array([a.kind for a in accounts])
+        signs = np.array([a.normal_sign for a in accounts], dtype=np.int64)
+        found: list[np.ndarray] = []
+        with self._lock:
+            lo, hi = self._range(start, end)
+            chunk = max(4 * limit, 64)
+            # Walk back from the newest entry, a growing chunk at a time,
+            # until enough lines of the kind turn up.
+            while hi > lo and sum(len(rows) for rows in found) < limit:
+                ids = self._order[max(lo, hi - chunk):hi][::-1]
+                first, stop = self._line_start[ids], self._line_start[ids + 1]
+                counts = stop - first
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                rows = self._line_rows[np.repeat(first, counts) + offsets]
+                found.append(rows[kinds[ledger.account[rows]] == kind])
+                hi -= chunk
+                chunk *= 2
+        rows = np.concatenate(found)[:limit] if found else np.arange(0)
+        account = ledger.account[rows]
+        je = ledger.je[rows]
+        return pd.DataFrame({
+            "Reference": [ledger.je_refs[i] for i in je],
+            "Date": ledger.date[rows],
+            "Account": [accounts[i].name for i in account],
+            "Category": [accounts[i].section for i in account],
+            "Description": [ledger.je_descriptions[i] for i in je],
+            "Amount": (ledger.debit[rows] - ledger.credit[rows]) * signs[account],
+        }, columns=LINE_COLUMNS)
@@ -0,0 +1,229 @@
+"""Local store for chain events delivered by FabConnect.
+
+Events are materialized into SQLite in WAL mode so the pages can read the
+latest chain activity from an indexed local table while the ingester keeps
+writing, without ever touching the network on a rerun.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from .settings import data_dir
+
+# Document id prefixes used across the pages, mapped to display names.
+DOCUMENT_TYPES = {
+    "FR": "Financial Report",
+    "EXP": "Expense Entry",
+    "INC": "Income Entry",
+    "JE": "Journal Entry",
+    "JEB": "Journal Batch",
+    "ORD": "Ordinance",
+    "RES": "Resolution",
+    "PROC": "Procurement",
+    "INFRA": "Infrastructure",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    tx_index     INTEGER NOT NULL,
+    event_index  INTEGER NOT NULL,
+    tx_id        TEXT NOT NULL,
+    chaincode_id TEXT,
+    event_name   TEXT NOT NULL,
+    document_id  TEXT,
+    timestamp    TEXT,
+    payload      TEXT NOT NULL,
+    PRIMARY KEY (block_number, tx_index, event_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_document ON events (document_id);
+CREATE INDEX IF NOT EXISTS events_name ON events (event_name, block_number);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    stream       TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    tx_index     INTEGER NOT NULL,
+    event_index  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+Position = tuple[int, int, int]
+
+
+def event_position(event: dict) -> Position:
+    return (int(event.get("blockNumber", 0)),
+            int(event.get("transactionIndex", 0)),
+            int(event.get("eventIndex", 0)))
+
+
+def document_type(document_id: str | None) -> str:
+    prefix = (document_id or "").split("-", 1)[0]
+    return DOCUMENT_TYPES.get(prefix, "Asset")
+
+
+def _status(anchored: str | None, expected: str | None) -> str:
+    """An event's status from the hash it anchored and the hash the local records expect."""
+    if anchored is None or expected is None:
+        return "🔗 Recorded"
+    if anchored.lower().removeprefix("0x") == expected.lower().removeprefix("0x"):
+        return "✅ Verified"
+    return "⚠️ Hash mismatch"
+
+
+class EventStore:
+    """SQLite-backed table of chain events plus per-stream ack checkpoints."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else data_dir() / "events.db"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def write_batch(self, stream: str, events: Iterable[dict]) -> int:
+        """Insert a delivered batch and advance the stream checkpoint atomically.
+
+        Events at or before the checkpoint are redeliveries and are skipped.
+        Returns the number of new events stored.
+        """
+        checkpoint = self.checkpoint(stream)
+        rows = []
+        last = checkpoint
+        for event in events:
+            position = event_position(event)
+            if checkpoint is not None and position <= checkpoint:
+                continue
+            payload = event.get("payload") or {}
+            rows.append((*position, event.get("transactionId", ""), event.get("chaincodeId"),
+                         event.get("eventName", ""), payload.get("ID"), event.get("timestamp"),
+                         json.dumps(payload, separators=(",", ":"))))
+            last = max(last, position) if last is not None else position
+        if not rows:
+            return 0
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute(
+                    "INSERT INTO checkpoints VALUES (?, ?, ?, ?) ON CONFLICT(stream) DO UPDATE SET "
+                    "block_number=excluded.block_number, tx_index=excluded.tx_index, "
+                    "event_index=excluded.event_index",
+                    (stream, *last))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def checkpoint(self, stream: str) -> Position | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT block_number, tx_index, event_index FROM checkpoints WHERE stream = ?",
+                (stream,)).fetchone()
+        return tuple(row) if row else None
+
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def height(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT MAX(block_number) FROM events").fetchone()
+        return row[0] or 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def document_hashes(self, document_ids: Iterable[str]) -> dict[str, tuple[str, int]]:
+        """Latest anchored ``Hash`` and its block number for each document id."""
+        ids = list(dict.fromkeys(document_ids))
+        anchored: dict[str, tuple[str, int]] = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._db.execute(
+                    "SELECT document_id, json_extract(payload, '$.Hash'), block_number FROM events "
+                    f"WHERE document_id IN ({','.join('?' * len(chunk))}) "
+                    "AND json_extract(payload, '$.Hash') IS NOT NULL "
+                    "ORDER BY block_number, tx_index, event_index",
+                    chunk).fetchall()
+                for document_id, digest, block in rows:
+                    anchored[document_id] = (digest, block)
+        return anchored
+
+    @staticmethod
+    def _table(rows: list[tuple]):
+        import pyarrow as pa
+
+        columns = ("block_number", "tx_index", "event_index", "tx_id", "chaincode_id",
+                   "event_name", "document_id", "timestamp", "payload")
+        types = (pa.int64(), pa.int32(), pa.int32(), pa.string(), pa.string(),
+                 pa.string(), pa.string(), pa.string(), pa.string())
+        return pa.table({name: pa.array([row[i] for row in rows], type=kind)
+                         for i, (name, kind) in enumerate(zip(columns, types))})
+
+    def rows_after(self, block_number: int):
+        """Events in blocks after ``block_number``, in chain order, as a ``pyarrow.Table``."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT block_number, tx_index, event_index, tx_id, chaincode_id, event_name, "
+                "document_id, timestamp, payload FROM events WHERE block_number > ? "
+                "ORDER BY block_number, tx_index, event_index", (block_number,)).fetchall()
+        return self._table(rows)
+
+    def rows_since(self, position: Position | None, limit: int):
+        """Up to ``limit`` events after ``position`` (all from the start when ``None``), in chain order.
+
+        A range scan of the primary key, so polling an idle store is one index probe.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT block_number, tx_index, event_index, tx_id, chaincode_id, event_name, "
+                "document_id, timestamp, payload FROM events "
+                "WHERE (block_number, tx_index, event_index) > (?, ?, ?) "
+                "ORDER BY block_number, tx_index, event_index LIMIT ?",
+                (*(position or (-1, -1, -1)), limit)).fetchall()
+        return self._table(rows)
+
+    def recent(self, limit: int = 5, expected: Callable[[str], str | None] | None = None) -> pd.DataFrame:
+        """Latest events, newest first, shaped for the activity tables.
+
+        ``Status`` compares the hash each event anchored with ``expected(document_id)``,
+        the hash the local records say it should carry (``None`` when they have none).
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT block_number, timestamp, event_name, document_id, tx_id, "
+                "json_extract(payload, '$.Hash') FROM events "
+                "ORDER BY block_number DESC, tx_index DESC, event_index DESC LIMIT ?",
+                (limit,)).fetchall()
+        return pd.DataFrame({
+            "Block #": [r[0] for r in rows],
+            "Timestamp": [r[1] or "" for r in rows],
+            "Transaction Type": [document_type(r[3]) for r in rows],
+            "Document ID": [r[3] or "" for r in rows],
+            "Event": [r[2] for r in rows],
+            "Transaction ID": [f"{r[4][:10]}..." for r in rows],
+            "Status": [_status(r[5], expected(r[3]) if expected and r[3] and r[5] else None) for r in rows],
+        })
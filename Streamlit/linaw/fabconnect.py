@@ -0,0 +1,343 @@
+"""Asyncio FabConnect client.
+
+Mirrors the Go ``kaleido.FabconnectClient``: transactions are posted to
+``/transactions?fly-sync=false`` and confirmed through ``/receipts/{id}``.
+All requests share one keep-alive connection pool, submissions run with
+bounded concurrency, and receipt polling is pipelined behind submission so
+a batch of journal entries never waits on one blocking request per entry.
+
+Configuration follows the Go runner's environment variables:
+``FABCONNECT_URL``, ``FABCONNECT_WS_URL``, ``USER_ID``, ``CHANNEL_ID``,
+``CCNAME`` and ``EVENT_BATCH_SIZE``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import aiohttp
+from yarl import URL
+
+from .settings import env_int
+
+EVENT_LISTENER_TOPIC = "linaw-events"
+TOO_MANY_IN_FLIGHT = "Too many in-flight transactions"
+TRANSACTION_SUCCESS = "TransactionSuccess"
+TRANSACTION_FAILURE = "TransactionFailure"
+
+
+@dataclass(frozen=True)
+class FabconnectConfig:
+    url: str = "http://localhost:3000"
+    username: str = "user1"
+    channel: str = "default-channel"
+    chaincode: str = "asset_transfer"
+    ws_url: str = ""
+    event_batch_size: int = 1
+
+    @classmethod
+    def from_env(cls) -> "FabconnectConfig":
+        return cls(
+            url=os.getenv("FABCONNECT_URL") or cls.url,
+            username=os.getenv("USER_ID") or cls.username,
+            channel=os.getenv("CHANNEL_ID") or cls.channel,
+            chaincode=os.getenv("CCNAME") or cls.chaincode,
+            ws_url=os.getenv("FABCONNECT_WS_URL", ""),
+            event_batch_size=env_int("EVENT_BATCH_SIZE", cls.event_batch_size),
+        )
+
+    @property
+    def websocket_url(self) -> str:
+        """``FABCONNECT_WS_URL``, or the REST URL switched to ws(s) with ``/ws`` appended."""
+        if self.ws_url:
+            return self.ws_url
+        url = self.url.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        return url.rstrip("/") + "/ws"
+
+
+async def _json_object(resp: aiohttp.ClientResponse) -> dict:
+    """The response body as a JSON object; an empty, malformed or non-object body reads as ``{}``."""
+    try:
+        body = await resp.json(content_type=None)
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+def _omit_empty(values: dict) -> dict:
+    """Drop empty fields the way Go's ``omitempty`` JSON tags do."""
+    return {k: v for k, v in values.items() if v not in (None, "", [], {}, False, 0)}
+
+
+@dataclass
+class TransactionHeaders:
+    signer: str = ""
+    channel: str = ""
+    chaincode: str = ""
+    type: str = "SendTransaction"
+    # Request id; FabConnect files the receipt under it (a generated one when blank).
+    id: str = ""
+
+    def to_json(self) -> dict:
+        return _omit_empty({
+            "type": self.type,
+            "id": self.id,
+            "signer": self.signer,
+            "channel": self.channel,
+            "chaincode": self.chaincode,
+        })
+
+
+@dataclass
+class TransactionPayload:
+    """Python shape of the Go ``FabconnectTransactionPayload``."""
+
+    headers: TransactionHeaders
+    func: str
+    args: list[str] = field(default_factory=list)
+    init: bool = False
+
+    def to_json(self) -> dict:
+        return _omit_empty({
+            "headers": self.headers.to_json(),
+            "func": self.func,
+            "args": list(self.args),
+            "init": self.init,
+        })
+
+
+@dataclass
+class TransactionReceipt:
+    id: str
+    type: str = ""
+    status: str = ""
+    time_elapsed: float = 0.0
+    # Fabric transaction id and block, once the transaction is committed.
+    transaction_id: str = ""
+    block_number: int | None = None
+    error: str = ""
+
+    @classmethod
+    def from_json(cls, body: dict) -> "TransactionReceipt":
+        headers = body.get("headers") or {}
+        block = body.get("blockNumber")
+        return cls(
+            id=body.get("_id", ""),
+            type=headers.get("type", ""),
+            status=body.get("status", ""),
+            time_elapsed=headers.get("timeElapsed", 0.0),
+            transaction_id=body.get("transactionID", ""),
+            block_number=None if block in (None, "") else int(block),
+            error=body.get("errorMessage", ""),
+        )
+
+    @property
+    def succeeded(self) -> bool:
+        return self.type == TRANSACTION_SUCCESS
+
+
+class FabconnectError(Exception):
+    """Raised when FabConnect rejects a request; ``status`` is the HTTP status, if any."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def duplicate(self) -> bool:
+        """The request id was already accepted."""
+        return self.status == 409
+
+    @property
+    def rejected(self) -> bool:
+        """The gateway refused this request itself; sending it again as-is will not help."""
+        return self.status is not None and 400 <= self.status < 500 and self.status not in (409, 429)
+
+
+class FabconnectClient:
+    """Pooled asyncio client for a FabConnect REST gateway.
+
+    Use as an async context manager so the shared session is closed::
+
+        async with FabconnectClient(config) as client:
+            receipts = await client.submit_and_wait(payloads)
+    """
+
+    def __init__(self, config: FabconnectConfig | None = None, *,
+                 max_connections: int = 64, max_in_flight: int = 256,
+                 retries: int = 10, retry_delay: float = 0.1,
+                 request_timeout: float = 30.0):
+        self.config = config or FabconnectConfig.from_env()
+        self.max_connections = max_connections
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.request_timeout = request_timeout
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._session: aiohttp.ClientSession | None = None
+
+        # FABCONNECT_URL may carry app credentials as user:password@host.
+        url = URL(self.config.url)
+        self._auth = aiohttp.BasicAuth(url.user, url.password or "") if url.user else None
+        self._base_url = str(url.with_user(None).with_password(None)).rstrip("/")
+
+    async def __aenter__(self) -> "FabconnectClient":
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                auth=self._auth,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+        return self._session
+
+    def _url(self, path: str) -> str:
+        return self._base_url + path
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # -- payloads --------------------------------------------------------
+
+    def payload(self, func: str, args: Iterable[str] = (), init: bool = False,
+                request_id: str = "") -> TransactionPayload:
+        config = self.config
+        return TransactionPayload(
+            headers=TransactionHeaders(signer=config.username, channel=config.channel,
+                                       chaincode=config.chaincode, id=request_id),
+            func=func,
+            args=[str(a) for a in args],
+            init=init,
+        )
+
+    # -- transactions ----------------------------------------------------
+
+    async def send_transaction(self, payload: TransactionPayload) -> str:
+        """Submit one transaction asynchronously and return its receipt id."""
+        session = self._ensure_session()
+        body = payload.to_json()
+        attempt = 0
+        while True:
+            async with self._in_flight:
+                async with session.post(self._url("/transactions"), params={"fly-sync": "false"}, json=body) as resp:
+                    result = await _json_object(resp)
+                    status = resp.status
+            if status == 202:
+                if not result.get("sent") or not result.get("id"):
+                    raise FabconnectError(f"transaction not sent successfully. sent = {result.get('sent')}",
+                                          status)
+                return result["id"]
+            if result.get("error") != TOO_MANY_IN_FLIGHT or attempt == self.retries:
+                raise FabconnectError(f"unexpected status code {status}: {result}", status)
+            await asyncio.sleep(self.retry_delay * (2 ** attempt))
+            attempt += 1
+
+    async def init_chaincode(self) -> str:
+        return await self.send_transaction(self.payload("InitLedger", init=True))
+
+    async def exec_chaincode(self, func: str, *args: str) -> str:
+        return await self.send_transaction(self.payload(func, args))
+
+    async def get_receipt(self, receipt_id: str) -> TransactionReceipt | None:
+        """Fetch a receipt, or ``None`` while FabConnect has not produced it yet (404)."""
+        session = self._ensure_session()
+        async with session.get(self._url(f"/receipts/{receipt_id}")) as resp:
+            if resp.status == 404:
+                await resp.read()
+                return None
+            body = await _json_object(resp)
+            if resp.status != 200 or not body:
+                raise FabconnectError(f"failed to get receipt {receipt_id}: {resp.status} {body}", resp.status)
+        return TransactionReceipt.from_json(body)
+
+    async def wait_for_receipt(self, receipt_id: str, interval: float = 0.5,
+                               timeout: float = 60.0) -> TransactionReceipt | None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            receipt = await self.get_receipt(receipt_id)
+            if receipt is not None or loop.time() >= deadline:
+                return receipt
+            await asyncio.sleep(interval)
+
+    async def submit_many(self, payloads: Iterable[TransactionPayload]) -> list[str]:
+        """Submit every payload concurrently and return the receipt ids in order."""
+        return await asyncio.gather(*(self.send_transaction(p) for p in payloads))
+
+    async def submit_and_wait(self, payloads: Iterable[TransactionPayload], interval: float = 0.5,
+                              timeout: float = 60.0) -> list[TransactionReceipt | None]:
+        """Submit payloads and poll each receipt as soon as its submission returns.
+
+        Receipt polling overlaps with the submissions still in flight, so the
+        batch finishes roughly one confirmation latency after the last send.
+        """
+        async def submit(payload: TransactionPayload) -> TransactionReceipt | None:
+            receipt_id = await self.send_transaction(payload)
+            return await self.wait_for_receipt(receipt_id, interval, timeout)
+
+        return await asyncio.gather(*(submit(p) for p in payloads))
+
+    # -- chain -----------------------------------------------------------
+
+    async def chain_height(self) -> int:
+        session = self._ensure_session()
+        params = {"fly-channel": self.config.channel, "fly-signer": self.config.username}
+        async with session.get(self._url("/chainInfo"), params=params) as resp:
+            if resp.status != 200:
+                raise FabconnectError(f"failed to get chain info: {await resp.text()}")
+            body = await resp.json(content_type=None)
+        return int(body["result"]["height"])
+
+    # -- event streams ---------------------------------------------------
+
+    async def create_event_stream(self, name: str, topic: str = EVENT_LISTENER_TOPIC,
+                                  batch_size: int | None = None) -> str:
+        session = self._ensure_session()
+        body = {
+            "name": name,
+            "type": "websocket",
+            "batchSize": batch_size or self.config.event_batch_size,
+            "websocket": {"topic": topic},
+        }
+        async with session.post(self._url("/eventstreams"), json=body) as resp:
+            result = await resp.json(content_type=None)
+            if resp.status >= 300:
+                raise FabconnectError(f"failed to create event stream: {result}")
+        return result["id"]
+
+    async def create_subscription(self, stream_id: str, name: str, from_block: int) -> dict:
+        session = self._ensure_session()
+        body = _omit_empty({
+            "stream": stream_id,
+            "channel": self.config.channel,
+            "name": name,
+            "signer": self.config.username,
+            "fromBlock": str(from_block),
+            "payloadType": "json",
+            "filter": {"chaincodeId": self.config.chaincode},
+        })
+        async with session.post(self._url("/subscriptions"), json=body) as resp:
+            result = await resp.json(content_type=None)
+            if resp.status >= 300:
+                raise FabconnectError(f"failed to create subscription: {result}")
+        return result
+
+    def ws_connect(self, **kwargs) -> "aiohttp.client._WSRequestContextManager":
+        """Open the event websocket on the shared, authenticated session."""
+        return self._ensure_session().ws_connect(self.config.websocket_url, **kwargs)
+
+    async def delete_event_stream(self, stream_id: str) -> None:
+        session = self._ensure_session()
+        async with session.delete(self._url(f"/eventstreams/{stream_id}")) as resp:
+            await resp.read()
@@ -0,0 +1,76 @@
+"""Plotly figures for the pages, built on one prebuilt layout template.
+
+``plotly.express`` resolves and validates plotly's full default template
+for every figure it makes, and ``st.plotly_chart`` validates a figure
+passed as a dict all over again on each rerun.  The builders here make
+``graph_objects`` figures directly on a small :func:`template` built once
+per process (Streamlit's chart theme restyles them in the browser), and
+the pages cache the figures themselves, so a rerun only serializes them.
+
+Plotly is imported by the first builder a run calls, so a page (or a tab)
+that draws no chart never loads it.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import plotly.graph_objects as go
+
+
+@cache
+def template() -> "go.layout.Template":
+    """The layout shared by every figure; what ``plotly.express`` would have set."""
+    import plotly.graph_objects as go
+
+    return go.layout.Template(layout=go.Layout(
+        margin=dict(t=60),
+        legend=dict(tracegroupgap=0),
+    ))
+
+
+@cache
+def palette(name: str) -> tuple[str, ...]:
+    """A qualitative colour sequence by name (``"Set3"``, ``"Pastel"``...)."""
+    from plotly.colors import qualitative
+
+    return tuple(getattr(qualitative, name))
+
+
+def _hover(x: str, y: str) -> str:
+    return f"{x}=%{{x}}<br>{y}=%{{y}}<extra></extra>"
+
+
+def figure(traces: Sequence = (), **layout) -> "go.Figure":
+    import plotly.graph_objects as go
+
+    return go.Figure(list(traces), layout=go.Layout(template=template(), **layout))
+
+
+def pie(frame: "pd.DataFrame", values: str, names: str, title: str, hole: float = 0.0,
+        colors: str = "Plotly") -> "go.Figure":
+    import plotly.graph_objects as go
+
+    return figure([go.Pie(labels=frame[names], values=frame[values], hole=hole,
+                          marker=dict(colors=palette(colors)),
+                          hovertemplate=f"{names}=%{{label}}<br>{values}=%{{value}}<extra></extra>")],
+                  title=title)
+
+
+def line(frame: "pd.DataFrame", x: str, y: str, title: str, color: str) -> "go.Figure":
+    import plotly.graph_objects as go
+
+    return figure([go.Scatter(x=frame[x], y=frame[y], mode="lines+markers",
+                              line=dict(color=color), marker=dict(size=10),
+                              hovertemplate=_hover(x, y))],
+                  title=title, xaxis_title=x, yaxis_title=y)
+
+
+def bars(frame: "pd.DataFrame", x: str, y: str, color: str) -> "go.Figure":
+    import plotly.graph_objects as go
+
+    return figure([go.Bar(x=frame[x], y=frame[y], marker_color=color, hovertemplate=_hover(x, y))],
+                  xaxis_title=x, yaxis_title=y)
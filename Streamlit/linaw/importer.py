@@ -0,0 +1,408 @@
+"""Streaming import of journal entries from treasury and collection exports.
+
+Files are read in fixed-size chunks (``pyarrow`` for CSV, ``openpyxl`` in
+read-only mode for Excel), so memory depends on the chunk size rather
+than the file.  Every chunk is validated with vectorized checks: account
+codes and funds against the chart, dates, amounts (one positive side per
+line, at most two decimals), and per entry that debits equal credits,
+there are at least two lines and they share a date.  An entry with any
+bad line is rejected whole.
+
+Accepted entries are identified by a SHA-256 content hash.  Hashes already
+recorded by an earlier import are skipped as duplicates, so re-importing
+an overlapping export is harmless.  The rest are committed to the ledger
+in one bulk append per chunk, and are anchored on chain with the rest of
+the ledger by :mod:`linaw.anchoring`.
+
+Lines of an entry must be contiguous in the file; an entry split across
+chunks is carried over to the next chunk before it is validated.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from .ledger import Ledger
+from .settings import data_dir
+
+CHUNK_ROWS = 200_000
+MAX_REPORTED_ERRORS = 1000
+
+# Accepted header names for each column (case-insensitive).
+COLUMNS = {
+    "reference": ("reference", "ref", "je", "je_no", "entry", "entry_no"),
+    "date": ("date", "posting_date", "txn_date"),
+    "description": ("description", "particulars", "memo"),
+    "account": ("account", "account_code", "code"),
+    "debit": ("debit", "dr"),
+    "credit": ("credit", "cr"),
+    "fund": ("fund",),
+}
+REQUIRED = ("reference", "date", "account", "debit", "credit")
+POSTED = "reference is already posted"
+
+# Per-line rejection reasons, checked in this order.
+LINE_REASONS = ("unknown account code", "invalid date", "invalid amount", "unknown fund")
+
+# Packed per-line record hashed into an entry's content hash.
+_LINE = np.dtype([("date", "<i8"), ("account", "<i2"), ("fund", "<i1"),
+                  ("debit", "<i8"), ("credit", "<i8")])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS imports (
+    id          INTEGER PRIMARY KEY,
+    source      TEXT NOT NULL,
+    started_at  TEXT NOT NULL,
+    lines       INTEGER NOT NULL DEFAULT 0,
+    accepted    INTEGER NOT NULL DEFAULT 0,
+    duplicates  INTEGER NOT NULL DEFAULT 0,
+    rejected    INTEGER NOT NULL DEFAULT 0
+);
+-- One row per committed entry, in commit order.
+CREATE TABLE IF NOT EXISTS imported_entries (
+    seq         INTEGER PRIMARY KEY,
+    hash        BLOB NOT NULL UNIQUE,
+    reference   TEXT NOT NULL,
+    import_id   INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class ImportResult:
+    source: str
+    lines: int = 0
+    accepted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    elapsed: float = 0.0
+    # (reference, reason) for rejected entries, capped at MAX_REPORTED_ERRORS.
+    errors: list[tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.elapsed if self.elapsed else 0.0
+
+
+class ImportLog:
+    """SQLite record of imports and the content hashes they committed."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else data_dir() / "imports.db"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        # The hash index is written in random order; keep its hot pages in memory.
+        self._db.execute("PRAGMA cache_size=-65536")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def start(self, source: str) -> int:
+        with self._lock:
+            cursor = self._db.execute("INSERT INTO imports (source, started_at) VALUES (?, datetime('now'))",
+                                      (source,))
+        return cursor.lastrowid
+
+    def finish(self, import_id: int, result: ImportResult) -> None:
+        with self._lock:
+            self._db.execute("UPDATE imports SET lines=?, accepted=?, duplicates=?, rejected=? WHERE id=?",
+                             (result.lines, result.accepted, result.duplicates, result.rejected, import_id))
+
+    def known(self, hashes: Iterable[bytes]) -> set[bytes]:
+        """The subset of ``hashes`` committed by earlier imports."""
+        hashes = sorted(hashes)
+        found: set[bytes] = set()
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT hash FROM imported_entries WHERE hash IN ({','.join('?' * len(chunk))})", chunk)
+                found.update(row[0] for row in rows)
+        return found
+
+    def record(self, import_id: int, refs: list[str], hashes: list[bytes]) -> None:
+        """Record committed entries in one transaction."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("INSERT INTO imported_entries (hash, reference, import_id) VALUES (?, ?, ?)",
+                                     zip(hashes, refs, [import_id] * len(refs)))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+
+# -- reading ---------------------------------------------------------------
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    """Rename recognised headers to the canonical columns; raise if a required one is missing."""
+    aliases = {alias: name for name, names in COLUMNS.items() for alias in names}
+    renamed = {}
+    for column in frame.columns:
+        key = str(column).strip().lower().replace(" ", "_").replace(".", "")
+        if key in aliases and aliases[key] not in renamed.values():
+            renamed[column] = aliases[key]
+    frame = frame.rename(columns=renamed)
+    missing = [name for name in REQUIRED if name not in frame.columns]
+    if missing:
+        raise ValueError(f"import file is missing required column(s): {', '.join(missing)}")
+    for name in ("description", "fund"):
+        if name not in frame.columns:
+            frame[name] = None
+    return frame[list(COLUMNS)]
+
+
+def _csv_chunks(source: str | Path | BinaryIO, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    # Everything is read as text and parsed by the validators, so a bad
+    # value rejects its entry instead of failing the whole file.
+    aliases = [alias for names in COLUMNS.values() for alias in names]
+    spaced = [alias.replace("_", " ") for alias in aliases]
+    types = {variant: pa.string() for alias in aliases + spaced
+             for variant in (alias, alias.upper(), alias.title())}
+    try:
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(block_size=16 << 20),
+            convert_options=pacsv.ConvertOptions(column_types=types, strings_can_be_null=True),
+        )
+        pending: list[pd.DataFrame] = []
+        rows = 0
+        for batch in reader:
+            frame = batch.to_pandas()
+            pending.append(frame)
+            rows += len(frame)
+            if rows >= chunk_rows:
+                yield _normalize(pd.concat(pending, ignore_index=True))
+                pending, rows = [], 0
+        if pending:
+            yield _normalize(pd.concat(pending, ignore_index=True))
+    except pa.ArrowInvalid as err:
+        raise ValueError(f"malformed CSV: {err}") from None
+
+
+def _excel_chunks(source: str | Path | BinaryIO, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield _normalize(pd.DataFrame(buffer, columns=header).astype(object))
+                buffer = []
+        if buffer:
+            yield _normalize(pd.DataFrame(buffer, columns=header).astype(object))
+    finally:
+        workbook.close()
+
+
+def read_chunks(source: str | Path | BinaryIO, chunk_rows: int = CHUNK_ROWS,
+                name: str | None = None) -> Iterator[pd.DataFrame]:
+    """Yield normalized chunks of ``source`` (CSV, or Excel by ``.xlsx``/``.xlsm`` name)."""
+    name = name or getattr(source, "name", None) or str(source)
+    if str(name).lower().endswith((".xlsx", ".xlsm")):
+        return _excel_chunks(source, chunk_rows)
+    return _csv_chunks(source, chunk_rows)
+
+
+# -- validation ------------------------------------------------------------
+
+def _text(values: pd.Series) -> pd.Series:
+    return values.astype("string").str.strip()
+
+
+def _centavos(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Amounts in centavos and a mask of values that are not valid amounts (blank is zero)."""
+    text = _text(values).str.replace(",", "", regex=False).str.replace("₱", "", regex=False)
+    blank = text.isna() | (text == "")
+    text = text.where(~blank, "0")
+    try:
+        pesos = text.astype("float64[pyarrow]").to_numpy(dtype=np.float64, na_value=np.nan)
+    except (ValueError, TypeError):
+        # Some value is not a number; coerce it to NaN so only its entry is rejected.
+        pesos = pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    scaled = pesos * 100
+    centavos = np.rint(np.nan_to_num(scaled)).astype(np.int64)
+    invalid = np.isnan(scaled) | (np.abs(scaled - centavos) > 1e-6) | (centavos < 0)
+    return centavos, invalid
+
+
+@dataclass
+class _Chunk:
+    """A validated chunk: per-entry verdicts plus the parsed line columns."""
+
+    refs: np.ndarray
+    descriptions: list[str]
+    entry: np.ndarray
+    date: np.ndarray
+    account: np.ndarray
+    fund: np.ndarray
+    debit: np.ndarray
+    credit: np.ndarray
+    reasons: list[str | None]
+    hashes: list[bytes]
+
+
+def validate(frame: pd.DataFrame, ledger: Ledger) -> _Chunk:
+    """Parse and check one chunk; every entry gets a rejection reason or ``None``."""
+    # Plain object arrays: the references are iterated per entry below.
+    refs = _text(frame["reference"]).fillna("").to_numpy(dtype=object)
+    entry, unique_refs = pd.factorize(refs, sort=False)
+    entries = len(unique_refs)
+
+    # -1 marks an unknown account or fund.
+    accounts = pd.Index([a.code for a in ledger.accounts]).get_indexer(_text(frame["account"]))
+    funds_text = _text(frame["fund"]).fillna(ledger.funds[0]).replace("", ledger.funds[0])
+    funds = pd.Index(ledger.funds).get_indexer(funds_text)
+    dates = pd.to_datetime(_text(frame["date"]), errors="coerce").to_numpy().astype("datetime64[D]")
+    debit, bad_debit = _centavos(frame["debit"])
+    credit, bad_credit = _centavos(frame["credit"])
+    one_side = (debit > 0) != (credit > 0)
+
+    line_checks = (accounts < 0, np.isnat(dates), bad_debit | bad_credit | ~one_side, funds < 0)
+    line_reason = np.full(len(frame), -1, dtype=np.int8)
+    for code, failed in reversed(list(enumerate(line_checks))):
+        line_reason[failed] = code
+    # First failing line (in file order) decides the entry's reason.
+    bad = np.flatnonzero(line_reason >= 0)
+    entry_line_reason = np.full(entries, -1, dtype=np.int8)
+    entry_line_reason[entry[bad][::-1]] = line_reason[bad][::-1]
+
+    lines = np.bincount(entry, minlength=entries)
+    debits = np.bincount(entry, weights=debit, minlength=entries)
+    credits = np.bincount(entry, weights=credit, minlength=entries)
+    day = np.where(np.isnat(dates), 0, dates.astype(np.int64))
+    first_day = np.full(entries, np.iinfo(np.int64).max)
+    last_day = np.full(entries, np.iinfo(np.int64).min)
+    np.minimum.at(first_day, entry, day)
+    np.maximum.at(last_day, entry, day)
+    posted = ledger.posted(unique_refs)
+
+    reasons: list[str | None] = [None] * entries
+    checks = (
+        (unique_refs == "", "missing reference"),
+        (entry_line_reason >= 0, None),
+        (lines < 2, "fewer than two lines"),
+        (debits != credits, "debits do not equal credits"),
+        (first_day != last_day, "lines have different dates"),
+        (posted, POSTED),
+    )
+    for failed, reason in reversed(checks):
+        for i in np.flatnonzero(failed):
+            reasons[i] = reason if reason is not None else LINE_REASONS[entry_line_reason[i]]
+
+    # Content hash: reference plus the packed lines, in file order.
+    order = np.argsort(entry, kind="stable")
+    packed = np.empty(len(frame), dtype=_LINE)
+    packed["date"], packed["account"], packed["fund"] = day, accounts, funds
+    packed["debit"], packed["credit"] = debit, credit
+    packed = packed[order]
+    bounds = np.r_[0, np.cumsum(lines)]
+    buffer = packed.tobytes()
+    size = _LINE.itemsize
+    hashes = [
+        hashlib.sha256(ref.encode() + b"\0" + buffer[lo * size: hi * size]).digest()
+        for ref, lo, hi in zip(unique_refs.tolist(), bounds[:-1].tolist(), bounds[1:].tolist())
+    ]
+
+    descriptions = _text(frame["description"]).fillna("").to_numpy(dtype=object)
+    first_line = order[bounds[:-1]]
+    return _Chunk(
+        refs=unique_refs,
+        descriptions=descriptions[first_line].tolist(),
+        entry=entry, date=dates, account=accounts.astype(np.int16), fund=funds.astype(np.int8),
+        debit=debit, credit=credit, reasons=reasons, hashes=hashes,
+    )
+
+
+# -- pipeline --------------------------------------------------------------
+
+class Importer:
+    """Validates, dedupes and bulk-commits journal imports into one ledger."""
+
+    def __init__(self, ledger: Ledger, log: ImportLog | None = None):
+        self.ledger = ledger
+        self.log = log or ImportLog()
+        self._lock = threading.Lock()
+
+    def _entries(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Re-cut chunks on entry boundaries, carrying a split entry into the next chunk."""
+        carry = None
+        for frame in chunks:
+            if carry is not None:
+                frame = pd.concat([carry, frame], ignore_index=True)
+            refs = _text(frame["reference"]).fillna("").to_numpy(dtype=object)
+            tail = len(frame)
+            while tail > 0 and refs[tail - 1] == refs[-1]:
+                tail -= 1
+            if tail == 0:
+                carry = frame
+                continue
+            carry = frame.iloc[tail:]
+            yield frame.iloc[:tail]
+        if carry is not None and len(carry):
+            yield carry
+
+    def run(self, source: str | Path | BinaryIO, name: str | None = None,
+            chunk_rows: int = CHUNK_ROWS) -> ImportResult:
+        """Import ``source`` (a path or binary file object) and return the tally."""
+        name = name or getattr(source, "name", None) or str(source)
+        result = ImportResult(source=str(name))
+        started = time.perf_counter()
+        with self._lock:
+            import_id = self.log.start(result.source)
+            for frame in self._entries(read_chunks(source, chunk_rows, name)):
+                self._commit(import_id, validate(frame.reset_index(drop=True), self.ledger), result)
+                result.lines += len(frame)
+            result.elapsed = time.perf_counter() - started
+            self.log.finish(import_id, result)
+        return result
+
+    def _commit(self, import_id: int, chunk: _Chunk, result: ImportResult) -> None:
+        valid = np.array([reason is None for reason in chunk.reasons], dtype=bool)
+        # A re-imported entry is either still valid (its earlier copy was
+        # committed to another process's ledger) or already posted here.
+        candidates = valid | np.array([r == POSTED for r in chunk.reasons], dtype=bool)
+        known = self.log.known(h for h, c in zip(chunk.hashes, candidates) if c)
+        duplicate = candidates & np.array([h in known for h in chunk.hashes], dtype=bool)
+        accept = valid & ~duplicate
+        rejected = ~valid & ~duplicate
+
+        result.duplicates += int(duplicate.sum())
+        result.rejected += int(rejected.sum())
+        for i in np.flatnonzero(rejected)[: max(0, MAX_REPORTED_ERRORS - len(result.errors))]:
+            result.errors.append((chunk.refs[i], chunk.reasons[i]))
+        if not accept.any():
+            return
+
+        accepted = np.flatnonzero(accept)
+        refs = chunk.refs[accepted].tolist()
+        ids = self.ledger.register_entries(refs, [chunk.descriptions[i] for i in accepted])
+        entry_ids = np.full(len(chunk.refs), -1, dtype=np.int32)
+        entry_ids[accepted] = ids
+        lines = accept[chunk.entry]
+        self.ledger.extend(chunk.date[lines], entry_ids[chunk.entry[lines]], chunk.account[lines],
+                           chunk.debit[lines], chunk.credit[lines], chunk.fund[lines])
+        self.log.record(import_id, refs, [chunk.hashes[i] for i in accepted])
+        result.accepted += len(accepted)
@@ -0,0 +1,118 @@
+"""Background ingester for the FabConnect websocket event stream.
+
+The ingester sets up the same event stream and subscription as the Go
+``FabconnectClient.CreateEventListener``, listens on its websocket topic and
+writes every delivered batch into the local :class:`EventStore` before
+acknowledging it.  FabConnect does not deliver the next batch until the
+previous one is acked, so a slow store naturally throttles the stream, and
+a restart resumes from the last committed checkpoint.
+
+Each tenant's :class:`~linaw.tenants.Workspace` runs one on its channel.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+
+import aiohttp
+
+from .events import EventStore
+from .fabconnect import EVENT_LISTENER_TOPIC, FabconnectClient, FabconnectConfig
+
+log = logging.getLogger(__name__)
+
+
+class EventIngester:
+    def __init__(self, store: EventStore, config: FabconnectConfig | None = None, *,
+                 client: FabconnectClient | None = None,
+                 stream_name: str = "linaw-events", topic: str = EVENT_LISTENER_TOPIC,
+                 queue_size: int = 4, reconnect_delay: float = 1.0,
+                 max_reconnect_delay: float = 30.0):
+        self.store = store
+        # A client passed in is shared with the tenant's other tasks; it is not ours to close.
+        self._owns_client = client is None
+        self.client = client or FabconnectClient(config)
+        self.stream_name = stream_name
+        self.topic = topic
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.batches = 0
+        self.events = 0
+
+    async def ensure_stream(self) -> str:
+        """Create the event stream and subscription once and remember the stream id."""
+        key = f"stream:{self.stream_name}"
+        stream_id = self.store.get_meta(key)
+        if stream_id:
+            return stream_id
+        checkpoint = self.store.checkpoint(self.stream_name)
+        from_block = checkpoint[0] if checkpoint else await self.client.chain_height()
+        stream_id = await self.client.create_event_stream(self.stream_name, self.topic)
+        await self.client.create_subscription(stream_id, f"{self.stream_name}-subscription", from_block)
+        self.store.set_meta(key, stream_id)
+        log.info("Created event stream %s from block %d", stream_id, from_block)
+        return stream_id
+
+    async def run(self) -> None:
+        """Consume the stream until cancelled, reconnecting with jittered backoff."""
+        delay = self.reconnect_delay
+        try:
+            while True:
+                try:
+                    await self.ensure_stream()
+                    await self._consume()
+                    delay = self.reconnect_delay
+                    log.info("Event stream closed. Reconnecting in %.1fs", delay)
+                    await asyncio.sleep(delay)
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError) as err:
+                    log.warning("Event stream disconnected: %s. Reconnecting in %.1fs", err, delay)
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                except Exception:
+                    # A gateway error, a malformed batch or a store failure must not
+                    # end ingestion for the life of the process; the unacked batch
+                    # is redelivered once reconnected.
+                    log.exception("Event ingestion failed. Reconnecting in %.1fs", delay)
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                    delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            if self._owns_client:
+                await self.client.close()
+
+    async def _consume(self) -> None:
+        async with self.client.ws_connect(heartbeat=30) as ws:
+            await ws.send_json({"type": "listen", "topic": self.topic})
+            log.info("Listening for events on %s", self.topic)
+            queue: asyncio.Queue[list[dict] | None] = asyncio.Queue(maxsize=self.queue_size)
+            reader = asyncio.create_task(self._read(ws, queue))
+            try:
+                while (batch := await queue.get()) is not None:
+                    # Commit before acking: an unacked batch is redelivered after a
+                    # reconnect and the checkpoint filters out what was already stored.
+                    stored = await asyncio.to_thread(self.store.write_batch, self.stream_name, batch)
+                    await ws.send_json({"type": "ack", "topic": self.topic})
+                    self.batches += 1
+                    self.events += stored
+            finally:
+                reader.cancel()
+                await asyncio.gather(reader, return_exceptions=True)
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse,
+                    queue: asyncio.Queue[list[dict] | None]) -> None:
+        try:
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                events = message.json()
+                if isinstance(events, dict):
+                    if "error" in events:
+                        log.error("Event stream error: %s", events["error"])
+                    continue
+                # Blocks while the writer is behind: back-pressure on the socket.
+                await queue.put(events)
+        finally:
+            await queue.put(None)
+
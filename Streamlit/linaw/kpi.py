@@ -0,0 +1,101 @@
+"""Running financial KPIs for the dashboard.
+
+The service folds every posting into per-month running aggregates (asset
+movement, income, expenses) as the ledger appends them, then publishes an
+immutable :class:`KpiSnapshot` for the latest month.  Readers only take
+the current snapshot, so the landing page never scans the ledger.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from .ledger import ASSET, EXPENSE, REVENUE, Ledger
+
+_ASSETS, _INCOME, _EXPENSES = range(3)
+
+
+def _change(current: int, previous: int) -> float | None:
+    return (current - previous) / abs(previous) if previous else None
+
+
+@dataclass(frozen=True)
+class KpiSnapshot:
+    """Figures for the latest posted month, in centavos, with month-over-month changes."""
+
+    month: np.datetime64 | None
+    total_assets: int
+    income: int
+    expenses: int
+    net_position: int
+    assets_change: float | None
+    income_change: float | None
+    expenses_change: float | None
+    net_change: float | None
+    updated_at: datetime
+
+
+class KpiService:
+    """Per-month running aggregates over a :class:`Ledger`, updated on every posting."""
+
+    def __init__(self, ledger: Ledger):
+        self.ledger = ledger
+        kinds = np.array([a.kind for a in ledger.accounts])
+        signs = np.array([a.normal_sign for a in ledger.accounts], dtype=np.int64)
+        # Column of the aggregate each account feeds (-1 for none) and its sign.
+        self._measure = np.full(len(kinds), -1)
+        self._measure[kinds == ASSET] = _ASSETS
+        self._measure[kinds == REVENUE] = _INCOME
+        self._measure[kinds == EXPENSE] = _EXPENSES
+        # Contra assets (accumulated depreciation) reduce total assets.
+        signs[kinds == ASSET] = 1
+        self._signs = signs
+        self._months: dict[int, np.ndarray] = {}
+        self._total_assets = 0
+        self._lock = threading.Lock()
+        self.snapshot = self._publish()
+        self._fold(0, len(ledger))
+        ledger.add_listener(self._fold)
+
+    def _fold(self, start: int, end: int) -> None:
+        ledger = self.ledger
+        accounts = ledger.account[start:end]
+        measures = self._measure[accounts]
+        used = measures >= 0
+        if not used.any():
+            return
+        amounts = ((ledger.debit[start:end] - ledger.credit[start:end]) * self._signs[accounts])[used]
+        months = ledger.date[start:end][used].astype("datetime64[M]").astype(np.int64)
+        keys, inverse = np.unique(months, return_inverse=True)
+        sums = np.zeros((len(keys), 3), dtype=np.int64)
+        np.add.at(sums, (inverse, measures[used]), amounts)
+        with self._lock:
+            for key, row in zip(keys.tolist(), sums):
+                self._months[key] = self._months.get(key, np.zeros(3, dtype=np.int64)) + row
+            self._total_assets += int(sums[:, _ASSETS].sum())
+            self.snapshot = self._publish()
+
+    def _publish(self) -> KpiSnapshot:
+        if not self._months:
+            return KpiSnapshot(None, self._total_assets, 0, 0, 0, None, None, None, None, datetime.now())
+        latest = max(self._months)
+        current = self._months[latest]
+        previous = self._months.get(latest - 1, np.zeros(3, dtype=np.int64))
+        assets_before = self._total_assets - int(current[_ASSETS])
+        net, previous_net = int(current[_INCOME] - current[_EXPENSES]), int(previous[_INCOME] - previous[_EXPENSES])
+        return KpiSnapshot(
+            month=np.datetime64(latest, "M"),
+            total_assets=self._total_assets,
+            income=int(current[_INCOME]),
+            expenses=int(current[_EXPENSES]),
+            net_position=net,
+            assets_change=_change(self._total_assets, assets_before),
+            income_change=_change(int(current[_INCOME]), int(previous[_INCOME])),
+            expenses_change=_change(int(current[_EXPENSES]), int(previous[_EXPENSES])),
+            net_change=_change(net, previous_net),
+            updated_at=datetime.now(),
+        )
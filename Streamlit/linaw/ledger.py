@@ -0,0 +1,450 @@
+"""Columnar double-entry ledger engine.
+
+Journal lines are stored as typed NumPy columns (date, journal entry,
+account, fund, debit, credit) with every amount held as integer centavos.
+Statements are computed with vectorized group-bys over those columns, so
+the Accounting page never has to carry pre-formatted literal tables.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+ASSET = "asset"
+LIABILITY = "liability"
+EQUITY = "equity"
+REVENUE = "revenue"
+EXPENSE = "expense"
+
+# Accounts whose normal balance is a debit; everything else is credit-normal.
+DEBIT_NORMAL = (ASSET, EXPENSE)
+
+
+@dataclass(frozen=True)
+class Account:
+    code: str
+    name: str
+    kind: str
+    section: str
+    contra: bool = False
+
+    @property
+    def normal_sign(self) -> int:
+        """+1 if debits increase the account, -1 if credits do."""
+        debit_normal = self.kind in DEBIT_NORMAL
+        if self.contra:
+            debit_normal = not debit_normal
+        return 1 if debit_normal else -1
+
+
+CHART_OF_ACCOUNTS: tuple[Account, ...] = (
+    Account("1010", "Cash on Hand", ASSET, "Current Assets"),
+    Account("1020", "Cash in Bank", ASSET, "Current Assets"),
+    Account("1030", "Accounts Receivable", ASSET, "Current Assets"),
+    Account("1210", "Land", ASSET, "Fixed Assets"),
+    Account("1220", "Buildings", ASSET, "Fixed Assets"),
+    Account("1230", "Equipment", ASSET, "Fixed Assets"),
+    Account("1290", "Less: Accumulated Depreciation", ASSET, "Fixed Assets", contra=True),
+    Account("2010", "Accounts Payable", LIABILITY, "Current Liabilities"),
+    Account("2020", "Accrued Expenses", LIABILITY, "Current Liabilities"),
+    Account("2510", "Long-term Debt", LIABILITY, "Long-term Liabilities"),
+    Account("3010", "Fund Balance", EQUITY, "Fund Balance/Equity"),
+    Account("4010", "Revenue - Real Property Tax", REVENUE, "Real Property Tax"),
+    Account("4020", "Revenue - Business Permits", REVENUE, "Business Permits"),
+    Account("4030", "Revenue - Market Fees", REVENUE, "Market Fees"),
+    Account("4040", "Revenue - Rental Income", REVENUE, "Rental Income"),
+    Account("4050", "Revenue - Service Fees", REVENUE, "Service Fees"),
+    Account("4090", "Revenue - Other Income", REVENUE, "Other Income"),
+    Account("5010", "Salaries Expense", EXPENSE, "Salaries & Wages"),
+    Account("5020", "Office Supplies Expense", EXPENSE, "Office Supplies"),
+    Account("5030", "Utilities Expense", EXPENSE, "Utilities"),
+    Account("5040", "Repairs and Maintenance Expense", EXPENSE, "Maintenance"),
+    Account("5050", "Semi-Expendable Equipment Expense", EXPENSE, "Equipment"),
+    Account("5090", "Other Expenses", EXPENSE, "Other Expenses"),
+)
+
+# Barangay funds every journal line is charged to.
+FUNDS: tuple[str, ...] = ("General Fund", "SK Fund", "Trust Fund")
+
+
+def to_centavos(pesos: float | int | str) -> int:
+    """Convert a peso amount to integer centavos without float drift."""
+    if isinstance(pesos, str):
+        pesos = pesos.replace(",", "").replace("₱", "").strip() or "0"
+        whole, _, frac = pesos.partition(".")
+        sign = -1 if whole.startswith("-") else 1
+        return sign * (abs(int(whole or "0")) * 100 + int((frac + "00")[:2]))
+    return int(round(pesos * 100))
+
+
+def format_peso(centavos: int | None, blank_zero: bool = False) -> str:
+    """Render centavos the way the statements do: '150,000.00' or '(85,000.00)'."""
+    if centavos is None or (blank_zero and centavos == 0):
+        return ""
+    text = f"{abs(centavos) / 100:,.2f}"
+    return f"({text})" if centavos < 0 else text
+
+
+class Ledger:
+    """Append-only journal stored as growable NumPy columns.
+
+    Entries are registered once (reference, description) and every journal
+    line points at its entry by integer id, so the per-line columns stay
+    fixed-width: ``datetime64[D]`` dates, ``int32`` entry ids, ``int16``
+    account ids, ``int8`` fund ids and ``int64`` centavo debits/credits.
+    """
+
+    def __init__(self, accounts: Sequence[Account] = CHART_OF_ACCOUNTS,
+                 funds: Sequence[str] = FUNDS, capacity: int = 1024):
+        self.accounts = tuple(accounts)
+        self._account_ids = {a.code: i for i, a in enumerate(self.accounts)}
+        self.funds = tuple(funds)
+        self._fund_ids = {name: i for i, name in enumerate(self.funds)}
+        self._signs = np.array([a.normal_sign for a in self.accounts], dtype=np.int64)
+
+        self.je_refs: list[str] = []
+        self.je_descriptions: list[str] = []
+        self._je_ids: dict[str, int] = {}
+
+        self._size = 0
+        self._date = np.empty(capacity, dtype="datetime64[D]")
+        self._je = np.empty(capacity, dtype=np.int32)
+        self._account = np.empty(capacity, dtype=np.int16)
+        self._fund = np.empty(capacity, dtype=np.int8)
+        self._debit = np.empty(capacity, dtype=np.int64)
+        self._credit = np.empty(capacity, dtype=np.int64)
+        self._listeners: list[Callable[[int, int], None]] = []
+        # Bumped on every append so caches can key results on it.
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    # -- columns ---------------------------------------------------------
+
+    @property
+    def date(self) -> np.ndarray:
+        return self._date[: self._size]
+
+    @property
+    def je(self) -> np.ndarray:
+        return self._je[: self._size]
+
+    @property
+    def account(self) -> np.ndarray:
+        return self._account[: self._size]
+
+    @property
+    def fund(self) -> np.ndarray:
+        return self._fund[: self._size]
+
+    @property
+    def debit(self) -> np.ndarray:
+        return self._debit[: self._size]
+
+    @property
+    def credit(self) -> np.ndarray:
+        return self._credit[: self._size]
+
+    def account_id(self, code: str) -> int:
+        try:
+            return self._account_ids[code]
+        except KeyError:
+            raise KeyError(f"unknown account code: {code}") from None
+
+    def fund_id(self, name: str) -> int:
+        try:
+            return self._fund_ids[name]
+        except KeyError:
+            raise KeyError(f"unknown fund: {name}") from None
+
+    def account_by_name(self, name: str) -> Account:
+        for account in self.accounts:
+            if account.name == name:
+                return account
+        raise KeyError(f"unknown account: {name}")
+
+    # -- posting ---------------------------------------------------------
+
+    def add_listener(self, listener: Callable[[int, int], None]) -> None:
+        """Call ``listener(start, end)`` with the row range of every appended batch."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int, int], None]) -> None:
+        self._listeners.remove(listener)
+
+    def register_entry(self, ref: str, description: str = "") -> int:
+        if ref in self._je_ids:
+            raise ValueError(f"journal entry {ref} is already posted")
+        je_id = len(self.je_refs)
+        self.je_refs.append(ref)
+        self.je_descriptions.append(description)
+        self._je_ids[ref] = je_id
+        return je_id
+
+    def register_entries(self, refs: Sequence[str], descriptions: Sequence[str]) -> np.ndarray:
+        """Register many entries at once; returns their ids in order."""
+        start = len(self.je_refs)
+        ids = dict(zip(refs, range(start, start + len(refs))))
+        if len(ids) != len(refs) or not ids.keys().isdisjoint(self._je_ids):
+            seen = set(self._je_ids)
+            for ref in refs:
+                if ref in seen:
+                    raise ValueError(f"journal entry {ref} is already posted")
+                seen.add(ref)
+        self.je_refs.extend(refs)
+        self.je_descriptions.extend(descriptions)
+        self._je_ids.update(ids)
+        return np.arange(start, start + len(refs), dtype=np.int32)
+
+    def entry_id(self, ref: str) -> int:
+        return self._je_ids[ref]
+
+    def posted(self, refs: Sequence[str]) -> np.ndarray:
+        """Boolean mask of the references that are already registered."""
+        found = self._je_ids.keys() & set(refs)
+        if not found:
+            return np.zeros(len(refs), dtype=bool)
+        return np.fromiter((ref in found for ref in refs), dtype=bool, count=len(refs))
+
+    def post(self, ref: str, when: date | str, description: str,
+             lines: Iterable[tuple[str, int, int]], fund: str | None = None) -> int:
+        """Post one balanced journal entry given (account code, debit, credit) lines.
+
+        Every line is charged to ``fund``, the first fund (General Fund) by default.
+        """
+        lines = list(lines)
+        debits = np.array([d for _, d, _ in lines], dtype=np.int64)
+        credits = np.array([c for _, _, c in lines], dtype=np.int64)
+        if debits.sum() != credits.sum():
+            raise ValueError(f"journal entry {ref} does not balance: "
+                             f"debits {debits.sum()} != credits {credits.sum()}")
+        accounts = np.array([self.account_id(code) for code, _, _ in lines], dtype=np.int16)
+        fund_id = self.fund_id(fund) if fund is not None else 0
+        je_id = self.register_entry(ref, description)
+        n = len(lines)
+        self.extend(
+            np.full(n, np.datetime64(when, "D")),
+            np.full(n, je_id, dtype=np.int32),
+            accounts,
+            debits,
+            credits,
+            np.full(n, fund_id, dtype=np.int8),
+        )
+        return je_id
+
+    def extend(self, dates: np.ndarray, je: np.ndarray, accounts: np.ndarray,
+               debits: np.ndarray, credits: np.ndarray,
+               funds: np.ndarray | None = None) -> None:
+        """Bulk-append journal lines whose entries are already registered."""
+        n = len(dates)
+        if funds is None:
+            funds = np.zeros(n, dtype=np.int8)
+        if not (len(je) == len(accounts) == len(funds) == len(debits) == len(credits) == n):
+            raise ValueError("journal line columns must have equal length")
+        self._reserve(self._size + n)
+        end = self._size + n
+        self._date[self._size:end] = dates
+        self._je[self._size:end] = je
+        self._account[self._size:end] = accounts
+        self._fund[self._size:end] = funds
+        self._debit[self._size:end] = debits
+        self._credit[self._size:end] = credits
+        start, self._size = self._size, end
+        self.version += 1
+        for listener in self._listeners:
+            listener(start, end)
+
+    def _reserve(self, needed: int) -> None:
+        capacity = len(self._date)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_date", "_je", "_account", "_fund", "_debit", "_credit"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, name, new)
+
+    # -- aggregates ------------------------------------------------------
+
+    def _mask(self, start: date | None = None, end: date | None = None) -> np.ndarray | slice:
+        if start is None and end is None:
+            return slice(None)
+        mask = np.ones(self._size, dtype=bool)
+        if start is not None:
+            mask &= self.date >= np.datetime64(start, "D")
+        if end is not None:
+            mask &= self.date <= np.datetime64(end, "D")
+        return mask
+
+    def _sum_by_account(self, values: np.ndarray, accounts: np.ndarray) -> np.ndarray:
+        # bincount accumulates in float64, which is exact for integer sums
+        # below 2**53 centavos (about ninety trillion pesos).
+        sums = np.bincount(accounts, weights=values, minlength=len(self.accounts))
+        return sums.astype(np.int64)
+
+    def account_totals(self, start: date | None = None,
+                       end: date | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Total debits and credits per account id over an optional date range."""
+        mask = self._mask(start, end)
+        accounts = self.account[mask]
+        return (self._sum_by_account(self.debit[mask], accounts),
+                self._sum_by_account(self.credit[mask], accounts))
+
+    def balances(self, as_of: date | None = None) -> np.ndarray:
+        """Balance per account id, signed by each account's normal side."""
+        debits, credits = self.account_totals(end=as_of)
+        return (debits - credits) * self._signs
+
+    def trial_balance(self, as_of: date | None = None) -> pd.DataFrame:
+        debits, credits = self.account_totals(end=as_of)
+        net = debits - credits
+        used = (debits != 0) | (credits != 0)
+        return pd.DataFrame({
+            "Code": [a.code for a in self.accounts],
+            "Account": [a.name for a in self.accounts],
+            "Debit": np.where(net > 0, net, 0),
+            "Credit": np.where(net < 0, -net, 0),
+        })[used].reset_index(drop=True)
+
+    def running_balance(self, code: str, start: date | None = None,
+                        end: date | None = None) -> pd.DataFrame:
+        """Postings to one account in date order with a running balance."""
+        account_id = self.account_id(code)
+        rows = np.flatnonzero(self.account == account_id)
+        rows = rows[np.argsort(self.date[rows], kind="stable")]
+        debit = self.debit[rows]
+        credit = self.credit[rows]
+        balance = np.cumsum((debit - credit) * self._signs[account_id])
+        je = self.je[rows]
+        frame = pd.DataFrame({
+            "Date": self.date[rows],
+            "Reference": np.asarray(self.je_refs, dtype=object)[je] if len(rows) else [],
+            "Description": np.asarray(self.je_descriptions, dtype=object)[je] if len(rows) else [],
+            "Debit": debit,
+            "Credit": credit,
+            "Balance": balance,
+        })
+        if start is not None:
+            frame = frame[frame["Date"] >= np.datetime64(start, "D")]
+        if end is not None:
+            frame = frame[frame["Date"] <= np.datetime64(end, "D")]
+        return frame.reset_index(drop=True)
+
+    def net_income(self, start: date | None = None, end: date | None = None) -> int:
+        debits, credits = self.account_totals(start, end)
+        net = credits - debits
+        kinds = np.array([a.kind for a in self.accounts])
+        return int(net[kinds == REVENUE].sum() + net[kinds == EXPENSE].sum())
+
+    def balance_sheet(self, as_of: date | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Assets and liabilities-and-equity statements as (Account, Amount) frames.
+
+        Amounts are centavos; section headers and spacer rows carry ``None``.
+        """
+        balances = self.balances(as_of)
+        contra_sign = np.array([-1 if a.contra else 1 for a in self.accounts])
+        # Contra accounts are presented as deductions from their section.
+        presented = balances * contra_sign
+
+        def section_rows(kind: str) -> tuple[list[tuple[str, int | None]], int]:
+            rows: list[tuple[str, int | None]] = []
+            total = 0
+            sections: dict[str, list[int]] = {}
+            for i, account in enumerate(self.accounts):
+                if account.kind == kind:
+                    sections.setdefault(account.section, []).append(i)
+            for section, ids in sections.items():
+                rows.append((section, None))
+                for i in ids:
+                    rows.append((f"  {self.accounts[i].name}", int(presented[i])))
+                    total += int(presented[i])
+            return rows, total
+
+        asset_rows, total_assets = section_rows(ASSET)
+        asset_rows.append(("TOTAL ASSETS", total_assets))
+
+        liability_rows, total_liabilities = section_rows(LIABILITY)
+        liability_rows.append(("TOTAL LIABILITIES", total_liabilities))
+        equity_rows, beginning = section_rows(EQUITY)
+        net_income = self.net_income(end=as_of)
+        total_equity = beginning + net_income
+        equity_rows.append(("  Net Income (Current Period)", net_income))
+        equity_rows.append(("TOTAL EQUITY", total_equity))
+
+        rows = liability_rows + [("", None)] + equity_rows + [("", None)]
+        rows.append(("TOTAL LIABILITIES & EQUITY", total_liabilities + total_equity))
+
+        def frame(data: list[tuple[str, int | None]]) -> pd.DataFrame:
+            return pd.DataFrame(data, columns=["Account", "Amount"])
+
+        return frame(asset_rows), frame(rows)
+
+    def income_statement(self, start: date | None = None, end: date | None = None) -> pd.DataFrame:
+        """Revenue and expenses over a date range as an (Account, Amount) frame.
+
+        Amounts are centavos; section headers carry ``None``.
+        """
+        debits, credits = self.account_totals(start, end)
+        rows: list[tuple[str, int | None]] = []
+        totals = {}
+        for kind, heading, sign in ((REVENUE, "REVENUE", 1), (EXPENSE, "EXPENSES", -1)):
+            rows.append((heading, None))
+            total = 0
+            for i, account in enumerate(self.accounts):
+                if account.kind == kind:
+                    amount = int(credits[i] - debits[i]) * sign
+                    rows.append((f"  {account.name}", amount))
+                    total += amount
+            rows.append((f"TOTAL {heading}", total))
+            rows.append(("", None))
+            totals[kind] = total
+        rows.append(("NET INCOME", totals[REVENUE] - totals[EXPENSE]))
+        return pd.DataFrame(rows, columns=["Account", "Amount"])
+
+    # -- journal entries -------------------------------------------------
+
+    def entries(self, start: date | None = None, end: date | None = None) -> pd.DataFrame:
+        """One header row per journal entry: reference, date, description, total."""
+        mask = self._mask(start, end)
+        je = self.je[mask]
+        if not len(je):
+            return pd.DataFrame(columns=["Reference", "Date", "Description", "Amount"])
+        ids, first = np.unique(je, return_index=True)
+        totals = np.bincount(je, weights=self.debit[mask], minlength=len(self.je_refs))[ids]
+        frame = pd.DataFrame({
+            "Reference": np.asarray(self.je_refs, dtype=object)[ids],
+            "Date": self.date[mask][first],
+            "Description": np.asarray(self.je_descriptions, dtype=object)[ids],
+            "Amount": totals.astype(np.int64),
+        })
+        return frame.sort_values(["Date", "Reference"], kind="stable").reset_index(drop=True)
+
+    def entry_lines(self, ref: str) -> pd.DataFrame:
+        rows = np.flatnonzero(self.je == self.entry_id(ref))
+        names = np.asarray([a.name for a in self.accounts], dtype=object)
+        return pd.DataFrame({
+            "Account": names[self.account[rows]],
+            "Debit": self.debit[rows],
+            "Credit": self.credit[rows],
+        })
+
+    def to_arrow(self):
+        """Export the journal lines as a ``pyarrow.Table`` (zero-copy for numeric columns)."""
+        import pyarrow as pa
+
+        return pa.table({
+            "date": self.date,
+            "je": self.je,
+            "account": self.account,
+            "fund": self.fund,
+            "debit": self.debit,
+            "credit": self.credit,
+        })
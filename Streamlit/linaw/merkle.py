@@ -0,0 +1,285 @@
+"""Merkle accumulators over journal entries, one tree per posting month.
+
+Each journal entry becomes one leaf::
+
+    leaf = SHA-256(0x00 || reference || 0x00 || lines)
+
+where ``lines`` are the entry's journal lines in posting order, each packed
+little-endian as (date as days since 1970-01-01: i8, account code: i4,
+debit centavos: i8, credit centavos: i8).  Interior nodes are
+``SHA-256(0x01 || left || right)``; a node without a right sibling is
+promoted unchanged to the next level.  The prefixes keep leaves and nodes
+from ever being confused, so a month's root commits to every entry in it
+and an inclusion proof is the O(log n) sibling path from leaf to root.
+
+Trees keep every level as a growable ``(n, 32)`` byte array: the initial
+build hashes each level in one pass over a contiguous buffer, and each
+append groups the new entries by month and rehashes only the right edge
+of each touched tree, one pass per level for the whole batch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import numpy as np
+
+from .ledger import Ledger
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+
+_LINE = np.dtype([("date", "<i8"), ("account", "<i4"), ("debit", "<i8"), ("credit", "<i8")])
+_NODE = hashlib.sha256(NODE_PREFIX)
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    h = _NODE.copy()
+    h.update(left)
+    h.update(right)
+    return h.digest()
+
+
+def _hash_pairs(level: np.ndarray) -> np.ndarray:
+    """Parents of a full level: hash each adjacent pair, promote an odd tail."""
+    pairs = len(level) // 2
+    if not pairs:
+        return level.copy()
+    buffer = memoryview(np.ascontiguousarray(level[: 2 * pairs]).data).cast("B")
+    digests = bytearray()
+    for offset in range(0, 64 * pairs, 64):
+        h = _NODE.copy()
+        h.update(buffer[offset:offset + 64])
+        digests += h.digest()
+    parents = np.frombuffer(bytes(digests), dtype=np.uint8).reshape(pairs, 32)
+    if len(level) % 2:
+        parents = np.concatenate([parents, level[-1:]])
+    return parents
+
+
+def verify_proof(leaf: bytes, proof: list[tuple[bytes, str]], root: bytes) -> bool:
+    """Fold a sibling path (hash, "left" | "right") into ``leaf`` and compare with ``root``."""
+    node = leaf
+    for sibling, side in proof:
+        node = node_hash(sibling, node) if side == "left" else node_hash(node, sibling)
+    return node == root
+
+
+class MerkleTree:
+    """Append-only binary Merkle tree over 32-byte leaves."""
+
+    def __init__(self, leaves: np.ndarray | None = None):
+        leaves = np.empty((0, 32), dtype=np.uint8) if leaves is None else leaves
+        levels = [np.asarray(leaves, dtype=np.uint8).reshape(-1, 32)]
+        while len(levels[-1]) > 1:
+            levels.append(_hash_pairs(levels[-1]))
+        self._sizes = [len(level) for level in levels]
+        self._levels = []
+        for level in levels:
+            stored = np.empty((max(16, len(level)), 32), dtype=np.uint8)
+            stored[: len(level)] = level
+            self._levels.append(stored)
+
+    def __len__(self) -> int:
+        return self._sizes[0]
+
+    @property
+    def root(self) -> bytes:
+        if not self._sizes[0]:
+            return EMPTY_ROOT
+        return self._levels[-1][0].tobytes()
+
+    def leaf(self, index: int) -> bytes:
+        return self._levels[0][index].tobytes()
+
+    def leaves(self, indices: np.ndarray) -> np.ndarray:
+        return self._levels[0][indices]
+
+    def _put(self, depth: int, index: int, nodes: np.ndarray) -> None:
+        """Write ``nodes`` at ``index`` onwards, which become the end of level ``depth``."""
+        if depth == len(self._levels):
+            self._levels.append(np.empty((16, 32), dtype=np.uint8))
+            self._sizes.append(0)
+        level = self._levels[depth]
+        size = index + len(nodes)
+        if size > len(level):
+            capacity = len(level)
+            while capacity < size:
+                capacity *= 2
+            grown = np.empty((capacity, 32), dtype=np.uint8)
+            grown[: self._sizes[depth]] = level[: self._sizes[depth]]
+            self._levels[depth] = level = grown
+        level[index:size] = nodes
+        self._sizes[depth] = size
+
+    def extend(self, leaves: np.ndarray) -> int:
+        """Add leaves and rehash the right edge once per level; returns the first new leaf's index."""
+        leaves = np.asarray(leaves, dtype=np.uint8).reshape(-1, 32)
+        index = self._sizes[0]
+        if not len(leaves):
+            return index
+        self._put(0, index, leaves)
+        depth, first = 0, index
+        while self._sizes[depth] > 1:
+            first &= ~1
+            parents = _hash_pairs(self._levels[depth][first:self._sizes[depth]])
+            depth, first = depth + 1, first // 2
+            self._put(depth, first, parents)
+        return index
+
+    def append(self, leaf: bytes) -> int:
+        """Add a leaf and rehash its path to the root; returns the leaf index."""
+        return self.extend(np.frombuffer(leaf, dtype=np.uint8))
+
+    def proof(self, index: int) -> list[tuple[bytes, str]]:
+        if not 0 <= index < self._sizes[0]:
+            raise IndexError(f"leaf {index} out of range")
+        path = []
+        for depth in range(len(self._sizes) - 1):
+            sibling = index ^ 1
+            if sibling < self._sizes[depth]:
+                path.append((self._levels[depth][sibling].tobytes(),
+                             "left" if sibling < index else "right"))
+            index //= 2
+        return path
+
+
+class JournalMerkle:
+    """Per-month Merkle trees over a ledger's journal entries.
+
+    The accumulator subscribes to the ledger; every entry must arrive with
+    all of its lines in a single append, which is how ``Ledger.post`` and
+    bulk ``Ledger.extend`` loads write them.
+    """
+
+    def __init__(self, ledger: Ledger):
+        self.ledger = ledger
+        self._codes = np.array([int(a.code) for a in ledger.accounts], dtype="<i4")
+        self.trees: dict[str, MerkleTree] = {}
+        self._periods: list[str] = []
+        self._period_ids: dict[str, int] = {}
+        self._entry_period = np.full(max(16, len(ledger.je_refs)), -1, dtype=np.int32)
+        self._entry_leaf = np.full(max(16, len(ledger.je_refs)), -1, dtype=np.int64)
+        self._build()
+        ledger.add_listener(self._on_append)
+
+    def _entry_leaves(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Entry ids, entry months and leaf hashes for journal rows ``start:end``."""
+        ledger = self.ledger
+        je = ledger.je[start:end]
+        if not len(je):
+            return je, ledger.date[:0].astype("datetime64[M]"), np.empty((0, 32), dtype=np.uint8)
+        order = np.argsort(je, kind="stable")
+        je = je[order]
+        rows = np.empty(len(order), dtype=_LINE)
+        rows["date"] = ledger.date[start:end][order].astype(np.int64)
+        rows["account"] = self._codes[ledger.account[start:end][order]]
+        rows["debit"] = ledger.debit[start:end][order]
+        rows["credit"] = ledger.credit[start:end][order]
+        bounds = np.flatnonzero(np.diff(je)) + 1
+        firsts = np.concatenate([[0], bounds]).astype(np.int64)
+        lasts = np.concatenate([bounds, [len(je)]]).astype(np.int64)
+        ids = je[firsts]
+        months = ledger.date[start:end][order][firsts].astype("datetime64[M]")
+
+        buffer = memoryview(rows.data).cast("B")
+        width = _LINE.itemsize
+        digests = bytearray()
+        refs = ledger.je_refs
+        for je_id, lo, hi in zip(ids.tolist(), firsts.tolist(), lasts.tolist()):
+            h = hashlib.sha256(LEAF_PREFIX)
+            h.update(refs[je_id].encode())
+            h.update(b"\x00")
+            h.update(buffer[lo * width:hi * width])
+            digests += h.digest()
+        leaves = np.frombuffer(bytes(digests), dtype=np.uint8).reshape(-1, 32)
+        return ids, months, leaves
+
+    def _locate(self, je_ids: np.ndarray | int, period: int, leaves: np.ndarray | int) -> None:
+        needed = int(np.max(je_ids)) + 1
+        capacity = len(self._entry_leaf)
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            for name in ("_entry_period", "_entry_leaf"):
+                old = getattr(self, name)
+                new = np.full(capacity, -1, dtype=old.dtype)
+                new[: len(old)] = old
+                setattr(self, name, new)
+        self._entry_period[je_ids] = period
+        self._entry_leaf[je_ids] = leaves
+
+    def _period_index(self, month: str, leaves: np.ndarray | None = None) -> int:
+        if month not in self._period_ids:
+            self.trees[month] = MerkleTree(leaves)
+            self._period_ids[month] = len(self._periods)
+            self._periods.append(month)
+        return self._period_ids[month]
+
+    def _build(self) -> None:
+        ids, months, leaves = self._entry_leaves(0, len(self.ledger))
+        order = np.lexsort((ids, months))
+        ids, months, leaves = ids[order], months[order], leaves[order]
+        unique, firsts = np.unique(months, return_index=True)
+        lasts = np.append(firsts[1:], len(months))
+        for month, lo, hi in zip(np.datetime_as_string(unique), firsts.tolist(), lasts.tolist()):
+            period = self._period_index(str(month), leaves[lo:hi])
+            self._locate(ids[lo:hi], period, np.arange(hi - lo))
+
+    def _on_append(self, start: int, end: int) -> None:
+        ids, months, leaves = self._entry_leaves(start, end)
+        order = np.lexsort((ids, months))
+        ids, months, leaves = ids[order], months[order], leaves[order]
+        unique, firsts = np.unique(months, return_index=True)
+        lasts = np.append(firsts[1:], len(months))
+        for month, lo, hi in zip(np.datetime_as_string(unique), firsts.tolist(), lasts.tolist()):
+            period = self._period_index(str(month))
+            first = self.trees[str(month)].extend(leaves[lo:hi])
+            self._locate(ids[lo:hi], period, np.arange(first, first + hi - lo))
+
+    # -- queries ---------------------------------------------------------
+
+    def period(self, ref: str) -> str:
+        je_id = self.ledger.entry_id(ref)
+        if je_id >= len(self._entry_period) or self._entry_period[je_id] < 0:
+            raise KeyError(f"journal entry {ref} has no posted lines")
+        return self._periods[self._entry_period[je_id]]
+
+    def leaves(self, start: int, stop: int) -> np.ndarray:
+        """Leaf hashes of entries ``start:stop`` in entry order, up to the first without posted lines."""
+        periods = self._entry_period[start:stop]
+        unposted = np.flatnonzero(periods < 0)
+        if len(unposted):
+            periods = periods[: unposted[0]]
+        indices = self._entry_leaf[start:start + len(periods)]
+        leaves = np.empty((len(periods), 32), dtype=np.uint8)
+        for period in np.unique(periods).tolist():
+            mask = periods == period
+            leaves[mask] = self.trees[self._periods[period]].leaves(indices[mask])
+        return leaves
+
+    def root(self, period: str) -> bytes:
+        tree = self.trees.get(period)
+        return tree.root if tree is not None else EMPTY_ROOT
+
+    def roots(self) -> dict[str, tuple[int, bytes]]:
+        """Entry count and root for every month, in calendar order."""
+        return {month: (len(self.trees[month]), self.trees[month].root)
+                for month in sorted(self.trees)}
+
+    def proof(self, ref: str) -> dict:
+        """A self-contained inclusion proof for one journal entry."""
+        month = self.period(ref)
+        tree = self.trees[month]
+        index = int(self._entry_leaf[self.ledger.entry_id(ref)])
+        return {
+            "reference": ref,
+            "period": month,
+            "leaf_index": index,
+            "leaf_count": len(tree),
+            "leaf": "0x" + tree.leaf(index).hex(),
+            "root": "0x" + tree.root.hex(),
+            "path": [{"hash": "0x" + sibling.hex(), "side": side}
+                     for sibling, side in tree.proof(index)],
+            "algorithm": "sha256; leaf=H(0x00|ref|0x00|lines), node=H(0x01|left|right)",
+        }
@@ -0,0 +1,412 @@
+"""Durable outbox for chain writes.
+
+FabConnect accepts a transaction with ``fly-sync=false`` and confirms it
+later through ``/receipts/{id}``, so a write the process forgets between
+the two is lost or, worse, sent twice.  Every chain write is therefore
+first appended to an :class:`Outbox` (a per-tenant SQLite file) under an
+idempotency key; appending a key that is already there does nothing.  An
+:class:`OutboxDispatcher` drains it in the background:
+
+* at most ``max_in_flight`` writes are being sent or awaiting a receipt,
+  oldest first;
+* each attempt is sent with the FabConnect request id ``<key>.<attempt>``,
+  so its receipt can be found after a restart.  A write that was being
+  sent when the process stopped is looked up under that id before it is
+  sent again, and a resend the gateway reports as a duplicate counts as
+  accepted;
+* a request the gateway refuses or fails (4xx or 5xx), a failed receipt
+  and a receipt that has not arrived within ``receipt_timeout`` of the
+  submission are retried with exponential backoff and jitter, under the
+  next attempt's id, and move to the dead-letter queue after
+  ``max_attempts``; :meth:`Outbox.requeue` puts them back;
+* an unreachable or saturated (429) gateway backs the whole dispatcher off
+  without spending the writes' attempts.
+
+Rows are only ever appended; a write's key, function and arguments never
+change, only its delivery columns.  Queue depth and confirmation lag come
+from indexed counts, cheap enough for every Dashboard rerun.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+from .settings import data_dir
+
+if TYPE_CHECKING:
+    from .fabconnect import FabconnectClient, FabconnectConfig, TransactionReceipt
+
+log = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq             INTEGER PRIMARY KEY AUTOINCREMENT,
+    key             TEXT NOT NULL UNIQUE,
+    func            TEXT NOT NULL,
+    args            TEXT NOT NULL,
+    enqueued_at     REAL NOT NULL,
+    status          TEXT NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    -- attempts made before the last requeue; request ids keep counting past it
+    base_attempt    INTEGER NOT NULL DEFAULT 0,
+    -- when to send the next attempt; for a submitted write, when to stop waiting for its receipt
+    next_attempt_at REAL NOT NULL,
+    receipt_id      TEXT,
+    tx_id           TEXT,
+    block_number    INTEGER,
+    error           TEXT,
+    confirmed_at    REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, seq);
+CREATE INDEX IF NOT EXISTS outbox_confirmed ON outbox (status, confirmed_at);
+"""
+
+_COLUMNS = ("seq, key, func, args, enqueued_at, status, attempts, base_attempt, next_attempt_at, receipt_id, "
+            "tx_id, block_number, error, confirmed_at")
+
+
+@dataclass(frozen=True)
+class OutboxEntry:
+    seq: int
+    key: str
+    func: str
+    args: tuple[str, ...]
+    enqueued_at: float
+    status: str
+    attempts: int = 0
+    base_attempt: int = 0
+    next_attempt_at: float = 0.0
+    receipt_id: str | None = None
+    tx_id: str | None = None
+    block_number: int | None = None
+    error: str | None = None
+    confirmed_at: float | None = None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "OutboxEntry":
+        seq, key, func, args, *rest = row
+        return cls(seq, key, func, tuple(json.loads(args)), *rest)
+
+    @property
+    def request_id(self) -> str:
+        """The FabConnect request id of the current attempt."""
+        return f"{self.key}.{self.attempts}"
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+@dataclass(frozen=True)
+class OutboxStats:
+    """Queue depth and confirmation lag at ``checked_at``."""
+
+    pending: int = 0
+    in_flight: int = 0
+    dead: int = 0
+    confirmed: int = 0
+    oldest_unconfirmed: float | None = None
+    last_confirmation: float | None = None
+    checked_at: float = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Writes not yet confirmed or dead-lettered."""
+        return self.pending + self.in_flight
+
+    @property
+    def lag(self) -> float:
+        """Age in seconds of the oldest write still awaiting confirmation."""
+        if self.oldest_unconfirmed is None:
+            return 0.0
+        return max(0.0, self.checked_at - self.oldest_unconfirmed)
+
+    @property
+    def lag_label(self) -> str:
+        if self.depth:
+            return f"oldest write waiting {_duration(self.lag)}"
+        if self.last_confirmation is not None:
+            return f"caught up (last write confirmed in {self.last_confirmation:.1f}s)"
+        return "—"
+
+
+class Outbox:
+    """SQLite log of chain writes and their delivery state."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else data_dir() / "outbox.db"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def enqueue(self, key: str, func: str, args: Iterable[str]) -> bool:
+        """Append a write; returns ``False`` when ``key`` was already enqueued."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO outbox (key, func, args, enqueued_at, status, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, func, json.dumps([str(arg) for arg in args]), now, PENDING, now))
+        return cursor.rowcount == 1
+
+    def _select(self, where: str, params: tuple = ()) -> list[OutboxEntry]:
+        with self._lock:
+            rows = self._db.execute(f"SELECT {_COLUMNS} FROM outbox WHERE {where}", params).fetchall()
+        return [OutboxEntry.from_row(row) for row in rows]
+
+    def get(self, key: str) -> OutboxEntry | None:
+        found = self._select("key = ?", (key,))
+        return found[0] if found else None
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, OutboxEntry]:
+        keys = list(dict.fromkeys(keys))
+        found: dict[str, OutboxEntry] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            for entry in self._select(f"key IN ({','.join('?' * len(chunk))})", tuple(chunk)):
+                found[entry.key] = entry
+        return found
+
+    def due(self, now: float, limit: int) -> list[OutboxEntry]:
+        """Writes to send now, oldest first; interrupted sends come first."""
+        if limit <= 0:
+            return []
+        return self._select("status IN (?, ?) AND next_attempt_at <= ? "
+                            "ORDER BY status = ? DESC, seq LIMIT ?",
+                            (SENDING, PENDING, now, SENDING, limit))
+
+    def in_flight(self) -> list[OutboxEntry]:
+        """Writes accepted by the gateway and awaiting their receipts."""
+        return self._select("status = ? ORDER BY seq", (SUBMITTED,))
+
+    def count_in_flight(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (SUBMITTED,)).fetchone()[0]
+
+    def dead_letters(self, limit: int = 100) -> list[OutboxEntry]:
+        return self._select("status = ? ORDER BY seq LIMIT ?", (DEAD, limit))
+
+    def sending(self, key: str) -> None:
+        """Record that the current attempt is about to be sent."""
+        with self._lock:
+            self._db.execute("UPDATE outbox SET status = ? WHERE key = ?", (SENDING, key))
+
+    def submitted(self, key: str, receipt_id: str, deadline: float) -> None:
+        """Record an accepted attempt whose receipt is due by ``deadline``."""
+        with self._lock:
+            self._db.execute("UPDATE outbox SET status = ?, receipt_id = ?, next_attempt_at = ? WHERE key = ?",
+                             (SUBMITTED, receipt_id, deadline, key))
+
+    def confirmed(self, key: str, tx_id: str | None, block_number: int | None) -> None:
+        with self._lock:
+            self._db.execute("UPDATE outbox SET status = ?, tx_id = ?, block_number = ?, error = NULL, "
+                             "confirmed_at = ? WHERE key = ?",
+                             (CONFIRMED, tx_id, block_number, time.time(), key))
+
+    def failed(self, key: str, error: str, retry_at: float | None) -> None:
+        """Count a failed attempt; retry at ``retry_at``, or dead-letter the write when ``None``."""
+        with self._lock:
+            if retry_at is None:
+                self._db.execute("UPDATE outbox SET status = ?, attempts = attempts + 1, error = ? "
+                                 "WHERE key = ?", (DEAD, error, key))
+            else:
+                self._db.execute("UPDATE outbox SET status = ?, attempts = attempts + 1, error = ?, "
+                                 "next_attempt_at = ? WHERE key = ?", (PENDING, error, retry_at, key))
+
+    def requeue(self, keys: Iterable[str] | None = None) -> int:
+        """Return dead letters (all of them by default) to the queue with a fresh attempt budget."""
+        now = time.time()
+        with self._lock:
+            if keys is None:
+                cursor = self._db.execute("UPDATE outbox SET status = ?, next_attempt_at = ?, base_attempt = attempts "
+                                          "WHERE status = ?",
+                                          (PENDING, now, DEAD))
+                return cursor.rowcount
+            requeued = 0
+            for key in keys:
+                requeued += self._db.execute(
+                    "UPDATE outbox SET status = ?, next_attempt_at = ?, base_attempt = attempts "
+                    "WHERE key = ? AND status = ?",
+                    (PENDING, now, key, DEAD)).rowcount
+            return requeued
+
+    def stats(self) -> OutboxStats:
+        """Queue depth and confirmation lag from the status indexes."""
+        with self._lock:
+            counts = dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM outbox WHERE status IN (?, ?, ?, ?) GROUP BY status",
+                (PENDING, SENDING, SUBMITTED, DEAD)).fetchall())
+            oldest = self._db.execute(
+                "SELECT MIN(enqueued_at) FROM outbox WHERE status IN (?, ?, ?)",
+                (PENDING, SENDING, SUBMITTED)).fetchone()[0]
+            last = self._db.execute(
+                "SELECT confirmed_at - enqueued_at FROM outbox WHERE status = ? "
+                "ORDER BY confirmed_at DESC LIMIT 1", (CONFIRMED,)).fetchone()
+            total = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM outbox").fetchone()[0]
+        unconfirmed = sum(counts.values())
+        return OutboxStats(
+            pending=counts.get(PENDING, 0),
+            in_flight=counts.get(SENDING, 0) + counts.get(SUBMITTED, 0),
+            dead=counts.get(DEAD, 0),
+            # Rows are never deleted, so the sequence is the number ever enqueued.
+            confirmed=total - unconfirmed,
+            oldest_unconfirmed=oldest,
+            last_confirmation=last[0] if last else None,
+            checked_at=time.time(),
+        )
+
+
+class OutboxDispatcher:
+    """Sends an :class:`Outbox`'s writes through FabConnect and records their receipts."""
+
+    def __init__(self, outbox: Outbox, config: FabconnectConfig | None = None, *,
+                 client: FabconnectClient | None = None, interval: float = 1.0, max_in_flight: int = 16,
+                 max_attempts: int = 8, retry_delay: float = 2.0, max_delay: float = 300.0,
+                 receipt_timeout: float = 600.0):
+        self.outbox = outbox
+        self.config = config
+        self._client = client
+        # A client passed in is shared with the tenant's other tasks; it is not ours to close.
+        self._owns_client = client is None
+        self.interval = interval
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.receipt_timeout = receipt_timeout
+
+    @property
+    def client(self) -> FabconnectClient:
+        if self._client is None:
+            from .fabconnect import FabconnectClient
+
+            self._client = FabconnectClient(self.config)
+        return self._client
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_delay * 2 ** attempts, self.max_delay)
+        return delay * random.uniform(0.5, 1.5)
+
+    def _failed(self, entry: OutboxEntry, error: str) -> None:
+        if entry.attempts + 1 - entry.base_attempt >= self.max_attempts:
+            self.outbox.failed(entry.key, error, None)
+            log.warning("Chain write %s dead-lettered after %d attempts: %s",
+                        entry.key, entry.attempts + 1 - entry.base_attempt, error)
+        else:
+            self.outbox.failed(entry.key, error, time.time() + self._backoff(entry.attempts - entry.base_attempt))
+
+    def _settle(self, entry: OutboxEntry, receipt: TransactionReceipt) -> None:
+        if receipt.succeeded:
+            self.outbox.confirmed(entry.key, receipt.transaction_id or None, receipt.block_number)
+        else:
+            self._failed(entry, receipt.error or receipt.type or "transaction failed")
+
+    async def _send(self, entry: OutboxEntry) -> None:
+        from .fabconnect import FabconnectError
+
+        if entry.status == SENDING:
+            # Interrupted mid-send: the gateway may already hold this attempt.
+            # If the lookup fails, resending under the same id is still safe:
+            # the gateway answers 409 when it has the attempt.
+            try:
+                receipt = await self.client.get_receipt(entry.request_id)
+            except FabconnectError as err:
+                log.warning("Receipt lookup for chain write %s failed: %s", entry.key, err)
+                receipt = None
+            if receipt is not None:
+                self._settle(entry, receipt)
+                return
+        self.outbox.sending(entry.key)
+        payload = self.client.payload(entry.func, entry.args, request_id=entry.request_id)
+        try:
+            receipt_id = await self.client.send_transaction(payload)
+        except FabconnectError as err:
+            if err.duplicate:
+                receipt_id = entry.request_id
+            elif err.status == 429:
+                # Saturated, not failing: back the dispatcher off instead.
+                raise
+            else:
+                self._failed(entry, str(err))
+                return
+        self.outbox.submitted(entry.key, receipt_id, time.time() + self.receipt_timeout)
+
+    async def _poll(self, entry: OutboxEntry) -> None:
+        from .fabconnect import FabconnectError
+
+        try:
+            receipt = await self.client.get_receipt(entry.receipt_id)
+        except FabconnectError as err:
+            # Counts as not there yet; the receipt deadline bounds the wait.
+            log.warning("Receipt lookup for chain write %s failed: %s", entry.key, err)
+            receipt = None
+        if receipt is not None:
+            self._settle(entry, receipt)
+        elif time.time() >= entry.next_attempt_at:
+            self._failed(entry, f"no receipt within {_duration(self.receipt_timeout)}")
+
+    async def step(self) -> None:
+        """Record the receipts that have arrived, then send what fits in flight."""
+        results = await asyncio.gather(*(self._poll(entry) for entry in self.outbox.in_flight()),
+                                       return_exceptions=True)
+        room = self.max_in_flight - self.outbox.count_in_flight()
+        due = self.outbox.due(time.time(), room)
+        results += await asyncio.gather(*(self._send(entry) for entry in due), return_exceptions=True)
+        # A write the gateway never answered stays where it was and is resumed next step.
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def run(self) -> None:
+        """Drain the outbox until cancelled; gateway failures back off exponentially with jitter."""
+        import aiohttp
+
+        from .fabconnect import FabconnectError
+
+        failures = 0
+        try:
+            while True:
+                try:
+                    await self.step()
+                    failures = 0
+                    delay = self.interval
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError, FabconnectError) as err:
+                    failures += 1
+                    delay = min(self.interval * 2 ** failures, self.max_delay)
+                    log.warning("Outbox dispatch failed (%d in a row): %s. Retrying in ~%.1fs",
+                                failures, err, delay)
+                except Exception:
+                    # A malformed receipt or a store failure must not stop the queue
+                    # draining for the life of the process; the write stays queued.
+                    failures += 1
+                    delay = min(self.interval * 2 ** failures, self.max_delay)
+                    log.exception("Outbox dispatch failed (%d in a row). Retrying in ~%.1fs", failures, delay)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        finally:
+            if self._owns_client and self._client is not None:
+                await self._client.close()
@@ -0,0 +1,390 @@
+"""Event-sourced projections of the chain event log, with Arrow snapshots.
+
+A :class:`Projection` is state folded from the chain events in chain
+order: the :class:`DocumentRegistry` (latest anchored hash of every
+document), the :class:`JournalAnchors` ledger (every batch of journal
+entries anchored on chain) and the :class:`ChainKpis` counters.  The
+journal lines themselves never go on chain, only their batch roots, so
+the books still load from their Parquet mirror.
+
+A :class:`Projector` folds events from the local
+:class:`~linaw.events.EventStore` into its projections in chunks, and
+every ``snapshot_every`` events writes each projection as a
+zstd-compressed Arrow IPC file into a directory named after the chain
+position (block, transaction, event) it covers.  On start, in this
+process or a new worker, it restores the newest complete snapshot
+whose format versions match and replays only the events after it.  A
+cold start therefore costs one snapshot read plus the tail, not a replay
+from block 0.  Snapshot directories are written under a temporary name
+and renamed into place, so a reader never sees a partial one.
+
+Pages call :meth:`Projector.catch_up` on each run; with no new events
+that is one primary-key probe.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .events import EventStore, Position, document_type
+
+log = logging.getLogger(__name__)
+
+# Payloads are stored as compact JSON (see EventStore.write_batch).
+_HASH = r'"Hash":"(?P<hash>[^"]*)"'
+_ANCHOR_EVENT = "JournalBatchAnchored"
+_COMPRESSION = "zstd"
+
+
+class Projection:
+    """State folded from chain events; subclasses set ``name`` and bump ``version`` on format changes."""
+
+    name = ""
+    version = 1
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def apply(self, events: pa.Table) -> None:
+        """Fold a chunk of events (``EventStore`` rows, in chain order) into the state."""
+        raise NotImplementedError
+
+    def to_arrow(self) -> pa.Table:
+        raise NotImplementedError
+
+    def restore(self, table: pa.Table) -> None:
+        """Replace the state with a table written by :meth:`to_arrow`."""
+        raise NotImplementedError
+
+
+class DocumentRegistry(Projection):
+    """Latest anchored ``Hash``, block and transaction of every document id."""
+
+    name = "registry"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._documents: dict[str, tuple[str, int, str]] = {}
+        self._height = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def apply(self, events: pa.Table) -> None:
+        self._height = max(self._height, int(pc.max(events["block_number"]).as_py()))
+        hashes = pc.struct_field(pc.extract_regex(events["payload"], _HASH), [0])
+        anchored = pc.and_(pc.is_valid(hashes), pc.is_valid(events["document_id"]))
+        frame = pa.table({
+            "document_id": events["document_id"],
+            "hash": hashes,
+            "block_number": events["block_number"],
+            "tx_id": events["tx_id"],
+        }).filter(anchored).to_pandas()
+        # Chain order: the last event for a document is its current hash.
+        frame = frame.drop_duplicates("document_id", keep="last")
+        self._documents.update(zip(frame["document_id"],
+                                   zip(frame["hash"], frame["block_number"].tolist(), frame["tx_id"])))
+
+    def to_arrow(self) -> pa.Table:
+        ids = list(self._documents)
+        hashes, blocks, tx_ids = zip(*self._documents.values()) if ids else ((), (), ())
+        return pa.table({
+            "document_id": pa.array(ids, pa.string()),
+            "hash": pa.array(hashes, pa.string()),
+            "block_number": pa.array(blocks, pa.int64()),
+            "tx_id": pa.array(tx_ids, pa.string()),
+        }, metadata={"height": str(self._height)})
+
+    def restore(self, table: pa.Table) -> None:
+        columns = [table[name].to_pylist() for name in ("document_id", "hash", "block_number", "tx_id")]
+        self._documents = dict(zip(columns[0], zip(*columns[1:])))
+        self._height = int((table.schema.metadata or {}).get(b"height", 0))
+
+    def height(self) -> int:
+        """The highest block folded in."""
+        return self._height
+
+    def document_hashes(self, document_ids: Iterable[str]) -> dict[str, tuple[str, int]]:
+        """Latest anchored ``Hash`` and its block number for each document id (``EventStore``'s lookup)."""
+        found = {}
+        for document_id in document_ids:
+            record = self._documents.get(document_id)
+            if record is not None:
+                found[document_id] = record[:2]
+        return found
+
+
+@dataclass(frozen=True)
+class ChainBatch:
+    """One ``JournalBatchAnchored`` event: a batch of journal entries committed by its Merkle root."""
+
+    asset_id: str
+    hash: str
+    first_entry: str
+    last_entry: str
+    entries: int
+    block_number: int
+    tx_id: str
+
+
+class JournalAnchors(Projection):
+    """The journal as the chain records it: every anchored batch, by asset id."""
+
+    name = "journal"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._batches: dict[str, ChainBatch] = {}
+        self.entries = 0
+
+    def __len__(self) -> int:
+        return len(self._batches)
+
+    def apply(self, events: pa.Table) -> None:
+        anchors = events.filter(pc.equal(events["event_name"], _ANCHOR_EVENT))
+        for payload, block, tx_id in zip(anchors["payload"].to_pylist(), anchors["block_number"].to_pylist(),
+                                         anchors["tx_id"].to_pylist()):
+            record = json.loads(payload)
+            batch = ChainBatch(record["ID"], record.get("Hash", ""), record.get("FirstEntry", ""),
+                               record.get("LastEntry", ""), int(record.get("Entries", 0)), block, tx_id)
+            previous = self._batches.get(batch.asset_id)
+            self.entries += batch.entries - (previous.entries if previous else 0)
+            self._batches[batch.asset_id] = batch
+
+    def to_arrow(self) -> pa.Table:
+        batches = list(self._batches.values())
+        return pa.table({
+            "asset_id": pa.array([b.asset_id for b in batches], pa.string()),
+            "hash": pa.array([b.hash for b in batches], pa.string()),
+            "first_entry": pa.array([b.first_entry for b in batches], pa.string()),
+            "last_entry": pa.array([b.last_entry for b in batches], pa.string()),
+            "entries": pa.array([b.entries for b in batches], pa.int32()),
+            "block_number": pa.array([b.block_number for b in batches], pa.int64()),
+            "tx_id": pa.array([b.tx_id for b in batches], pa.string()),
+        })
+
+    def restore(self, table: pa.Table) -> None:
+        self._batches = {row["asset_id"]: ChainBatch(**row) for row in table.to_pylist()}
+        self.entries = sum(batch.entries for batch in self._batches.values())
+
+    def get(self, asset_id: str) -> ChainBatch | None:
+        return self._batches.get(asset_id)
+
+
+@dataclass(frozen=True)
+class ChainKpiSnapshot:
+    events: int = 0
+    transactions: int = 0
+    height: int = 0
+    journal_batches: int = 0
+    journal_entries: int = 0
+    # Events per document type ("Ordinance", "Journal Batch"...).
+    by_type: tuple[tuple[str, int], ...] = ()
+
+
+class ChainKpis(Projection):
+    """Running chain counters, published as an immutable :class:`ChainKpiSnapshot`."""
+
+    name = "kpis"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.snapshot = ChainKpiSnapshot()
+        # The last (block, tx) folded in, so a transaction split across chunks counts once.
+        self._last_tx: tuple[int, int] = (-1, -1)
+
+    def apply(self, events: pa.Table) -> None:
+        blocks = events["block_number"].to_numpy()
+        txs = events["tx_index"].to_numpy().astype(np.int64)
+        starts = np.ones(len(blocks), dtype=bool)
+        starts[1:] = (blocks[1:] != blocks[:-1]) | (txs[1:] != txs[:-1])
+        starts[0] = (int(blocks[0]), int(txs[0])) != self._last_tx
+        self._last_tx = (int(blocks[-1]), int(txs[-1]))
+
+        counts = dict(self.snapshot.by_type)
+        documents = events["document_id"].to_pylist()
+        for kind, count in zip(*np.unique([document_type(d) for d in documents], return_counts=True)):
+            counts[str(kind)] = counts.get(str(kind), 0) + int(count)
+        anchors = events.filter(pc.equal(events["event_name"], _ANCHOR_EVENT))
+        entries = sum(int(json.loads(payload).get("Entries", 0)) for payload in anchors["payload"].to_pylist())
+
+        previous = self.snapshot
+        self.snapshot = ChainKpiSnapshot(
+            events=previous.events + len(events),
+            transactions=previous.transactions + int(starts.sum()),
+            height=max(previous.height, int(blocks.max())),
+            journal_batches=previous.journal_batches + len(anchors),
+            journal_entries=previous.journal_entries + entries,
+            by_type=tuple(sorted(counts.items())),
+        )
+
+    def to_arrow(self) -> pa.Table:
+        snapshot = self.snapshot
+        metrics = {
+            "events": snapshot.events,
+            "transactions": snapshot.transactions,
+            "height": snapshot.height,
+            "journal_batches": snapshot.journal_batches,
+            "journal_entries": snapshot.journal_entries,
+            "last_block": self._last_tx[0],
+            "last_tx_index": self._last_tx[1],
+            **{f"type:{kind}": count for kind, count in snapshot.by_type},
+        }
+        return pa.table({"metric": pa.array(list(metrics), pa.string()),
+                         "value": pa.array(list(metrics.values()), pa.int64())})
+
+    def restore(self, table: pa.Table) -> None:
+        metrics = dict(zip(table["metric"].to_pylist(), table["value"].to_pylist()))
+        self._last_tx = (metrics.pop("last_block"), metrics.pop("last_tx_index"))
+        by_type = tuple(sorted((name[5:], metrics.pop(name)) for name in list(metrics) if name.startswith("type:")))
+        self.snapshot = ChainKpiSnapshot(**metrics, by_type=by_type)
+
+
+def _position_name(position: Position) -> str:
+    return "{:012d}-{:06d}-{:06d}".format(*position)
+
+
+def _parse_position(name: str) -> Position | None:
+    try:
+        block, tx, event = (int(part) for part in name.split("-"))
+    except ValueError:
+        return None
+    return block, tx, event
+
+
+class Projector:
+    """Keeps projections caught up with an :class:`EventStore` and snapshots them."""
+
+    def __init__(self, events: EventStore, root: str | Path, projections: Iterable[Projection], *,
+                 snapshot_every: int = 50_000, keep: int = 2, chunk_size: int = 100_000):
+        self.events = events
+        self.root = Path(root)
+        self.projections = {projection.name: projection for projection in projections}
+        self.snapshot_every = snapshot_every
+        self.keep = keep
+        self.chunk_size = chunk_size
+        self.position: Position | None = None
+        self._unsnapshotted = 0
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Projection:
+        return self.projections[name]
+
+    @property
+    def height(self) -> int:
+        """The block of the last event folded in (0 before any)."""
+        return self.position[0] if self.position else 0
+
+    # -- snapshots -------------------------------------------------------
+
+    def _snapshot_dirs(self) -> list[tuple[Position, Path]]:
+        if not self.root.exists():
+            return []
+        found = [(_parse_position(path.name), path) for path in self.root.iterdir() if path.is_dir()]
+        return sorted(((position, path) for position, path in found if position is not None), reverse=True)
+
+    def _restore(self, path: Path) -> bool:
+        tables = {}
+        for name, projection in self.projections.items():
+            file = path / f"{name}.arrow"
+            try:
+                with pa.memory_map(str(file)) as source:
+                    table = pa.ipc.open_file(source).read_all()
+                    metadata = table.schema.metadata or {}
+                    if int(metadata.get(b"version", 0)) != projection.version:
+                        return False
+                    tables[name] = table.combine_chunks()
+            except (OSError, pa.ArrowInvalid):
+                return False
+        for name, table in tables.items():
+            self.projections[name].restore(table)
+        return True
+
+    def snapshot(self) -> Path | None:
+        """Write every projection at the current position; returns the snapshot directory."""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Path | None:
+        if self.position is None:
+            return None
+        target = self.root / _position_name(self.position)
+        if target.exists():
+            self._unsnapshotted = 0
+            return target
+        partial = self.root / f".partial-{uuid.uuid4().hex}"
+        partial.mkdir(parents=True)
+        options = pa.ipc.IpcWriteOptions(compression=_COMPRESSION)
+        for name, projection in self.projections.items():
+            table = projection.to_arrow()
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                                   b"version": str(projection.version).encode(),
+                                                   b"position": ",".join(map(str, self.position)).encode()})
+            with pa.OSFile(str(partial / f"{name}.arrow"), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                    writer.write_table(table)
+        try:
+            os.rename(partial, target)
+        except OSError:
+            # Another worker wrote this position first.
+            shutil.rmtree(partial, ignore_errors=True)
+        self._unsnapshotted = 0
+        for _, old in self._snapshot_dirs()[self.keep:]:
+            shutil.rmtree(old, ignore_errors=True)
+        return target
+
+    # -- replay ----------------------------------------------------------
+
+    def load(self) -> int:
+        """Restore the newest usable snapshot and replay the events after it; returns events replayed."""
+        with self._lock:
+            for position, path in self._snapshot_dirs():
+                if self._restore(path):
+                    self.position = position
+                    break
+                log.warning("Skipping unusable projection snapshot %s", path.name)
+            else:
+                for projection in self.projections.values():
+                    projection.reset()
+                self.position = None
+            return self._catch_up()
+
+    def catch_up(self) -> int:
+        """Fold in events stored since the last call; returns the number folded."""
+        with self._lock:
+            return self._catch_up()
+
+    def _catch_up(self) -> int:
+        applied = 0
+        while True:
+            events = self.events.rows_since(self.position, self.chunk_size)
+            if not len(events):
+                break
+            for projection in self.projections.values():
+                projection.apply(events)
+            last = len(events) - 1
+            self.position = (events["block_number"][last].as_py(), events["tx_index"][last].as_py(),
+                             events["event_index"][last].as_py())
+            applied += len(events)
+            self._unsnapshotted += len(events)
+            if self._unsnapshotted >= self.snapshot_every:
+                self._snapshot()
+        return applied
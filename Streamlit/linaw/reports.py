@@ -0,0 +1,508 @@
+"""Financial statement packs rendered to PDF and XLSX.
+
+A pack is one organization's balance sheet, income statement and budget
+utilization report for one period; the budget page is read off a
+:class:`~linaw.budget.BudgetBook`, already rolled up to every fund and
+office.  :func:`generate_reports` fans the
+(organization, period) packs out over a process pool.  Tasks are handed
+out in chunks that keep an organization's periods together, so a worker
+opens each set of books once, and the year's income-and-expense chart is
+rendered once per worker, organization and year, then reused by every
+pack of that year in both the PDF and the workbook.  Each pack is written
+straight to its own files; workers hand back only paths and sizes.
+
+Rendering uses ``matplotlib`` figures directly (no ``pyplot`` state), so a
+single document can also be rendered on the Streamlit thread.
+
+Run from the ``Streamlit`` directory::
+
+    python -m linaw.reports --organizations 500 --lines 20000 --year 2025 --out reports
+    python -m linaw.reports --tenants --out reports    # every tenant in LINAW_TENANTS
+"""
+
+from __future__ import annotations
+
+import argparse
+import calendar
+import io
+import logging
+import math
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .budget import BudgetBook, Ordinance, source_ordinance
+from .ledger import EXPENSE, REVENUE, Ledger, format_peso
+from .sample import SAMPLE_ORGANIZATION, sample_ordinance
+from .storage import ParquetStore
+from .synthetic import source_ledger
+
+PESO = 100
+FORMATS = ("pdf", "xlsx")
+# A4 portrait, in inches.
+PAGE_SIZE = (8.27, 11.69)
+ROWS_PER_PAGE = 38
+CHART_DPI = 150
+PESO_FORMAT = "#,##0.00;(#,##0.00)"
+# Workbook columns holding centavo amounts, written as pesos.
+MONEY_COLUMNS = ("Amount", "Appropriation", "Allotments", "Obligations", "Disbursements", "Unobligated")
+# Budget levels a pack lists under all funds: funds and their offices.
+BUDGET_DEPTH = 2
+
+_MONTHS = "|".join(calendar.month_name[1:])
+_QUARTER_TITLE = re.compile(r"\bQ([1-4])\s+(\d{4})\b")
+_MONTH_TITLE = re.compile(rf"\b({_MONTHS})\s+(\d{{4}})\b")
+_YEAR_TITLE = re.compile(r"\bFY\s*(\d{4})\b")
+
+log = logging.getLogger(__name__)
+
+
+# -- periods ---------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Period:
+    label: str
+    start: date
+    end: date
+
+    @property
+    def months(self) -> int:
+        return (self.end.year - self.start.year) * 12 + self.end.month - self.start.month + 1
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def month_period(year: int, month: int) -> Period:
+    return Period(f"{calendar.month_name[month]} {year}", date(year, month, 1), _month_end(year, month))
+
+
+def quarter_period(year: int, quarter: int) -> Period:
+    first = 3 * quarter - 2
+    return Period(f"Q{quarter} {year}", date(year, first, 1), _month_end(year, first + 2))
+
+
+def year_period(year: int) -> Period:
+    return Period(f"FY {year}", date(year, 1, 1), date(year, 12, 31))
+
+
+def periods(year: int, frequency: str = "quarterly") -> list[Period]:
+    """Every ``monthly``, ``quarterly`` or ``annual`` period of a fiscal year."""
+    if frequency == "monthly":
+        return [month_period(year, m) for m in range(1, 13)]
+    if frequency == "quarterly":
+        return [quarter_period(year, q) for q in range(1, 5)]
+    if frequency == "annual":
+        return [year_period(year)]
+    raise ValueError(f"unknown report frequency: {frequency}")
+
+
+def document_period(document: Mapping) -> Period:
+    """The period a report document covers, from its title (else the month it was issued)."""
+    title = document.get("title", "")
+    if match := _QUARTER_TITLE.search(title):
+        return quarter_period(int(match[2]), int(match[1]))
+    if match := _MONTH_TITLE.search(title):
+        return month_period(int(match[2]), list(calendar.month_name).index(match[1]))
+    if match := _YEAR_TITLE.search(title):
+        return year_period(int(match[1]))
+    issued = date.fromisoformat(document["date"])
+    return month_period(issued.year, issued.month)
+
+
+# -- statements ------------------------------------------------------------
+
+def open_books(books: str) -> Ledger:
+    """Load the books named ``books``: ``sample``, ``synthetic:<lines>:<seed>:<years>`` or a Parquet store path."""
+    if books == "sample" or books.startswith("synthetic:"):
+        return source_ledger(books)
+    store = ParquetStore(books)
+    ledger = store.load_ledger(store.manifest().get("source", ""))
+    if ledger is None:
+        raise ValueError(f"no books are persisted in {books}")
+    return ledger
+
+
+def monthly_totals(ledger: Ledger, start: date, end: date) -> pd.DataFrame:
+    """Income and expenses (centavos) for every month from ``start`` through ``end``."""
+    first, last = np.datetime64(start, "M"), np.datetime64(end, "M")
+    months = int((last - first).astype(np.int64)) + 1
+    dates = ledger.date
+    rows = np.flatnonzero((dates >= np.datetime64(start, "D")) & (dates <= np.datetime64(end, "D")))
+    month = (dates[rows].astype("datetime64[M]") - first).astype(np.int64)
+    kinds = np.array([a.kind for a in ledger.accounts])[ledger.account[rows]]
+    net = ledger.credit[rows] - ledger.debit[rows]
+    income = np.bincount(month, weights=np.where(kinds == REVENUE, net, 0), minlength=months)
+    expenses = np.bincount(month, weights=np.where(kinds == EXPENSE, -net, 0), minlength=months)
+    return pd.DataFrame({
+        "Month": np.arange(first, last + 1),
+        "Income": income.astype(np.int64),
+        "Expenses": expenses.astype(np.int64),
+    })
+
+
+@dataclass(frozen=True)
+class Chart:
+    """A chart rendered once: PNG bytes for workbooks plus the decoded pixels for PDF pages."""
+
+    png: bytes
+    pixels: np.ndarray
+
+
+def trend_chart(ledger: Ledger, year: int) -> Chart:
+    """Monthly income and expenses for a fiscal year."""
+    import matplotlib.image as mpimg
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    monthly = monthly_totals(ledger, date(year, 1, 1), date(year, 12, 31))
+    fig = Figure(figsize=(7.2, 3.0))
+    ax = fig.subplots()
+    x = np.arange(12)
+    ax.bar(x - 0.2, monthly["Income"] / PESO, 0.4, label="Income", color="#2ecc71")
+    ax.bar(x + 0.2, monthly["Expenses"] / PESO, 0.4, label="Expenses", color="#e74c3c")
+    ax.set_xticks(x, [calendar.month_abbr[m] for m in range(1, 13)])
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda value, _: f"{value:,.0f}"))
+    ax.set_title(f"Income and Expenses, FY {year}", fontsize=10)
+    ax.legend(fontsize=8)
+    ax.spines[["top", "right"]].set_visible(False)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=CHART_DPI)
+    png = buffer.getvalue()
+    return Chart(png, mpimg.imread(io.BytesIO(png), format="png"))
+
+
+@dataclass(frozen=True)
+class Pack:
+    """Everything one report pack shows; amounts are centavos."""
+
+    organization: str
+    period: Period
+    assets: pd.DataFrame
+    liabilities_equity: pd.DataFrame
+    income_statement: pd.DataFrame
+    budget: pd.DataFrame
+    chart: Chart
+
+    @property
+    def title(self) -> str:
+        return f"{self.organization} - Financial Report - {self.period.label}"
+
+
+def build_pack(ledger: Ledger, organization: str, period: Period, chart: Chart | None = None,
+               budget: BudgetBook | None = None, node: int = 0) -> Pack:
+    """Statements for ``period``; the budget page covers appropriation ``node`` (all funds by default)."""
+    budget = budget or BudgetBook(ledger, sample_ordinance())
+    assets, liabilities_equity = ledger.balance_sheet(as_of=period.end)
+    return Pack(
+        organization=organization,
+        period=period,
+        assets=assets,
+        liabilities_equity=liabilities_equity,
+        income_statement=ledger.income_statement(period.start, period.end),
+        budget=budget.utilization(period.start, period.end, node, depth=BUDGET_DEPTH),
+        chart=chart or trend_chart(ledger, period.end.year),
+    )
+
+
+# -- rendering -------------------------------------------------------------
+
+def _peso(value) -> str:
+    return format_peso(int(value))
+
+
+def _printable(value) -> str:
+    """Text without emoji, which the PDF fonts cannot draw."""
+    return "".join(ch for ch in str(value) if ord(ch) < 0x2600).strip()
+
+
+# (column, x position, alignment, formatter) per statement layout.
+_STATEMENT_LAYOUT = (("Account", 0.08, "left", str), ("Amount", 0.92, "right", _peso))
+# Allotments stay in the workbook; the page has room for five amounts.
+_BUDGET_LAYOUT = (
+    ("Item", 0.08, "left", str),
+    ("Appropriation", 0.46, "right", _peso),
+    ("Obligations", 0.575, "right", _peso),
+    ("Disbursements", 0.69, "right", _peso),
+    ("Unobligated", 0.805, "right", _peso),
+    ("Utilization %", 0.92, "right", lambda value: f"{value:.1f}%"),
+)
+
+
+def _page(pack: Pack, heading: str):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=PAGE_SIZE)
+    fig.text(0.08, 0.955, pack.organization, fontsize=9, color="#555555")
+    fig.text(0.92, 0.955, pack.period.label, fontsize=9, color="#555555", ha="right")
+    fig.text(0.08, 0.925, heading, fontsize=15, weight="bold")
+    return fig
+
+
+def _table_pages(pdf, pack: Pack, heading: str, frame: pd.DataFrame, layout, chart: Chart | None = None,
+                 top: float = 0.88, fontsize: float = 9) -> None:
+    """Draw ``frame`` as text rows, continuing onto as many pages as it needs."""
+    records = frame.to_dict("records")
+    step = 0.021
+    for page_start in range(0, max(1, len(records)), ROWS_PER_PAGE):
+        fig = _page(pack, heading if not page_start else f"{heading} (continued)")
+        y = top
+        for column, x, align, _ in layout:
+            fig.text(x, y, column, fontsize=fontsize, weight="bold", ha=align)
+        y -= step * 1.2
+        for record in records[page_start: page_start + ROWS_PER_PAGE]:
+            label = str(record[layout[0][0]])
+            emphasis = "bold" if label.strip() and label == label.upper() else "normal"
+            for column, x, align, formatter in layout:
+                value = record[column]
+                text = "" if pd.isna(value) else formatter(value)
+                fig.text(x, y, text, fontsize=fontsize, ha=align, weight=emphasis)
+            y -= step
+        if chart is not None and page_start + ROWS_PER_PAGE >= len(records):
+            height = 0.84 * chart.pixels.shape[0] / chart.pixels.shape[1] * PAGE_SIZE[0] / PAGE_SIZE[1]
+            ax = fig.add_axes((0.08, max(0.05, y - 0.04 - height), 0.84, height))
+            ax.imshow(chart.pixels, interpolation="antialiased")
+            ax.set_axis_off()
+        pdf.savefig(fig)
+
+
+def render_pdf(pack: Pack, target: str | Path | BinaryIO) -> None:
+    """Write ``pack`` as a PDF, one statement per page (longer ones continue)."""
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    with PdfPages(target, metadata={"Title": pack.title, "Author": "LINAW AIS"}) as pdf:
+        _table_pages(pdf, pack, "Balance Sheet - Assets", pack.assets, _STATEMENT_LAYOUT)
+        _table_pages(pdf, pack, "Balance Sheet - Liabilities & Equity", pack.liabilities_equity,
+                     _STATEMENT_LAYOUT)
+        _table_pages(pdf, pack, "Income Statement", pack.income_statement, _STATEMENT_LAYOUT)
+        _table_pages(pdf, pack, "Budget Utilization", pack.budget, _BUDGET_LAYOUT, chart=pack.chart,
+                     fontsize=8)
+
+
+def render_xlsx(pack: Pack, target: str | Path | BinaryIO) -> None:
+    """Write ``pack`` as a workbook with one sheet per statement (amounts in pesos)."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.drawing.image import Image
+    from openpyxl.styles import Font
+
+    workbook = Workbook(write_only=True)
+    sheets = (
+        ("Assets", pack.assets),
+        ("Liabilities & Equity", pack.liabilities_equity),
+        ("Income Statement", pack.income_statement),
+        ("Budget Utilization", pack.budget),
+    )
+    for title, frame in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.column_dimensions["A"].width = 42
+        for column in "BCDEFG":
+            sheet.column_dimensions[column].width = 18
+        heading = WriteOnlyCell(sheet, f"{pack.organization} - {title}")
+        heading.font = Font(bold=True, size=13)
+        sheet.append([heading])
+        sheet.append([pack.period.label])
+        sheet.append([])
+        header = []
+        for column in frame.columns:
+            cell = WriteOnlyCell(sheet, column)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        sheet.append(header)
+        for record in frame.itertuples(index=False):
+            row = []
+            for column, value in zip(frame.columns, record):
+                if value is None or (isinstance(value, float) and math.isnan(value)):
+                    value = None
+                elif column in MONEY_COLUMNS:
+                    value = int(value) / PESO
+                cell = WriteOnlyCell(sheet, value)
+                if column in MONEY_COLUMNS:
+                    cell.number_format = PESO_FORMAT
+                row.append(cell)
+            sheet.append(row)
+        if frame is pack.budget:
+            sheet.add_image(Image(io.BytesIO(pack.chart.png)), f"A{len(frame) + 7}")
+    workbook.save(target)
+
+
+RENDERERS = {"pdf": render_pdf, "xlsx": render_xlsx}
+
+
+def document_pdf(document: Mapping, ledger: Ledger, organization: str = SAMPLE_ORGANIZATION,
+                 budget: BudgetBook | None = None) -> bytes:
+    """The PDF behind a public document: its statement pack for financial reports, else its record."""
+    buffer = io.BytesIO()
+    if document.get("type") == "Financial Reports":
+        render_pdf(build_pack(ledger, organization, document_period(document), budget=budget), buffer)
+        return buffer.getvalue()
+
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=PAGE_SIZE)
+    fig.text(0.08, 0.955, organization, fontsize=9, color="#555555")
+    fig.text(0.08, 0.92, _printable(document["title"]), fontsize=14, weight="bold", wrap=True)
+    fields = ("id", "type", "date", "status", "amount", "prepared_by", "verified_by")
+    y = 0.87
+    for name in fields:
+        fig.text(0.08, y, name.replace("_", " ").title(), fontsize=9, weight="bold")
+        fig.text(0.30, y, _printable(document.get(name, "")), fontsize=9)
+        y -= 0.025
+    fig.text(0.08, y - 0.02, _printable(document.get("details", "")), fontsize=9, wrap=True)
+    fig.text(0.08, y - 0.07, "Document Hash", fontsize=9, weight="bold")
+    fig.text(0.08, y - 0.095, document.get("hash", ""), fontsize=7, family="monospace")
+    with PdfPages(buffer, metadata={"Title": document["title"], "Author": "LINAW AIS"}) as pdf:
+        pdf.savefig(fig)
+    return buffer.getvalue()
+
+
+# -- process pool ----------------------------------------------------------
+
+@dataclass(frozen=True)
+class ReportTask:
+    organization: str
+    # Passed to open_books in the worker; tasks never carry the ledger itself.
+    books: str
+    period: Period
+    # Passed to source_ordinance in the worker.
+    ordinance: str = "sample"
+
+
+@dataclass(frozen=True)
+class ReportResult:
+    organization: str
+    period: str
+    files: tuple[str, ...]
+    size: int
+    seconds: float
+
+
+# Per-worker caches: the books being rendered, their budget and their charts by year.
+_open: dict[str, Ledger] = {}
+_budgets: dict[tuple[str, str], BudgetBook] = {}
+_charts: dict[tuple[str, int], Chart] = {}
+
+
+def _books(books: str) -> Ledger:
+    if books not in _open:
+        _open.clear()
+        _budgets.clear()
+        _charts.clear()
+        _open[books] = open_books(books)
+    return _open[books]
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-")
+
+
+def render_task(task: ReportTask, out_dir: str, formats: Sequence[str] = FORMATS,
+                ordinance: Ordinance | None = None) -> ReportResult:
+    """Render one pack to ``out_dir/<organization>/`` in each format."""
+    started = time.perf_counter()
+    ledger = _books(task.books)
+    budget = _budgets.get((task.books, task.ordinance))
+    if budget is None:
+        budget = _budgets[(task.books, task.ordinance)] = BudgetBook(
+            ledger, ordinance or source_ordinance(task.ordinance))
+    year = task.period.end.year
+    chart = _charts.get((task.books, year))
+    if chart is None:
+        chart = _charts[(task.books, year)] = trend_chart(ledger, year)
+    pack = build_pack(ledger, task.organization, task.period, chart, budget)
+
+    folder = Path(out_dir) / _slug(task.organization)
+    folder.mkdir(parents=True, exist_ok=True)
+    files = []
+    size = 0
+    for fmt in formats:
+        path = folder / f"{_slug(task.organization)}-{_slug(task.period.label)}.{fmt}"
+        partial_path = path.with_name(path.name + ".part")
+        with open(partial_path, "wb") as handle:
+            RENDERERS[fmt](pack, handle)
+        partial_path.replace(path)
+        files.append(str(path))
+        size += path.stat().st_size
+    return ReportResult(task.organization, task.period.label, tuple(files), size,
+                        time.perf_counter() - started)
+
+
+def generate_reports(tasks: Iterable[ReportTask], out_dir: str | Path, *, workers: int | None = None,
+                     formats: Sequence[str] = FORMATS,
+                     ordinance: Ordinance | None = None) -> Iterator[ReportResult]:
+    """Render every task's pack, yielding results as they finish (in task order per chunk).
+
+    ``workers`` defaults to the CPU count; ``1`` renders in this process.
+    """
+    tasks = sorted(tasks, key=lambda task: (task.books, task.organization, task.period.start))
+    render = partial(render_task, out_dir=str(out_dir), formats=tuple(formats),
+                     ordinance=ordinance)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        yield from map(render, tasks)
+        return
+    # Keep each organization's periods in one chunk, but never starve a worker.
+    per_books = math.ceil(len(tasks) / len({task.books for task in tasks}))
+    chunksize = max(1, min(per_books, math.ceil(len(tasks) / workers)))
+    # Fresh interpreters: the Streamlit server runs background threads that
+    # must not be forked.
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        yield from pool.map(render, tasks, chunksize=chunksize)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Render financial statement packs for many organizations.")
+    parser.add_argument("--organizations", type=int, default=1,
+                        help="synthetic organizations to render (ignored with --books)")
+    parser.add_argument("--lines", type=int, default=20_000, help="synthetic journal lines per organization")
+    parser.add_argument("--books", help="render one organization from these books (sample or a Parquet store)")
+    parser.add_argument("--tenants", action="store_true",
+                        help="render every configured tenant from its Parquet store")
+    parser.add_argument("--year", type=int, default=2025, help="fiscal year (synthetic books end November 2025)")
+    parser.add_argument("--frequency", choices=("monthly", "quarterly", "annual"), default="quarterly")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", type=Path, default=Path("reports"))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.tenants:
+        from .tenants import load_tenants
+
+        organizations = [(tenant.name, str(tenant.data_dir / "parquet"), tenant.ordinance_source)
+                         for tenant in load_tenants().values()]
+    elif args.books:
+        organizations = [(SAMPLE_ORGANIZATION, args.books, "sample")]
+    else:
+        organizations = [(f"Barangay {i + 1:03d}", f"synthetic:{args.lines}:{i}:1", "sample")
+                         for i in range(args.organizations)]
+    tasks = [ReportTask(name, books, period, ordinance)
+             for name, books, ordinance in organizations for period in periods(args.year, args.frequency)]
+
+    started = time.perf_counter()
+    size = 0
+    for done, result in enumerate(generate_reports(tasks, args.out, workers=args.workers,
+                                                   formats=args.formats), 1):
+        size += result.size
+        if done % 100 == 0 or done == len(tasks):
+            log.info("%s/%s packs, %.1f MiB, %.1fs", f"{done:,}", f"{len(tasks):,}",
+                     size / 2**20, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Process-wide resources shared by every Streamlit page and session.
+
+Everything a page reads belongs to a tenant.  The ``load_*`` helpers
+resolve the tenant named by the ``?tenant=`` query parameter (the first
+configured tenant without one) and return its resource from the shared
+:class:`~linaw.tenants.WorkspacePool`.
+"""
+
+from __future__ import annotations
+
+import streamlit as st
+
+from .anchoring import Anchorer
+from .anomalies import FindingStore
+from .balances import BalanceIndex
+from .budget import BudgetBook
+from .cache import CacheBudget, QueryCache
+from .chainstatus import ChainStatusPoller
+from .entries import EntryIndex
+from .events import EventStore
+from .importer import Importer
+from .kpi import KpiService
+from .ledger import Ledger
+from .merkle import JournalMerkle
+from .outbox import Outbox
+from .projections import Projector
+from .rollups import RollupCube
+from .search import SearchIndex
+from .settings import env_int
+from .storage import ParquetStore
+from .tenants import Tenant, Workspace, WorkspacePool, load_tenants
+from .verify import DocumentVerifier
+
+
+@st.cache_resource
+def load_tenant_registry() -> dict[str, Tenant]:
+    return load_tenants()
+
+
+@st.cache_resource
+def load_workspaces() -> WorkspacePool:
+    """Up to ``LINAW_ACTIVE_TENANTS`` resident tenants sharing ``LINAW_CACHE_MB`` of query cache."""
+    budget = CacheBudget(env_int("LINAW_CACHE_MB", 512) * 2**20)
+    return WorkspacePool(load_tenant_registry(), max_active=env_int("LINAW_ACTIVE_TENANTS", 64), budget=budget)
+
+
+def current_tenant() -> Tenant:
+    tenants = load_tenant_registry()
+    requested = st.query_params.get("tenant")
+    if requested is None:
+        return next(iter(tenants.values()))
+    if requested not in tenants:
+        st.error(f"Unknown organization `{requested}`.")
+        st.stop()
+    return tenants[requested]
+
+
+def load_workspace(tenant_id: str | None = None) -> Workspace:
+    """A tenant's workspace (the current tenant's by default)."""
+    return load_workspaces().get(tenant_id or current_tenant().id)
+
+
+def load_parquet_store() -> ParquetStore:
+    return load_workspace().parquet_store
+
+
+def load_ledger() -> Ledger:
+    """The tenant's books, persisted to and reloaded from its Parquet store."""
+    return load_workspace().ledger
+
+
+def load_balance_index() -> BalanceIndex:
+    return load_workspace().balance_index
+
+
+def load_entry_index() -> EntryIndex:
+    return load_workspace().entry_index
+
+
+def load_importer() -> Importer:
+    """Imports post into the tenant's ledger; the import log lives in its data directory."""
+    return load_workspace().importer
+
+
+def load_anchoring() -> Anchorer:
+    """The tenant's anchoring batches; posted entries are anchored while FabConnect is configured."""
+    return load_workspace().anchoring
+
+
+def load_outbox() -> Outbox:
+    """The tenant's pending chain writes; read ``.stats()`` for queue depth and lag."""
+    return load_workspace().outbox
+
+
+def load_findings() -> FindingStore:
+    """The tenant's anomaly findings; postings are checked whenever the books are loaded."""
+    return load_workspace().findings
+
+
+def load_kpis() -> KpiService:
+    return load_workspace().kpis
+
+
+def load_rollups() -> RollupCube:
+    return load_workspace().rollups
+
+
+def load_budget_book() -> BudgetBook:
+    """The tenant's appropriations, rolled up by fund, office and object code as postings arrive."""
+    return load_workspace().budget_book
+
+
+def load_journal_merkle() -> JournalMerkle:
+    return load_workspace().journal_merkle
+
+
+def load_document_index() -> SearchIndex:
+    return load_workspace().document_index
+
+
+def load_event_store() -> EventStore:
+    """The tenant's chain-event table, fed over its channel when FabConnect is configured."""
+    return load_workspace().event_store
+
+
+def load_chain_status() -> ChainStatusPoller:
+    return load_workspace().chain_status
+
+
+def load_projections() -> Projector:
+    """The tenant's chain projections, caught up with the events stored since the last run."""
+    projector = load_workspace().projections
+    projector.catch_up()
+    return projector
+
+
+def load_verifier() -> DocumentVerifier:
+    return load_workspace().verifier
+
+
+def load_query_cache() -> QueryCache:
+    """The tenant's result cache, invalidated when its ledger, chain or registry changes."""
+    return load_workspace().query_cache
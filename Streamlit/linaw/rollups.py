@@ -0,0 +1,158 @@
+"""Materialized income and expense rollups.
+
+The ledger's activity is folded into dense (period × account × fund) cubes
+of centavo sums, one by month and one by day.  Both are maintained from
+the ledger listener, so a posting costs one scatter-add into each cube
+and every chart on the Income & Expenses page becomes a slice-and-sum
+over a few hundred cells instead of a pass over the journal.  Accounts
+roll up to categories through their ``section``.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .ledger import EXPENSE, REVENUE, Ledger
+
+_UNITS = {"M": "datetime64[M]", "D": "datetime64[D]"}
+
+
+class _TimeCube:
+    """Dense (period × account × fund) sums over a growable span of periods."""
+
+    def __init__(self, unit: str, accounts: int, funds: int):
+        self.dtype = _UNITS[unit]
+        self.origin = 0
+        self.size = 0
+        self.data = np.zeros((0, accounts, funds), dtype=np.int64)
+
+    def add(self, periods: np.ndarray, accounts: np.ndarray, funds: np.ndarray,
+            amounts: np.ndarray) -> None:
+        if not len(periods):
+            return
+        periods = periods.astype(np.int64)
+        lo, hi = int(periods.min()), int(periods.max()) + 1
+        if not self.size:
+            self.origin = lo
+        start = min(self.origin, lo)
+        end = max(self.origin + self.size, hi)
+        if start < self.origin or end - start > len(self.data):
+            capacity = max(len(self.data), 16)
+            while capacity < end - start:
+                capacity *= 2
+            grown = np.zeros((capacity, *self.data.shape[1:]), dtype=np.int64)
+            shift = self.origin - start
+            grown[shift:shift + self.size] = self.data[: self.size]
+            self.data, self.origin = grown, start
+        self.size = end - self.origin
+        np.add.at(self.data, (periods - self.origin, accounts, funds), amounts)
+
+    def periods(self) -> np.ndarray:
+        return np.arange(self.origin, self.origin + self.size).astype(self.dtype)
+
+    def window(self, start=None, end=None) -> slice:
+        """Cube rows for periods ``start`` through ``end`` inclusive."""
+        lo = 0 if start is None else np.datetime64(start).astype(self.dtype).astype(np.int64) - self.origin
+        hi = self.size if end is None else np.datetime64(end).astype(self.dtype).astype(np.int64) - self.origin + 1
+        return slice(int(np.clip(lo, 0, self.size)), int(np.clip(hi, 0, self.size)))
+
+
+class RollupCube:
+    """Monthly and daily category rollups of a :class:`Ledger`.
+
+    Amounts are signed by each account's normal side, so revenue and
+    expense activity both read as positive centavos.
+    """
+
+    def __init__(self, ledger: Ledger):
+        self.ledger = ledger
+        accounts = ledger.accounts
+        self._signs = np.array([a.normal_sign for a in accounts], dtype=np.int64)
+        self._kinds = np.array([a.kind for a in accounts])
+        self.categories = list(dict.fromkeys(a.section for a in accounts))
+        self._category = np.array([self.categories.index(a.section) for a in accounts])
+        self._monthly = _TimeCube("M", len(accounts), len(ledger.funds))
+        self._daily = _TimeCube("D", len(accounts), len(ledger.funds))
+        self._add(0, len(ledger))
+        ledger.add_listener(self._add)
+
+    def _add(self, start: int, end: int) -> None:
+        ledger = self.ledger
+        accounts = ledger.account[start:end]
+        amounts = (ledger.debit[start:end] - ledger.credit[start:end]) * self._signs[accounts]
+        days = ledger.date[start:end]
+        funds = ledger.fund[start:end]
+        self._daily.add(days, accounts, funds, amounts)
+        self._monthly.add(days.astype("datetime64[M]"), accounts, funds, amounts)
+
+    def _slice(self, cube: _TimeCube, start, end, fund: str | None) -> np.ndarray:
+        """(period × account) sums for a window, for one fund or all of them."""
+        data = cube.data[cube.window(start, end)]
+        if fund is None:
+            return data.sum(axis=2)
+        return data[:, :, self.ledger.fund_id(fund)]
+
+    def _by_kind(self, values: np.ndarray, kind: str) -> np.ndarray:
+        return values[..., self._kinds == kind].sum(axis=-1)
+
+    # -- queries ---------------------------------------------------------
+
+    def months(self) -> np.ndarray:
+        """Every month from the first posting to the last, as ``datetime64[M]``."""
+        return self._monthly.periods()
+
+    def latest_month(self) -> np.datetime64 | None:
+        return self.months()[-1] if self._monthly.size else None
+
+    def total(self, kind: str, start: date | str | None = None,
+              end: date | str | None = None, fund: str | None = None) -> int:
+        """Revenue or expense total for months ``start`` through ``end``."""
+        return int(self._by_kind(self._slice(self._monthly, start, end, fund).sum(axis=0), kind))
+
+    def by_category(self, kind: str, start: date | str | None = None,
+                    end: date | str | None = None, fund: str | None = None) -> pd.DataFrame:
+        """Category, Amount (centavos) and Percentage of the kind's total."""
+        totals = self._slice(self._monthly, start, end, fund).sum(axis=0)
+        mask = self._kinds == kind
+        sums = np.bincount(self._category[mask], weights=totals[mask],
+                           minlength=len(self.categories)).astype(np.int64)
+        ids = list(dict.fromkeys(self._category[mask].tolist()))
+        amounts = sums[ids]
+        grand = amounts.sum()
+        return pd.DataFrame({
+            "Category": [self.categories[i] for i in ids],
+            "Amount": amounts,
+            "Percentage": np.round(amounts * 100 / grand, 1) if grand else np.zeros(len(ids)),
+        })
+
+    def monthly(self, start: date | str | None = None, end: date | str | None = None,
+                fund: str | None = None) -> pd.DataFrame:
+        """Month, Income, Expenses and Net (centavos) for each month in the window."""
+        window = self._monthly.window(start, end)
+        values = self._slice(self._monthly, start, end, fund)
+        income = self._by_kind(values, REVENUE)
+        expenses = self._by_kind(values, EXPENSE)
+        return pd.DataFrame({
+            "Month": self.months()[window],
+            "Income": income,
+            "Expenses": expenses,
+            "Net": income - expenses,
+        })
+
+    def daily(self, month: date | str, kind: str, category: str | None = None,
+              fund: str | None = None) -> pd.DataFrame:
+        """Date and Amount for every day of one month, optionally for one category."""
+        first = np.datetime64(month, "M").astype("datetime64[D]")
+        last = (np.datetime64(month, "M") + 1).astype("datetime64[D]") - 1
+        window = self._daily.window(first, last)
+        values = self._slice(self._daily, first, last, fund)
+        mask = self._kinds == kind
+        if category is not None:
+            mask &= self._category == self.categories.index(category)
+        return pd.DataFrame({
+            "Date": self._daily.periods()[window],
+            "Amount": values[:, mask].sum(axis=1),
+        })
@@ -0,0 +1,205 @@
+"""Sample barangay books and documents used by the pages until live data is loaded."""
+
+from __future__ import annotations
+
+from .budget import Appropriation, Ordinance, RevenueEstimate
+from .ledger import Ledger
+
+PESO = 100
+
+SAMPLE_ORGANIZATION = "Barangay LINAW"
+# Annual appropriation ordinance in pesos: (fund, office, object code, amount).
+SAMPLE_APPROPRIATIONS = [
+    ("General Fund", "Office of the Punong Barangay", "5010", 3_420_000),
+    ("General Fund", "Office of the Punong Barangay", "5090", 300_000),
+    ("General Fund", "Barangay Treasury", "5020", 1_200_000),
+    ("General Fund", "Barangay Treasury", "5030", 960_000),
+    ("General Fund", "Infrastructure and Public Works", "5040", 840_000),
+    ("General Fund", "Infrastructure and Public Works", "5050", 840_000),
+    ("SK Fund", "Sangguniang Kabataan", "5020", 60_000),
+    ("SK Fund", "Sangguniang Kabataan", "5050", 60_000),
+    ("SK Fund", "Sangguniang Kabataan", "5090", 120_000),
+]
+# Estimated annual revenues in pesos: (fund, revenue account, amount).
+SAMPLE_REVENUE_ESTIMATES = [
+    ("General Fund", "4010", 4_000_000),
+    ("General Fund", "4020", 1_900_000),
+    ("General Fund", "4030", 1_400_000),
+    ("General Fund", "4040", 1_050_000),
+    ("General Fund", "4050", 750_000),
+    ("General Fund", "4090", 500_000),
+]
+
+# (reference, date, description, [(account code, debit, credit), ...]) in pesos.
+SAMPLE_ENTRIES = [
+    ("JE-2025-001", "2025-07-01", "Opening balances", [
+        ("1010", 125_000, 0), ("1020", 220_000, 0), ("1030", 85_000, 0),
+        ("1210", 800_000, 0), ("1220", 350_000, 0), ("1230", 125_000, 0),
+        ("1290", 0, 85_000), ("2010", 0, 145_000), ("2020", 0, 75_000),
+        ("2510", 0, 500_000), ("3010", 0, 900_000),
+    ]),
+    ("JE-2025-002", "2025-07-05", "Tax Collection", [("1020", 300_000, 0), ("4010", 0, 300_000)]),
+    ("JE-2025-003", "2025-07-06", "Permit Fees", [("1020", 150_000, 0), ("4020", 0, 150_000)]),
+    ("JE-2025-004", "2025-07-07", "Market Fees", [("1020", 105_000, 0), ("4030", 0, 105_000)]),
+    ("JE-2025-005", "2025-07-08", "Rental Income", [("1020", 80_000, 0), ("4040", 0, 80_000)]),
+    ("JE-2025-006", "2025-07-09", "Service Fees", [("1020", 55_000, 0), ("4050", 0, 55_000)]),
+    ("JE-2025-007", "2025-07-10", "Other Income", [("1020", 30_000, 0), ("4090", 0, 30_000)]),
+    ("JE-2025-008", "2025-07-15", "Salary Payment", [("5010", 285_000, 0), ("1020", 0, 285_000)]),
+    ("JE-2025-009", "2025-07-16", "Office Supplies", [("5020", 100_000, 0), ("1020", 0, 100_000)]),
+    ("JE-2025-010", "2025-07-17", "Electricity and Water", [("5030", 80_000, 0), ("1020", 0, 80_000)]),
+    ("JE-2025-011", "2025-07-18", "Building Repairs", [("5040", 75_000, 0), ("1020", 0, 75_000)]),
+    ("JE-2025-012", "2025-07-19", "Equipment Purchase", [("5050", 75_000, 0), ("1020", 0, 75_000)]),
+    ("JE-2025-013", "2025-07-20", "Other Expenses", [("5090", 25_000, 0), ("1020", 0, 25_000)]),
+    ("JE-2025-014", "2025-08-05", "Tax Collection", [("1020", 315_000, 0), ("4010", 0, 315_000)]),
+    ("JE-2025-015", "2025-08-06", "Permit Fees", [("1020", 160_000, 0), ("4020", 0, 160_000)]),
+    ("JE-2025-016", "2025-08-07", "Market Fees", [("1020", 112_000, 0), ("4030", 0, 112_000)]),
+    ("JE-2025-017", "2025-08-08", "Rental Income", [("1020", 85_000, 0), ("4040", 0, 85_000)]),
+    ("JE-2025-018", "2025-08-09", "Service Fees", [("1020", 58_000, 0), ("4050", 0, 58_000)]),
+    ("JE-2025-019", "2025-08-10", "Other Income", [("1020", 35_000, 0), ("4090", 0, 35_000)]),
+    ("JE-2025-020", "2025-08-15", "Salary Payment", [("5010", 285_000, 0), ("1020", 0, 285_000)]),
+    ("JE-2025-021", "2025-08-16", "Office Supplies", [("5020", 98_000, 0), ("1020", 0, 98_000)]),
+    ("JE-2025-022", "2025-08-17", "Electricity and Water", [("5030", 79_000, 0), ("1020", 0, 79_000)]),
+    ("JE-2025-023", "2025-08-18", "Building Repairs", [("5040", 70_000, 0), ("1020", 0, 70_000)]),
+    ("JE-2025-024", "2025-08-19", "Equipment Purchase", [("5050", 70_000, 0), ("1020", 0, 70_000)]),
+    ("JE-2025-025", "2025-08-20", "Other Expenses", [("5090", 23_000, 0), ("1020", 0, 23_000)]),
+    ("JE-2025-026", "2025-08-28", "Barangay Hall Improvements", [("1220", 300_000, 0), ("1020", 0, 300_000)]),
+    ("JE-2025-027", "2025-09-05", "Tax Collection", [("1020", 328_000, 0), ("4010", 0, 328_000)]),
+    ("JE-2025-028", "2025-09-06", "Permit Fees", [("1020", 168_000, 0), ("4020", 0, 168_000)]),
+    ("JE-2025-029", "2025-09-07", "Market Fees", [("1020", 116_000, 0), ("4030", 0, 116_000)]),
+    ("JE-2025-030", "2025-09-08", "Rental Income", [("1020", 88_000, 0), ("4040", 0, 88_000)]),
+    ("JE-2025-031", "2025-09-09", "Service Fees", [("1020", 60_000, 0), ("4050", 0, 60_000)]),
+    ("JE-2025-032", "2025-09-10", "Other Income", [("1020", 35_000, 0), ("4090", 0, 35_000)]),
+    ("JE-2025-033", "2025-09-15", "Salary Payment", [("5010", 285_000, 0), ("1020", 0, 285_000)]),
+    ("JE-2025-034", "2025-09-16", "Office Supplies", [("5020", 96_000, 0), ("1020", 0, 96_000)]),
+    ("JE-2025-035", "2025-09-17", "Electricity and Water", [("5030", 78_000, 0), ("1020", 0, 78_000)]),
+    ("JE-2025-036", "2025-09-18", "Building Repairs", [("5040", 68_000, 0), ("1020", 0, 68_000)]),
+    ("JE-2025-037", "2025-09-19", "Equipment Purchase", [("5050", 66_000, 0), ("1020", 0, 66_000)]),
+    ("JE-2025-038", "2025-09-20", "Other Expenses", [("5090", 22_000, 0), ("1020", 0, 22_000)]),
+    ("JE-2025-039", "2025-09-26", "Service Vehicle Acquisition", [("1230", 300_000, 0), ("1020", 0, 300_000)]),
+    ("JE-2025-040", "2025-10-05", "Tax Collection", [("1020", 333_000, 0), ("4010", 0, 333_000)]),
+    ("JE-2025-041", "2025-10-06", "Permit Fees", [("1020", 172_000, 0), ("4020", 0, 172_000)]),
+    ("JE-2025-042", "2025-10-07", "Market Fees", [("1020", 119_000, 0), ("4030", 0, 119_000)]),
+    ("JE-2025-043", "2025-10-08", "Rental Income", [("1020", 90_000, 0), ("4040", 0, 90_000)]),
+    ("JE-2025-044", "2025-10-09", "Service Fees", [("1020", 62_000, 0), ("4050", 0, 62_000)]),
+    ("JE-2025-045", "2025-10-10", "Other Income", [("1020", 34_000, 0), ("4090", 0, 34_000)]),
+    ("JE-2025-046", "2025-10-15", "Salary Payment", [("5010", 285_000, 0), ("1020", 0, 285_000)]),
+    ("JE-2025-047", "2025-10-16", "Office Supplies", [("5020", 95_000, 0), ("1020", 0, 95_000)]),
+    ("JE-2025-048", "2025-10-17", "Electricity and Water", [("5030", 78_000, 0), ("1020", 0, 78_000)]),
+    ("JE-2025-049", "2025-10-18", "Building Repairs", [("5040", 66_000, 0), ("1020", 0, 66_000)]),
+    ("JE-2025-050", "2025-10-19", "Equipment Purchase", [("5050", 64_000, 0), ("1020", 0, 64_000)]),
+    ("JE-2025-051", "2025-10-20", "Other Expenses", [("5090", 22_000, 0), ("1020", 0, 22_000)]),
+    ("JE-2025-101", "2025-11-01", "Tax Collection", [("1020", 150_000, 0), ("4010", 0, 150_000)]),
+    ("JE-2025-102", "2025-11-01", "Equipment Purchase", [("5050", 75_000, 0), ("1020", 0, 75_000)]),
+    ("JE-2025-103", "2025-11-02", "Permit Fees", [("1020", 50_000, 0), ("4020", 0, 50_000)]),
+    ("JE-2025-104", "2025-11-02", "Salary Payment", [("5010", 85_000, 0), ("1020", 0, 85_000)]),
+    ("JE-2025-105", "2025-11-02", "Rental Income", [("1020", 25_000, 0), ("4040", 0, 25_000)]),
+    ("JE-2025-106", "2025-11-02", "Service Fees", [("1020", 15_000, 0), ("4050", 0, 15_000)]),
+    ("JE-2025-107", "2025-11-02", "Market Fees", [("1020", 35_000, 0), ("4030", 0, 35_000)]),
+    ("JE-2025-108", "2025-11-02", "Office Supplies", [("5020", 25_000, 0), ("1020", 0, 25_000)]),
+    ("JE-2025-109", "2025-11-02", "Electricity and Water", [("5030", 18_000, 0), ("1020", 0, 18_000)]),
+    ("JE-2025-110", "2025-11-02", "Building Repairs", [("5040", 15_000, 0), ("1020", 0, 15_000)]),
+    ("JE-2025-111", "2025-11-05", "Tax Collection", [("1020", 200_000, 0), ("4010", 0, 200_000)]),
+    ("JE-2025-112", "2025-11-06", "Permit Fees", [("1020", 130_000, 0), ("4020", 0, 130_000)]),
+    ("JE-2025-113", "2025-11-07", "Market Fees", [("1020", 90_000, 0), ("4030", 0, 90_000)]),
+    ("JE-2025-114", "2025-11-08", "Rental Income", [("1020", 70_000, 0), ("4040", 0, 70_000)]),
+    ("JE-2025-115", "2025-11-09", "Service Fees", [("1020", 50_000, 0), ("4050", 0, 50_000)]),
+    ("JE-2025-116", "2025-11-10", "Other Income", [("1020", 35_000, 0), ("4090", 0, 35_000)]),
+    ("JE-2025-117", "2025-11-12", "Office Supplies", [("5020", 70_000, 0), ("1020", 0, 70_000)]),
+    ("JE-2025-118", "2025-11-13", "Electricity and Water", [("5030", 60_000, 0), ("1020", 0, 60_000)]),
+    ("JE-2025-119", "2025-11-14", "Salary Payment", [("5010", 200_000, 0), ("1020", 0, 200_000)]),
+    ("JE-2025-120", "2025-11-15", "Building Repairs", [("5040", 50_000, 0), ("1020", 0, 50_000)]),
+    ("JE-2025-121", "2025-11-15", "Other Expenses", [("5090", 22_000, 0), ("1020", 0, 22_000)]),
+]
+
+
+SAMPLE_DOCUMENTS = [
+    {
+        "type": "Financial Reports",
+        "id": "FR-2025-034",
+        "title": "Quarterly Financial Statement - Q3 2025",
+        "date": "2025-10-15",
+        "status": "✅ Verified",
+        "hash": "0xcb91e7d413f5a21a4d506de3054b7d20f58babc5df5327733f3b4b37043847f0",
+        "details": "Comprehensive financial statement for Q3 2025 including balance sheet, income statement, and cash flow analysis.",
+        "amount": "₱850,000",
+        "prepared_by": "Maria Santos, Municipal Accountant",
+        "verified_by": "Hon. Juan dela Cruz, Barangay Captain"
+    },
+    {
+        "type": "Ordinance",
+        "id": "ORD-2025-012",
+        "title": "Barangay Solid Waste Management Ordinance",
+        "date": "2025-09-20",
+        "status": "✅ Verified",
+        "hash": "0xfd60efbd6079a9516b0617487c6560223992245130e28fe8bcde07cc85059a56",
+        "details": "Ordinance implementing comprehensive solid waste management program in accordance with RA 9003.",
+        "amount": "N/A",
+        "prepared_by": "Barangay Council",
+        "verified_by": "Hon. Juan dela Cruz, Barangay Captain"
+    },
+    {
+        "type": "Infrastructure",
+        "id": "INFRA-2025-008",
+        "title": "Multi-Purpose Hall Construction Project",
+        "date": "2025-08-10",
+        "status": "✅ Verified",
+        "hash": "0xdcf0b823d6212ba6d885d29d25b70f2606cfce2e316b4593698d29d9e8942701",
+        "details": "Construction project for a 200-capacity multi-purpose hall for community events and disaster evacuation.",
+        "amount": "₱2,500,000",
+        "prepared_by": "Engineering Office",
+        "verified_by": "Hon. Juan dela Cruz, Barangay Captain"
+    },
+    {
+        "type": "Procurement",
+        "id": "PROC-2025-045",
+        "title": "Office Equipment and Supplies Procurement",
+        "date": "2025-11-01",
+        "status": "✅ Verified",
+        "hash": "0x445ecb87f8efceff58bf00529af1c7e5196b6454f5539652a90a922cab5ec7e3",
+        "details": "Procurement of computers, printers, and office supplies for barangay hall operations.",
+        "amount": "₱175,000",
+        "prepared_by": "Procurement Committee",
+        "verified_by": "Hon. Juan dela Cruz, Barangay Captain"
+    },
+    {
+        "type": "Resolution",
+        "id": "RES-2025-056",
+        "title": "Resolution Authorizing Budget Allocation for Health Programs",
+        "date": "2025-10-28",
+        "status": "✅ Verified",
+        "hash": "0x083f7bcae501afb79c42105af88763a4764cccc699048bc17a307331fa41d4bb",
+        "details": "Resolution approving additional budget for maternal and child health programs for FY 2025.",
+        "amount": "₱350,000",
+        "prepared_by": "Barangay Health Committee",
+        "verified_by": "Hon. Juan dela Cruz, Barangay Captain"
+    },
+    {
+        "type": "Financial Reports",
+        "id": "FR-2025-033",
+        "title": "Monthly Budget Utilization Report - October 2025",
+        "date": "2025-10-31",
+        "status": "✅ Verified",
+        "hash": "0xcf1e8825bf066157809f13596f5d9f59b534ce39012fdb381ff4f20d8727049a",
+        "details": "Detailed report on budget utilization for October 2025 showing expenditure vs approved budget.",
+        "amount": "₱620,000",
+        "prepared_by": "Maria Santos, Municipal Accountant",
+        "verified_by": "Hon. Juan dela Cruz, Barangay Captain"
+    }
+]
+
+
+def sample_ledger() -> Ledger:
+    ledger = Ledger()
+    for ref, when, description, lines in SAMPLE_ENTRIES:
+        ledger.post(ref, when, description,
+                    [(code, debit * PESO, credit * PESO) for code, debit, credit in lines])
+    return ledger
+
+
+def sample_ordinance() -> Ordinance:
+    return Ordinance(
+        appropriations=tuple(Appropriation(fund, office, code, amount * PESO)
+                             for fund, office, code, amount in SAMPLE_APPROPRIATIONS),
+        revenues=tuple(RevenueEstimate(fund, code, amount * PESO)
+                       for fund, code, amount in SAMPLE_REVENUE_ESTIMATES),
+    )
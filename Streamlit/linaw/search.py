@@ -0,0 +1,334 @@
+"""Full-text and faceted search over the public document registry.
+
+An inverted index maps tokens from the title, details, ID, preparer and
+verifier of each document to weighted term frequencies; type and status
+facets are bitmaps (Python ints, one bit per document) and dates live in a
+NumPy column for range masks.  Documents are added incrementally, and a
+query only touches the postings of its own tokens instead of scanning the
+registry.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+
+# Field weights used when scoring a match.
+FIELD_WEIGHTS = {
+    "id": 4.0,
+    "title": 3.0,
+    "prepared_by": 1.5,
+    "verified_by": 1.0,
+    "details": 1.0,
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_DOCUMENT_ID = re.compile(r"^[a-z]+-[a-z0-9-]*$")
+
+# Composite (date, position) sort keys: days * _KEY_SPAN + position.
+_KEY_SPAN = 1 << 32
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class _Bitmap:
+    """Growable packed bitmap, one bit per document position."""
+
+    __slots__ = ("bits",)
+
+    def __init__(self, capacity: int = 1024):
+        self.bits = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+
+    def set(self, position: int) -> None:
+        byte = position >> 3
+        if byte >= len(self.bits):
+            grown = np.zeros(max(len(self.bits) * 2, byte + 1), dtype=np.uint8)
+            grown[: len(self.bits)] = self.bits
+            self.bits = grown
+        self.bits[byte] |= np.uint8(1 << (position & 7))
+
+    def mask(self, size: int) -> np.ndarray:
+        """The first ``size`` bits as a boolean array."""
+        unpacked = np.unpackbits(self.bits, count=min(size, len(self.bits) * 8), bitorder="little")
+        mask = np.zeros(size, dtype=bool)
+        mask[: len(unpacked)] = unpacked
+        return mask
+
+    def test(self, positions: np.ndarray) -> np.ndarray:
+        """Whether each of ``positions`` is set, without unpacking the bitmap."""
+        inside = (positions >> 3) < len(self.bits)
+        result = np.zeros(len(positions), dtype=bool)
+        clipped = positions[inside]
+        result[inside] = (self.bits[clipped >> 3] >> (clipped & 7)) & 1
+        return result
+
+
+class _Postings:
+    """Growable (position, weight) arrays for one token."""
+
+    __slots__ = ("size", "positions", "weights")
+
+    def __init__(self):
+        self.size = 0
+        self.positions = np.empty(4, dtype=np.int32)
+        self.weights = np.empty(4, dtype=np.float32)
+
+    def append(self, position: int, weight: float) -> None:
+        if self.size == len(self.positions):
+            self.positions = np.resize(self.positions, self.size * 2)
+            self.weights = np.resize(self.weights, self.size * 2)
+        self.positions[self.size] = position
+        self.weights[self.size] = weight
+        self.size += 1
+
+
+@dataclass
+class Page:
+    """One window of a registry query plus the cursor for the next window."""
+
+    documents: list[dict]
+    next_cursor: str | None
+
+
+@dataclass
+class SearchResult:
+    total: int
+    documents: list[dict]
+    scores: list[float]
+    facets: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+class SearchIndex:
+    """Incrementally maintained inverted index with facet bitmaps."""
+
+    FACETS = ("type", "status")
+
+    def __init__(self, documents: list[dict] | None = None):
+        self.documents: list[dict] = []
+        self._positions: dict[str, int] = {}
+        self._postings: dict[str, _Postings] = {}
+        self._vocabulary: list[str] = []
+        self._new_tokens: list[str] = []
+        self._lengths = np.empty(1024, dtype=np.float32)
+        self._dates = np.empty(1024, dtype="datetime64[D]")
+        self._total_length = 0.0
+        # Positions ordered by (date, position) and their composite sort keys,
+        # refreshed lazily after documents are added.
+        self._by_date = np.empty(0, dtype=np.int64)
+        self._date_keys = np.empty(0, dtype=np.int64)
+        self.facets: dict[str, dict[str, _Bitmap]] = {facet: {} for facet in self.FACETS}
+        for document in documents or ():
+            self.add(document)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def get(self, document_id: str) -> dict | None:
+        position = self._positions.get(document_id)
+        return None if position is None else self.documents[position]
+
+    def add(self, document: dict) -> None:
+        """Index one document; re-adding a known id is ignored."""
+        if document["id"] in self._positions:
+            return
+        position = len(self.documents)
+        self.documents.append(document)
+        self._positions[document["id"]] = position
+
+        weights: dict[str, float] = defaultdict(float)
+        for name, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(str(document.get(name, ""))):
+                weights[token] += weight
+        # The full ID is searchable as a single token too ("fr-2025-034").
+        weights[document["id"].lower()] += FIELD_WEIGHTS["id"]
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = _Postings()
+                self._new_tokens.append(token)
+            postings.append(position, weight)
+
+        if position == len(self._dates):
+            self._dates = np.resize(self._dates, position * 2)
+            self._lengths = np.resize(self._lengths, position * 2)
+        length = sum(weights.values())
+        self._lengths[position] = length
+        self._total_length += length
+        self._dates[position] = np.datetime64(document["date"], "D")
+
+        for facet, bitmaps in self.facets.items():
+            value = document.get(facet, "")
+            bitmap = bitmaps.get(value)
+            if bitmap is None:
+                bitmap = bitmaps[value] = _Bitmap(len(self._dates))
+            bitmap.set(position)
+
+    def _expand(self, token: str, prefix: bool) -> list[str]:
+        if not prefix:
+            return [token] if token in self._postings else []
+        if self._new_tokens:
+            # New tokens are merged into the sorted vocabulary on the next
+            # prefix lookup rather than insorted one at a time during indexing.
+            self._vocabulary = sorted(self._vocabulary + self._new_tokens)
+            self._new_tokens.clear()
+        lo = bisect.bisect_left(self._vocabulary, token)
+        hi = bisect.bisect_left(self._vocabulary, token + "\uffff")
+        return self._vocabulary[lo:hi]
+
+    def filter_mask(self, doc_type: str | None = None, status: str | None = None,
+                    start: date | None = None, end: date | None = None) -> np.ndarray:
+        """Boolean mask of documents that pass the facet and date filters."""
+        n = len(self.documents)
+        mask = np.ones(n, dtype=bool)
+        for facet, value in (("type", doc_type), ("status", status)):
+            if value:
+                bitmap = self.facets[facet].get(value)
+                mask &= bitmap.mask(n) if bitmap is not None else False
+        dates = self._dates[:n]
+        if start is not None:
+            mask &= dates >= np.datetime64(start, "D")
+        if end is not None:
+            mask &= dates <= np.datetime64(end, "D")
+        return mask
+
+    def score(self, query: str, allowed: np.ndarray) -> np.ndarray:
+        """BM25 score per document; zero where a document misses a query token.
+
+        The last token is matched as a prefix so partially typed words match.
+        """
+        query = query.strip().lower()
+        # "FR-2025-03" is looked up as a (partial) document ID, not as words;
+        # a hyphenated phrase that starts no ID ("covid-19") is searched as words.
+        if _DOCUMENT_ID.match(query) and self._expand(query, prefix=True):
+            tokens = [query]
+        else:
+            tokens = tokenize(query)
+        n = len(self.documents)
+        scores = np.zeros(n, dtype=np.float64)
+        present = allowed.copy()
+        lengths = self._lengths[:n]
+        average = self._total_length / n if n else 1.0
+        for i, token in enumerate(tokens):
+            token_scores = np.zeros(n, dtype=np.float64)
+            for term in self._expand(token, prefix=i == len(tokens) - 1):
+                postings = self._postings[term]
+                positions = postings.positions[: postings.size]
+                tf = postings.weights[: postings.size].astype(np.float64)
+                idf = math.log(1 + (n - postings.size + 0.5) / (postings.size + 0.5))
+                norm = tf + K1 * (1 - B + B * lengths[positions] / average)
+                np.maximum.at(token_scores, positions, idf * tf * (K1 + 1) / norm)
+            present &= token_scores > 0
+            scores += token_scores
+        scores[~present] = 0.0
+        return scores
+
+    def search(self, query: str = "", doc_type: str | None = None, status: str | None = None,
+               start: date | None = None, end: date | None = None,
+               page: int = 0, per_page: int = 20) -> SearchResult:
+        """Ranked, paginated search; without a query, newest documents first."""
+        allowed = self.filter_mask(doc_type, status, start, end)
+        dates = self._dates[: len(self.documents)].astype(np.int64)
+        if query.strip():
+            scores = self.score(query, allowed)
+            matched = scores > 0
+        else:
+            scores = np.zeros(len(self.documents))
+            matched = allowed
+        positions = np.flatnonzero(matched)
+        order = positions[np.lexsort((-dates[positions], -scores[positions]))]
+
+        window = order[page * per_page:(page + 1) * per_page]
+        return SearchResult(
+            total=len(order),
+            documents=[self.documents[p] for p in window],
+            scores=[float(scores[p]) for p in window],
+            facets={facet: {value: int(np.count_nonzero(bitmap.mask(len(matched)) & matched))
+                            for value, bitmap in bitmaps.items()}
+                    for facet, bitmaps in self.facets.items()},
+        )
+
+    # -- cursor queries --------------------------------------------------
+
+    def _sorted_by_date(self) -> tuple[np.ndarray, np.ndarray]:
+        n = len(self.documents)
+        sorted_size = len(self._by_date)
+        if sorted_size == n:
+            return self._by_date, self._date_keys
+        new = np.arange(sorted_size, n, dtype=np.int64)
+        new_keys = self._dates[sorted_size:n].astype(np.int64) * _KEY_SPAN + new
+        order = np.argsort(new_keys, kind="stable")
+        new, new_keys = new[order], new_keys[order]
+        if sorted_size and new_keys[0] < self._date_keys[-1]:
+            # Back-dated arrivals: merge instead of appending.
+            keys = np.concatenate([self._date_keys, new_keys])
+            order = np.argsort(keys, kind="stable")
+            self._date_keys = keys[order]
+            self._by_date = np.concatenate([self._by_date, new])[order]
+        else:
+            self._date_keys = np.concatenate([self._date_keys, new_keys])
+            self._by_date = np.concatenate([self._by_date, new])
+        return self._by_date, self._date_keys
+
+    def count(self, doc_type: str | None = None, status: str | None = None,
+              start: date | None = None, end: date | None = None) -> int:
+        return int(np.count_nonzero(self.filter_mask(doc_type, status, start, end)))
+
+    def query(self, text: str = "", doc_type: str | None = None, status: str | None = None,
+              start: date | None = None, end: date | None = None,
+              cursor: str | None = None, limit: int = 20) -> Page:
+        """Cursor-paginated registry query.
+
+        Without ``text`` documents are browsed newest first by walking the date
+        order backwards from the cursor, so a page costs time proportional to
+        the page size, not the registry.  With ``text`` the ranked results are
+        windowed by offset.
+        """
+        if text.strip():
+            offset = int(cursor) if cursor else 0
+            result = self.search(text, doc_type, status, start, end, per_page=limit + offset)
+            documents = result.documents[offset:]
+            more = offset + limit < result.total
+            return Page(documents, str(offset + limit) if more else None)
+
+        by_date, keys = self._sorted_by_date()
+        hi = len(keys) if cursor is None else int(np.searchsorted(keys, int(cursor), side="left"))
+        if end is not None:
+            end_key = (np.datetime64(end, "D").astype(np.int64) + 1) * _KEY_SPAN
+            hi = min(hi, int(np.searchsorted(keys, end_key, side="left")))
+        lo = 0
+        if start is not None:
+            lo = int(np.searchsorted(keys, np.datetime64(start, "D").astype(np.int64) * _KEY_SPAN, side="left"))
+
+        filters = [self.facets[facet].get(value) for facet, value in
+                   (("type", doc_type), ("status", status)) if value]
+        if any(bitmap is None for bitmap in filters):
+            return Page([], None)
+
+        found: list[int] = []
+        chunk = max(limit * 4, 64)
+        while hi > lo and len(found) < limit:
+            chunk_lo = max(lo, hi - chunk)
+            positions = by_date[chunk_lo:hi][::-1]
+            keep = np.ones(len(positions), dtype=bool)
+            for bitmap in filters:
+                keep &= bitmap.test(positions)
+            found.extend(positions[keep][: limit - len(found)].tolist())
+            hi = chunk_lo
+            chunk *= 2
+        if len(found) < limit:
+            return Page([self.documents[p] for p in found], None)
+        last = found[-1]
+        next_cursor = int(self._dates[last].astype(np.int64)) * _KEY_SPAN + last
+        return Page([self.documents[p] for p in found], str(next_cursor))
@@ -0,0 +1,24 @@
+"""Process-wide settings read from the environment."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def data_dir() -> Path:
+    """Directory for local stores; ``LINAW_DATA_DIR`` overrides ``Streamlit/.linaw``."""
+    configured = os.getenv("LINAW_DATA_DIR")
+    path = Path(configured) if configured else Path(__file__).resolve().parent.parent / ".linaw"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Failed to convert {name}={value!r} to integer") from None
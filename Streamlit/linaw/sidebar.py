@@ -0,0 +1,27 @@
+"""Tenant branding and switcher shown in every page's sidebar."""
+
+from __future__ import annotations
+
+import streamlit as st
+
+from .resources import current_tenant, load_tenant_registry
+from .tenants import Tenant
+
+
+def tenant_sidebar() -> Tenant:
+    """Show the current tenant's logo and name, with a switcher when several are hosted."""
+    tenants = load_tenant_registry()
+    tenant = current_tenant()
+    logo = tenant.logo_path
+    if logo is not None and logo.is_file():
+        st.logo(str(logo))
+    if len(tenants) > 1:
+        ids = list(tenants)
+        choice = st.sidebar.selectbox("Organization", ids, index=ids.index(tenant.id),
+                                      format_func=lambda tenant_id: tenants[tenant_id].name)
+        if choice != tenant.id:
+            st.query_params["tenant"] = choice
+            st.rerun()
+    else:
+        st.sidebar.caption(tenant.name)
+    return tenant
@@ -0,0 +1,403 @@
+"""Partitioned Parquet storage for journal lines, entries, documents and chain events.
+
+Each table is a hive-partitioned Parquet dataset under the data directory:
+
+    parquet/journal_lines/fiscal_year=2025/month=11/account=1010/part-*.parquet
+    parquet/journal_entries/fiscal_year=2025/month=11/part-*.parquet
+    parquet/documents/fiscal_year=2025/month=11/part-*.parquet
+    parquet/events/fiscal_year=2025/month=11/part-*.parquet
+
+Writes are append-only: every batch adds new files, sorted by date so the
+row-group statistics are tight.  Reads go through a memory-mapped local
+filesystem and pass the column projection and a filter to the scanner, so
+partitions outside the date range (and accounts not asked for) are never
+opened and row groups are skipped on their min/max statistics.  The
+barangay fiscal year is the calendar year.
+
+A manifest records which books the datasets hold, so a restarted process
+reloads the ledger from disk instead of rebuilding it.  The manifest is
+updated after a batch's files are written, so its line count is the
+last complete write.  If the process died after writing files but
+before updating the manifest, the extra lines are adopted when they
+form whole, balanced entries with their headers.  Otherwise they are
+moved under ``set-aside/``, and so is a journal the store stops
+mirroring; persisted books are never deleted.  Confirmed lines that are
+missing raise :class:`StoreError`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from .ledger import Ledger
+from .settings import data_dir
+
+log = logging.getLogger(__name__)
+
+JOURNAL_LINES = "journal_lines"
+JOURNAL_ENTRIES = "journal_entries"
+DOCUMENTS = "documents"
+EVENTS = "events"
+
+ROWS_PER_GROUP = 65_536
+_HIVE_NULL = "__HIVE_DEFAULT_PARTITION__"
+
+_PERIOD = [("fiscal_year", pa.int16()), ("month", pa.int8())]
+_PARTITIONING = {
+    JOURNAL_LINES: ds.partitioning(pa.schema(_PERIOD + [("account", pa.string())]), flavor="hive"),
+    JOURNAL_ENTRIES: ds.partitioning(pa.schema(_PERIOD), flavor="hive"),
+    DOCUMENTS: ds.partitioning(pa.schema(_PERIOD), flavor="hive"),
+    EVENTS: ds.partitioning(pa.schema(_PERIOD), flavor="hive"),
+}
+
+
+class StoreError(Exception):
+    """The persisted journal is inconsistent and cannot be repaired automatically."""
+
+
+def _day(value: date | str | np.datetime64) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+def _period_columns(dates: np.ndarray) -> dict[str, pa.Array]:
+    missing = np.isnat(dates)
+    months = np.where(missing, 0, dates.astype("datetime64[M]").astype(np.int64))
+    return {
+        "fiscal_year": pa.array((months // 12 + 1970).astype(np.int16), mask=missing),
+        "month": pa.array((months % 12 + 1).astype(np.int8), mask=missing),
+    }
+
+
+def date_filter(start: date | str | None = None, end: date | str | None = None,
+                column: str = "date") -> ds.Expression | None:
+    """Filter for an inclusive date range that also prunes fiscal_year/month partitions."""
+    year, month = ds.field("fiscal_year"), ds.field("month")
+    terms = []
+    if start is not None:
+        start = _day(start).item()
+        y, m = start.year, start.month
+        terms += [(year > y) | ((year == y) & (month >= m)),
+                  ds.field(column) >= pa.scalar(start, pa.date32())]
+    if end is not None:
+        end = _day(end).item()
+        y, m = end.year, end.month
+        terms += [(year < y) | ((year == y) & (month <= m)),
+                  ds.field(column) <= pa.scalar(end, pa.date32())]
+    expression = None
+    for term in terms:
+        expression = term if expression is None else expression & term
+    return expression
+
+
+class ParquetStore:
+    """Append-only partitioned Parquet datasets with pruned, memory-mapped reads."""
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root) if root else data_dir() / "parquet"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+        self._datasets: dict[str, ds.Dataset] = {}
+        self._lock = threading.Lock()
+        self._attached: tuple[Ledger, Callable[[int, int], None]] | None = None
+
+    # -- manifest --------------------------------------------------------
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.root / "manifest.json"
+
+    def manifest(self) -> dict:
+        try:
+            return json.loads(self._manifest_path.read_text())
+        except FileNotFoundError:
+            return {}
+
+    def _update_manifest(self, **values) -> None:
+        manifest = {**self.manifest(), **values}
+        partial = self._manifest_path.with_suffix(".tmp")
+        partial.write_text(json.dumps(manifest, indent=2))
+        partial.replace(self._manifest_path)
+
+    # -- low-level -------------------------------------------------------
+
+    def _write(self, name: str, table: pa.Table) -> None:
+        """Append ``table`` (which carries the partition columns) as one new file per partition.
+
+        Files are written one after another on the calling thread; the
+        multi-threaded dataset writer keeps a buffer per open partition
+        and holds far more memory for the same batch.
+        """
+        if not len(table):
+            return
+        keys = _PARTITIONING[name].schema.names
+        groups = pd.DataFrame({key: table[key].to_pandas() for key in keys}).groupby(
+            keys, dropna=False, sort=False).indices
+        data = table.drop_columns(keys)
+        with self._lock:
+            for values, rows in groups.items():
+                directory = self.root / name
+                for key, value in zip(keys, values):
+                    if pd.isna(value):
+                        value = _HIVE_NULL
+                    elif not isinstance(value, str):
+                        value = int(value)  # nullable ints arrive as floats
+                    directory /= f"{key}={value}"
+                directory.mkdir(parents=True, exist_ok=True)
+                pq.write_table(data.take(rows), directory / f"part-{uuid.uuid4().hex}.parquet",
+                               row_group_size=ROWS_PER_GROUP)
+            self._datasets.pop(name, None)
+
+    def dataset(self, name: str) -> ds.Dataset | None:
+        """The (cached) dataset for ``name``, or ``None`` while nothing is written."""
+        with self._lock:
+            dataset = self._datasets.get(name)
+            if dataset is None:
+                path = self.root / name
+                if not path.exists():
+                    return None
+                dataset = ds.dataset(str(path), format="parquet", filesystem=self._fs,
+                                     partitioning=_PARTITIONING[name])
+                self._datasets[name] = dataset
+            return dataset
+
+    def read(self, name: str, columns: Sequence[str] | None = None,
+             filter: ds.Expression | None = None) -> pa.Table | None:
+        dataset = self.dataset(name)
+        if dataset is None:
+            return None
+        return dataset.to_table(columns=list(columns) if columns else None, filter=filter)
+
+    def _set_aside(self, name: str, reason: str, column: str | None = None, first: int = 0) -> int:
+        """Move ``name``'s files (only those whose ``column`` starts at ``first`` or later) under ``set-aside/``."""
+        source = self.root / name
+        target = self.root / "set-aside" / f"{time.strftime('%Y%m%d-%H%M%S')}-{reason}" / name
+        moved = 0
+        with self._lock:
+            for path in sorted(source.rglob("*.parquet")):
+                if column is not None and pc.min(pq.read_table(path, columns=[column])[column]).as_py() < first:
+                    continue
+                destination = target / path.relative_to(source)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                path.replace(destination)
+                moved += 1
+            self._datasets.pop(name, None)
+        if moved:
+            log.warning("%s: moved %d %s file(s) to %s (%s)", self.root, moved, name, target, reason)
+        return moved
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in _PARTITIONING:
+                self._fs.delete_dir_contents(str(self.root / name), missing_dir_ok=True)
+            self._datasets.clear()
+            self._manifest_path.unlink(missing_ok=True)
+
+    # -- journal ---------------------------------------------------------
+
+    def append_lines(self, ledger: Ledger, start: int, end: int) -> None:
+        """Persist ledger lines ``start:end`` and any entries first posted among them."""
+        if end <= start:
+            return
+        dates = ledger.date[start:end]
+        order = np.argsort(dates, kind="stable")
+        codes = np.array([a.code for a in ledger.accounts], dtype=object)
+        funds = np.array(ledger.funds, dtype=object)
+        dates = dates[order]
+        self._write(JOURNAL_LINES, pa.table({
+            "line": np.arange(start, end, dtype=np.int64)[order],
+            "date": dates,
+            "entry": ledger.je[start:end][order],
+            "fund": funds[ledger.fund[start:end][order]],
+            "debit": ledger.debit[start:end][order],
+            "credit": ledger.credit[start:end][order],
+            "account": codes[ledger.account[start:end][order]],
+            **_period_columns(dates),
+        }))
+
+        # Entries are written once, with the batch holding their first line;
+        # their amount is the debit total of that batch (entries are posted whole).
+        persisted = self.manifest().get("entries", 0)
+        je = ledger.je[start:end]
+        ids, first, inverse = np.unique(je, return_index=True, return_inverse=True)
+        amounts = np.bincount(inverse, weights=ledger.debit[start:end]).astype(np.int64)
+        fresh = ids >= persisted
+        if fresh.any():
+            entry_dates = ledger.date[start:end][first[fresh]]
+            self._write(JOURNAL_ENTRIES, pa.table({
+                "entry": ids[fresh].astype(np.int32),
+                "reference": [ledger.je_refs[i] for i in ids[fresh]],
+                "date": entry_dates,
+                "description": [ledger.je_descriptions[i] for i in ids[fresh]],
+                "amount": amounts[fresh],
+                **_period_columns(entry_dates),
+            }).sort_by("date"))
+        self._update_manifest(lines=end, entries=max(persisted, int(ids[-1]) + 1))
+
+    def attach(self, ledger: Ledger, source: str) -> None:
+        """Mirror ``ledger`` (which holds the books named ``source``) and follow its postings."""
+        manifest = self.manifest()
+        if manifest.get("source") != source or manifest.get("lines") != len(ledger):
+            reason = "replaced" if manifest.get("source") not in (None, source) else "mismatched"
+            for name in (JOURNAL_LINES, JOURNAL_ENTRIES):
+                self._set_aside(name, reason)
+            self._update_manifest(source=source, lines=0, entries=0)
+            self.append_lines(ledger, 0, len(ledger))
+
+        def listener(start: int, end: int) -> None:
+            self.append_lines(ledger, start, end)
+
+        ledger.add_listener(listener)
+        self._attached = (ledger, listener)
+
+    def detach(self) -> None:
+        """Stop following the attached ledger's postings."""
+        if self._attached is not None:
+            ledger, listener = self._attached
+            ledger.remove_listener(listener)
+            self._attached = None
+
+    def load_ledger(self, source: str) -> Ledger | None:
+        """Rebuild the ledger persisted for ``source``, or ``None`` if it is not on disk."""
+        manifest = self.manifest()
+        if manifest.get("source") != source:
+            return None
+        lines = self.read(JOURNAL_LINES, ["line", "date", "entry", "account", "fund", "debit", "credit"])
+        entries = self.read(JOURNAL_ENTRIES, ["entry", "reference", "description"])
+        if lines is None or not len(lines):
+            if manifest.get("lines"):
+                raise StoreError(f"{self.root}: the manifest records {manifest['lines']:,} journal lines "
+                                 f"but none are on disk")
+            return None
+        if entries is None:
+            entries = pa.table({"entry": pa.array([], pa.int32()), "reference": pa.array([], pa.string()),
+                                "description": pa.array([], pa.string())})
+        lines, entries = self._recover(manifest, lines.sort_by("line"), entries.sort_by("entry"))
+        if not len(lines):
+            return None
+
+        ledger = Ledger(capacity=max(1024, len(lines)))
+        ledger.register_entries(entries["reference"].to_pylist(), entries["description"].to_pylist())
+        accounts = pd.Index([a.code for a in ledger.accounts]).get_indexer(
+            lines["account"].to_numpy(zero_copy_only=False))
+        funds = pd.Index(ledger.funds).get_indexer(lines["fund"].to_numpy(zero_copy_only=False))
+        ledger.extend(
+            lines["date"].to_numpy().astype("datetime64[D]"),
+            lines["entry"].to_numpy(),
+            accounts.astype(np.int16),
+            lines["debit"].to_numpy(),
+            lines["credit"].to_numpy(),
+            funds.astype(np.int8),
+        )
+        return ledger
+
+    def _recover(self, manifest: dict, lines: pa.Table, entries: pa.Table) -> tuple[pa.Table, pa.Table]:
+        """Reconcile the journal on disk with the manifest's last complete write."""
+        confirmed, confirmed_entries = manifest.get("lines", 0), manifest.get("entries", 0)
+        numbers = lines["line"].to_numpy()
+        ids = entries["entry"].to_numpy()
+        if len(numbers) < confirmed or not np.array_equal(numbers[:confirmed], np.arange(confirmed)) \
+                or not np.array_equal(ids[:confirmed_entries], np.arange(confirmed_entries)):
+            raise StoreError(f"{self.root}: journal lines or entries recorded by the manifest are missing; "
+                             f"restore the store from a backup")
+        if len(numbers) == confirmed and len(ids) == confirmed_entries:
+            return lines, entries
+
+        # Lines past the manifest come from one interrupted write.
+        tail = lines.slice(confirmed)
+        tail_entries = tail["entry"].to_numpy()
+        balance = np.bincount(tail_entries - tail_entries.min(),
+                              weights=tail["debit"].to_numpy() - tail["credit"].to_numpy()) if len(tail) else []
+        complete = (np.array_equal(numbers, np.arange(len(numbers)))
+                    and np.array_equal(ids, np.arange(len(ids)))
+                    and (not len(tail) or int(tail_entries.max()) < len(ids))
+                    and not np.any(balance))
+        if complete:
+            log.warning("%s: adopted %d journal line(s) written before an interrupted manifest update",
+                        self.root, len(numbers) - confirmed)
+            self._update_manifest(lines=len(numbers), entries=len(ids))
+            return lines, entries
+        self._set_aside(JOURNAL_LINES, "incomplete-write", "line", confirmed)
+        self._set_aside(JOURNAL_ENTRIES, "incomplete-write", "entry", confirmed_entries)
+        return lines.slice(0, confirmed), entries.slice(0, confirmed_entries)
+
+    def journal_lines(self, start: date | str | None = None, end: date | str | None = None,
+                      accounts: Iterable[str] | None = None,
+                      columns: Sequence[str] | None = None) -> pa.Table | None:
+        """Journal lines in an inclusive date range, optionally for some account codes."""
+        expression = date_filter(start, end)
+        if accounts is not None:
+            term = ds.field("account").isin(list(accounts))
+            expression = term if expression is None else expression & term
+        return self.read(JOURNAL_LINES, columns, expression)
+
+    def journal_entries(self, start: date | str | None = None, end: date | str | None = None,
+                        columns: Sequence[str] | None = None) -> pa.Table | None:
+        """Entry headers (first posting date) in an inclusive date range."""
+        return self.read(JOURNAL_ENTRIES, columns, date_filter(start, end))
+
+    # -- documents -------------------------------------------------------
+
+    def write_documents(self, documents: list[dict]) -> None:
+        if not documents:
+            return
+        table = pa.Table.from_pylist(documents)
+        dates = np.array([doc["date"] for doc in documents], dtype="datetime64[D]")
+        table = table.set_column(table.schema.get_field_index("date"), "date", pa.array(dates))
+        for name, values in _period_columns(dates).items():
+            table = table.append_column(name, values)
+        self._write(DOCUMENTS, table.sort_by("date"))
+
+    def replace_documents(self, documents: list[dict], source: str) -> None:
+        """Persist the registry named ``source`` unless it is already on disk."""
+        if self.manifest().get("documents") == source:
+            return
+        with self._lock:
+            self._fs.delete_dir_contents(str(self.root / DOCUMENTS), missing_dir_ok=True)
+            self._datasets.pop(DOCUMENTS, None)
+        self.write_documents(documents)
+        self._update_manifest(documents=source)
+
+    def documents(self, doc_type: str | None = None, start: date | str | None = None,
+                  end: date | str | None = None, columns: Sequence[str] | None = None) -> pa.Table | None:
+        expression = date_filter(start, end)
+        if doc_type is not None:
+            term = ds.field("type") == doc_type
+            expression = term if expression is None else expression & term
+        return self.read(DOCUMENTS, columns, expression)
+
+    # -- chain events ----------------------------------------------------
+
+    def archive_events(self, event_store) -> int:
+        """Copy events newer than the last archived block out of the live SQLite store."""
+        archived = self.manifest().get("events_block", 0)
+        table = event_store.rows_after(archived)
+        if not len(table):
+            return 0
+        stamps = pc.cast(pc.strptime(pc.utf8_slice_codeunits(table["timestamp"], 0, 10),
+                                     format="%Y-%m-%d", unit="s", error_is_null=True), pa.date32())
+        dates = stamps.to_numpy(zero_copy_only=False).astype("datetime64[D]")
+        table = table.append_column("date", stamps)
+        for name, values in _period_columns(dates).items():
+            table = table.append_column(name, values)
+        self._write(EVENTS, table)
+        self._update_manifest(events_block=int(pc.max(table["block_number"]).as_py()))
+        return len(table)
+
+    def events(self, start: date | str | None = None, end: date | str | None = None,
+               columns: Sequence[str] | None = None) -> pa.Table | None:
+        return self.read(EVENTS, columns, date_filter(start, end))
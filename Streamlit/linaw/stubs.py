@@ -0,0 +1,261 @@
+"""Local stand-ins for the FabConnect gateway and the Kaleido admin API.
+
+``FabconnectStub`` serves the subset of the FabConnect REST API the Python
+clients use, entirely in memory, so they can be exercised without a Fabric
+network::
+
+    async with FabconnectStub(receipt_delay=0.05) as stub:
+        async with FabconnectClient(FabconnectConfig(url=stub.url)) as client:
+            ...
+
+``KaleidoStub`` serves the environment node listing the chain-status
+poller reads; tests flip node states to simulate outages.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from aiohttp import WSMsgType, web
+
+from .fabconnect import TOO_MANY_IN_FLIGHT, TRANSACTION_FAILURE, TRANSACTION_SUCCESS
+
+EVENT_NAMES = {"CreateAsset": "AssetCreated", "AnchorJournalBatch": "JournalBatchAnchored"}
+
+
+class FabconnectStub:
+    """In-memory FabConnect server bound to an ephemeral localhost port.
+
+    Confirmed transactions emit an ``AssetCreated``-style chain event whose
+    payload ``ID`` is the first transaction argument (and ``Hash`` the
+    second, for ``AnchorJournalBatch``).  Like the chaincode, a transaction
+    whose ID already exists fails.  Receipts are filed under the request's
+    ``headers.id`` when it has one, and a request id seen before is refused
+    with 409.  Events are delivered on ``/ws`` in batches of the event
+    stream's ``batchSize``; the next batch is only sent once the previous
+    one is acked, and an unacked batch is redelivered to the next listener,
+    like FabConnect does.  While ``error_status`` is set, transaction and
+    receipt requests are answered with that status, like a failing gateway.
+    """
+
+    def __init__(self, receipt_delay: float = 0.0, max_in_flight: int | None = None,
+                 block_height: int = 1, error_status: int | None = None):
+        self.receipt_delay = receipt_delay
+        self.max_in_flight = max_in_flight
+        self.error_status = error_status
+        self.block_height = block_height
+        self.transactions: dict[str, dict] = {}
+        self.assets: set[str] = set()
+        self.receipts: dict[str, dict] = {}
+        self.connections: set[tuple] = set()
+        self.rejected = 0
+        self.events: list[dict] = []
+        self.acked = 0
+        self.acks = 0
+        self.batch_size = 1
+        self.event_streams: dict[str, dict] = {}
+        self.subscriptions: list[dict] = []
+        self._new_events: asyncio.Event | None = None
+        self._pending = 0
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.post("/transactions", self._post_transaction),
+            web.get("/receipts/{id}", self._get_receipt),
+            web.get("/chainInfo", self._chain_info),
+            web.post("/eventstreams", self._post_event_stream),
+            web.delete("/eventstreams/{id}", self._delete_event_stream),
+            web.post("/subscriptions", self._post_subscription),
+            web.get("/ws", self._websocket),
+        ])
+
+    async def __aenter__(self) -> "FabconnectStub":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        self._new_events = asyncio.Event()
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _track(self, request: web.Request) -> None:
+        self.connections.add(request.transport.get_extra_info("peername"))
+
+    async def _post_transaction(self, request: web.Request) -> web.Response:
+        self._track(request)
+        if self.error_status is not None:
+            return web.json_response({"error": "Internal server error"}, status=self.error_status)
+        if self.max_in_flight is not None and self._pending >= self.max_in_flight:
+            self.rejected += 1
+            return web.json_response({"error": TOO_MANY_IN_FLIGHT}, status=429)
+        body = await request.json()
+        tx_id = body.get("headers", {}).get("id") or str(uuid.uuid4())
+        if tx_id in self.transactions:
+            return web.json_response({"error": f"Duplicate ID: {tx_id}"}, status=409)
+        self.transactions[tx_id] = body
+        self._pending += 1
+        asyncio.get_running_loop().call_later(self.receipt_delay, self._confirm, tx_id)
+        return web.json_response({"sent": True, "id": tx_id}, status=202)
+
+    def _confirm(self, tx_id: str) -> None:
+        self._pending -= 1
+        self.block_height += 1
+        body = self.transactions[tx_id]
+        args = body.get("args") or [""]
+        receipt = {
+            "_id": tx_id,
+            "headers": {"type": TRANSACTION_SUCCESS, "timeElapsed": self.receipt_delay},
+            "status": "",
+            "blockNumber": self.block_height,
+            "transactionID": uuid.uuid4().hex + uuid.uuid4().hex,
+        }
+        self.receipts[tx_id] = receipt
+        if body.get("init"):
+            return
+        if args[0] in self.assets:
+            receipt["headers"]["type"] = TRANSACTION_FAILURE
+            receipt["errorMessage"] = f"the asset {args[0]} already exists"
+            return
+        self.assets.add(args[0])
+        payload = {"ID": args[0]}
+        if body.get("func") == "AnchorJournalBatch":
+            payload["Hash"] = args[1]
+        self.emit({
+            "chaincodeId": body.get("headers", {}).get("chaincode", ""),
+            "blockNumber": self.block_height,
+            "transactionId": receipt["transactionID"],
+            "transactionIndex": 0,
+            "eventIndex": 0,
+            "eventName": EVENT_NAMES.get(body.get("func"), "AssetCreated"),
+            "payload": payload,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        })
+
+    def emit(self, event: dict) -> None:
+        """Queue a chain event for delivery to websocket listeners."""
+        self.events.append(event)
+        self._new_events.set()
+
+    async def _get_receipt(self, request: web.Request) -> web.Response:
+        self._track(request)
+        if self.error_status is not None:
+            return web.json_response({"error": "Internal server error"}, status=self.error_status)
+        receipt = self.receipts.get(request.match_info["id"])
+        if receipt is None:
+            return web.json_response({"error": "Not found"}, status=404)
+        return web.json_response(receipt)
+
+    async def _chain_info(self, request: web.Request) -> web.Response:
+        self._track(request)
+        return web.json_response({"result": {"height": self.block_height}})
+
+    async def _post_event_stream(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        stream_id = f"es-{uuid.uuid4().hex[:12]}"
+        self.event_streams[stream_id] = body
+        self.batch_size = int(body.get("batchSize") or 1)
+        return web.json_response({"id": stream_id, **body})
+
+    async def _delete_event_stream(self, request: web.Request) -> web.Response:
+        self.event_streams.pop(request.match_info["id"], None)
+        return web.Response(status=204)
+
+    async def _post_subscription(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.subscriptions.append(body)
+        return web.json_response({"id": f"sb-{uuid.uuid4().hex[:12]}", **body})
+
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        listen = await ws.receive_json()
+        topic = listen.get("topic")
+        # An idle listener that disconnects is noticed through its transport.
+        while not ws.closed and request.transport is not None and not request.transport.is_closing():
+            if self.acked >= len(self.events):
+                self._new_events.clear()
+                try:
+                    await asyncio.wait_for(self._new_events.wait(), timeout=0.1)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            batch = self.events[self.acked:self.acked + self.batch_size]
+            await ws.send_json(batch)
+            reply = await ws.receive()
+            if reply.type != WSMsgType.TEXT:
+                break
+            ack = reply.json()
+            if ack.get("type") == "ack" and ack.get("topic") == topic:
+                self.acked += len(batch)
+                self.acks += 1
+        return ws
+
+
+class KaleidoStub:
+    """In-memory Kaleido admin API serving ``/consortia/{id}/environments/{id}/nodes``."""
+
+    def __init__(self, api_key: str = "stub-key", consortium: str = "c1", environment: str = "e1",
+                 peers: int = 2, orderers: int = 1):
+        self.api_key = api_key
+        self.consortium = consortium
+        self.environment = environment
+        self.nodes = (
+            [{"_id": f"peer{i}", "role": "peer", "state": "started"} for i in range(peers)]
+            + [{"_id": f"orderer{i}", "role": "orderer", "state": "started"} for i in range(orderers)]
+        )
+        self.requests = 0
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/consortia/{consortium}/environments/{environment}/nodes", self._list_nodes),
+        ])
+
+    async def __aenter__(self) -> "KaleidoStub":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def set_state(self, node_id: str, state: str) -> None:
+        for node in self.nodes:
+            if node["_id"] == node_id:
+                node["state"] = state
+
+    async def _list_nodes(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if request.headers.get("Authorization") != f"Bearer {self.api_key}":
+            return web.json_response({"errorMessage": "Unauthorized"}, status=401)
+        if (request.match_info["consortium"], request.match_info["environment"]) != (
+                self.consortium, self.environment):
+            return web.json_response({"errorMessage": "Not found"}, status=404)
+        return web.json_response(self.nodes)
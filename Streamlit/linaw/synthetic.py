@@ -0,0 +1,363 @@
+"""Seeded synthetic barangay books and public documents for scale testing.
+
+Journals are generated in fixed-size chunks with vectorized NumPy draws:
+every chunk is a run of two-line income or expense entries against Cash
+in Bank, so the books balance by construction, and dates advance evenly
+from the first entry to the last so chunks come out in posting order.
+Category mixes and typical amounts follow the sample November books.
+Public documents cover every type in the Public View filter and carry
+the real digest of their record, so they verify.  The same seed and
+chunk size always produce the same data.
+
+Chunks can be loaded straight into a :class:`Ledger` or streamed to
+Parquet with bounded memory::
+
+    python -m linaw.synthetic --lines 50000000 --years 10 --documents 1000000 --out data/
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from .ledger import CHART_OF_ACCOUNTS, FUNDS, Ledger
+from .sample import PESO, SAMPLE_DOCUMENTS, SAMPLE_ENTRIES, sample_ledger
+from .verify import canonical_payload
+
+CHUNK_LINES = 1_000_000
+
+log = logging.getLogger(__name__)
+
+# Revenue and expense accounts with their typical single-entry amount (pesos)
+# and relative frequency, taken from the sample month.
+INCOME_MIX = {
+    "4010": (150_000, 0.30), "4020": (50_000, 0.20), "4030": (35_000, 0.20),
+    "4040": (25_000, 0.12), "4050": (15_000, 0.12), "4090": (10_000, 0.06),
+}
+EXPENSE_MIX = {
+    "5010": (85_000, 0.25), "5020": (25_000, 0.25), "5030": (18_000, 0.20),
+    "5040": (15_000, 0.12), "5050": (40_000, 0.08), "5090": (8_000, 0.10),
+}
+DESCRIPTIONS = {
+    "4010": "Tax Collection", "4020": "Permit Fees", "4030": "Market Fees",
+    "4040": "Rental Income", "4050": "Service Fees", "4090": "Other Income",
+    "5010": "Salary Payment", "5020": "Office Supplies", "5030": "Electricity and Water",
+    "5040": "Building Repairs", "5050": "Equipment Purchase", "5090": "Other Expenses",
+}
+# Share of entries charged to the General, SK and Trust funds.
+FUND_MIX = (0.85, 0.10, 0.05)
+INCOME_SHARE = 0.45
+
+# Public document types (as filtered on the Public View) with their id
+# prefix, relative frequency and title templates.
+DOCUMENT_KINDS = {
+    "Financial Reports": ("FR", 0.30, (
+        "Monthly Budget Utilization Report - {month}",
+        "Quarterly Financial Statement - {quarter}",
+        "Statement of Receipts and Expenditures - {month}",
+    )),
+    "Procurement": ("PROC", 0.25, (
+        "Office Equipment and Supplies Procurement",
+        "Procurement of Medical Supplies for the Health Center",
+        "Procurement of Disaster Response Equipment",
+        "Procurement of Street Lighting Fixtures",
+    )),
+    "Resolution": ("RES", 0.20, (
+        "Resolution Authorizing Budget Allocation for Health Programs",
+        "Resolution Approving the Annual Investment Program",
+        "Resolution Authorizing the Barangay Captain to Enter into a Contract",
+        "Resolution Adopting the Barangay Development Plan",
+    )),
+    "Ordinance": ("ORD", 0.15, (
+        "Barangay Solid Waste Management Ordinance",
+        "Barangay Curfew Ordinance for Minors",
+        "Ordinance Regulating Market Stall Fees",
+        "Anti-Littering and Clean Surroundings Ordinance",
+    )),
+    "Infrastructure": ("INFRA", 0.10, (
+        "Multi-Purpose Hall Construction Project",
+        "Barangay Road Concreting Project",
+        "Drainage Improvement Project",
+        "Day Care Center Rehabilitation Project",
+    )),
+}
+PREPARERS = (
+    "Maria Santos, Municipal Accountant", "Barangay Council", "Engineering Office",
+    "Procurement Committee", "Barangay Health Committee", "Barangay Treasurer",
+)
+VERIFIER = "Hon. Juan dela Cruz, Barangay Captain"
+
+_ACCOUNT_IDS = {a.code: i for i, a in enumerate(CHART_OF_ACCOUNTS)}
+_CASH_IN_BANK = _ACCOUNT_IDS["1020"]
+
+
+@dataclass
+class JournalChunk:
+    """One block of entries: headers per entry, columns per journal line."""
+
+    refs: list[str]
+    descriptions: list[str]
+    entry: np.ndarray
+    date: np.ndarray
+    account: np.ndarray
+    fund: np.ndarray
+    debit: np.ndarray
+    credit: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+
+def _opening_chunk(when: np.datetime64) -> JournalChunk:
+    _, _, description, lines = SAMPLE_ENTRIES[0]
+    n = len(lines)
+    return JournalChunk(
+        refs=[f"JE-{when.astype('datetime64[Y]')}-OPEN"],
+        descriptions=[description],
+        entry=np.zeros(n, dtype=np.int64),
+        date=np.full(n, when),
+        account=np.array([_ACCOUNT_IDS[code] for code, _, _ in lines], dtype=np.int16),
+        fund=np.zeros(n, dtype=np.int8),
+        debit=np.array([d * PESO for _, d, _ in lines], dtype=np.int64),
+        credit=np.array([c * PESO for _, _, c in lines], dtype=np.int64),
+    )
+
+
+def generate_journal(lines: int, seed: int = 0, end: str = "2025-11-30", years: int = 1,
+                     chunk_lines: int = CHUNK_LINES) -> Iterator[JournalChunk]:
+    """Yield about ``lines`` balanced journal lines covering ``years`` up to ``end``."""
+    last = np.datetime64(end, "D")
+    first = (last.astype("datetime64[M]") - (12 * years - 1)).astype("datetime64[D]")
+    opening = _opening_chunk(first)
+    yield opening
+
+    entries = max(0, (lines - len(opening)) // 2)
+    span = int((last - first).astype(np.int64)) + 1
+    income_codes = np.array([_ACCOUNT_IDS[c] for c in INCOME_MIX], dtype=np.int16)
+    expense_codes = np.array([_ACCOUNT_IDS[c] for c in EXPENSE_MIX], dtype=np.int16)
+    income_p = np.array([p for _, p in INCOME_MIX.values()])
+    expense_p = np.array([p for _, p in EXPENSE_MIX.values()])
+    typical = np.zeros(len(CHART_OF_ACCOUNTS))
+    descriptions = np.empty(len(CHART_OF_ACCOUNTS), dtype=object)
+    for code, (amount, _) in {**INCOME_MIX, **EXPENSE_MIX}.items():
+        typical[_ACCOUNT_IDS[code]] = amount
+        descriptions[_ACCOUNT_IDS[code]] = DESCRIPTIONS[code]
+
+    per_chunk = max(1, chunk_lines // 2)
+    for index, lo in enumerate(range(0, entries, per_chunk)):
+        hi = min(entries, lo + per_chunk)
+        n = hi - lo
+        rng = np.random.default_rng([seed, index])
+        seq = np.arange(lo, hi, dtype=np.int64)
+        dates = first + (seq * span // entries)
+        income = rng.random(n) < INCOME_SHARE
+        category = np.where(income,
+                            income_codes[rng.choice(len(income_codes), n, p=income_p / income_p.sum())],
+                            expense_codes[rng.choice(len(expense_codes), n, p=expense_p / expense_p.sum())])
+        amount = np.round(typical[category] * rng.lognormal(0.0, 0.5, n)).astype(np.int64) * PESO
+        fund = rng.choice(len(FUND_MIX), n, p=FUND_MIX).astype(np.int8)
+
+        # Income debits cash and credits revenue; expenses the reverse.
+        debit_account = np.where(income, _CASH_IN_BANK, category)
+        credit_account = np.where(income, category, _CASH_IN_BANK)
+        years_of = dates.astype("datetime64[Y]")
+        refs = [f"JE-{year}-{number:08d}" for year, number in
+                zip(years_of.astype(str).tolist(), (seq + 1).tolist())]
+        yield JournalChunk(
+            refs=refs,
+            descriptions=descriptions[category].tolist(),
+            entry=np.repeat(seq + 1, 2),
+            date=np.repeat(dates, 2),
+            account=np.column_stack([debit_account, credit_account]).ravel().astype(np.int16),
+            fund=np.repeat(fund, 2),
+            debit=np.column_stack([amount, np.zeros(n, dtype=np.int64)]).ravel(),
+            credit=np.column_stack([np.zeros(n, dtype=np.int64), amount]).ravel(),
+        )
+
+
+def generate_documents(count: int, seed: int = 0, end: str = "2025-11-30", years: int = 1,
+                       chunk_size: int = 100_000) -> Iterator[list[dict]]:
+    """Yield ``count`` public documents, oldest first, in lists of ``chunk_size``."""
+    last = np.datetime64(end, "D")
+    first = (last.astype("datetime64[M]") - (12 * years - 1)).astype("datetime64[D]")
+    span = int((last - first).astype(np.int64)) + 1
+    kinds = list(DOCUMENT_KINDS)
+    weights = np.array([DOCUMENT_KINDS[k][1] for k in kinds])
+    numbers: dict[tuple[str, str], int] = {}
+
+    for index, lo in enumerate(range(0, count, chunk_size)):
+        hi = min(count, lo + chunk_size)
+        n = hi - lo
+        rng = np.random.default_rng([seed, 1, index])
+        dates = first + (np.arange(lo, hi, dtype=np.int64) * span // max(count, 1))
+        kind = rng.choice(len(kinds), n, p=weights / weights.sum())
+        template = rng.integers(0, 1 << 16, n)
+        amount = np.round(rng.lognormal(12.0, 1.0, n), -3).astype(np.int64)
+        preparer = rng.integers(0, len(PREPARERS), n)
+        chunk = []
+        for when, k, t, pesos, who in zip(dates.tolist(), kind.tolist(), template.tolist(),
+                                           amount.tolist(), preparer.tolist()):
+            doc_type = kinds[k]
+            prefix, _, titles = DOCUMENT_KINDS[doc_type]
+            year = str(when.year)
+            number = numbers[prefix, year] = numbers.get((prefix, year), 0) + 1
+            title = titles[t % len(titles)].format(
+                month=when.strftime("%B %Y"), quarter=f"Q{(when.month - 1) // 3 + 1} {year}")
+            document = {
+                "type": doc_type,
+                "id": f"{prefix}-{year}-{number:03d}",
+                "title": title,
+                "date": when.isoformat(),
+                "status": "✅ Verified",
+                "details": f"{title}, issued {when.strftime('%B %d, %Y')}.",
+                "amount": "N/A" if doc_type == "Ordinance" else f"₱{pesos:,}",
+                "prepared_by": PREPARERS[who],
+                "verified_by": VERIFIER,
+            }
+            document["hash"] = "0x" + hashlib.sha256(canonical_payload(document)).hexdigest()
+            chunk.append(document)
+        yield chunk
+
+
+def synthetic_documents(count: int, seed: int = 0, years: int = 1) -> list[dict]:
+    return [doc for chunk in generate_documents(count, seed=seed, years=years) for doc in chunk]
+
+
+def synthetic_ledger(lines: int, seed: int = 0, years: int = 1) -> Ledger:
+    """An in-memory ledger of about ``lines`` synthetic journal lines."""
+    ledger = Ledger(capacity=max(1024, lines + 16))
+    for chunk in generate_journal(lines, seed=seed, years=years):
+        base = ledger.register_entries(chunk.refs, chunk.descriptions)[0] - chunk.entry[0]
+        ledger.extend(chunk.date, (chunk.entry + base).astype(np.int32), chunk.account,
+                      chunk.debit, chunk.credit, chunk.fund)
+    return ledger
+
+
+def synthetic_source(count: int, seed: int = 0, years: int = 1) -> str:
+    return f"synthetic:{count}:{seed}:{years}"
+
+
+def _parse_source(source: str) -> tuple[int, int, int]:
+    try:
+        _, count, seed, years = source.split(":")
+        return int(count), int(seed), int(years)
+    except ValueError:
+        raise ValueError(f"invalid synthetic source {source!r}; expected synthetic:<count>:<seed>:<years>") from None
+
+
+def source_ledger(source: str) -> Ledger:
+    """Books named by ``source``: ``sample`` or ``synthetic:<lines>:<seed>:<years>``."""
+    if source == "sample":
+        return sample_ledger()
+    lines, seed, years = _parse_source(source)
+    return synthetic_ledger(lines, seed=seed, years=years)
+
+
+def source_documents(source: str) -> list[dict]:
+    """Public documents named by ``source``: ``sample`` or ``synthetic:<count>:<seed>:<years>``."""
+    if source == "sample":
+        return SAMPLE_DOCUMENTS
+    count, seed, years = _parse_source(source)
+    return synthetic_documents(count, seed=seed, years=years)
+
+
+# -- Parquet export ------------------------------------------------------
+
+def _line_table(chunk: JournalChunk):
+    import pyarrow as pa
+
+    codes = pa.array([a.code for a in CHART_OF_ACCOUNTS])
+    return pa.table({
+        "date": pa.array(chunk.date),
+        "entry": pa.array(chunk.entry),
+        "account": pa.DictionaryArray.from_arrays(pa.array(chunk.account.astype(np.int32)), codes),
+        "fund": pa.DictionaryArray.from_arrays(pa.array(chunk.fund.astype(np.int32)), pa.array(FUNDS)),
+        "debit": pa.array(chunk.debit),
+        "credit": pa.array(chunk.credit),
+    })
+
+
+def _entry_table(chunk: JournalChunk):
+    import pyarrow as pa
+
+    firsts = np.flatnonzero(np.r_[True, chunk.entry[1:] != chunk.entry[:-1]])
+    return pa.table({
+        "entry": pa.array(chunk.entry[firsts]),
+        "reference": pa.array(chunk.refs),
+        "date": pa.array(chunk.date[firsts]),
+        "description": pa.array(chunk.descriptions),
+    })
+
+
+def write_parquet(out: str | Path, lines: int, documents: int = 0, seed: int = 0, years: int = 1,
+                  chunk_lines: int = CHUNK_LINES) -> dict[str, int]:
+    """Stream a synthetic journal and document registry to Parquet, one row group per chunk.
+
+    Writes ``journal_lines.parquet``, ``journal_entries.parquet`` and
+    ``documents.parquet`` under ``out``; returns the row count of each.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    counts = {"journal_lines": 0, "journal_entries": 0, "documents": 0}
+    line_writer = entry_writer = None
+    try:
+        for chunk in generate_journal(lines, seed=seed, years=years, chunk_lines=chunk_lines):
+            line_table, entry_table = _line_table(chunk), _entry_table(chunk)
+            if line_writer is None:
+                line_writer = pq.ParquetWriter(out / "journal_lines.parquet", line_table.schema)
+                entry_writer = pq.ParquetWriter(out / "journal_entries.parquet", entry_table.schema)
+            line_writer.write_table(line_table, row_group_size=len(line_table))
+            entry_writer.write_table(entry_table, row_group_size=len(entry_table))
+            counts["journal_lines"] += len(line_table)
+            counts["journal_entries"] += len(entry_table)
+    finally:
+        for writer in (line_writer, entry_writer):
+            if writer is not None:
+                writer.close()
+
+    document_writer = None
+    try:
+        for chunk in generate_documents(documents, seed=seed, years=years):
+            table = pa.Table.from_pylist(chunk)
+            if document_writer is None:
+                document_writer = pq.ParquetWriter(out / "documents.parquet", table.schema)
+            document_writer.write_table(table, row_group_size=len(table))
+            counts["documents"] += len(table)
+    finally:
+        if document_writer is not None:
+            document_writer.close()
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic LINAW books as Parquet.")
+    parser.add_argument("--lines", type=int, required=True, help="journal lines to generate")
+    parser.add_argument("--documents", type=int, default=0, help="public documents to generate")
+    parser.add_argument("--years", type=int, default=1, help="fiscal years covered, ending 2025")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-lines", type=int, default=CHUNK_LINES)
+    parser.add_argument("--out", type=Path, required=True, help="output directory")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    start = time.perf_counter()
+    counts = write_parquet(args.out, args.lines, args.documents, seed=args.seed,
+                           years=args.years, chunk_lines=args.chunk_lines)
+    elapsed = time.perf_counter() - start
+    for name, rows in counts.items():
+        log.info("%16s: %s rows", name, f"{rows:,}")
+    log.info("wrote %s in %.1fs", args.out, elapsed)
+
+
+if __name__ == "__main__":
+    main()
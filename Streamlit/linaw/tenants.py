@@ -0,0 +1,487 @@
+"""Tenants (organizations) served by one LINAW process.
+
+Every tenant gets its own partition of everything the pages read:
+
+* books, document registry and archived events in its own Parquet store,
+  chain events, import history, anchoring batches, the outbox of chain
+  writes and anomaly findings in its own SQLite files, and snapshots of
+  its chain projections, all under ``<data dir>/tenants/<id>/``;
+* its own query cache, charged against a process-wide
+  :class:`~linaw.cache.CacheBudget` with the tenant's ``weight``, so a
+  tenant's year-end load evicts its own entries first;
+* its own :class:`TenantChannel` to its Fabric channel, signing as its own
+  user (the Go runner's ``CHANNEL_ID``/``USER_ID``) through a connection
+  pool capped at ``LINAW_TENANT_CONNECTIONS`` sockets; its batches are
+  anchored on chain under its id.
+
+A :class:`Workspace` builds a tenant's resources on first use, so a page
+that only reads chain events never loads the ledger.  The
+:class:`WorkspacePool` keeps the most recently used workspaces resident;
+an idle tenant's workspace is closed (its channel, stores and cache
+released) and rebuilt from its Parquet store on the next visit.
+
+Tenants are listed in the JSON file named by ``LINAW_TENANTS``: objects
+with ``id`` and ``name`` and optionally ``channel``, ``user``, ``logo``,
+``books``, ``documents``, ``ordinance`` and ``weight``.  Without it the process serves a
+single ``default`` tenant configured from the environment.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Coroutine
+
+from .anchoring import Anchorer, AnchorLog
+from .anomalies import AnomalyDetector, FindingStore
+from .balances import BalanceIndex
+from .budget import BudgetBook, source_ordinance
+from .cache import CacheBudget, QueryCache
+from .chainstatus import ChainStatusPoller, KaleidoConfig
+from .entries import EntryIndex
+from .events import EventStore
+from .importer import Importer, ImportLog
+from .kpi import KpiService
+from .ledger import Ledger
+from .merkle import JournalMerkle
+from .outbox import Outbox, OutboxDispatcher
+from .projections import ChainKpis, DocumentRegistry, JournalAnchors, Projector
+from .rollups import RollupCube
+from .sample import SAMPLE_ORGANIZATION
+from .search import SearchIndex
+from .settings import data_dir, env_int
+from .storage import ParquetStore
+from .synthetic import source_documents, source_ledger, synthetic_source
+from .verify import DocumentVerifier
+
+if TYPE_CHECKING:
+    from .fabconnect import FabconnectConfig
+
+log = logging.getLogger(__name__)
+
+APP_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_TENANT = "default"
+DEFAULT_LOGO = APP_DIR / "graphics" / "pasay-logo.png"
+_TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+@dataclass(frozen=True)
+class Tenant:
+    id: str
+    name: str
+    # Fabric channel and signer; blank uses CHANNEL_ID / USER_ID.
+    channel: str = ""
+    user: str = ""
+    logo: str = ""
+    # Books and registry sources: "sample" or "synthetic:<count>:<seed>:<years>".
+    books: str = "sample"
+    documents: str = "sample"
+    # Budget ordinance: "sample", a JSON file (relative paths are resolved
+    # against the app directory) or blank until the tenant has one.
+    ordinance: str = "sample"
+    # Relative share of the process-wide cache budget.
+    weight: float = 1.0
+
+    def __post_init__(self):
+        if not _TENANT_ID.match(self.id):
+            raise ValueError(f"invalid tenant id {self.id!r}: use lowercase letters, digits, '-' and '_'")
+        if self.weight <= 0:
+            raise ValueError(f"tenant {self.id} needs a positive weight")
+
+    @property
+    def data_dir(self) -> Path:
+        path = data_dir() / "tenants" / self.id
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @property
+    def logo_path(self) -> Path | None:
+        """The logo file; relative paths are resolved against the app directory."""
+        if not self.logo:
+            return None
+        path = Path(self.logo)
+        return path if path.is_absolute() else APP_DIR / path
+
+    @property
+    def ordinance_source(self) -> str:
+        """``ordinance`` as :func:`~linaw.budget.source_ordinance` takes it."""
+        if self.ordinance in ("", "sample"):
+            return self.ordinance
+        path = Path(self.ordinance)
+        return str(path if path.is_absolute() else APP_DIR / path)
+
+    def fabconnect_config(self, base: FabconnectConfig | None = None) -> FabconnectConfig:
+        from .fabconnect import FabconnectConfig
+
+        base = base or FabconnectConfig.from_env()
+        return replace(base, channel=self.channel or base.channel, username=self.user or base.username)
+
+
+def _env_source(variable: str) -> str | None:
+    count = env_int(variable, 0)
+    if not count:
+        return None
+    return synthetic_source(count, env_int("LINAW_SYNTHETIC_SEED", 0), env_int("LINAW_SYNTHETIC_YEARS", 1))
+
+
+def default_tenant() -> Tenant:
+    """The single tenant served without ``LINAW_TENANTS``; ``LINAW_SYNTHETIC_*`` pick its data."""
+    return Tenant(
+        id=DEFAULT_TENANT,
+        name=SAMPLE_ORGANIZATION,
+        channel=os.getenv("CHANNEL_ID", ""),
+        user=os.getenv("USER_ID", ""),
+        logo=str(DEFAULT_LOGO),
+        books=_env_source("LINAW_SYNTHETIC_LINES") or "sample",
+        documents=_env_source("LINAW_SYNTHETIC_DOCUMENTS") or "sample",
+    )
+
+
+def load_tenants(path: str | Path | None = None) -> dict[str, Tenant]:
+    """Tenants by id, in configuration order, from ``path`` or ``LINAW_TENANTS``."""
+    path = path or os.getenv("LINAW_TENANTS")
+    if not path:
+        tenant = default_tenant()
+        return {tenant.id: tenant}
+    known = {f.name for f in fields(Tenant)}
+    tenants: dict[str, Tenant] = {}
+    for entry in json.loads(Path(path).read_text()):
+        unknown = set(entry) - known
+        if unknown:
+            raise ValueError(f"unknown tenant setting(s) {', '.join(sorted(unknown))} in {path}")
+        tenant = Tenant(**entry)
+        if tenant.id in tenants:
+            raise ValueError(f"duplicate tenant id {tenant.id!r} in {path}")
+        tenants[tenant.id] = tenant
+    if not tenants:
+        raise ValueError(f"no tenants are configured in {path}")
+    return tenants
+
+
+class TenantChannel:
+    """A tenant's connection to its Fabric channel.
+
+    One pooled FabConnect client, signing as the tenant's user on its
+    channel, and one event-loop thread that runs the tenant's background
+    tasks (event ingestion, chain-status polling, the outbox dispatcher
+    and anchoring) on that pool.
+    """
+
+    def __init__(self, tenant: Tenant, max_connections: int = 8, request_timeout: float = 10.0):
+        # The HTTP stack is only imported for tenants that connect.
+        from .fabconnect import FabconnectClient
+
+        self.tenant = tenant
+        self.config = tenant.fabconnect_config()
+        self.client = FabconnectClient(self.config, max_connections=max_connections,
+                                       request_timeout=request_timeout)
+        self._loop = asyncio.new_event_loop()
+        self._tasks: list[concurrent.futures.Future] = []
+        self._thread = threading.Thread(target=self._loop.run_forever, name=f"linaw-{tenant.id}", daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine: Coroutine) -> None:
+        """Run ``coroutine`` on the channel's loop until the channel is closed."""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        name = coroutine.__qualname__
+        future.add_done_callback(lambda done: self._finished(name, done))
+        self._tasks.append(future)
+
+    def _finished(self, name: str, future: concurrent.futures.Future) -> None:
+        # Background tasks run until cancelled; one that raises has stopped
+        # for good and would otherwise fail silently.
+        if not future.cancelled() and future.exception() is not None:
+            log.error("%s for tenant %s stopped", name, self.tenant.id, exc_info=future.exception())
+
+    def close(self, timeout: float = 5.0) -> None:
+        for task in self._tasks:
+            task.cancel()
+        concurrent.futures.wait(self._tasks, timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+
+class Workspace:
+    """One tenant's resources, each built on first use and shared by every session."""
+
+    def __init__(self, tenant: Tenant, budget: CacheBudget | None = None):
+        self.tenant = tenant
+        self.budget = budget
+        self._resources: dict[str, Any] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, build: Callable[[], Any]) -> Any:
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._resources:
+                self._resources[name] = build()
+        return self._resources[name]
+
+    @property
+    def channel(self) -> TenantChannel | None:
+        """The tenant's channel connection, when FabConnect is configured."""
+        if not os.getenv("FABCONNECT_URL"):
+            return None
+        return self._get("channel", lambda: TenantChannel(self.tenant, env_int("LINAW_TENANT_CONNECTIONS", 8)))
+
+    @property
+    def parquet_store(self) -> ParquetStore:
+        return self._get("parquet_store", lambda: ParquetStore(self.tenant.data_dir / "parquet"))
+
+    def _build_ledger(self) -> Ledger:
+        # Persisted to the tenant's Parquet store and reloaded from it on
+        # restart; later postings are appended as they are made.
+        store = self.parquet_store
+        source = self.tenant.books
+        ledger = store.load_ledger(source)
+        if ledger is None:
+            ledger = source_ledger(source)
+        store.attach(ledger, source)
+        ledger.add_listener(lambda start, end: self.query_cache.invalidate("ledger"))
+        return ledger
+
+    @property
+    def ledger(self) -> Ledger:
+        ledger = self._resources.get("ledger")
+        if ledger is None:
+            ledger = self._get("ledger", self._build_ledger)
+            # Check and anchor postings whenever the books are loaded, not
+            # only once a page asks.
+            self.anomalies
+            if self.channel is not None:
+                self.anchoring
+        return ledger
+
+    @property
+    def balance_index(self) -> BalanceIndex:
+        return self._get("balance_index", lambda: BalanceIndex(self.ledger))
+
+    @property
+    def entry_index(self) -> EntryIndex:
+        return self._get("entry_index", lambda: EntryIndex(self.ledger))
+
+    @property
+    def kpis(self) -> KpiService:
+        return self._get("kpis", lambda: KpiService(self.ledger))
+
+    @property
+    def rollups(self) -> RollupCube:
+        return self._get("rollups", lambda: RollupCube(self.ledger))
+
+    @property
+    def budget_book(self) -> BudgetBook:
+        """The tenant's appropriations; without an ordinance every expense is unappropriated."""
+        return self._get("budget_book",
+                         lambda: BudgetBook(self.ledger, source_ordinance(self.tenant.ordinance_source)))
+
+    @property
+    def journal_merkle(self) -> JournalMerkle:
+        return self._get("journal_merkle", lambda: JournalMerkle(self.ledger))
+
+    @property
+    def importer(self) -> Importer:
+        return self._get("importer", lambda: Importer(self.ledger, ImportLog(self.tenant.data_dir / "imports.db")))
+
+    def _build_outbox(self) -> Outbox:
+        outbox = Outbox(self.tenant.data_dir / "outbox.db")
+        channel = self.channel
+        if channel is not None:
+            channel.run(OutboxDispatcher(outbox, client=channel.client,
+                                         max_in_flight=env_int("LINAW_OUTBOX_IN_FLIGHT", 16),
+                                         max_attempts=env_int("LINAW_OUTBOX_ATTEMPTS", 8)).run())
+        return outbox
+
+    @property
+    def outbox(self) -> Outbox:
+        """Every chain write the tenant makes; drained through its channel when it has one."""
+        return self._get("outbox", self._build_outbox)
+
+    @property
+    def anchor_log(self) -> AnchorLog:
+        return self._get("anchor_log", lambda: AnchorLog(self.tenant.data_dir / "anchors.db"))
+
+    @property
+    def batch_prefix(self) -> str:
+        return f"JEB-{self.tenant.id}"
+
+    def _build_anchoring(self) -> Anchorer:
+        channel = self.channel
+        anchorer = Anchorer(self.ledger, self.journal_merkle, self.anchor_log,
+                            self.outbox, events=self.event_store if channel else None,
+                            asset_prefix=self.batch_prefix,
+                            batch_size=env_int("LINAW_ANCHOR_BATCH", 256),
+                            interval=env_int("LINAW_ANCHOR_SECONDS", 5))
+        if channel is not None:
+            channel.run(anchorer.run())
+        return anchorer
+
+    @property
+    def anchoring(self) -> Anchorer:
+        """Batches and anchors posted entries while the tenant has a channel; entries queue otherwise."""
+        return self._get("anchoring", self._build_anchoring)
+
+    @property
+    def findings(self) -> FindingStore:
+        """Anomaly findings as last checked; reading them does not load the books."""
+        return self._get("findings", lambda: FindingStore(self.tenant.data_dir / "findings.db"))
+
+    def _build_anomalies(self) -> AnomalyDetector:
+        return AnomalyDetector(self.ledger, self.findings,
+                               threshold=env_int("LINAW_PROCUREMENT_THRESHOLD", 50_000) * 100)
+
+    @property
+    def anomalies(self) -> AnomalyDetector:
+        """Checks postings as they arrive and records the findings in :attr:`findings`."""
+        return self._get("anomalies", self._build_anomalies)
+
+    def _build_document_index(self) -> SearchIndex:
+        documents = source_documents(self.tenant.documents)
+        self.parquet_store.replace_documents(documents, self.tenant.documents)
+        return SearchIndex(documents)
+
+    @property
+    def document_index(self) -> SearchIndex:
+        return self._get("document_index", self._build_document_index)
+
+    def _build_event_store(self) -> EventStore:
+        store = EventStore(self.tenant.data_dir / "events.db")
+        self.parquet_store.archive_events(store)
+        if self.channel is not None:
+            from .fabconnect import EVENT_LISTENER_TOPIC
+            from .ingest import EventIngester
+
+            # One stream and topic per tenant on a shared gateway.
+            name = f"linaw-events-{self.tenant.id}"
+            self.channel.run(EventIngester(store, client=self.channel.client, stream_name=name,
+                                           topic=f"{EVENT_LISTENER_TOPIC}-{self.tenant.id}").run())
+        return store
+
+    @property
+    def event_store(self) -> EventStore:
+        return self._get("event_store", self._build_event_store)
+
+    def _build_projections(self) -> Projector:
+        projector = Projector(self.event_store, self.tenant.data_dir / "snapshots",
+                              [DocumentRegistry(), JournalAnchors(), ChainKpis()],
+                              snapshot_every=env_int("LINAW_SNAPSHOT_EVENTS", 50_000))
+        projector.load()
+        return projector
+
+    @property
+    def projections(self) -> Projector:
+        """Registry, on-chain journal and chain KPIs, restored from snapshots and caught up on build."""
+        return self._get("projections", self._build_projections)
+
+    def _build_chain_status(self) -> ChainStatusPoller:
+        channel = self.channel
+        if channel is None:
+            # Never polled: pages read the idle "Not connected" snapshot.
+            return ChainStatusPoller(interval=env_int("LINAW_CHAIN_POLL_SECONDS", 10))
+        poller = ChainStatusPoller(channel.config, kaleido=KaleidoConfig.from_env(), client=channel.client,
+                                   outbox=self.outbox, interval=env_int("LINAW_CHAIN_POLL_SECONDS", 10))
+        channel.run(poller.run())
+        return poller
+
+    @property
+    def chain_status(self) -> ChainStatusPoller:
+        """Pages read ``.snapshot``; ``LINAW_CHAIN_POLL_SECONDS`` sets the interval."""
+        return self._get("chain_status", self._build_chain_status)
+
+    @property
+    def verifier(self) -> DocumentVerifier:
+        return self._get("verifier", lambda: DocumentVerifier(self.projections["registry"]))
+
+    def expected_hash(self, document_id: str) -> str | None:
+        """The hash a chain event for ``document_id`` should carry, or ``None`` when it is unknown here.
+
+        A journal batch carries its root, a registry document its content digest.
+        """
+        prefix = f"{self.batch_prefix}-"
+        if document_id.startswith(prefix):
+            number = document_id[len(prefix):]
+            batch = self.anchor_log.get(int(number)) if number.isdigit() else None
+            return "0x" + batch.root.hex() if batch else None
+        document = self.document_index.get(document_id)
+        return self.verifier.digest(document) if document else None
+
+    def _build_query_cache(self) -> QueryCache:
+        cache = QueryCache(max_entries=env_int("LINAW_CACHE_ENTRIES", 1024), budget=self.budget,
+                           weight=self.tenant.weight)
+        # Versions are read only for the sources a cached value depends on,
+        # so registering them does not build the ledger or the stores.
+        cache.add_source("ledger", lambda: self.ledger.version)
+        cache.add_source("chain", lambda: self.event_store.height())
+        cache.add_source("documents", lambda: len(self.document_index))
+        cache.add_source("findings", lambda: self.findings.position())
+        return cache
+
+    @property
+    def query_cache(self) -> QueryCache:
+        return self._get("query_cache", self._build_query_cache)
+
+    def close(self) -> None:
+        """Stop the tenant's background tasks, close its stores and release its cache budget.
+
+        The replacement workspace opens the same files, so the ledger stops
+        mirroring postings to the Parquet store here.  Sessions still
+        holding the workspace pick up the replacement on their next run.
+        """
+        resources = self._resources
+        channel = resources.get("channel")
+        if channel is not None:
+            channel.close()
+        if "parquet_store" in resources:
+            resources["parquet_store"].detach()
+        if "anomalies" in resources:
+            resources["anomalies"].close()
+        if "importer" in resources:
+            resources["importer"].log.close()
+        for name in ("findings", "event_store", "outbox", "anchor_log"):
+            if name in resources:
+                resources[name].close()
+        cache = resources.get("query_cache")
+        if cache is not None:
+            cache.close()
+
+
+class WorkspacePool:
+    """Resident tenant workspaces; the least recently used is closed past ``max_active``."""
+
+    def __init__(self, tenants: dict[str, Tenant], max_active: int = 64, budget: CacheBudget | None = None):
+        self.tenants = tenants
+        self.max_active = max_active
+        self.budget = budget
+        self._active: OrderedDict[str, Workspace] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def get(self, tenant_id: str) -> Workspace:
+        evicted = []
+        with self._lock:
+            workspace = self._active.get(tenant_id)
+            if workspace is not None:
+                self._active.move_to_end(tenant_id)
+                return workspace
+            if tenant_id not in self.tenants:
+                raise KeyError(f"unknown tenant: {tenant_id}")
+            workspace = self._active[tenant_id] = Workspace(self.tenants[tenant_id], self.budget)
+            while len(self._active) > self.max_active:
+                evicted.append(self._active.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return workspace
@@ -0,0 +1,128 @@
+"""Batched hash verification for public documents.
+
+A document's content digest is a streaming SHA-256 over its attached file
+(read through ``mmap`` in fixed-size windows, so large PDFs never sit in
+memory) or, without an attachment, over its canonical JSON record.  The
+digest is compared with the hash published in the registry and with the
+hash anchored on chain, looked up for a whole page of documents in the
+:class:`~linaw.projections.DocumentRegistry` projection of the chain
+events.  Results are cached by content digest and chain height, so a rerun
+at the same height costs dictionary lookups.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from .projections import DocumentRegistry
+
+CHUNK_SIZE = 1 << 20
+
+# Registry fields that describe the record itself rather than its content.
+_UNHASHED_FIELDS = ("hash", "status", "file")
+
+
+def sha256_file(path: str | Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """Hex SHA-256 of a file, hashed through a memory map one window at a time."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, chunk_size):
+                        digest.update(view[offset:offset + chunk_size])
+                finally:
+                    view.release()
+    return digest.hexdigest()
+
+
+def canonical_payload(document: dict) -> bytes:
+    record = {k: v for k, v in document.items() if k not in _UNHASHED_FIELDS}
+    return json.dumps(record, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def normalize_hash(value: str | None) -> str:
+    return (value or "").lower().removeprefix("0x")
+
+
+@dataclass(frozen=True)
+class Verification:
+    document_id: str
+    digest: str
+    on_chain_hash: str | None
+    block_number: int | None
+    document_verified: bool
+    hash_confirmed: bool
+    blockchain_synced: bool
+
+
+class DocumentVerifier:
+    """Verifies pages of documents against their published and anchored hashes."""
+
+    def __init__(self, registry: DocumentRegistry, max_entries: int = 65536):
+        self.registry = registry
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._file_digests: dict[tuple, str] = {}
+        self._results: OrderedDict[tuple[str, str, int], Verification] = OrderedDict()
+
+    def digest(self, document: dict) -> str:
+        path = document.get("file")
+        if not path:
+            return hashlib.sha256(canonical_payload(document)).hexdigest()
+        stat = os.stat(path)
+        key = (str(path), stat.st_size, stat.st_mtime_ns)
+        digest = self._file_digests.get(key)
+        if digest is None:
+            digest = self._file_digests[key] = sha256_file(path)
+        return digest
+
+    def verify_many(self, documents: Iterable[dict], height: int | None = None) -> dict[str, Verification]:
+        """Verify every document in one pass with a single registry lookup."""
+        if height is None:
+            height = self.registry.height()
+        documents = list(documents)
+        digests = {doc["id"]: self.digest(doc) for doc in documents}
+        results: dict[str, Verification] = {}
+        missing = []
+        with self._lock:
+            for doc in documents:
+                key = (doc["id"], digests[doc["id"]], height)
+                cached = self._results.get(key)
+                if cached is not None:
+                    self._results.move_to_end(key)
+                    results[doc["id"]] = cached
+                else:
+                    missing.append(doc)
+        if not missing:
+            return results
+
+        anchored = self.registry.document_hashes([doc["id"] for doc in missing])
+        with self._lock:
+            for doc in missing:
+                digest = digests[doc["id"]]
+                on_chain, block = anchored.get(doc["id"], (None, None))
+                verification = Verification(
+                    document_id=doc["id"],
+                    digest=digest,
+                    on_chain_hash=on_chain,
+                    block_number=block,
+                    document_verified=normalize_hash(doc.get("hash")) == digest,
+                    hash_confirmed=on_chain is not None and normalize_hash(on_chain) == digest,
+                    blockchain_synced=block is not None and block <= height,
+                )
+                results[doc["id"]] = verification
+                self._results[(doc["id"], digest, height)] = verification
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return results
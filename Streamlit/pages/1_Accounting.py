@@ -1,197 +1,264 @@
+import json
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from linaw import format_peso
+from linaw.resources import (load_anchoring, load_balance_index, load_entry_index, load_importer,
+                             load_journal_merkle, load_ledger, load_parquet_store, load_query_cache)
+from linaw.sidebar import tenant_sidebar
+
+GL_ROW_LIMIT = 1000
+JE_PAGE_SIZE = 50
 
 st.set_page_config(page_title="Accounting - LINAW AIS", page_icon="📒", layout="wide")
+tenant_sidebar()
 
 st.title("📒 Accounting Records")
 st.markdown("Comprehensive financial statements and ledger entries")
 st.markdown("---")
 
-# Tabs for different accounting views
-tab1, tab2, tab3 = st.tabs(["📊 Balance Sheet", "📗 General Ledger", "📝 Journal Entries"])
+# Tabs for different accounting views; only the open tab is built.
+tab1, tab2, tab3, tab4 = st.tabs(["📊 Balance Sheet", "📗 General Ledger", "📝 Journal Entries", "📥 Import"],
+                                 key="accounting_tab", on_change="rerun")
+
+
+ledger = load_ledger()
+balance_index = load_balance_index()
+entry_index = load_entry_index()
+journal_merkle = load_journal_merkle()
+anchoring = load_anchoring()
+parquet_store = load_parquet_store()
+query_cache = load_query_cache()
+amount_format = st.column_config.NumberColumn(format="accounting")
+
+
+def statement_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Account': frame['Account'],
+        'Amount (₱)': ['' if pd.isna(amount) else format_peso(int(amount)) for amount in frame['Amount']],
+    })
+
+
+def peso_columns(frame: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    frame = frame.copy()
+    for column in columns:
+        frame[f'{column} (₱)'] = frame.pop(column) / 100
+    return frame
+
+
+# Views below are shared across sessions until the next posting.
+@query_cache.memoize("ledger")
+def balance_sheet_view():
+    assets, liabilities = ledger.balance_sheet()
+    return statement_frame(assets), statement_frame(liabilities)
+
+
+@query_cache.memoize("ledger")
+def last_posting_date():
+    return ledger.date.max().item() if len(ledger) else datetime.now().date()
+
+
+@query_cache.memoize("ledger")
+def general_ledger_view(code: str, start, end):
+    # Only this account's partitions for the months in range are scanned.
+    lines = parquet_store.journal_lines(start, end, accounts=[code],
+                                        columns=['line', 'date', 'entry', 'debit', 'credit'])
+    lines = lines.sort_by([('date', 'ascending'), ('line', 'ascending')])
+    debit, credit = lines['debit'].to_numpy(), lines['credit'].to_numpy()
+    sign = ledger.accounts[ledger.account_id(code)].normal_sign
+    opening = balance_index.balance(code, start - timedelta(days=1))
+    balance = opening + np.cumsum((debit - credit) * sign)
+    shown = slice(max(0, len(lines) - GL_ROW_LIMIT), len(lines))
+    entries = lines['entry'].to_numpy()[shown]
+    gl_data = pd.DataFrame({
+        'Date': lines['date'].to_numpy()[shown],
+        'Reference': [ledger.je_refs[i] for i in entries],
+        'Description': [ledger.je_descriptions[i] for i in entries],
+        'Debit': debit[shown],
+        'Credit': credit[shown],
+        'Balance': balance[shown],
+    })
+    closing = int(balance[-1]) if len(balance) else opening
+    return (len(lines), peso_columns(gl_data, ['Debit', 'Credit', 'Balance']),
+            (int(debit.sum()), int(credit.sum())), closing)
+
+
+@query_cache.memoize("ledger")
+def journal_page(start, end, page: int):
+    return entry_index.headers(start, end, page * JE_PAGE_SIZE, JE_PAGE_SIZE)
+
+
+@query_cache.memoize("ledger")
+def entry_lines_view(ref: str):
+    return peso_columns(entry_index.lines(ref), ['Debit', 'Credit'])
+
+
+def show_more_entries(key: str) -> None:
+    st.session_state[key] += 1
+
 
 # Balance Sheet Tab
 with tab1:
-    st.subheader("Balance Sheet")
-    st.caption(f"As of {datetime.now().strftime('%B %d, %Y')}")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("#### 🏦 Assets")
-        assets_data = {
-            'Account': [
-                'Current Assets',
-                '  Cash on Hand',
-                '  Cash in Bank',
-                '  Accounts Receivable',
-                'Fixed Assets',
-                '  Land',
-                '  Buildings',
-                '  Equipment',
-                '  Less: Accumulated Depreciation',
-                'TOTAL ASSETS'
-            ],
-            'Amount (₱)': [
-                '',
-                '125,000',
-                '450,000',
-                '85,000',
-                '',
-                '800,000',
-                '650,000',
-                '425,000',
-                '(85,000)',
-                '2,450,000'
-            ]
-        }
-        assets_df = pd.DataFrame(assets_data)
-        st.dataframe(assets_df, use_container_width=True, hide_index=True)
-    
-    with col2:
-        st.markdown("#### 💼 Liabilities & Equity")
-        liabilities_data = {
-            'Account': [
-                'Current Liabilities',
-                '  Accounts Payable',
-                '  Accrued Expenses',
-                'Long-term Liabilities',
-                '  Long-term Debt',
-                'TOTAL LIABILITIES',
-                '',
-                "Fund Balance/Equity",
-                '  Beginning Balance',
-                '  Net Income (Current Period)',
-                'TOTAL EQUITY',
-                '',
-                'TOTAL LIABILITIES & EQUITY'
-            ],
-            'Amount (₱)': [
-                '',
-                '145,000',
-                '75,000',
-                '',
-                '500,000',
-                '720,000',
-                '',
-                '',
-                '1,500,000',
-                '230,000',
-                '1,730,000',
-                '',
-                '2,450,000'
-            ]
-        }
-        liabilities_df = pd.DataFrame(liabilities_data)
-        st.dataframe(liabilities_df, use_container_width=True, hide_index=True)
+    if tab1.open:
+        st.subheader("Balance Sheet")
+        st.caption(f"As of {datetime.now().strftime('%B %d, %Y')}")
+
+        assets_view, liabilities_view = balance_sheet_view()
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("#### 🏦 Assets")
+            st.dataframe(assets_view, use_container_width=True, hide_index=True)
+
+        with col2:
+            st.markdown("#### 💼 Liabilities & Equity")
+            st.dataframe(liabilities_view, use_container_width=True, hide_index=True)
 
 # General Ledger Tab
 with tab2:
-    st.subheader("General Ledger")
-    st.caption("Account transaction details")
-    
-    # Account selector
-    account = st.selectbox(
-        "Select Account",
-        ["Cash in Bank", "Accounts Receivable", "Revenue", "Operating Expenses"]
-    )
-    
-    # Sample General Ledger Data
-    if account == "Cash in Bank":
-        gl_data = pd.DataFrame({
-            'Date': ['2025-11-01', '2025-11-01', '2025-11-02', '2025-11-02'],
-            'Reference': ['JE-2025-101', 'JE-2025-102', 'JE-2025-103', 'JE-2025-104'],
-            'Description': ['Tax Collection', 'Equipment Purchase', 'Permit Fees', 'Salary Payment'],
-            'Debit (₱)': ['150,000', '', '50,000', ''],
-            'Credit (₱)': ['', '75,000', '', '85,000'],
-            'Balance (₱)': ['550,000', '475,000', '525,000', '450,000']
-        })
-    elif account == "Revenue":
-        gl_data = pd.DataFrame({
-            'Date': ['2025-11-01', '2025-11-02', '2025-11-02', '2025-11-02'],
-            'Reference': ['JE-2025-101', 'JE-2025-103', 'JE-2025-105', 'JE-2025-106'],
-            'Description': ['Tax Collection', 'Permit Fees', 'Rental Income', 'Service Fees'],
-            'Debit (₱)': ['', '', '', ''],
-            'Credit (₱)': ['150,000', '50,000', '25,000', '15,000'],
-            'Balance (₱)': ['150,000', '200,000', '225,000', '240,000']
-        })
-    else:
-        gl_data = pd.DataFrame({
-            'Date': ['2025-11-01', '2025-11-02'],
-            'Reference': ['JE-2025-102', 'JE-2025-104'],
-            'Description': ['Equipment Purchase', 'Salary Payment'],
-            'Debit (₱)': ['75,000', '85,000'],
-            'Credit (₱)': ['', ''],
-            'Balance (₱)': ['75,000', '160,000']
-        })
-    
-    st.dataframe(gl_data, use_container_width=True, hide_index=True)
-    
-    # Summary
-    st.markdown("#### Account Summary")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Total Debits", "₱325,000")
-    with col2:
-        st.metric("Total Credits", "₱240,000")
-    with col3:
-        st.metric("Current Balance", "₱450,000")
+    if tab2.open:
+        st.subheader("General Ledger")
+        st.caption("Account transaction details")
+
+        # Account selector
+        account_name = st.selectbox(
+            "Select Account",
+            [account.name for account in ledger.accounts],
+            index=1
+        )
+        account = ledger.account_by_name(account_name)
+
+        last_posting = last_posting_date()
+        col1, col2 = st.columns(2)
+        with col1:
+            gl_start = st.date_input("From Date", last_posting.replace(month=1, day=1), key="gl_start")
+        with col2:
+            gl_end = st.date_input("To Date", last_posting, key="gl_end")
+
+        postings, gl_view, (total_debits, total_credits), closing_balance = general_ledger_view(
+            account.code, gl_start, gl_end)
+        if postings > GL_ROW_LIMIT:
+            st.caption(f"Showing the latest {GL_ROW_LIMIT:,} of {postings:,} postings")
+        st.dataframe(
+            gl_view,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Debit (₱)': amount_format,
+                'Credit (₱)': amount_format,
+                'Balance (₱)': amount_format,
+            }
+        )
+
+        # Summary
+        st.markdown("#### Account Summary")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Debits", f"₱{format_peso(total_debits)}")
+        with col2:
+            st.metric("Total Credits", f"₱{format_peso(total_credits)}")
+        with col3:
+            st.metric("Closing Balance", f"₱{format_peso(closing_balance)}")
 
 # Journal Entries Tab
 with tab3:
-    st.subheader("Journal Entries")
-    st.caption("Detailed transaction records")
-    
-    # Date filter
-    col1, col2 = st.columns(2)
-    with col1:
-        start_date = st.date_input("From Date", datetime(2025, 11, 1))
-    with col2:
-        end_date = st.date_input("To Date", datetime.now())
-    
-    st.markdown("---")
-    
-    # Sample Journal Entries
-    with st.expander("📄 JE-2025-101 - Tax Collection (Nov 1, 2025)", expanded=True):
-        je_data = pd.DataFrame({
-            'Account': ['Cash in Bank', 'Revenue - Real Property Tax'],
-            'Debit (₱)': ['150,000', ''],
-            'Credit (₱)': ['', '150,000']
-        })
-        st.dataframe(je_data, use_container_width=True, hide_index=True)
-        st.caption("**Description**: Monthly real property tax collection")
-        st.caption("**Blockchain Hash**: `0x7a3f8b2e4c5d6f1a9b8c7d2e3f4a5b6c7d8e9f0a1b2c3d4e5f6a7b8c9d0e1f2a`")
-    
-    with st.expander("📄 JE-2025-102 - Equipment Purchase (Nov 1, 2025)"):
-        je_data = pd.DataFrame({
-            'Account': ['Equipment', 'Cash in Bank'],
-            'Debit (₱)': ['75,000', ''],
-            'Credit (₱)': ['', '75,000']
-        })
-        st.dataframe(je_data, use_container_width=True, hide_index=True)
-        st.caption("**Description**: Purchase of office equipment")
-        st.caption("**Blockchain Hash**: `0x9c4d1f7a2b3e5c8d9f0a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0c1d2`")
-    
-    with st.expander("📄 JE-2025-103 - Permit Fees (Nov 2, 2025)"):
-        je_data = pd.DataFrame({
-            'Account': ['Cash in Bank', 'Revenue - Business Permits'],
-            'Debit (₱)': ['50,000', ''],
-            'Credit (₱)': ['', '50,000']
-        })
-        st.dataframe(je_data, use_container_width=True, hide_index=True)
-        st.caption("**Description**: Business permit fee collection")
-        st.caption("**Blockchain Hash**: `0x2e8b5c3a6d4f9a1b7c8d0e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b`")
-    
-    with st.expander("📄 JE-2025-104 - Salary Payment (Nov 2, 2025)"):
-        je_data = pd.DataFrame({
-            'Account': ['Salaries Expense', 'Cash in Bank'],
-            'Debit (₱)': ['85,000', ''],
-            'Credit (₱)': ['', '85,000']
-        })
-        st.dataframe(je_data, use_container_width=True, hide_index=True)
-        st.caption("**Description**: Monthly salary disbursement for barangay staff")
-        st.caption("**Blockchain Hash**: `0x6f1a9d4b3c2e5f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a`")
+    if tab3.open:
+        st.subheader("Journal Entries")
+        st.caption("Detailed transaction records")
+
+        # Date filter
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("From Date", datetime(2025, 11, 1))
+        with col2:
+            end_date = st.date_input("To Date", datetime.now())
+
+        st.markdown("---")
+
+        # Headers come from the date index a page at a time, so the first page
+        # renders before later ones are read; line items load when an entry opens.
+        total = entry_index.count(start_date, end_date)
+        pages_key = f"je_pages_{start_date}_{end_date}"
+        st.session_state.setdefault(pages_key, 1)
+        shown = min(total, st.session_state[pages_key] * JE_PAGE_SIZE)
+        if not total:
+            st.info("No journal entries in the selected date range.")
+        elif total > JE_PAGE_SIZE:
+            st.caption(f"Showing {shown:,} of {total:,} entries")
+
+        for page in range(st.session_state[pages_key]):
+            entries = journal_page(start_date, end_date, page)
+            for i, entry in enumerate(entries.itertuples(index=False)):
+                day = pd.Timestamp(entry.Date)
+                posted = f"{day:%b} {day.day}, {day:%Y}"
+                panel = st.expander(f"📄 {entry.Reference} - {entry.Description} ({posted})",
+                                    expanded=page == 0 and i == 0, key=f"je_{entry.Reference}", on_change="rerun")
+                if not panel.open:
+                    continue
+                with panel:
+                    je_data = entry_lines_view(entry.Reference)
+                    st.dataframe(
+                        je_data,
+                        use_container_width=True,
+                        hide_index=True,
+                        column_config={'Debit (₱)': amount_format, 'Credit (₱)': amount_format}
+                    )
+                    st.caption(f"**Description**: {entry.Description}")
+                    st.caption(f"**Total**: ₱{format_peso(int(entry.Amount))}")
+                    proof = journal_merkle.proof(entry.Reference)
+                    st.caption(f"**Merkle Root ({proof['period']})**: `{proof['root']}`")
+                    # The entry is on chain through its batch's root, one transaction per batch.
+                    try:
+                        proof["anchor"] = anchoring.proof(entry.Reference)
+                        anchor_label = anchoring.status(entry.Reference).label
+                    except ValueError:
+                        # Its batch was cut from books since replaced; it re-queues on the next start.
+                        proof["anchor"], anchor_label = None, "⚠️ Not anchored"
+                    st.caption(f"**On-chain Anchor**: {anchor_label}")
+                    st.download_button(
+                        "📥 Export Proof",
+                        data=json.dumps(proof, indent=2),
+                        file_name=f"{entry.Reference}-proof.json",
+                        mime="application/json",
+                        key=f"proof_{entry.Reference}"
+                    )
+
+        if shown < total:
+            st.button("Show more entries", on_click=show_more_entries, args=(pages_key,))
+
+# Import Tab
+with tab4:
+    if tab4.open:
+        st.subheader("Import Journal Entries")
+        st.caption("Post entries from a treasury or collection export (CSV or Excel). "
+                   "Columns: Reference, Date, Description, Account, Debit, Credit, Fund.")
+
+        upload = st.file_uploader("Export file", type=["csv", "xlsx"], key="import_file")
+        if upload is not None and st.button("Import", type="primary"):
+            with st.spinner(f"Importing {upload.name}..."):
+                try:
+                    st.session_state["import_result"] = load_importer().run(upload, name=upload.name)
+                except ValueError as err:
+                    st.session_state.pop("import_result", None)
+                    st.error(f"Could not read {upload.name}: {err}")
+
+        result = st.session_state.get("import_result")
+        if result is not None:
+            st.success(f"Imported {result.source}: {result.lines:,} lines in {result.elapsed:.1f}s "
+                       f"({result.lines_per_second:,.0f} lines/s)")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Entries Posted", f"{result.accepted:,}")
+            col2.metric("Duplicates Skipped", f"{result.duplicates:,}")
+            col3.metric("Entries Rejected", f"{result.rejected:,}")
+            if result.errors:
+                st.markdown("**Rejected entries**")
+                st.dataframe(pd.DataFrame(result.errors, columns=["Reference", "Reason"]),
+                             use_container_width=True, hide_index=True)
+            st.caption(f"{anchoring.queued():,} posted entries awaiting anchoring")
 
 st.markdown("---")
 st.caption("All accounting records are secured on the LINAW blockchain")
\ No newline at end of file
@@ -1,221 +1,277 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 
+from linaw import figures
+from linaw.ledger import EXPENSE, REVENUE
+from linaw.resources import load_budget_book, load_entry_index, load_query_cache, load_rollups
+from linaw.sidebar import tenant_sidebar
+
+TREND_MONTHS = 5
+DETAIL_ROWS = 10
+
 st.set_page_config(page_title="Income & Expenses - LINAW AIS", page_icon="📈", layout="wide")
+tenant_sidebar()
 
 st.title("📈 Income & Expenses Analysis")
 st.markdown("Comprehensive revenue and expenditure tracking")
 st.markdown("---")
 
+rollups = load_rollups()
+budget_book = load_budget_book()
+entry_index = load_entry_index()
+query_cache = load_query_cache()
+
+
+def in_pesos(frame: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    frame = frame.copy()
+    for column in columns:
+        frame[column] = frame[column] / 100
+    return frame
+
+
+def change(current: float, previous: float) -> str | None:
+    return f"{(current - previous) / abs(previous) * 100:+.1f}%" if previous else None
+
+
+def share(percentage: float) -> float:
+    # A category netted below zero (refunds) or past the total still draws a bar.
+    return min(max(percentage / 100, 0.0), 1.0)
+
+
+# Frames and figure specs are shared across sessions until the next posting.
+@query_cache.memoize("ledger")
+def monthly_trend(months: int):
+    current_month = rollups.latest_month()
+    trend = rollups.monthly(start=current_month - (months - 1), end=current_month)
+    trend_months = list(trend['Month'].to_numpy().astype('datetime64[M]'))
+    trend = in_pesos(trend, ['Income', 'Expenses', 'Net'])
+    trend['Month'] = trend['Month'].dt.strftime('%B')
+    return trend, trend_months
+
+
+@query_cache.memoize("ledger")
+def category_breakdown(kind: str, month):
+    return in_pesos(rollups.by_category(kind, month, month), ['Amount'])
+
+
+@query_cache.memoize("ledger")
+def category_pie(kind: str, month, title: str, colors: str):
+    return figures.pie(category_breakdown(kind, month), values='Amount', names='Category',
+                       title=title, hole=0.4, colors=colors)
+
+
+@query_cache.memoize("ledger")
+def trend_line(column: str, title: str, color: str):
+    trend = monthly_trend(TREND_MONTHS)[0]
+    return figures.line(trend, 'Month', column, f'{title} (Last {len(trend)} Months)', color)
+
+
+@query_cache.memoize("ledger")
+def comparison_chart():
+    import plotly.graph_objects as go
+
+    trend = monthly_trend(TREND_MONTHS)[0]
+    return figures.figure(
+        [
+            go.Bar(x=trend['Month'], y=trend['Income'], name='Income', marker_color='#2ecc71'),
+            go.Bar(x=trend['Month'], y=trend['Expenses'], name='Expenses', marker_color='#e74c3c'),
+            go.Scatter(x=trend['Month'], y=trend['Net'], name='Net Income', mode='lines+markers',
+                       marker=dict(size=10), line=dict(color='#3498db', width=3)),
+        ],
+        title='Income vs Expenses Comparison',
+        barmode='group',
+        xaxis_title='Month',
+        yaxis_title='Amount (₱)'
+    )
+
+
+@query_cache.memoize("ledger")
+def budget_vs_actual(month):
+    return in_pesos(budget_book.summary(month, month), ['Budget', 'Actual', 'Variance'])
+
+
+@query_cache.memoize("ledger")
+def appropriation_status(month, node: int):
+    # Obligations and disbursements for the month; allotments and
+    # utilization for the fiscal year to date.
+    year_start = month.astype('datetime64[Y]').astype('datetime64[M]')
+    status = budget_book.utilization(year_start, month, node)
+    monthly = budget_book.utilization(month, month, node)
+    status['Obligations'] = monthly['Obligations']
+    status['Disbursements'] = monthly['Disbursements']
+    return in_pesos(status, ['Appropriation', 'Allotments', 'Obligations', 'Disbursements', 'Unobligated'])
+
+
+@query_cache.memoize("ledger")
+def detail_records(kind: str, month):
+    first = month.astype('datetime64[D]')
+    last = (month + 1).astype('datetime64[D]') - 1
+    records = entry_index.recent_lines(kind, first, last, DETAIL_ROWS)
+    return pd.DataFrame({
+        'Date': records['Date'].dt.strftime('%Y-%m-%d'),
+        'Category': records['Category'],
+        'Description': records['Description'],
+        'Amount (₱)': (records['Amount'] / 100).map('{:,.2f}'.format),
+        'Transaction ID': records['Reference'],
+    })
+
+
+@query_cache.memoize("ledger")
+def daily_bars(kind: str, month, color: str):
+    return figures.bars(in_pesos(rollups.daily(month, kind), ['Amount']), 'Date', 'Amount', color)
+
+
+def daily_breakdown(kind: str, color: str, key: str):
+    month = st.selectbox(
+        "Daily breakdown for",
+        trend_months,
+        index=len(trend_months) - 1,
+        format_func=lambda m: pd.Timestamp(m).strftime('%B %Y'),
+        key=key
+    )
+    st.plotly_chart(daily_bars(kind, month, color), use_container_width=True)
+
+
+# Current month and the trend window, from the materialized rollups
+current_month = rollups.latest_month()
+if current_month is None:
+    st.info("No income or expenses have been posted yet. Import journal entries from the "
+            "Accounting page's 📥 Import tab to see them here.")
+    st.stop()
+comparison_data, trend_months = monthly_trend(TREND_MONTHS)
+current = comparison_data.iloc[-1]
+previous = comparison_data.iloc[-2] if len(comparison_data) > 1 else current * 0
+
 # Summary Cards
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("Total Income", "₱850,000", "+12.3%")
+    st.metric("Total Income", f"₱{current['Income']:,.0f}", change(current['Income'], previous['Income']))
 with col2:
-    st.metric("Total Expenses", "₱620,000", "-3.1%")
+    st.metric("Total Expenses", f"₱{current['Expenses']:,.0f}", change(current['Expenses'], previous['Expenses']))
 with col3:
-    st.metric("Net Income", "₱230,000", "+18.5%")
+    st.metric("Net Income", f"₱{current['Net']:,.0f}", change(current['Net'], previous['Net']))
 
 st.markdown("---")
 
-# Income and Expense Tabs
-tab1, tab2, tab3 = st.tabs(["💰 Income Summary", "💸 Expense Summary", "📊 Comparative Analysis"])
+# Income and Expense Tabs; only the open tab is built, so its charts are
+# the only ones a run draws.
+tab1, tab2, tab3 = st.tabs(["💰 Income Summary", "💸 Expense Summary", "📊 Comparative Analysis"],
+                           key="income_expense_tab", on_change="rerun")
 
 # Income Summary Tab
 with tab1:
-    st.subheader("Income Summary")
-    
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        # Income by Category
-        income_data = pd.DataFrame({
-            'Category': ['Real Property Tax', 'Business Permits', 'Market Fees', 'Rental Income', 'Service Fees', 'Other Income'],
-            'Amount': [350000, 180000, 125000, 95000, 65000, 35000],
-            'Percentage': [41.2, 21.2, 14.7, 11.2, 7.6, 4.1]
-        })
-        
-        fig_income_pie = px.pie(
-            income_data, 
-            values='Amount', 
-            names='Category',
-            title='Income Distribution by Category',
-            hole=0.4,
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        st.plotly_chart(fig_income_pie, use_container_width=True)
-    
-    with col2:
-        st.markdown("#### Income Breakdown")
-        for idx, row in income_data.iterrows():
-            st.write(f"**{row['Category']}**")
-            st.progress(row['Percentage'] / 100)
-            st.caption(f"₱{row['Amount']:,} ({row['Percentage']}%)")
-            st.markdown("")
-    
-    st.markdown("---")
-    
-    # Monthly Income Trend
-    st.markdown("#### Monthly Income Trend")
-    monthly_income = pd.DataFrame({
-        'Month': ['July', 'August', 'September', 'October', 'November'],
-        'Income': [720000, 765000, 795000, 810000, 850000]
-    })
-    
-    fig_income_trend = px.line(
-        monthly_income,
-        x='Month',
-        y='Income',
-        markers=True,
-        title='Income Growth Trend (Last 5 Months)'
-    )
-    fig_income_trend.update_traces(line_color='#2ecc71', marker=dict(size=10))
-    st.plotly_chart(fig_income_trend, use_container_width=True)
-    
-    # Detailed Income Table
-    st.markdown("#### Detailed Income Records")
-    income_detail = pd.DataFrame({
-        'Date': ['2025-11-01', '2025-11-02', '2025-11-02', '2025-11-02', '2025-11-02'],
-        'Category': ['Real Property Tax', 'Business Permits', 'Rental Income', 'Service Fees', 'Market Fees'],
-        'Description': ['Monthly tax collection', 'New business permits', 'Barangay hall rental', 'Document processing', 'Market stall fees'],
-        'Amount (₱)': ['150,000', '50,000', '25,000', '15,000', '35,000'],
-        'Transaction ID': ['INC-2025-445', 'INC-2025-446', 'INC-2025-447', 'INC-2025-448', 'INC-2025-449']
-    })
-    st.dataframe(income_detail, use_container_width=True, hide_index=True)
+    if tab1.open:
+        st.subheader("Income Summary")
+
+        col1, col2 = st.columns([2, 1])
+
+        with col1:
+            # Income by Category
+            income_data = category_breakdown(REVENUE, current_month)
+            fig_income_pie = category_pie(REVENUE, current_month, 'Income Distribution by Category', 'Set3')
+            st.plotly_chart(fig_income_pie, use_container_width=True)
+
+        with col2:
+            st.markdown("#### Income Breakdown")
+            for idx, row in income_data.iterrows():
+                st.write(f"**{row['Category']}**")
+                st.progress(share(row['Percentage']))
+                st.caption(f"₱{row['Amount']:,.0f} ({row['Percentage']}%)")
+                st.markdown("")
+
+        st.markdown("---")
+
+        # Monthly Income Trend
+        st.markdown("#### Monthly Income Trend")
+        fig_income_trend = trend_line('Income', 'Income Growth Trend', '#2ecc71')
+        st.plotly_chart(fig_income_trend, use_container_width=True)
+        daily_breakdown(REVENUE, '#2ecc71', 'income_drilldown')
+
+        # Detailed Income Table
+        st.markdown(f"#### Latest Income Records ({pd.Timestamp(current_month).strftime('%B %Y')})")
+        income_detail = detail_records(REVENUE, current_month)
+        st.dataframe(income_detail, use_container_width=True, hide_index=True)
 
 # Expense Summary Tab
 with tab2:
-    st.subheader("Expense Summary")
-    
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        # Expense by Category
-        expense_data = pd.DataFrame({
-            'Category': ['Salaries & Wages', 'Office Supplies', 'Utilities', 'Maintenance', 'Equipment', 'Other Expenses'],
-            'Amount': [285000, 95000, 78000, 65000, 75000, 22000],
-            'Percentage': [46.0, 15.3, 12.6, 10.5, 12.1, 3.5]
-        })
-        
-        fig_expense_pie = px.pie(
-            expense_data,
-            values='Amount',
-            names='Category',
-            title='Expense Distribution by Category',
-            hole=0.4,
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        st.plotly_chart(fig_expense_pie, use_container_width=True)
-    
-    with col2:
-        st.markdown("#### Expense Breakdown")
-        for idx, row in expense_data.iterrows():
-            st.write(f"**{row['Category']}**")
-            st.progress(row['Percentage'] / 100)
-            st.caption(f"₱{row['Amount']:,} ({row['Percentage']}%)")
-            st.markdown("")
-    
-    st.markdown("---")
-    
-    # Monthly Expense Trend
-    st.markdown("#### Monthly Expense Trend")
-    monthly_expense = pd.DataFrame({
-        'Month': ['July', 'August', 'September', 'October', 'November'],
-        'Expenses': [640000, 625000, 615000, 610000, 620000]
-    })
-    
-    fig_expense_trend = px.line(
-        monthly_expense,
-        x='Month',
-        y='Expenses',
-        markers=True,
-        title='Expense Trend (Last 5 Months)'
-    )
-    fig_expense_trend.update_traces(line_color='#e74c3c', marker=dict(size=10))
-    st.plotly_chart(fig_expense_trend, use_container_width=True)
-    
-    # Detailed Expense Table
-    st.markdown("#### Detailed Expense Records")
-    expense_detail = pd.DataFrame({
-        'Date': ['2025-11-01', '2025-11-02', '2025-11-02', '2025-11-02', '2025-11-02'],
-        'Category': ['Equipment', 'Salaries & Wages', 'Office Supplies', 'Utilities', 'Maintenance'],
-        'Description': ['Office equipment purchase', 'Monthly salary disbursement', 'Paper and office materials', 'Electricity and water', 'Building repairs'],
-        'Amount (₱)': ['75,000', '85,000', '25,000', '18,000', '15,000'],
-        'Transaction ID': ['EXP-2025-890', 'EXP-2025-891', 'EXP-2025-892', 'EXP-2025-893', 'EXP-2025-894']
-    })
-    st.dataframe(expense_detail, use_container_width=True, hide_index=True)
+    if tab2.open:
+        st.subheader("Expense Summary")
+
+        col1, col2 = st.columns([2, 1])
+
+        with col1:
+            # Expense by Category
+            expense_data = category_breakdown(EXPENSE, current_month)
+            fig_expense_pie = category_pie(EXPENSE, current_month, 'Expense Distribution by Category', 'Pastel')
+            st.plotly_chart(fig_expense_pie, use_container_width=True)
+
+        with col2:
+            st.markdown("#### Expense Breakdown")
+            for idx, row in expense_data.iterrows():
+                st.write(f"**{row['Category']}**")
+                st.progress(share(row['Percentage']))
+                st.caption(f"₱{row['Amount']:,.0f} ({row['Percentage']}%)")
+                st.markdown("")
+
+        st.markdown("---")
+
+        # Monthly Expense Trend
+        st.markdown("#### Monthly Expense Trend")
+        fig_expense_trend = trend_line('Expenses', 'Expense Trend', '#e74c3c')
+        st.plotly_chart(fig_expense_trend, use_container_width=True)
+        daily_breakdown(EXPENSE, '#e74c3c', 'expense_drilldown')
+
+        # Detailed Expense Table
+        st.markdown(f"#### Latest Expense Records ({pd.Timestamp(current_month).strftime('%B %Y')})")
+        expense_detail = detail_records(EXPENSE, current_month)
+        st.dataframe(expense_detail, use_container_width=True, hide_index=True)
 
 # Comparative Analysis Tab
 with tab3:
-    st.subheader("Comparative Analysis")
-    
-    # Income vs Expense Comparison
-    comparison_data = pd.DataFrame({
-        'Month': ['July', 'August', 'September', 'October', 'November'],
-        'Income': [720000, 765000, 795000, 810000, 850000],
-        'Expenses': [640000, 625000, 615000, 610000, 620000],
-        'Net': [80000, 140000, 180000, 200000, 230000]
-    })
-    
-    fig_comparison = go.Figure()
-    fig_comparison.add_trace(go.Bar(
-        x=comparison_data['Month'],
-        y=comparison_data['Income'],
-        name='Income',
-        marker_color='#2ecc71'
-    ))
-    fig_comparison.add_trace(go.Bar(
-        x=comparison_data['Month'],
-        y=comparison_data['Expenses'],
-        name='Expenses',
-        marker_color='#e74c3c'
-    ))
-    fig_comparison.add_trace(go.Scatter(
-        x=comparison_data['Month'],
-        y=comparison_data['Net'],
-        name='Net Income',
-        mode='lines+markers',
-        marker=dict(size=10),
-        line=dict(color='#3498db', width=3)
-    ))
-    
-    fig_comparison.update_layout(
-        title='Income vs Expenses Comparison',
-        barmode='group',
-        xaxis_title='Month',
-        yaxis_title='Amount (₱)'
-    )
-    st.plotly_chart(fig_comparison, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # Summary Statistics
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown("#### Average Monthly Income")
-        st.metric("", f"₱{comparison_data['Income'].mean():,.0f}")
-    with col2:
-        st.markdown("#### Average Monthly Expenses")
-        st.metric("", f"₱{comparison_data['Expenses'].mean():,.0f}")
-    with col3:
-        st.markdown("#### Average Net Income")
-        st.metric("", f"₱{comparison_data['Net'].mean():,.0f}")
-    
-    st.markdown("---")
-    
-    # Budget vs Actual
-    st.markdown("#### Budget vs Actual Comparison")
-    budget_data = pd.DataFrame({
-        'Category': ['Income', 'Expenses', 'Net Income'],
-        'Budget': [800000, 650000, 150000],
-        'Actual': [850000, 620000, 230000],
-        'Variance': [50000, -30000, 80000],
-        'Variance %': [6.25, -4.62, 53.33]
-    })
-    st.dataframe(budget_data, use_container_width=True, hide_index=True)
+    if tab3.open:
+        st.subheader("Comparative Analysis")
+
+        # Income vs Expense Comparison
+        fig_comparison = comparison_chart()
+        st.plotly_chart(fig_comparison, use_container_width=True)
+
+        st.markdown("---")
+
+        # Summary Statistics
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown("#### Average Monthly Income")
+            st.metric("", f"₱{comparison_data['Income'].mean():,.0f}")
+        with col2:
+            st.markdown("#### Average Monthly Expenses")
+            st.metric("", f"₱{comparison_data['Expenses'].mean():,.0f}")
+        with col3:
+            st.markdown("#### Average Net Income")
+            st.metric("", f"₱{comparison_data['Net'].mean():,.0f}")
+
+        st.markdown("---")
+
+        # Budget vs Actual
+        st.markdown("#### Budget vs Actual Comparison")
+        if not budget_book.ordinance.appropriations:
+            st.info("No budget ordinance has been loaded for this organization yet, so there are "
+                    "no appropriations to compare spending against.")
+        else:
+            budget_data = budget_vs_actual(current_month)
+            st.dataframe(budget_data, use_container_width=True, hide_index=True)
+
+            # Appropriations by fund, office and object code
+            st.markdown("#### Appropriation Utilization")
+            node = st.selectbox(
+                "Fund or office",
+                budget_book.nodes(),
+                format_func=budget_book.appropriations.label,
+                key="budget_node"
+            )
+            st.dataframe(appropriation_status(current_month, node), use_container_width=True, hide_index=True)
+            st.caption(f"Obligations and disbursements for {pd.Timestamp(current_month).strftime('%B %Y')}; "
+                       "allotments, unobligated balances and utilization are for the year to date.")
 
 st.markdown("---")
 st.caption("All financial data is recorded on the LINAW blockchain for transparency and accountability")
\ No newline at end of file
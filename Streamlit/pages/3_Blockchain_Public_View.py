@@ -1,11 +1,20 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from functools import partial
+
+from linaw.anomalies import KINDS
+from linaw.resources import (load_chain_status, load_document_index, load_event_store, load_findings,
+                             load_projections, load_query_cache, load_verifier, load_workspace)
+from linaw.sidebar import tenant_sidebar
+
+REGISTRY_PAGE_SIZE = 20
 
 st.set_page_config(page_title="Blockchain Public View - LINAW AIS", page_icon="🔍", layout="wide")
+tenant = tenant_sidebar()
 
 st.title("🔍 Blockchain Public Document View")
-st.markdown("Transparent access to verified barangay/LGU documents")
+st.markdown(f"Transparent access to verified documents of {tenant.name}")
 st.markdown("---")
 
 # Search and Filter
@@ -19,82 +28,6 @@ with col3:
 
 st.markdown("---")
 
-# Sample Document Database
-documents = [
-    {
-        'type': 'Financial Reports',
-        'id': 'FR-2025-034',
-        'title': 'Quarterly Financial Statement - Q3 2025',
-        'date': '2025-10-15',
-        'status': '✅ Verified',
-        'hash': '0x7a3f8b2e4c5d6f1a9b8c7d2e3f4a5b6c7d8e9f0a1b2c3d4e5f6a7b8c9d0e1f2a',
-        'details': 'Comprehensive financial statement for Q3 2025 including balance sheet, income statement, and cash flow analysis.',
-        'amount': '₱850,000',
-        'prepared_by': 'Maria Santos, Municipal Accountant',
-        'verified_by': 'Hon. Juan dela Cruz, Barangay Captain'
-    },
-    {
-        'type': 'Ordinance',
-        'id': 'ORD-2025-012',
-        'title': 'Barangay Solid Waste Management Ordinance',
-        'date': '2025-09-20',
-        'status': '✅ Verified',
-        'hash': '0x6f1a9d4b3c2e5f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a',
-        'details': 'Ordinance implementing comprehensive solid waste management program in accordance with RA 9003.',
-        'amount': 'N/A',
-        'prepared_by': 'Barangay Council',
-        'verified_by': 'Hon. Juan dela Cruz, Barangay Captain'
-    },
-    {
-        'type': 'Infrastructure',
-        'id': 'INFRA-2025-008',
-        'title': 'Multi-Purpose Hall Construction Project',
-        'date': '2025-08-10',
-        'status': '✅ Verified',
-        'hash': '0x2e8b5c3a6d4f9a1b7c8d0e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b',
-        'details': 'Construction project for a 200-capacity multi-purpose hall for community events and disaster evacuation.',
-        'amount': '₱2,500,000',
-        'prepared_by': 'Engineering Office',
-        'verified_by': 'Hon. Juan dela Cruz, Barangay Captain'
-    },
-    {
-        'type': 'Procurement',
-        'id': 'PROC-2025-045',
-        'title': 'Office Equipment and Supplies Procurement',
-        'date': '2025-11-01',
-        'status': '✅ Verified',
-        'hash': '0x9c4d1f7a2b3e5c8d9f0a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0c1d2',
-        'details': 'Procurement of computers, printers, and office supplies for barangay hall operations.',
-        'amount': '₱175,000',
-        'prepared_by': 'Procurement Committee',
-        'verified_by': 'Hon. Juan dela Cruz, Barangay Captain'
-    },
-    {
-        'type': 'Resolution',
-        'id': 'RES-2025-056',
-        'title': 'Resolution Authorizing Budget Allocation for Health Programs',
-        'date': '2025-10-28',
-        'status': '✅ Verified',
-        'hash': '0x1d2e3f4a5b6c7d8e9f0a1b2c3d4e5f6a7b8c9d0e1f2a3b4c5d6e7f8a9b0c1d2e',
-        'details': 'Resolution approving additional budget for maternal and child health programs for FY 2025.',
-        'amount': '₱350,000',
-        'prepared_by': 'Barangay Health Committee',
-        'verified_by': 'Hon. Juan dela Cruz, Barangay Captain'
-    },
-    {
-        'type': 'Financial Reports',
-        'id': 'FR-2025-033',
-        'title': 'Monthly Budget Utilization Report - October 2025',
-        'date': '2025-10-31',
-        'status': '✅ Verified',
-        'hash': '0x3e4f5a6b7c8d9e0f1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f',
-        'details': 'Detailed report on budget utilization for October 2025 showing expenditure vs approved budget.',
-        'amount': '₱620,000',
-        'prepared_by': 'Maria Santos, Municipal Accountant',
-        'verified_by': 'Hon. Juan dela Cruz, Barangay Captain'
-    }
-]
-
 # Initialize session state for document expansion
 if 'expanded_docs' not in st.session_state:
     st.session_state.expanded_docs = set()
@@ -102,15 +35,95 @@ if 'expanded_docs' not in st.session_state:
 # Display Documents Table
 st.subheader("📋 Public Documents Registry")
 
-# Create DataFrame
-df = pd.DataFrame(documents)
+workspace = load_workspace()
+document_index = load_document_index()
+query_cache = load_query_cache()
+
+
+@query_cache.memoize("documents")
+def registry_page(text, doc_type, start, cursor):
+    return document_index.query(text, doc_type=doc_type, start=start, cursor=cursor,
+                                limit=REGISTRY_PAGE_SIZE)
+
+
+@query_cache.memoize("ledger")
+def document_pdf(doc_id: str) -> bytes:
+    # Runs on the download thread: the workspace is bound, not looked up.
+    # Imported on first download so the page itself never loads matplotlib.
+    from linaw.reports import document_pdf as render_document
+
+    return render_document(document_index.get(doc_id), workspace.ledger, workspace.tenant.name,
+                           workspace.budget_book)
+
+
+@query_cache.memoize("chain")
+def recent_activity(limit: int):
+    return load_event_store().recent(limit=limit, expected=workspace.expected_hash)
+
+
+@query_cache.memoize("findings")
+def flagged_counts():
+    return load_findings().counts()
+
+
+@query_cache.memoize("findings")
+def flagged_transactions(kind, limit: int):
+    flagged = load_findings().recent(kind, limit=limit)
+    flagged['Amount'] = flagged['Amount'] / 100
+    return flagged
+
+
+# Cursor stack for the registry pages; a change of filters starts over.
+registry_filters = (search_query, doc_type_filter, date_filter)
+if st.session_state.get('registry_filters') != registry_filters:
+    st.session_state.registry_filters = registry_filters
+    st.session_state.registry_cursors = [None]
+cursors = st.session_state.registry_cursors
 
-# Apply filters
-if doc_type_filter != "All":
-    df = df[df['type'] == doc_type_filter]
+results = registry_page(
+    search_query,
+    None if doc_type_filter == "All" else doc_type_filter,
+    date_filter,
+    cursors[-1]
+)
 
-# Display table with action buttons
-for idx, doc in df.iterrows():
+
+def next_page():
+    st.session_state.registry_cursors.append(results.next_cursor)
+
+
+def previous_page():
+    st.session_state.registry_cursors.pop()
+
+
+def verification_badge(passed, label, failed, pending=None):
+    if passed:
+        st.success(f"✅ {label}")
+    elif pending:
+        st.warning(f"⏳ {pending}")
+    else:
+        st.error(f"❌ {failed}")
+
+
+# One batched verification pass for the opened documents, served from cache on reruns.
+projections = load_projections()
+opened = [doc for doc in results.documents if doc['id'] in st.session_state.expanded_docs]
+verifications = load_verifier().verify_many(opened, projections.height) if opened else {}
+
+
+def verification_of(doc):
+    # A document opened by this run's click was not in the batch above.
+    if doc['id'] not in verifications:
+        verifications.update(load_verifier().verify_many([doc], projections.height))
+    return verifications[doc['id']]
+
+
+if not results.documents:
+    st.info("No documents match the current search and filters.")
+
+# Display table with action buttons (only the visible page is built)
+for doc in results.documents:
+    idx = doc['id']
     with st.container():
         col1, col2, col3, col4, col5 = st.columns([1.5, 1.2, 2.5, 1, 0.8])
         
@@ -156,63 +169,87 @@ for idx, doc in df.iterrows():
                 st.code(doc['hash'], language=None)
                 
                 st.markdown("**Verification:**")
+                verification = verification_of(doc)
+                anchored = verification.on_chain_hash is not None
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.success("✅ Document Verified")
+                    verification_badge(verification.document_verified, "Document Verified",
+                                       "Document Altered")
                 with col2:
-                    st.success("✅ Hash Confirmed")
+                    verification_badge(verification.hash_confirmed, "Hash Confirmed", "Hash Mismatch",
+                                       None if anchored else "Not Yet Anchored")
                 with col3:
-                    st.success("✅ Blockchain Synced")
+                    verification_badge(verification.blockchain_synced, "Blockchain Synced",
+                                       "Not Synced", "Awaiting Sync")
                 
                 # Action buttons
                 st.markdown("---")
                 btn_col1, btn_col2, btn_col3 = st.columns([1, 1, 3])
                 with btn_col1:
-                    st.button("📥 Download PDF", key=f"download_{idx}")
+                    st.download_button("📥 Download PDF", data=partial(document_pdf, doc['id']),
+                                       file_name=f"{doc['id']}.pdf", mime="application/pdf",
+                                       key=f"download_{idx}")
                 with btn_col2:
                     st.button("🔍 View on Explorer", key=f"explorer_{idx}")
         
         st.markdown("---")
 
+nav_col1, nav_col2, nav_col3 = st.columns([1, 3, 1])
+with nav_col1:
+    st.button("◀ Previous", on_click=previous_page, disabled=len(cursors) == 1)
+with nav_col2:
+    st.caption(f"Page {len(cursors)}")
+with nav_col3:
+    st.button("Next ▶", on_click=next_page, disabled=results.next_cursor is None)
+
 # Blockchain Statistics
 st.markdown("### 📊 Blockchain Statistics")
+chain_status = load_chain_status().snapshot
+chain_kpis = projections["kpis"].snapshot
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("Total Documents", "6")
+    st.metric("Total Documents", f"{len(document_index):,}")
 with col2:
-    st.metric("Verified Transactions", "6")
+    st.metric("Verified Transactions", f"{chain_kpis.transactions:,}")
 with col3:
-    st.metric("Block Height", "2,547")
+    st.metric("Block Height", chain_status.height_label)
 with col4:
-    st.metric("Network Status", "🟢 Active")
+    st.metric("Network Status", chain_status.label)
+if chain_status.receipt_backlog:
+    st.caption(f"{chain_status.receipt_backlog:,} transactions awaiting receipts")
+if chain_kpis.journal_batches:
+    st.caption(f"{chain_kpis.journal_entries:,} journal entries anchored in "
+               f"{chain_kpis.journal_batches:,} batches")
 
 st.markdown("---")
 
 # Recent Blockchain Activity
 st.subheader("🔗 Recent Blockchain Activity")
-activity_data = pd.DataFrame({
-    'Block #': ['2547', '2546', '2545', '2544', '2543'],
-    'Timestamp': [
-        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        '2025-11-01 14:23:15',
-        '2025-10-31 16:45:30',
-        '2025-10-28 10:15:22',
-        '2025-10-15 09:30:45'
-    ],
-    'Transaction Type': ['Procurement', 'Financial Report', 'Financial Report', 'Resolution', 'Financial Report'],
-    'Document ID': ['PROC-2025-045', 'FR-2025-034', 'FR-2025-033', 'RES-2025-056', 'FR-2025-034'],
-    'Hash': [
-        '0x9c4d1f7a...',
-        '0x7a3f8b2e...',
-        '0x3e4f5a6b...',
-        '0x1d2e3f4a...',
-        '0x7a3f8b2e...'
-    ],
-    'Status': ['✅ Confirmed', '✅ Confirmed', '✅ Confirmed', '✅ Confirmed', '✅ Confirmed']
-})
-
-st.dataframe(activity_data, use_container_width=True, hide_index=True)
+activity_data = recent_activity(5)
+if activity_data.empty:
+    st.info("No blockchain activity has been ingested yet. Set `FABCONNECT_URL` to stream chain events into the local store.")
+else:
+    st.dataframe(activity_data, use_container_width=True, hide_index=True)
+
+st.markdown("---")
+
+# Flagged Transactions
+st.subheader("🚩 Flagged Transactions")
+finding_counts = flagged_counts()
+for column, (kind, label) in zip(st.columns(len(KINDS)), KINDS.items()):
+    with column:
+        st.metric(label, f"{finding_counts[kind]:,}")
+finding_kind = st.selectbox("Show", ["All", *KINDS], format_func=lambda kind: KINDS.get(kind, kind),
+                            key="finding_kind")
+flagged = flagged_transactions(None if finding_kind == "All" else finding_kind, 50)
+if flagged.empty:
+    st.success("No irregularities have been flagged in the posted transactions.")
+else:
+    st.dataframe(flagged, use_container_width=True, hide_index=True,
+                 column_config={"Amount": st.column_config.NumberColumn("Amount (₱)", format="accounting")})
+st.caption("Findings are automated checks on every posted transaction, flagged for review; "
+           "they are not conclusions of wrongdoing.")
 
 st.markdown("---")
 
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import sqlite3
+
+from linaw.anchoring import ANCHORED, FAILED, QUEUED, SUBMITTED, Anchorer, AnchorLog
+from linaw.fabconnect import FabconnectConfig
+from linaw.ledger import Ledger
+from linaw.merkle import JournalMerkle, verify_proof
+from linaw.outbox import Outbox, OutboxDispatcher
+from linaw.stubs import FabconnectStub
+
+
+def post(ledger: Ledger, start: int, stop: int, amount: int = 100) -> None:
+    for i in range(start, stop):
+        ledger.post(f"JE-{i}", f"2025-01-{1 + i % 28:02d}", f"Entry {i}",
+                    [("1010", amount + i, 0), ("4020", 0, amount + i)])
+
+
+def anchorer(tmp_path, ledger: Ledger, **kwargs) -> Anchorer:
+    return Anchorer(ledger, JournalMerkle(ledger), AnchorLog(tmp_path / "anchors.db"),
+                    Outbox(tmp_path / "outbox.db"), batch_size=4, **kwargs)
+
+
+def test_entries_are_cut_into_contiguous_batches(tmp_path):
+    ledger = Ledger()
+    post(ledger, 0, 10)
+    anchors = anchorer(tmp_path, ledger)
+    assert anchors.queued() == 10
+
+    anchors.step()
+    assert anchors.queued() == 0
+    assert [(b.first_entry, b.last_entry, b.status) for b in anchors.log.batches()] == [
+        (0, 3, SUBMITTED), (4, 7, SUBMITTED), (8, 9, SUBMITTED)]
+    assert anchors.outbox.stats().depth == 3
+
+    post(ledger, 10, 11)
+    assert anchors.status("JE-10").status == QUEUED
+    anchors.step()
+    assert anchors.status("JE-10").batch.batch == 4
+    assert anchors.outbox.stats().depth == 4
+
+
+def test_batches_settle_from_the_outbox(tmp_path):
+    ledger = Ledger()
+    post(ledger, 0, 6)
+    anchors = anchorer(tmp_path, ledger)
+    anchors.step()
+
+    async def main():
+        async with FabconnectStub() as stub:
+            dispatch = OutboxDispatcher(anchors.outbox, FabconnectConfig(url=stub.url), retry_delay=0.0)
+            for _ in range(50):
+                await dispatch.step()
+                if not anchors.outbox.stats().depth:
+                    break
+                await asyncio.sleep(0.02)
+            await dispatch.client.close()
+
+    asyncio.run(main())
+    assert anchors.reconcile() == 2
+    status = anchors.status("JE-5")
+    assert status.status == ANCHORED and status.batch.tx_id and status.batch.block_number
+
+    proof = anchors.proof("JE-5")
+    path = [(bytes.fromhex(step["hash"][2:]), step["side"]) for step in proof["path"]]
+    leaf = anchors.merkle.leaves(5, 6)[0].tobytes()
+    assert verify_proof(leaf, path, bytes.fromhex(proof["root"][2:]))
+
+
+def test_dead_lettered_batches_fail_until_requeued(tmp_path):
+    ledger = Ledger()
+    post(ledger, 0, 2)
+    anchors = anchorer(tmp_path, ledger)
+    anchors.step()
+    anchors.outbox.failed(anchors.asset_id(1), "endorsement failed", None)
+
+    anchors.reconcile()
+    status = anchors.status("JE-0")
+    assert (status.status, status.batch.error) == (FAILED, "endorsement failed")
+
+    assert anchors.outbox.requeue() == 1
+    anchors.reconcile()
+    assert anchors.status("JE-0").status == SUBMITTED
+
+
+def test_batches_cut_from_other_books_are_retired_on_step(tmp_path):
+    ledger = Ledger()
+    post(ledger, 0, 8)
+    anchors = anchorer(tmp_path, ledger)
+    anchors.step()
+
+    # Another process holding different books cuts into the same log.
+    other = Ledger()
+    post(other, 0, 12, amount=500)
+    foreign = anchors.log.cut(8, 11, JournalMerkle(other).leaves(8, 12)[0].tobytes())
+
+    post(ledger, 8, 12)
+    anchors.step()
+    batches = anchors.log.batches()
+    assert foreign.batch not in [b.batch for b in batches]
+    assert [(b.batch, b.first_entry, b.last_entry) for b in batches][-1] == (foreign.batch + 1, 8, 11)
+    assert anchors.status("JE-11").status == SUBMITTED
+
+
+def test_step_failures_do_not_stop_anchoring(tmp_path, caplog):
+    ledger = Ledger()
+    post(ledger, 0, 3)
+    anchors = anchorer(tmp_path, ledger, interval=0.01)
+    reconcile = anchors.reconcile
+    failed = []
+
+    def flaky():
+        if not failed:
+            failed.append(True)
+            raise sqlite3.OperationalError("database is locked")
+        return reconcile()
+
+    anchors.reconcile = flaky
+
+    async def main():
+        task = asyncio.create_task(anchors.run())
+        for _ in range(200):
+            if anchors.outbox.stats().depth:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    with caplog.at_level(logging.ERROR, logger="linaw.anchoring"):
+        asyncio.run(main())
+    assert anchors.outbox.stats().depth == 1
+    assert "Anchoring step failed (1 in a row)" in caplog.text
@@ -0,0 +1,57 @@
+from linaw.anomalies import DUPLICATE, OUTLIER, SPLIT, AnomalyDetector, FindingStore
+from linaw.ledger import Ledger
+
+
+def pay(ledger: Ledger, ref: str, when: str, payee: str, amount: int, account: str = "5020") -> None:
+    ledger.post(ref, when, payee, [(account, amount, 0), ("1020", 0, amount)])
+
+
+def test_duplicate_payments_are_found_across_restarts(tmp_path):
+    ledger = Ledger()
+    detector = AnomalyDetector(ledger, FindingStore(tmp_path / "findings.db"))
+    pay(ledger, "DV-1", "2025-03-03", "ABC Trading", 12_000_00)
+    pay(ledger, "DV-2", "2025-03-05", "ABC Trading #2", 12_000_00)
+    pay(ledger, "DV-3", "2025-03-25", "ABC Trading", 12_000_00)
+    pay(ledger, "DV-4", "2025-03-26", "ABC Trading", 9_000_00)
+    detector.close()
+
+    # Postings made while no detector runs are checked on the next start,
+    # against the payments already checked.
+    pay(ledger, "DV-5", "2025-03-28", "abc trading", 9_000_00)
+    store = FindingStore(tmp_path / "findings.db")
+    AnomalyDetector(ledger, store)
+    findings = store.recent(DUPLICATE)
+    assert findings["Entry"].tolist() == ["DV-5", "DV-2"]
+    assert findings["Related Entries"].tolist() == ["DV-4", "DV-1"]
+    assert store.position() == len(ledger)
+
+
+def test_near_threshold_purchases_to_one_payee_are_flagged_as_split(tmp_path):
+    ledger = Ledger()
+    store = FindingStore(tmp_path / "findings.db")
+    AnomalyDetector(ledger, store)
+    pay(ledger, "DV-1", "2025-04-02", "Juan Office Supplies", 45_000_00)
+    pay(ledger, "DV-2", "2025-04-03", "Other Supplier", 46_000_00)
+    pay(ledger, "DV-3", "2025-04-20", "Juan Office Supplies", 48_000_00)
+    # Utilities are not procured, however close to the threshold.
+    pay(ledger, "DV-4", "2025-04-21", "Power Co", 45_000_00, account="5030")
+    pay(ledger, "DV-5", "2025-04-22", "Power Co", 47_000_00, account="5030")
+
+    findings = store.recent(SPLIT)
+    assert findings["Entry"].tolist() == ["DV-3"]
+    assert findings["Related Entries"].tolist() == ["DV-1"]
+    assert "total ₱93,000.00" in findings["Detail"][0]
+
+
+def test_amounts_far_above_their_category_are_outliers(tmp_path):
+    ledger = Ledger()
+    store = FindingStore(tmp_path / "findings.db")
+    AnomalyDetector(ledger, store)
+    for day in range(1, 29):
+        for shift in (0, 1):
+            pay(ledger, f"DV-{day}-{shift}", f"2025-05-{day:02d}", f"Water bill {day}",
+                1_000_00 + day % 7 * 20_00 + shift * 5_00 + day, account="5030")
+    pay(ledger, "DV-BIG", "2025-05-30", "Water bill", 900_000_00, account="5030")
+
+    assert store.counts() == {DUPLICATE: 0, SPLIT: 0, OUTLIER: 1}
+    assert store.recent(OUTLIER)["Entry"].tolist() == ["DV-BIG"]
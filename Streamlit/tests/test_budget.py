@@ -0,0 +1,72 @@
+import pytest
+
+from linaw.budget import UNAPPROPRIATED, Appropriation, BudgetBook, Ordinance, RevenueEstimate
+from linaw.ledger import Ledger
+
+GENERAL = "General Fund"
+TREASURY = "Barangay Treasury"
+
+
+def budget_book(ledger: Ledger) -> BudgetBook:
+    ordinance = Ordinance(
+        appropriations=(Appropriation(GENERAL, TREASURY, "5020", 120_000),),
+        revenues=(RevenueEstimate(GENERAL, "4020", 24_000),),
+    )
+    return BudgetBook(ledger, ordinance)
+
+
+def row(frame, item: str) -> dict:
+    return frame.set_index("Item").loc[item].to_dict()
+
+
+def test_obligations_are_disbursed_as_payables_are_settled():
+    ledger = Ledger()
+    book = budget_book(ledger)
+    treasury = book.appropriations.node(GENERAL, TREASURY)
+
+    # Supplies paid partly in cash, the rest owed to the supplier.
+    ledger.post("DV-1", "2025-01-10", "Office supplies",
+                [("5020", 10_000, 0), ("1020", 0, 4_000), ("2010", 0, 6_000)])
+    january = row(book.utilization("2025-01-01", "2025-01-31", treasury), TREASURY.upper())
+    assert january["Appropriation"] == 120_000
+    assert january["Allotments"] == 30_000
+    assert (january["Obligations"], january["Disbursements"]) == (10_000, 4_000)
+    assert january["Unobligated"] == 20_000
+    assert book.unpaid() == 6_000
+
+    ledger.post("DV-2", "2025-02-05", "Pay supplier", [("2010", 6_000, 0), ("1020", 0, 6_000)])
+    february = row(book.utilization("2025-02-01", "2025-02-28", treasury), TREASURY.upper())
+    assert (february["Obligations"], february["Disbursements"]) == (0, 6_000)
+    assert book.unpaid() == 0
+    year = row(book.utilization("2025-01-01", "2025-03-31", treasury), TREASURY.upper())
+    assert (year["Obligations"], year["Disbursements"], year["Utilization %"]) == (10_000, 10_000, 8.3)
+
+
+def test_spending_without_an_appropriation_is_kept_and_summarized():
+    ledger = Ledger()
+    book = budget_book(ledger)
+    ledger.post("OR-1", "2025-01-05", "Permit fees", [("1020", 3_000, 0), ("4020", 0, 3_000)])
+    ledger.post("DV-1", "2025-01-20", "Electricity", [("5030", 500, 0), ("1020", 0, 500)])
+
+    unappropriated = book.appropriations.node(GENERAL, UNAPPROPRIATED)
+    status = book.utilization("2025-01-01", "2025-01-31", unappropriated)
+    assert row(status, UNAPPROPRIATED.upper())["Obligations"] == 500
+    assert row(status, "5030 Utilities Expense")["Appropriation"] == 0
+
+    summary = book.summary("2025-01-01", "2025-01-31").set_index("Category")
+    assert summary.loc["Income", "Budget"] == 2_000
+    assert summary.loc["Income", "Actual"] == 3_000
+    assert summary.loc["Expenses", "Budget"] == 10_000
+    assert summary.loc["Expenses", "Actual"] == 500
+    assert summary.loc["Net Income", "Variance"] == 2_500 - (2_000 - 10_000)
+
+    with pytest.raises(ValueError):
+        book.summary("2024-12-01", "2025-01-31")
+
+
+def test_ordinances_must_appropriate_expense_accounts_once():
+    with pytest.raises(ValueError, match="not an expense account"):
+        BudgetBook(Ledger(), Ordinance((Appropriation(GENERAL, TREASURY, "4020", 1),)))
+    with pytest.raises(ValueError, match="more than once"):
+        BudgetBook(Ledger(), Ordinance((Appropriation(GENERAL, TREASURY, "5020", 1),
+                                        Appropriation(GENERAL, "Office of the Punong Barangay", "5020", 1))))
@@ -0,0 +1,79 @@
+import threading
+
+import numpy as np
+
+from linaw.cache import CacheBudget, QueryCache
+
+
+def test_entries_are_served_until_their_sources_change():
+    versions = {"ledger": 0, "chain": 0}
+    cache = QueryCache(max_entries=2)
+    for name in versions:
+        cache.add_source(name, lambda name=name: versions[name])
+    calls = []
+
+    @cache.memoize("ledger")
+    def total(month):
+        calls.append(month)
+        return len(calls)
+
+    @cache.memoize("chain")
+    def height():
+        calls.append("height")
+        return len(calls)
+
+    assert (total(1), total(1), height()) == (1, 1, 2)
+    versions["ledger"] += 1
+    assert (total(1), height()) == (3, 2)
+
+    # Past max_entries the least recently used entry goes.
+    total(2)
+    assert total(1) == 5
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.invalidations, stats.evictions, stats.entries) == (2, 5, 1, 2, 2)
+
+
+def test_concurrent_misses_compute_once():
+    cache = QueryCache()
+    cache.add_source("ledger", lambda: 0)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "frame"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get("key", ("ledger",), compute)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(cache.get("key", ("ledger",), compute)))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert results == ["frame", "frame"]
+    assert len(calls) == 1
+
+
+def test_a_tenant_over_its_share_evicts_its_own_entries():
+    budget = CacheBudget(max_bytes=10_000)
+    busy, quiet = QueryCache(budget=budget), QueryCache(budget=budget)
+    for cache in (busy, quiet):
+        cache.add_source("ledger", lambda: 0)
+    block = np.zeros(2_000, dtype=np.uint8)
+
+    quiet.get("kept", ("ledger",), lambda: block.copy())
+    for month in range(6):
+        busy.get(month, ("ledger",), lambda: block.copy())
+
+    assert budget.used <= budget.max_bytes
+    assert quiet.stats().entries == 1
+    assert busy.stats().entries == 4
+    assert busy.stats().evictions == 2
+
+    busy.close()
+    assert budget.used == quiet.stats().bytes
+    assert budget.share(quiet) == budget.max_bytes
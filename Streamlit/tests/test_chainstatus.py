@@ -0,0 +1,107 @@
+import asyncio
+import logging
+
+from linaw.chainstatus import ChainStatusPoller, KaleidoConfig
+from linaw.fabconnect import FabconnectClient, FabconnectConfig
+from linaw.outbox import Outbox, OutboxDispatcher
+from linaw.stubs import FabconnectStub, KaleidoStub
+
+
+def poller(fabconnect: FabconnectStub, kaleido: KaleidoStub | None = None, **kwargs) -> ChainStatusPoller:
+    config = None
+    if kaleido is not None:
+        config = KaleidoConfig(url=kaleido.url, api_key=kaleido.api_key, consortium=kaleido.consortium,
+                               environment=kaleido.environment)
+    return ChainStatusPoller(FabconnectConfig(url=fabconnect.url), config, **kwargs)
+
+
+def test_poll_reports_height_and_node_health():
+    async def main():
+        async with FabconnectStub(block_height=42) as fabconnect, KaleidoStub(peers=2, orderers=1) as kaleido:
+            status = poller(fabconnect, kaleido)
+            healthy = await status.poll_once()
+            kaleido.set_state("peer1", "paused")
+            degraded = await status.poll_once()
+            await status.close()
+            return healthy, degraded
+
+    healthy, degraded = asyncio.run(main())
+    assert (healthy.height, healthy.peers_up, healthy.peers, healthy.orderers_up) == (42, 2, 2, 1)
+    assert healthy.label == "🟢 Active"
+    assert (degraded.peers_up, degraded.label) == (1, "🟡 Degraded")
+
+
+def test_receipt_backlog_drains_as_receipts_arrive(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.db")
+    for i in range(3):
+        outbox.enqueue(f"a{i}", "CreateAsset", [f"A{i}"])
+
+    async def main():
+        async with FabconnectStub(receipt_delay=0.2) as fabconnect:
+            status = poller(fabconnect, outbox=outbox)
+            dispatcher = OutboxDispatcher(outbox, client=status.client)
+            await dispatcher.step()
+            waiting = (await status.poll_once()).receipt_backlog
+            await asyncio.sleep(0.3)
+            await dispatcher.step()
+            drained = (await status.poll_once()).receipt_backlog
+            await status.close()
+            return waiting, drained
+
+    assert asyncio.run(main()) == (3, 0)
+
+
+def test_close_leaves_a_shared_client_open():
+    async def main():
+        async with FabconnectStub(block_height=3) as fabconnect:
+            async with FabconnectClient(FabconnectConfig(url=fabconnect.url)) as client:
+                session = client._ensure_session()
+                status = ChainStatusPoller(client=client)
+                await status.poll_once()
+                await status.close()
+                return session.closed
+
+    assert not asyncio.run(main())
+
+
+def test_unreachable_network_keeps_the_last_height():
+    async def main():
+        async with FabconnectStub(block_height=7) as fabconnect, KaleidoStub() as kaleido:
+            status = poller(fabconnect, kaleido, interval=0.01)
+            task = asyncio.create_task(status.run())
+            while status.snapshot.reachable is None:
+                await asyncio.sleep(0.01)
+            kaleido.api_key = "rotated"
+            while status.snapshot.reachable:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return status.snapshot
+
+    snapshot = asyncio.run(main())
+    assert snapshot.label == "🔴 Unreachable"
+    assert snapshot.height == 7
+    assert snapshot.failures >= 1
+    assert "401" in snapshot.error
+
+
+def test_unexpected_errors_mark_the_network_unreachable(caplog):
+    async def main():
+        async with FabconnectStub(block_height=5) as fabconnect:
+            status = poller(fabconnect, interval=0.01)
+            await status.poll_once()
+            status.client.chain_height = broken
+            task = asyncio.create_task(status.run())
+            while status.snapshot.reachable:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return status.snapshot
+
+    async def broken():
+        raise KeyError("height")
+
+    with caplog.at_level(logging.ERROR, logger="linaw.chainstatus"):
+        snapshot = asyncio.run(main())
+    assert (snapshot.label, snapshot.height) == ("🔴 Unreachable", 5)
+    assert "Chain status poll failed (1 in a row)" in caplog.text
@@ -0,0 +1,45 @@
+from linaw.entries import EntryIndex
+from linaw.ledger import EXPENSE, REVENUE, Ledger
+
+
+def test_recent_lines_are_the_latest_of_their_kind():
+    ledger = Ledger()
+    index = EntryIndex(ledger)
+    for day in range(1, 29):
+        ledger.post(f"OR-{day}", f"2025-03-{day:02d}", f"Collection {day}",
+                    [("1010", day * 100, 0), ("4020", 0, day * 100)])
+        if day % 7 == 0:
+            ledger.post(f"DV-{day}", f"2025-03-{day:02d}", f"Supplies {day}",
+                        [("5020", day * 10, 0), ("1010", 0, day * 10)])
+    ledger.post("OR-APR", "2025-04-01", "April collection", [("1010", 999, 0), ("4020", 0, 999)])
+
+    income = index.recent_lines(REVENUE, "2025-03-01", "2025-03-31", limit=3)
+    assert income["Reference"].tolist() == ["OR-28", "OR-27", "OR-26"]
+    assert income["Amount"].tolist() == [2800, 2700, 2600]
+
+    expenses = index.recent_lines(EXPENSE, "2025-03-01", "2025-03-31", limit=10)
+    assert expenses["Reference"].tolist() == ["DV-28", "DV-21", "DV-14", "DV-7"]
+    assert (expenses["Amount"] > 0).all()
+    assert index.recent_lines(EXPENSE, "2025-04-01", "2025-04-30").empty
+
+
+def test_headers_stay_in_date_order_as_entries_are_posted():
+    ledger = Ledger()
+    index = EntryIndex(ledger)
+    ledger.post("OR-1", "2025-02-10", "Permit fees", [("1020", 100, 0), ("4020", 0, 100)])
+    ledger.post("DV-1", "2025-02-01", "Back-dated supplies",
+                [("5020", 150, 0), ("5030", 50, 0), ("1020", 0, 200)])
+    ledger.post("OR-2", "2025-02-20", "Market fees", [("1020", 300, 0), ("4030", 0, 300)])
+
+    headers = index.headers()
+    assert headers["Reference"].tolist() == ["DV-1", "OR-1", "OR-2"]
+    assert headers["Amount"].tolist() == [200, 100, 300]
+    assert index.count("2025-02-05", "2025-02-28") == 2
+    assert [page["Reference"].tolist() for page in index.pages(size=2)] == [["DV-1", "OR-1"], ["OR-2"]]
+    assert index.headers("2025-02-05", offset=1)["Reference"].tolist() == ["OR-2"]
+
+    lines = index.lines("DV-1")
+    assert lines["Account"].tolist() == ["Office Supplies Expense", "Utilities Expense", "Cash in Bank"]
+    assert (lines["Debit"].sum(), lines["Credit"].sum()) == (200, 200)
+    # Followed postings agree with an index built over the finished books.
+    assert EntryIndex(ledger).headers().equals(headers)
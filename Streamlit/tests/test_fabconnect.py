@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from linaw.fabconnect import FabconnectClient, FabconnectConfig, FabconnectError
+from linaw.stubs import FabconnectStub
+
+
+def client(stub: FabconnectStub, **kwargs) -> FabconnectClient:
+    return FabconnectClient(FabconnectConfig(url=stub.url), retry_delay=0.01, **kwargs)
+
+
+def test_submit_and_wait_confirms_every_transaction():
+    async def main():
+        async with FabconnectStub(receipt_delay=0.02) as stub, client(stub) as fabconnect:
+            payloads = [fabconnect.payload("CreateAsset", [f"asset-{i}", "x"]) for i in range(20)]
+            receipts = await fabconnect.submit_and_wait(payloads, interval=0.01, timeout=5)
+            return stub, receipts
+
+    stub, receipts = asyncio.run(main())
+    assert all(r is not None and r.succeeded for r in receipts)
+    assert len({r.block_number for r in receipts}) == 20
+    assert stub.assets == {f"asset-{i}" for i in range(20)}
+
+
+def test_failed_transaction_receipt():
+    async def main():
+        async with FabconnectStub() as stub, client(stub) as fabconnect:
+            first = await fabconnect.exec_chaincode("CreateAsset", "asset-1")
+            second = await fabconnect.exec_chaincode("CreateAsset", "asset-1")
+            return (await fabconnect.wait_for_receipt(first, interval=0.01),
+                    await fabconnect.wait_for_receipt(second, interval=0.01))
+
+    first, second = asyncio.run(main())
+    assert first.succeeded
+    assert not second.succeeded
+    assert "already exists" in second.error
+
+
+def test_duplicate_request_id_is_refused():
+    async def main():
+        async with FabconnectStub() as stub, client(stub) as fabconnect:
+            await fabconnect.send_transaction(fabconnect.payload("CreateAsset", ["a"], request_id="w.0"))
+            await fabconnect.send_transaction(fabconnect.payload("CreateAsset", ["a"], request_id="w.0"))
+
+    with pytest.raises(FabconnectError) as err:
+        asyncio.run(main())
+    assert err.value.duplicate
+
+
+def test_saturated_gateway_is_retried_then_reported():
+    async def main():
+        async with FabconnectStub(max_in_flight=0) as stub, client(stub, retries=3) as fabconnect:
+            try:
+                await fabconnect.exec_chaincode("CreateAsset", "a")
+            finally:
+                assert stub.rejected == 4
+
+    with pytest.raises(FabconnectError) as err:
+        asyncio.run(main())
+    assert err.value.status == 429
+
+
+def test_missing_receipt_is_pending_but_gateway_errors_raise():
+    async def main():
+        async with FabconnectStub() as stub, client(stub) as fabconnect:
+            assert await fabconnect.get_receipt("unknown") is None
+            stub.error_status = 500
+            await fabconnect.get_receipt("unknown")
+
+    with pytest.raises(FabconnectError) as err:
+        asyncio.run(main())
+    assert err.value.status == 500
+
+
+def test_chain_height_follows_confirmations():
+    async def main():
+        async with FabconnectStub(block_height=10) as stub, client(stub) as fabconnect:
+            before = await fabconnect.chain_height()
+            receipt_id = await fabconnect.exec_chaincode("CreateAsset", "a")
+            await fabconnect.wait_for_receipt(receipt_id, interval=0.01)
+            return before, await fabconnect.chain_height()
+
+    assert asyncio.run(main()) == (10, 11)
+
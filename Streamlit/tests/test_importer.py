@@ -0,0 +1,93 @@
+import io
+
+from linaw.importer import POSTED, ImportLog, Importer
+from linaw.ledger import Ledger
+
+CSV = """Reference,Date,Description,Account,Debit,Credit,Fund
+OR-1,2025-03-01,Market fees,1010,"1,500.00",,
+OR-1,2025-03-01,Market fees,4030,,1500,
+OR-2,2025-03-02,Permit,1010,250.50,,SK Fund
+OR-2,2025-03-02,Permit,4020,,250.50,SK Fund
+OR-3,2025-03-03,Unbalanced,1010,100,,
+OR-3,2025-03-03,Unbalanced,4020,,99,
+OR-4,2025-03-04,Unknown account,9999,100,,
+OR-4,2025-03-04,Unknown account,4020,,100,
+OR-5,2025-03-05,Split dates,1010,100,,
+OR-5,2025-03-06,Split dates,4020,,100,
+OR-6,2025-03-07,Single line,1010,100,,
+OR-7,not a date,Bad date,1010,100,,
+OR-7,not a date,Bad date,4020,,100,
+OR-8,2025-03-08,Fractional centavo,1010,1.005,,
+OR-8,2025-03-08,Fractional centavo,4020,,1.005,
+"""
+
+
+def run(importer: Importer, text: str, chunk_rows: int = 4):
+    return importer.run(io.BytesIO(text.encode()), name="collections.csv", chunk_rows=chunk_rows)
+
+
+def test_valid_entries_are_committed_and_bad_ones_rejected_whole(tmp_path):
+    ledger = Ledger()
+    result = run(Importer(ledger, ImportLog(tmp_path / "imports.db")), CSV)
+
+    assert (result.lines, result.accepted, result.rejected, result.duplicates) == (15, 2, 6, 0)
+    assert dict(result.errors) == {
+        "OR-3": "debits do not equal credits",
+        "OR-4": "unknown account code",
+        "OR-5": "lines have different dates",
+        "OR-6": "fewer than two lines",
+        "OR-7": "invalid date",
+        "OR-8": "invalid amount",
+    }
+    assert ledger.je_refs == ["OR-1", "OR-2"]
+    assert ledger.balances()[ledger.account_id("1010")] == 1_750_50
+    lines = ledger.entry_lines("OR-2")
+    assert len(lines) == 2
+    assert set(ledger.fund[: len(ledger)].tolist()) == {0, ledger.fund_id("SK Fund")}
+
+
+def test_reimport_skips_committed_entries(tmp_path):
+    log = ImportLog(tmp_path / "imports.db")
+    ledger = Ledger()
+    run(Importer(ledger, log), CSV)
+
+    # Already posted here: duplicates, not "already posted" rejections.
+    again = run(Importer(ledger, log), CSV.replace("1,500.00", "1500"))
+    assert (again.accepted, again.duplicates, again.rejected) == (0, 2, 6)
+    assert POSTED not in dict(again.errors).values()
+    assert len(ledger) == 4
+
+    # Another process's ledger sharing the import log: still duplicates.
+    other = Ledger()
+    assert run(Importer(other, log), CSV).duplicates == 2
+    assert len(other) == 0
+
+
+def test_changed_entry_with_a_posted_reference_is_rejected(tmp_path):
+    ledger = Ledger()
+    importer = Importer(ledger, ImportLog(tmp_path / "imports.db"))
+    run(importer, CSV)
+    changed = run(importer, CSV.replace("250.50", "260.50"))
+    assert dict(changed.errors)["OR-2"] == POSTED
+    assert changed.duplicates == 1
+
+
+def test_entries_split_across_chunks_are_carried_over(tmp_path):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["JE No", "Posting Date", "Account Code", "Dr", "Cr"])
+    for i in range(50):
+        when = f"2025-04-{1 + i % 28:02d}"
+        sheet.append([f"JE-{i}", when, "5020", 10, None])
+        sheet.append([f"JE-{i}", when, "1020", None, 5])
+        sheet.append([f"JE-{i}", when, "1010", None, 5])
+    path = tmp_path / "journal.xlsx"
+    workbook.save(path)
+
+    ledger = Ledger()
+    result = Importer(ledger, ImportLog(tmp_path / "imports.db")).run(path, chunk_rows=4)
+    assert (result.lines, result.accepted, result.rejected) == (150, 50, 0)
+    assert ledger.je_refs == [f"JE-{i}" for i in range(50)]
+    assert ledger.balances()[ledger.account_id("5020")] == 50 * 10_00
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+
+from linaw.events import EventStore
+from linaw.fabconnect import FabconnectClient, FabconnectConfig
+from linaw.ingest import EventIngester
+from linaw.stubs import FabconnectStub
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def confirm(stub: FabconnectStub, *assets: str) -> None:
+    async with FabconnectClient(FabconnectConfig(url=stub.url)) as fabconnect:
+        for asset in assets:
+            receipt_id = await fabconnect.exec_chaincode("CreateAsset", asset)
+            await fabconnect.wait_for_receipt(receipt_id, interval=0.01)
+
+
+def ingester(stub: FabconnectStub, store: EventStore, **kwargs) -> EventIngester:
+    config = FabconnectConfig(url=stub.url, event_batch_size=2)
+    return EventIngester(store, config, reconnect_delay=0.01, **kwargs)
+
+
+def test_events_are_stored_then_acked(tmp_path):
+    store = EventStore(tmp_path / "events.db")
+
+    async def main():
+        async with FabconnectStub() as stub:
+            task = asyncio.create_task(ingester(stub, store).run())
+            await wait_for(lambda: stub.subscriptions)
+            await confirm(stub, "FR-1", "FR-2", "FR-3")
+            await wait_for(lambda: stub.acked == 3)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return stub
+
+    stub = asyncio.run(main())
+    assert len(stub.event_streams) == 1
+    assert store.count() == 3
+    assert store.recent(limit=10)["Document ID"].tolist() == ["FR-3", "FR-2", "FR-1"]
+    assert store.checkpoint("linaw-events")[0] == stub.block_height
+
+
+def test_restart_reuses_the_stream_and_skips_redelivered_events(tmp_path):
+    store = EventStore(tmp_path / "events.db")
+
+    async def main():
+        async with FabconnectStub() as stub:
+            first = asyncio.create_task(ingester(stub, store).run())
+            await wait_for(lambda: stub.subscriptions)
+            await confirm(stub, "FR-1", "FR-2")
+            await wait_for(lambda: store.count() == 2)
+            first.cancel()
+            await asyncio.gather(first, return_exceptions=True)
+
+            # Replay what was stored, as FabConnect does for a batch whose ack was lost.
+            stub.acked = 0
+            second = asyncio.create_task(ingester(stub, store).run())
+            await confirm(stub, "FR-3")
+            await wait_for(lambda: stub.acked == 3)
+            second.cancel()
+            await asyncio.gather(second, return_exceptions=True)
+            return stub
+
+    stub = asyncio.run(main())
+    assert len(stub.event_streams) == 1
+    assert store.count() == 3
+
+
+def test_malformed_event_does_not_stop_ingestion(tmp_path, caplog):
+    store = EventStore(tmp_path / "events.db")
+
+    async def main():
+        async with FabconnectStub() as stub:
+            task = asyncio.create_task(ingester(stub, store).run())
+            await wait_for(lambda: stub.subscriptions)
+            malformed = {"blockNumber": "latest", "eventName": "AssetCreated", "payload": {"ID": "FR-1"}}
+            stub.emit(malformed)
+            await wait_for(lambda: "Event ingestion failed" in caplog.text)
+            assert not task.done()
+            # The unacked batch is redelivered after the reconnect.
+            malformed["blockNumber"] = 1
+            await confirm(stub, "FR-2")
+            await wait_for(lambda: store.count() == 2)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    with caplog.at_level(logging.ERROR, logger="linaw.ingest"):
+        asyncio.run(main())
+    assert store.recent()["Document ID"].tolist() == ["FR-2", "FR-1"]
+
+
+def test_cancelling_leaves_a_shared_client_open(tmp_path):
+    store = EventStore(tmp_path / "events.db")
+
+    async def main():
+        async with FabconnectStub() as stub:
+            async with FabconnectClient(FabconnectConfig(url=stub.url, event_batch_size=2)) as client:
+                session = client._ensure_session()
+                task = asyncio.create_task(EventIngester(store, client=client, reconnect_delay=0.01).run())
+                await wait_for(lambda: stub.subscriptions)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                return session.closed
+
+    assert not asyncio.run(main())
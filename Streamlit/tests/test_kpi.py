@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from linaw.kpi import KpiService
+from linaw.ledger import Ledger
+
+
+def test_snapshot_follows_the_latest_month():
+    ledger = Ledger()
+    kpis = KpiService(ledger)
+    assert kpis.snapshot.month is None
+
+    ledger.post("OR-1", "2025-02-14", "Permit fees", [("1020", 1_000, 0), ("4020", 0, 1_000)])
+    ledger.post("OR-2", "2025-03-03", "Market fees", [("1020", 1_500, 0), ("4030", 0, 1_500)])
+    ledger.post("DV-1", "2025-03-10", "Supplies", [("5020", 500, 0), ("1020", 0, 500)])
+    # Depreciation is an expense that reduces assets through a contra account.
+    ledger.post("JV-1", "2025-03-31", "Depreciation", [("5090", 100, 0), ("1290", 0, 100)])
+
+    snapshot = kpis.snapshot
+    assert snapshot.month == np.datetime64("2025-03")
+    assert (snapshot.income, snapshot.expenses, snapshot.net_position) == (1_500, 600, 900)
+    assert snapshot.total_assets == 1_900
+    assert snapshot.income_change == pytest.approx(0.5)
+    assert snapshot.net_change == pytest.approx(-0.1)
+    assert snapshot.assets_change == pytest.approx(0.9)
+
+    # A back-dated posting updates the totals but not the month shown.
+    ledger.post("OR-0", "2025-01-20", "Rental", [("1020", 100, 0), ("4040", 0, 100)])
+    assert kpis.snapshot.month == np.datetime64("2025-03")
+    assert kpis.snapshot.total_assets == 2_000
+    assert kpis.snapshot.income_change == pytest.approx(0.5)
@@ -0,0 +1,59 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from linaw.balances import BalanceIndex
+from linaw.ledger import Ledger, format_peso, to_centavos
+
+
+def sample_ledger() -> Ledger:
+    ledger = Ledger()
+    ledger.post("JE-1", "2025-01-05", "Opening cash", [("1010", 100_000_00, 0), ("3010", 0, 100_000_00)])
+    ledger.post("JE-2", "2025-01-10", "Permit fees", [("1010", 5_000_00, 0), ("4020", 0, 5_000_00)])
+    ledger.post("JE-3", "2025-02-01", "Office supplies", [("5020", 1_250_50, 0), ("1010", 0, 1_250_50)])
+    return ledger
+
+
+def test_amounts_are_exact_centavos():
+    assert to_centavos("₱1,234.5") == 123450
+    assert to_centavos("-0.07") == -7
+    assert to_centavos(0.1 + 0.2) == 30
+    assert format_peso(-8_500_000) == "(85,000.00)"
+    assert format_peso(0, blank_zero=True) == ""
+
+
+def test_unbalanced_or_repeated_entries_are_refused():
+    ledger = sample_ledger()
+    with pytest.raises(ValueError, match="does not balance"):
+        ledger.post("JE-4", "2025-02-02", "Bad", [("1010", 100, 0), ("4020", 0, 99)])
+    with pytest.raises(ValueError, match="already posted"):
+        ledger.post("JE-1", "2025-02-02", "Again", [("1010", 100, 0), ("4020", 0, 100)])
+    assert len(ledger) == 6
+
+
+def test_statements_balance():
+    ledger = sample_ledger()
+    assert ledger.balances()[ledger.account_id("1010")] == 103_749_50
+    assert ledger.net_income() == 5_000_00 - 1_250_50
+    assert ledger.net_income(end=date(2025, 1, 31)) == 5_000_00
+    debits, credits = ledger.debit[: len(ledger)].sum(), ledger.credit[: len(ledger)].sum()
+    assert debits == credits
+
+
+def test_balance_index_matches_a_full_scan_after_back_dated_postings():
+    ledger = sample_ledger()
+    index = BalanceIndex(ledger)
+    ledger.post("JE-4", "2025-01-07", "Back-dated rent", [("1010", 2_000_00, 0), ("4040", 0, 2_000_00)])
+    ledger.post("JE-5", "2025-03-01", "Salaries", [("5010", 10_000_00, 0), ("1010", 0, 10_000_00)])
+
+    for as_of in (None, date(2025, 1, 6), date(2025, 1, 7), date(2025, 2, 28)):
+        expected = ledger.balances(as_of)
+        for account in ledger.accounts:
+            assert index.balance(account.code, as_of) == expected[ledger.account_id(account.code)]
+
+    postings = index.postings("1010")
+    assert postings["Reference"].tolist() == ["JE-1", "JE-4", "JE-2", "JE-3", "JE-5"]
+    assert postings["Balance"].iloc[-1] == index.balance("1010")
+    assert np.all(np.diff(postings["Date"].to_numpy()) >= np.timedelta64(0, "D"))
+    assert index.totals("1010", start=date(2025, 1, 6), end=date(2025, 1, 31)) == (7_000_00, 0)
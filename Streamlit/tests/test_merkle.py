@@ -0,0 +1,59 @@
+import numpy as np
+
+from linaw.ledger import Ledger
+from linaw.merkle import JournalMerkle, MerkleTree, verify_proof
+
+
+def post(ledger: Ledger, start: int, stop: int) -> None:
+    for i in range(start, stop):
+        month = 1 + i % 3
+        ledger.post(f"JE-{i}", f"2025-{month:02d}-{1 + i % 28:02d}", f"Entry {i}",
+                    [("1010", 100 + i, 0), ("4020", 0, 100 + i)])
+
+
+def proof_holds(proof: dict) -> bool:
+    path = [(bytes.fromhex(step["hash"][2:]), step["side"]) for step in proof["path"]]
+    return verify_proof(bytes.fromhex(proof["leaf"][2:]), path, bytes.fromhex(proof["root"][2:]))
+
+
+def test_every_leaf_proves_against_the_root():
+    leaves = np.frombuffer(np.random.default_rng(0).bytes(32 * 13), dtype=np.uint8).reshape(13, 32)
+    tree = MerkleTree(leaves)
+    for i in range(len(tree)):
+        assert verify_proof(tree.leaf(i), tree.proof(i), tree.root)
+    assert not verify_proof(tree.leaf(3), tree.proof(4), tree.root)
+
+
+def test_appending_matches_building_in_one_pass():
+    leaves = np.frombuffer(np.random.default_rng(1).bytes(32 * 37), dtype=np.uint8).reshape(37, 32)
+    grown = MerkleTree(leaves[:5])
+    grown.append(leaves[5].tobytes())
+    assert grown.extend(leaves[6:20]) == 6
+    grown.extend(leaves[20:])
+    built = MerkleTree(leaves)
+    assert grown.root == built.root
+    assert all(grown.proof(i) == built.proof(i) for i in range(len(built)))
+
+
+def test_journal_proofs_survive_incremental_posting():
+    ledger = Ledger()
+    post(ledger, 0, 10)
+    merkle = JournalMerkle(ledger)
+    post(ledger, 10, 40)
+
+    rebuilt = JournalMerkle(ledger)
+    assert merkle.roots() == rebuilt.roots()
+    assert sorted(merkle.roots()) == ["2025-01", "2025-02", "2025-03"]
+    for i in range(40):
+        proof = merkle.proof(f"JE-{i}")
+        assert proof["period"] == f"2025-{1 + i % 3:02d}"
+        assert proof_holds(proof)
+
+
+def test_changed_entry_changes_the_root():
+    original, altered = Ledger(), Ledger()
+    post(original, 0, 6)
+    post(altered, 0, 5)
+    altered.post("JE-5", "2025-03-06", "Entry 5", [("1010", 106, 0), ("4020", 0, 106)])
+    assert JournalMerkle(original).root("2025-03") != JournalMerkle(altered).root("2025-03")
+    assert JournalMerkle(original).root("2025-01") == JournalMerkle(altered).root("2025-01")
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import sqlite3
+
+from linaw.fabconnect import FabconnectClient, FabconnectConfig
+from linaw.outbox import CONFIRMED, DEAD, PENDING, SUBMITTED, Outbox, OutboxDispatcher
+from linaw.stubs import FabconnectStub
+
+
+def dispatcher(stub: FabconnectStub, outbox: Outbox, **kwargs) -> OutboxDispatcher:
+    return OutboxDispatcher(outbox, FabconnectConfig(url=stub.url), retry_delay=0.0, **kwargs)
+
+
+async def drain(dispatch: OutboxDispatcher, steps: int = 50) -> None:
+    for _ in range(steps):
+        await dispatch.step()
+        if not dispatch.outbox.stats().depth:
+            break
+        await asyncio.sleep(0.02)
+    await dispatch.client.close()
+
+
+def test_writes_are_confirmed_once(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.db")
+    assert outbox.enqueue("fr-1", "CreateAsset", ["FR-1", "x"])
+    assert outbox.enqueue("fr-2", "CreateAsset", ["FR-2", "y"])
+    assert not outbox.enqueue("fr-1", "CreateAsset", ["FR-1", "x"])
+
+    async def main():
+        async with FabconnectStub(receipt_delay=0.01) as stub:
+            await drain(dispatcher(stub, outbox))
+            return stub
+
+    stub = asyncio.run(main())
+    entries = outbox.get_many(["fr-1", "fr-2"])
+    assert {e.status for e in entries.values()} == {CONFIRMED}
+    assert all(e.block_number and e.tx_id for e in entries.values())
+    assert sorted(stub.transactions) == ["fr-1.0", "fr-2.0"]
+
+
+def test_failed_writes_are_retried_then_dead_lettered(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.db")
+    outbox.enqueue("a", "CreateAsset", ["FR-1"])
+    outbox.enqueue("b", "CreateAsset", ["FR-1"])
+
+    async def main():
+        async with FabconnectStub() as stub:
+            await drain(dispatcher(stub, outbox, max_attempts=3))
+            return stub
+
+    stub = asyncio.run(main())
+    first, second = outbox.get("a"), outbox.get("b")
+    assert first.status == CONFIRMED
+    assert (second.status, second.attempts) == (DEAD, 3)
+    assert "already exists" in second.error
+    assert [e.key for e in outbox.dead_letters()] == ["b"]
+    assert {"b.0", "b.1", "b.2"} <= set(stub.transactions)
+
+    assert outbox.requeue() == 1
+    assert outbox.get("b").status == PENDING
+
+
+def test_gateway_errors_count_against_attempts(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.db")
+    outbox.enqueue("a", "CreateAsset", ["FR-1"])
+
+    async def main():
+        async with FabconnectStub(error_status=503) as stub:
+            await drain(dispatcher(stub, outbox, max_attempts=2))
+
+    asyncio.run(main())
+    entry = outbox.get("a")
+    assert (entry.status, entry.attempts) == (DEAD, 2)
+    assert "503" in entry.error
+
+
+def test_missing_receipt_times_out(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.db")
+    outbox.enqueue("a", "CreateAsset", ["FR-1"])
+
+    async def main():
+        async with FabconnectStub(receipt_delay=60) as stub:
+            dispatch = dispatcher(stub, outbox, max_attempts=1, receipt_timeout=0.05)
+            await dispatch.step()
+            assert outbox.get("a").status == SUBMITTED
+            await asyncio.sleep(0.1)
+            await drain(dispatch, steps=1)
+
+    asyncio.run(main())
+    entry = outbox.get("a")
+    assert entry.status == DEAD
+    assert entry.error.startswith("no receipt within")
+
+
+def test_interrupted_send_is_not_sent_twice(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.db")
+    outbox.enqueue("a", "CreateAsset", ["FR-1"])
+
+    async def main():
+        async with FabconnectStub() as stub:
+            # The process stopped after sending the first attempt but before recording it.
+            outbox.sending("a")
+            async with FabconnectClient(FabconnectConfig(url=stub.url)) as client:
+                await client.send_transaction(client.payload("CreateAsset", ["FR-1"], request_id="a.0"))
+            await drain(dispatcher(stub, outbox))
+            return stub
+
+    stub = asyncio.run(main())
+    assert outbox.get("a").status == CONFIRMED
+    assert list(stub.transactions) == ["a.0"]
+
+
+def test_unexpected_errors_do_not_stop_the_dispatcher(tmp_path, caplog):
+    outbox = Outbox(tmp_path / "outbox.db")
+    outbox.enqueue("a", "CreateAsset", ["FR-1"])
+    due = outbox.due
+    failures = iter([sqlite3.OperationalError("database is locked")])
+
+    def flaky_due(now, limit):
+        for err in failures:
+            raise err
+        return due(now, limit)
+
+    outbox.due = flaky_due
+
+    async def main():
+        async with FabconnectStub() as stub:
+            task = asyncio.create_task(dispatcher(stub, outbox, interval=0.01).run())
+            for _ in range(500):
+                if outbox.get("a").status == CONFIRMED:
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    with caplog.at_level(logging.ERROR, logger="linaw.outbox"):
+        asyncio.run(main())
+    assert outbox.get("a").status == CONFIRMED
+    assert "database is locked" in caplog.text
@@ -0,0 +1,67 @@
+import logging
+
+from linaw.events import EventStore
+from linaw.projections import ChainKpis, DocumentRegistry, JournalAnchors, Projector
+
+
+def event(block: int, name: str, payload: dict, tx: int = 0) -> dict:
+    return {"blockNumber": block, "transactionIndex": tx, "eventIndex": 0,
+            "transactionId": f"tx-{block}-{tx}", "chaincodeId": "asset", "eventName": name,
+            "payload": payload, "timestamp": "2025-11-30T00:00:00+00:00"}
+
+
+EVENTS = [
+    event(1, "AssetCreated", {"ID": "ORD-1", "Hash": "0xaa"}),
+    event(2, "AssetUpdated", {"ID": "ORD-1", "Hash": "0xbb"}),
+    event(2, "AssetCreated", {"ID": "RES-1", "Hash": "0xcc"}, tx=1),
+    event(3, "JournalBatchAnchored", {"ID": "JEB-default-1", "Hash": "0xdd", "FirstEntry": "JE-0",
+                                      "LastEntry": "JE-3", "Entries": 4}),
+]
+
+
+def projector(events: EventStore, root, registry=DocumentRegistry) -> Projector:
+    return Projector(events, root, [registry(), JournalAnchors(), ChainKpis()],
+                     snapshot_every=3)
+
+
+def state(projections: Projector) -> tuple:
+    return (projections["registry"].document_hashes(["ORD-1", "RES-1"]),
+            projections["registry"].height(), projections["journal"].entries, projections["kpis"].snapshot)
+
+
+def test_restarts_resume_from_the_snapshot(tmp_path):
+    events = EventStore(tmp_path / "events.db")
+    events.write_batch("default", EVENTS[:3])
+    first = projector(events, tmp_path / "snapshots")
+    assert first.load() == 3
+    assert [path.name for path in (tmp_path / "snapshots").iterdir()] == ["000000000002-000001-000000"]
+
+    events.write_batch("default", EVENTS[3:])
+    first.catch_up()
+    assert first["registry"].document_hashes(["ORD-1"]) == {"ORD-1": ("0xbb", 2)}
+    assert first["journal"].get("JEB-default-1").entries == 4
+    kpis = first["kpis"].snapshot
+    assert (kpis.events, kpis.transactions, kpis.height, kpis.journal_batches) == (4, 4, 3, 1)
+
+    # A new worker restores the snapshot and replays only the event after it.
+    second = projector(events, tmp_path / "snapshots")
+    assert second.load() == 1
+    assert state(second) == state(first)
+
+
+def test_snapshots_of_another_format_are_replayed_from_the_events(tmp_path, caplog):
+    events = EventStore(tmp_path / "events.db")
+    events.write_batch("default", EVENTS)
+    projector(events, tmp_path / "snapshots").load()
+    (tmp_path / "snapshots" / ".partial-abandoned").mkdir()
+
+    class NewRegistry(DocumentRegistry):
+        version = DocumentRegistry.version + 1
+
+    with caplog.at_level(logging.WARNING, logger="linaw.projections"):
+        replayed = projector(events, tmp_path / "snapshots", NewRegistry)
+        assert replayed.load() == len(EVENTS)
+    assert "Skipping unusable projection snapshot" in caplog.text
+    fresh = projector(events, tmp_path / "fresh")
+    fresh.load()
+    assert state(replayed) == state(fresh)
@@ -0,0 +1,40 @@
+from datetime import date
+
+from openpyxl import load_workbook
+
+from linaw.reports import ReportTask, document_period, generate_reports, periods, quarter_period
+
+
+def test_report_documents_cover_the_period_in_their_title():
+    assert document_period({"title": "Q3 2025 Financial Report", "date": "2025-10-05"}).label == "Q3 2025"
+    assert document_period({"title": "Statement for March 2025", "date": "2025-04-02"}).end == date(2025, 3, 31)
+    assert document_period({"title": "FY 2024 Annual Report", "date": "2025-01-31"}).months == 12
+    assert document_period({"title": "Barangay Assembly", "date": "2025-06-15"}).label == "June 2025"
+    assert [period.label for period in periods(2025)] == ["Q1 2025", "Q2 2025", "Q3 2025", "Q4 2025"]
+
+
+def budget_rows(path: str) -> list[dict]:
+    sheet = load_workbook(path, read_only=True)["Budget Utilization"]
+    header, *rows = sheet.iter_rows(min_row=4, values_only=True)
+    return [dict(zip(header, row)) for row in rows if row[0]]
+
+
+def test_packs_budget_against_each_tasks_ordinance(tmp_path):
+    period = quarter_period(2025, 4)
+    tasks = [ReportTask("Sample Barangay", "synthetic:2000:0:1", period),
+             ReportTask("New Barangay", "synthetic:2000:0:1", period, ordinance="")]
+    results = {result.organization: result
+               for result in generate_reports(tasks, tmp_path, workers=1, formats=["xlsx"])}
+
+    sample = results["Sample Barangay"]
+    assert sample.files == (str(tmp_path / "Sample-Barangay" / "Sample-Barangay-Q4-2025.xlsx"),)
+    assert sample.size > 0
+    budgeted = budget_rows(sample.files[0])
+    assert budgeted[0]["Item"] == "ALL FUNDS"
+    assert budgeted[0]["Appropriation"] > 0
+
+    # Without an ordinance the same spending shows, all of it unappropriated.
+    unbudgeted = budget_rows(results["New Barangay"].files[0])
+    assert unbudgeted[0]["Appropriation"] == 0
+    assert unbudgeted[0]["Obligations"] == budgeted[0]["Obligations"]
+    assert {row["Item"].strip() for row in unbudgeted if row["Item"].startswith("    ")} == {"Unappropriated"}
@@ -0,0 +1,34 @@
+import numpy as np
+
+from linaw.ledger import EXPENSE, REVENUE, Ledger
+from linaw.rollups import RollupCube
+
+
+def test_rollups_sum_categories_by_month_day_and_fund():
+    ledger = Ledger()
+    rollups = RollupCube(ledger)
+    assert rollups.latest_month() is None
+
+    ledger.post("OR-1", "2025-03-05", "Permit fees", [("1020", 3_000, 0), ("4020", 0, 3_000)])
+    ledger.post("OR-2", "2025-03-05", "Market fees", [("1020", 1_000, 0), ("4030", 0, 1_000)])
+    ledger.post("DV-1", "2025-03-18", "Supplies", [("5020", 800, 0), ("1020", 0, 800)], fund="SK Fund")
+    # Back-dated: the cubes grow towards earlier periods too.
+    ledger.post("OR-0", "2025-01-09", "Rental", [("1020", 500, 0), ("4040", 0, 500)])
+
+    assert rollups.months().tolist() == np.arange("2025-01", "2025-04", dtype="datetime64[M]").tolist()
+    monthly = rollups.monthly()
+    assert monthly[["Income", "Expenses", "Net"]].values.tolist() == [[500, 0, 500], [0, 0, 0],
+                                                                     [4_000, 800, 3_200]]
+    assert rollups.total(REVENUE, "2025-03", "2025-03", fund="General Fund") == 4_000
+    assert rollups.total(EXPENSE, "2025-03", "2025-03", fund="General Fund") == 0
+
+    income = rollups.by_category(REVENUE, "2025-03", "2025-03").set_index("Category")
+    assert income.loc["Business Permits"].tolist() == [3_000, 75.0]
+    assert income.loc["Market Fees"].tolist() == [1_000, 25.0]
+    assert income.loc["Rental Income"].tolist() == [0, 0.0]
+
+    daily = rollups.daily("2025-03", REVENUE)
+    # Days run to the last posting, not the end of the month.
+    assert len(daily) == 18
+    assert daily.set_index("Date").loc[np.datetime64("2025-03-05"), "Amount"] == 4_000
+    assert rollups.daily("2025-03", EXPENSE, category="Office Supplies")["Amount"].sum() == 800
@@ -0,0 +1,67 @@
+from datetime import date
+
+from linaw.search import SearchIndex
+
+DOCUMENTS = [
+    {"id": "FR-2025-034", "type": "Financial Report", "status": "Verified", "date": "2025-03-31",
+     "title": "Quarterly Financial Report", "details": "Q1 statements", "prepared_by": "Treasurer"},
+    {"id": "FR-2025-035", "type": "Financial Report", "status": "Pending", "date": "2025-04-30",
+     "title": "Monthly Collections", "details": "Market fees and permits", "prepared_by": "Treasurer"},
+    {"id": "DV-2025-101", "type": "Disbursement", "status": "Verified", "date": "2025-02-14",
+     "title": "COVID-19 Relief Distribution", "details": "Food packs", "prepared_by": "Secretary"},
+    {"id": "PR-2025-007", "type": "Procurement", "status": "Verified", "date": "2025-01-20",
+     "title": "Office Supplies Purchase", "details": "Bond paper and ink", "prepared_by": "Secretary"},
+]
+
+
+def ids(result) -> list[str]:
+    return [document["id"] for document in result.documents]
+
+
+def test_words_rank_title_matches_first():
+    index = SearchIndex(DOCUMENTS)
+    result = index.search("financial")
+    assert ids(result) == ["FR-2025-034"]
+    assert ids(index.search("treasurer")) == ["FR-2025-035", "FR-2025-034"]
+    assert index.search("treasurer bond").total == 0
+
+
+def test_last_word_matches_as_a_prefix():
+    index = SearchIndex(DOCUMENTS)
+    assert ids(index.search("office supp")) == ["PR-2025-007"]
+    assert ids(index.search("relief distr")) == ["DV-2025-101"]
+
+
+def test_document_ids_match_as_prefixes():
+    index = SearchIndex(DOCUMENTS)
+    assert ids(index.search("FR-2025-03")) == ["FR-2025-035", "FR-2025-034"]
+    assert ids(index.search("dv-2025-101")) == ["DV-2025-101"]
+
+
+def test_hyphenated_words_are_searched_as_words():
+    index = SearchIndex(DOCUMENTS)
+    assert ids(index.search("covid-19")) == ["DV-2025-101"]
+    assert ids(index.search("covid 19")) == ["DV-2025-101"]
+
+
+def test_facets_and_dates_filter_results():
+    index = SearchIndex(DOCUMENTS)
+    result = index.search(status="Verified", start=date(2025, 2, 1))
+    assert ids(result) == ["FR-2025-034", "DV-2025-101"]
+    assert result.facets["type"] == {"Financial Report": 1, "Disbursement": 1, "Procurement": 0}
+    assert index.count(doc_type="Financial Report") == 2
+
+
+def test_cursor_pages_cover_the_registry_once():
+    index = SearchIndex(DOCUMENTS[:2])
+    for document in DOCUMENTS[2:]:
+        index.add(document)
+    index.add(DOCUMENTS[0])
+    seen, cursor = [], None
+    while True:
+        page = index.query(cursor=cursor, limit=3)
+        seen += [document["id"] for document in page.documents]
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert seen == ["FR-2025-035", "FR-2025-034", "DV-2025-101", "PR-2025-007"]
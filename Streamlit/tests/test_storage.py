@@ -0,0 +1,60 @@
+import logging
+
+import pytest
+
+from linaw.ledger import Ledger
+from linaw.storage import ParquetStore, StoreError
+
+SOURCE = "sample"
+
+
+def post(ledger: Ledger, ref: str, amount: int) -> None:
+    ledger.post(ref, "2025-07-01", "Collection", [("1020", amount, 0), ("4020", 0, amount)])
+
+
+@pytest.fixture
+def books(tmp_path):
+    ledger = Ledger()
+    post(ledger, "OR-1", 100)
+    post(ledger, "OR-2", 200)
+    store = ParquetStore(tmp_path / "parquet")
+    store.attach(ledger, SOURCE)
+    store.detach()
+    return store, ledger
+
+
+def interrupt(store: ParquetStore, ledger: Ledger, lines: int) -> None:
+    """Write the next entry's first ``lines`` lines, as a write cut short before its manifest update."""
+    manifest = store.manifest()
+    post(ledger, "OR-3", 300)
+    store.append_lines(ledger, manifest["lines"], manifest["lines"] + lines)
+    store._update_manifest(lines=manifest["lines"], entries=manifest["entries"])
+
+
+def test_a_complete_write_is_adopted(books, caplog):
+    store, ledger = books
+    interrupt(store, ledger, 2)
+    with caplog.at_level(logging.WARNING, logger="linaw.storage"):
+        loaded = store.load_ledger(SOURCE)
+    assert len(loaded) == 6
+    assert loaded.je_refs == ["OR-1", "OR-2", "OR-3"]
+    assert (store.manifest()["lines"], store.manifest()["entries"]) == (6, 3)
+    assert "adopted 2 journal line(s)" in caplog.text
+
+
+def test_a_partial_write_is_set_aside(books):
+    store, ledger = books
+    interrupt(store, ledger, 1)
+    loaded = store.load_ledger(SOURCE)
+    assert len(loaded) == 4
+    assert loaded.je_refs == ["OR-1", "OR-2"]
+    assert [path.name for path in (store.root / "set-aside").iterdir()][0].endswith("-incomplete-write")
+    # The set-aside files are gone from the store, so the next load is clean.
+    assert len(store.load_ledger(SOURCE)) == 4
+
+
+def test_missing_lines_are_an_error(books):
+    store, _ = books
+    store._update_manifest(lines=6)
+    with pytest.raises(StoreError, match="missing"):
+        store.load_ledger(SOURCE)
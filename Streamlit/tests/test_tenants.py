@@ -0,0 +1,95 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import sqlite3
+
+import pytest
+
+from linaw.tenants import Tenant, TenantChannel, WorkspacePool
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINAW_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("FABCONNECT_URL", raising=False)
+    tenants = {id: Tenant(id=id, name=id.title()) for id in ("north", "south")}
+    return WorkspacePool(tenants, max_active=1)
+
+
+def post(ledger, ref: str) -> None:
+    ledger.post(ref, "2025-06-30", "Late collection", [("1010", 1_000, 0), ("4020", 0, 1_000)])
+
+
+def test_least_recently_used_workspace_is_evicted(pool):
+    north = pool.get("north")
+    assert pool.get("north") is north
+    pool.get("south")
+    assert len(pool) == 1
+    assert pool.get("north") is not north
+    with pytest.raises(KeyError):
+        pool.get("east")
+
+
+def test_evicted_workspace_releases_its_stores(pool):
+    old = pool.get("north")
+    ledger = old.ledger
+    old.anomalies, old.importer, old.outbox, old.anchor_log
+    lines = old.parquet_store.manifest()["lines"]
+    pool.get("south")
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        old.outbox.stats()
+    # Postings a lingering session makes to the evicted books no longer
+    # reach the Parquet tree the replacement reads.
+    post(ledger, "JE-LATE")
+    assert old.parquet_store.manifest()["lines"] == lines
+
+    new = pool.get("north")
+    assert len(new.ledger) == lines
+    post(new.ledger, "JE-NEW")
+    assert new.parquet_store.manifest()["lines"] == lines + 2
+
+
+def test_channel_logs_tasks_that_fail(pool, caplog):
+    channel = TenantChannel(pool.tenants["north"])
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def forever():
+        await asyncio.Event().wait()
+
+    with caplog.at_level(logging.ERROR, logger="linaw.tenants"):
+        channel.run(broken())
+        channel.run(forever())
+        concurrent.futures.wait(channel._tasks[:1], 5)
+        channel.close()
+    errors = [record for record in caplog.records if record.levelno == logging.ERROR]
+    assert len(errors) == 1
+    assert "broken for tenant north stopped" in errors[0].getMessage()
+    assert "boom" in caplog.text
+
+
+def test_each_tenant_budgets_against_its_own_ordinance(tmp_path, monkeypatch):
+    monkeypatch.setenv("LINAW_DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("FABCONNECT_URL", raising=False)
+    ordinance = tmp_path / "east.json"
+    ordinance.write_text(json.dumps({
+        "appropriations": [{"fund": "General Fund", "office": "Barangay Treasury",
+                            "account": "5020", "amount": 1_200_000}],
+        "releases": "annual",
+    }))
+    tenants = {
+        "east": Tenant(id="east", name="East", ordinance=str(ordinance)),
+        "west": Tenant(id="west", name="West", ordinance=""),
+    }
+    pool = WorkspacePool(tenants)
+
+    east = pool.get("east").budget_book
+    assert east.ordinance.appropriations[0].amount == 1_200_000
+    assert int(east.appropriated[0]) == 1_200_000
+
+    west = pool.get("west").budget_book
+    assert not west.ordinance.appropriations
+    assert int(west.appropriated[0]) == 0
@@ -0,0 +1,56 @@
+import hashlib
+
+import pyarrow as pa
+
+from linaw.projections import DocumentRegistry
+from linaw.verify import DocumentVerifier, canonical_payload, sha256_file
+
+
+def registry(anchored: dict[str, tuple[str, int]], height: int) -> DocumentRegistry:
+    registry = DocumentRegistry()
+    registry.restore(pa.table({
+        "document_id": list(anchored),
+        "hash": [hash for hash, _ in anchored.values()],
+        "block_number": pa.array([block for _, block in anchored.values()], pa.int64()),
+        "tx_id": [f"tx-{block}" for _, block in anchored.values()],
+    }, metadata={"height": str(height)}))
+    return registry
+
+
+def record(document_id: str, amount: int) -> dict:
+    document = {"id": document_id, "title": "Annual Budget", "date": "2025-01-15", "amount": amount}
+    return {**document, "hash": "0x" + hashlib.sha256(canonical_payload(document)).hexdigest(),
+            "status": "Published"}
+
+
+def test_records_are_checked_against_their_published_and_anchored_hashes():
+    budget, resolution = record("ORD-1", 1_000), record("RES-1", 50)
+    verifier = DocumentVerifier(registry({"ORD-1": (budget["hash"].upper(), 4)}, height=9))
+
+    tampered = {**budget, "amount": 2_000}
+    results = verifier.verify_many([budget, resolution])
+    assert (results["ORD-1"].document_verified, results["ORD-1"].hash_confirmed) == (True, True)
+    assert (results["ORD-1"].block_number, results["ORD-1"].blockchain_synced) == (4, True)
+    assert (results["RES-1"].document_verified, results["RES-1"].on_chain_hash) == (True, None)
+    assert not results["RES-1"].hash_confirmed
+
+    changed = verifier.verify_many([tampered])["ORD-1"]
+    assert not changed.document_verified and not changed.hash_confirmed
+    # At the same height and content the earlier result is served again.
+    assert verifier.verify_many([budget])["ORD-1"] is results["ORD-1"]
+
+
+def test_attachments_are_hashed_in_windows(tmp_path):
+    content = bytes(range(256)) * 5_000
+    path = tmp_path / "report.pdf"
+    path.write_bytes(content)
+    assert sha256_file(path, chunk_size=4096) == hashlib.sha256(content).hexdigest()
+    empty = tmp_path / "empty.pdf"
+    empty.touch()
+    assert sha256_file(empty) == hashlib.sha256(b"").hexdigest()
+
+    verifier = DocumentVerifier(registry({}, height=0))
+    document = {"id": "FR-1", "file": str(path), "hash": hashlib.sha256(content).hexdigest()}
+    assert verifier.verify_many([document])["FR-1"].document_verified
+    path.write_bytes(content + b"appended")
+    assert not verifier.verify_many([document])["FR-1"].document_verified
@@ -24,6 +24,21 @@ type Asset struct {
 	Size           int    `json:"Size"`
 }
 
+// JournalAnchor commits a batch of journal entries to the ledger by the
+// Merkle root (Hash) of the entries' hashes; the entries stay off chain.
+// Fields are in alphabetic order, like Asset's.  Anchors are stored under
+// composite keys of type journalAnchorType, which the open-ended range
+// query in GetAllAssets does not return.
+type JournalAnchor struct {
+	Entries    int    `json:"Entries"`
+	FirstEntry string `json:"FirstEntry"`
+	Hash       string `json:"Hash"`
+	ID         string `json:"ID"`
+	LastEntry  string `json:"LastEntry"`
+}
+
+const journalAnchorType = "JournalAnchor"
+
 var logger = flogging.MustGetLogger("asset-transfer")
 
 // CreateAsset issues a new asset to the world state with given details.
@@ -50,11 +65,52 @@ func (s *SmartContract) CreateAsset(ctx contractapi.TransactionContextInterface,
 
 	logger.Infof("Asset create: %+v", string(assetJSON))
 
-	ctx.GetStub().SetEvent("AssetCreated", assetJSON)
+	err = ctx.GetStub().SetEvent("AssetCreated", assetJSON)
+	if err != nil {
+		return fmt.Errorf("failed to set event for asset %s: %v", id, err)
+	}
 
 	return ctx.GetStub().PutState(id, assetJSON)
 }
 
+// AnchorJournalBatch records the Merkle root of a batch of journal entries.
+// One transaction anchors the whole batch, so posting is not bound by the
+// network's transactions per second.
+func (s *SmartContract) AnchorJournalBatch(ctx contractapi.TransactionContextInterface, id string, hash string, firstEntry string, lastEntry string, entries int) error {
+	key, err := ctx.GetStub().CreateCompositeKey(journalAnchorType, []string{id})
+	if err != nil {
+		return fmt.Errorf("failed to create the key for journal batch %s: %v", id, err)
+	}
+	exists, err := s.assetExists(ctx, key)
+	if err != nil {
+		return err
+	}
+	if exists {
+		return fmt.Errorf("the journal batch %s is already anchored", id)
+	}
+
+	anchor := JournalAnchor{
+		ID:         id,
+		Hash:       hash,
+		FirstEntry: firstEntry,
+		LastEntry:  lastEntry,
+		Entries:    entries,
+	}
+	anchorJSON, err := json.Marshal(anchor)
+	if err != nil {
+		return err
+	}
+
+	logger.Infof("Journal batch anchored: %+v", string(anchorJSON))
+
+	err = ctx.GetStub().SetEvent("JournalBatchAnchored", anchorJSON)
+	if err != nil {
+		return fmt.Errorf("failed to set event for journal batch %s: %v", id, err)
+	}
+
+	return ctx.GetStub().PutState(key, anchorJSON)
+}
+
 // GetAllAssets returns all assets found in world state
 func (s *SmartContract) GetAllAssets(ctx contractapi.TransactionContextInterface) ([]*Asset, error) {
 	// range query with empty string for startKey and endKey does an